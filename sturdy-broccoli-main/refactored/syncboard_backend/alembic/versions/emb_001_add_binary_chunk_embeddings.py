@@ -0,0 +1,64 @@
+"""Add packed binary chunk embeddings
+
+Revision ID: emb_001
+Revises: saved_ideas_001
+Create Date: 2026-10-16
+
+Adds:
+- document_chunks.embedding_blob: float32/float16/int8 packed embedding
+  (see backend/embedding_codec.py), replacing the JSON embedding array
+
+Changes:
+- document_chunks.embedding: chunks stored without an embedding hold the
+  JSON literal 'null'; they become SQL NULL, so "has an embedding" is an
+  IS NOT NULL check
+
+Existing JSON embeddings keep working and are converted online, in
+batches, by the backend.tasks.convert_chunk_embeddings_task Celery task.
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = 'emb_001'
+down_revision = 'saved_ideas_001'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.add_column('document_chunks', sa.Column('embedding_blob', sa.LargeBinary(), nullable=True))
+    op.execute(
+        "UPDATE document_chunks SET embedding = NULL "
+        "WHERE embedding IS NOT NULL AND CAST(embedding AS TEXT) = 'null'"
+    )
+
+
+def downgrade():
+    # Move binary embeddings back into the JSON column before dropping it
+    from embedding_codec import decode_embedding
+
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(text(
+            "SELECT id, embedding_blob FROM document_chunks "
+            "WHERE embedding_blob IS NOT NULL AND id > :last_id ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            text("UPDATE document_chunks SET embedding = :embedding WHERE id = :id"),
+            [
+                {"id": row_id, "embedding": json.dumps(decode_embedding(bytes(blob)).tolist())}
+                for row_id, blob in rows
+            ]
+        )
+        last_id = rows[-1][0]
+
+    op.drop_column('document_chunks', 'embedding_blob')
@@ -10,8 +10,7 @@ Supports two retrieval modes:
 import logging
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-from openai import AsyncOpenAI
-from .config import settings
+from .openai_clients import get_async_openai
 
 logger = logging.getLogger(__name__)
 
@@ -37,9 +36,6 @@ MODELS = {
     "gpt-5-nano": "gpt-5-nano",
 }
 
-# Initialize OpenAI client
-client = AsyncOpenAI(api_key=settings.openai_api_key)
-
 
 async def generate_with_rag(
     prompt: str,
@@ -180,7 +176,7 @@ Please answer this question: {prompt}"""
 
         # GPT-5 models use different parameters
         if selected_model.startswith("gpt-5"):
-            response = await client.chat.completions.create(
+            response = await get_async_openai().chat.completions.create(
                 model=selected_model,
                 messages=[
                     {"role": "system", "content": system_message},
@@ -189,7 +185,7 @@ Please answer this question: {prompt}"""
                 max_completion_tokens=16000
             )
         else:
-            response = await client.chat.completions.create(
+            response = await get_async_openai().chat.completions.create(
                 model=selected_model,
                 messages=[
                     {"role": "system", "content": system_message},
@@ -321,7 +317,7 @@ Please answer this question: {prompt}"""
         logger.info(f"Using model: {selected_model} for chunk-based RAG")
 
         if selected_model.startswith("gpt-5"):
-            response = await client.chat.completions.create(
+            response = await get_async_openai().chat.completions.create(
                 model=selected_model,
                 messages=[
                     {"role": "system", "content": system_message},
@@ -330,7 +326,7 @@ Please answer this question: {prompt}"""
                 max_completion_tokens=16000
             )
         else:
-            response = await client.chat.completions.create(
+            response = await get_async_openai().chat.completions.create(
                 model=selected_model,
                 messages=[
                     {"role": "system", "content": system_message},
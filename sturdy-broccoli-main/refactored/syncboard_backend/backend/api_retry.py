@@ -0,0 +1,94 @@
+"""
+Concurrency limits and retry helpers for OpenAI API calls.
+
+Shared by the embedding and summarization services:
+- RequestLimiter bounds in-flight requests, pauses them all after a 429
+  and stops new ones after an error that every request would hit
+- retry_after() reads Retry-After hints from API errors
+- is_retryable() / backoff_delay() decide whether and how long to wait
+- is_bad_request() tells rejected input apart from auth or configuration errors
+"""
+
+import asyncio
+import random
+import time
+from typing import Optional
+
+try:
+    from openai import APIConnectionError, APITimeoutError
+    TRANSIENT_ERRORS = (asyncio.TimeoutError, APIConnectionError, APITimeoutError)
+except ImportError:
+    TRANSIENT_ERRORS = (asyncio.TimeoutError,)
+
+
+class RequestLimiter:
+    """
+    Bounds in-flight API requests and pauses them all after a 429.
+
+    Create one per event loop: its semaphore belongs to the loop that first
+    waits on it.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._paused_until = 0.0
+        self._error: Optional[Exception] = None
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def abort(self, error: Exception) -> None:
+        """Fail every request that has not started yet with ``error``."""
+        self._error = error
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        # Respect a rate-limit pause that started while we were queued
+        delay = self._paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._paused_until - time.monotonic()
+        if self._error is not None:
+            self._semaphore.release()
+            raise self._error
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait according to an API error's Retry-After headers, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits, timeouts, 5xx and connection errors."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        # Without a status code only network failures are transient, not programming errors
+        return isinstance(error, TRANSIENT_ERRORS)
+    return status in (408, 409, 429) or status >= 500
+
+
+def is_bad_request(error: Exception) -> bool:
+    """True if the API rejected the request's input (400, 422)."""
+    return getattr(error, "status_code", None) in (400, 422)
+
+
+def backoff_delay(error: Exception, attempt: int, base: float, cap: float) -> float:
+    """Retry-After if the server sent one, else jittered exponential backoff, capped."""
+    delay = retry_after(error)
+    if delay is None:
+        delay = base * (2 ** attempt) * random.uniform(0.5, 1.0)
+    return min(delay, cap)
@@ -3,6 +3,7 @@ Redis-based caching layer for SyncBoard 3.0 Knowledge Bank.
 
 Provides intelligent caching for expensive operations:
 - Concept extraction results (AI API calls)
+- Embeddings, keyed by model and content hash
 - Content similarity checks
 - Computed analytics
 
@@ -10,12 +11,14 @@ Improvement #5: Save 20-40% on API costs by caching repeated/similar content.
 """
 
 import json
+import base64
 import hashlib
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import timedelta
 
 from .config import settings
+from .embedding_codec import encode_embedding, decode_embedding
 
 logger = logging.getLogger(__name__)
 
@@ -204,12 +207,14 @@ def get_cache_stats() -> Dict[str, Any]:
         # Count keys by prefix
         concept_keys = len(redis.keys("concept_extraction:*"))
         similarity_keys = len(redis.keys("similarity:*"))
+        embedding_keys = len(redis.keys("embedding:*"))
 
         return {
             "status": "connected",
             "total_keys": redis.dbsize(),
             "concept_extraction_keys": concept_keys,
             "similarity_keys": similarity_keys,
+            "embedding_keys": embedding_keys,
             "memory_used_mb": round(memory.get("used_memory", 0) / (1024 * 1024), 2),
             "hits": info.get("keyspace_hits", 0),
             "misses": info.get("keyspace_misses", 0),
@@ -285,6 +290,75 @@ def cache_concepts(
     return set_cached_result(key, result, ttl_seconds)
 
 
+# =============================================================================
+# Embedding Cache
+# =============================================================================
+
+def embedding_content_hash(text: str) -> str:
+    """Content address of a text for embedding caching (exact text, not normalized)."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _embedding_key(model: str, content_hash: str) -> str:
+    return f"embedding:{model}:{content_hash}"
+
+
+def get_cached_embeddings(model: str, content_hashes: List[str]) -> Dict[str, List[float]]:
+    """
+    Look up many embeddings in one round trip.
+
+    Args:
+        model: Embedding model name
+        content_hashes: Hashes from embedding_content_hash()
+
+    Returns:
+        Dict of content hash -> embedding for the hashes found
+    """
+    redis = get_redis_client()
+    if redis is None or not content_hashes:
+        return {}
+
+    try:
+        values = redis.mget([_embedding_key(model, h) for h in content_hashes])
+        return {
+            content_hash: decode_embedding(base64.b64decode(value)).tolist()
+            for content_hash, value in zip(content_hashes, values)
+            if value
+        }
+    except Exception as e:
+        logger.warning(f"Embedding cache read error: {e}")
+        return {}
+
+
+def cache_embeddings(model: str, embeddings: Dict[str, List[float]], ttl_days: int = 30) -> bool:
+    """
+    Store embeddings (packed float32, base64) in one pipelined round trip.
+
+    Args:
+        model: Embedding model name
+        embeddings: Dict of content hash -> embedding
+        ttl_days: Time-to-live in days (default: 30 days)
+
+    Returns:
+        True if cached successfully
+    """
+    redis = get_redis_client()
+    if redis is None or not embeddings:
+        return False
+
+    try:
+        ttl_seconds = ttl_days * 24 * 60 * 60
+        pipe = redis.pipeline(transaction=False)
+        for content_hash, embedding in embeddings.items():
+            blob = base64.b64encode(encode_embedding(embedding, "float32")).decode("ascii")
+            pipe.setex(_embedding_key(model, content_hash), ttl_seconds, blob)
+        pipe.execute()
+        return True
+    except Exception as e:
+        logger.warning(f"Embedding cache write error: {e}")
+        return False
+
+
 # =============================================================================
 # Content Similarity Cache
 # =============================================================================
@@ -0,0 +1,106 @@
+"""
+Delta-based cache synchronization for SyncBoard 3.0 Knowledge Bank.
+
+Writers publish structured deltas with redis_client.notify_data_changed().
+Every process that keeps the in-memory cache (API server, Celery workers)
+owns a CacheSynchronizer that:
+- Applies only the documents, clusters or KBs named in each delta
+- Queues the named documents for incremental knowledge graph updates
+- Tracks the last applied version
+- Replays missed deltas from the Redis change log when it sees a gap
+- Falls back to a full reload only when the gap cannot be replayed
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+from .models import DocumentMetadata, Cluster
+from .vector_store import VectorStore
+from .db_storage_adapter import apply_data_change
+from .knowledge_graph_service import apply_graph_change
+from .redis_client import parse_data_change, get_data_version, get_data_changes_since
+
+logger = logging.getLogger(__name__)
+
+
+class CacheSynchronizer:
+    """Keeps one process's in-memory cache in step with published data deltas."""
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        documents: Dict[str, Dict[int, str]],
+        metadata: Dict[str, Dict[int, DocumentMetadata]],
+        clusters: Dict[str, Dict[int, Cluster]],
+        full_reload: Callable[[], None]
+    ):
+        """
+        Initialize synchronizer.
+
+        Args:
+            vector_store: Process-wide VectorStore
+            documents: Process-wide documents dict (nested by kb_id)
+            metadata: Process-wide metadata dict (nested by kb_id)
+            clusters: Process-wide clusters dict (nested by kb_id)
+            full_reload: Callable that reloads the whole cache from the database
+        """
+        self.vector_store = vector_store
+        self.documents = documents
+        self.metadata = metadata
+        self.clusters = clusters
+        self._full_reload = full_reload
+        self.version = 0
+        self._lock = threading.RLock()
+
+    def full_resync(self) -> None:
+        """Reload everything from the database and adopt the current version."""
+        with self._lock:
+            # Read the version first: changes published during the reload are
+            # replayed afterwards, which is harmless because deltas are idempotent.
+            version = get_data_version()
+            self._full_reload()
+            apply_graph_change(None)
+            self.version = version
+
+    def handle_message(self, raw: Any) -> None:
+        """Apply a message received on the data_changed channel."""
+        change = parse_data_change(raw)
+        with self._lock:
+            if change is None:
+                logger.info("📨 Received legacy data_changed notification, full resync")
+                self.full_resync()
+            elif change["version"] <= self.version:
+                logger.debug(f"Skipping already-applied data change v{change['version']}")
+            elif change["version"] == self.version + 1:
+                self._apply([change])
+            else:
+                logger.info(f"📨 Data version gap ({self.version} → {change['version']}), catching up")
+                self.catch_up()
+
+    def catch_up(self) -> None:
+        """Apply every change published since the last applied version."""
+        with self._lock:
+            changes = get_data_changes_since(self.version)
+            if changes is None:
+                logger.info(f"Change log cannot cover gap from v{self.version}, full resync")
+                self.full_resync()
+                return
+            self._apply(changes)
+
+    def _apply(self, changes: List[dict]) -> None:
+        for change in changes:
+            if change["version"] <= self.version:
+                continue
+            if change["entity"] == "all":
+                self.full_resync()
+                continue
+            try:
+                apply_data_change(change, self.vector_store, self.documents, self.metadata, self.clusters)
+            except Exception as e:
+                logger.error(f"Failed to apply data change v{change['version']}: {e}, full resync", exc_info=True)
+                self.full_resync()
+                return
+            apply_graph_change(change)
+            self.version = change["version"]
+            logger.debug(f"Applied data change v{self.version}: {change['entity']} {change['action']} {change['ids']}")
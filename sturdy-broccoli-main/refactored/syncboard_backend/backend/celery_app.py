@@ -102,6 +102,7 @@ celery_app.conf.task_routes = {
     "backend.tasks.import_github_files_task": {"queue": "uploads"},  # Phase 5: GitHub import
     "backend.tasks.find_duplicates_background": {"queue": "analysis"},
     "backend.tasks.generate_build_suggestions": {"queue": "analysis"},
+    "backend.tasks.recluster_knowledge_base_task": {"queue": "analysis"},
 }
 
 # =============================================================================
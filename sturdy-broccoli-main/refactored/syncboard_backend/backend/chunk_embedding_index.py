@@ -0,0 +1,295 @@
+"""
+Cached chunk embedding matrices for SyncBoard 3.0.
+
+search_chunks_by_embedding used to load every chunk of a knowledge base as
+ORM objects and score them one at a time. Instead each knowledge base gets
+a ChunkEmbeddingIndex:
+- A contiguous float32 matrix of L2-normalised chunk embeddings, so a
+  query is one matrix-vector product plus an argpartition top-k
+- Loaded once per process, then kept current incrementally: only chunks
+  added since the last check are read, deletions become tombstones
+- Invalidated per document when the chunking pipeline rewrites that
+  document's chunks; other processes' writes are picked up by a cheap
+  (count, max id) watermark check
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .db_models import DBDocumentChunk
+from .embedding_codec import decode_chunk_embedding
+from .constants import (
+    CHUNK_INDEX_SYNC_INTERVAL_SECONDS,
+    DB_BULK_LOAD_BATCH_SIZE,
+    VECTOR_COMPACTION_RATIO,
+)
+from .watermark_index import EngineRegistry, WatermarkIndex
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise rows in place (zero rows stay zero) and return the matrix."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the ``top_k`` highest scores, best first, via argpartition."""
+    if top_k <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if len(scores) > top_k:
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best.sort()
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class ChunkEmbeddingIndex(WatermarkIndex):
+    """Normalised embedding matrix for the chunks of one knowledge base."""
+
+    def __init__(self, kb_id: str, sync_interval: float = CHUNK_INDEX_SYNC_INTERVAL_SECONDS):
+        """
+        Initialize an empty, not-yet-loaded index.
+
+        Args:
+            kb_id: Knowledge base the index covers
+            sync_interval: Minimum seconds between watermark checks
+        """
+        super().__init__(sync_interval)
+        self.kb_id = kb_id
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._chunk_ids = np.zeros(0, dtype=np.int64)
+        self._document_ids = np.zeros(0, dtype=np.int64)
+        self._live = np.zeros(0, dtype=bool)
+        self._n_rows = 0
+        self._n_dead = 0
+        self._row_of: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def dim(self) -> int:
+        return self._matrix.shape[1]
+
+    # -------------------------------------------------------------------------
+    # Synchronization
+    # -------------------------------------------------------------------------
+
+    def invalidate_document(self, document_id: int) -> None:
+        """Drop a document's chunks now and re-read them on the next search."""
+        with self._lock:
+            rows = np.flatnonzero(self._live[:self._n_rows] & (self._document_ids[:self._n_rows] == document_id))
+            for row in rows:
+                self._tombstone(int(row))
+            self._dirty = True
+
+    def _rows(self, db: Session, *criteria) -> Iterable[Tuple[int, int, np.ndarray]]:
+        """Yield (chunk_id, document_id, embedding) for this KB's embedded chunks."""
+        query = db.query(
+            DBDocumentChunk.id, DBDocumentChunk.document_id,
+            DBDocumentChunk.embedding, DBDocumentChunk.embedding_blob
+        ).filter(
+            DBDocumentChunk.knowledge_base_id == self.kb_id,
+            DBDocumentChunk.has_embedding,
+            *criteria
+        ).order_by(DBDocumentChunk.id).yield_per(DB_BULK_LOAD_BATCH_SIZE)
+        for chunk_id, document_id, embedding, embedding_blob in query:
+            yield chunk_id, document_id, decode_chunk_embedding(embedding, embedding_blob)
+
+    def _watermark(self, db: Session) -> Tuple[int, int]:
+        row_count, max_chunk_id = db.query(
+            func.count(DBDocumentChunk.id), func.max(DBDocumentChunk.id)
+        ).filter(
+            DBDocumentChunk.knowledge_base_id == self.kb_id,
+            DBDocumentChunk.has_embedding
+        ).one()
+        return row_count, max_chunk_id or 0
+
+    def _load_rows(self, db: Session) -> None:
+        self._append(self._rows(db))
+        logger.info(f"Loaded {len(self)} chunk embeddings for KB {self.kb_id}")
+
+    def _add_rows_after(self, db: Session, row_id: int) -> None:
+        self._append(self._rows(db, DBDocumentChunk.id > row_id))
+
+    def _reconcile(self, db: Session) -> None:
+        # Also picks up embeddings filled in on older rows
+        db_ids = {
+            chunk_id for (chunk_id,) in db.query(DBDocumentChunk.id).filter(
+                DBDocumentChunk.knowledge_base_id == self.kb_id,
+                DBDocumentChunk.has_embedding
+            )
+        }
+        for chunk_id in set(self._row_of) - db_ids:
+            self._tombstone(self._row_of[chunk_id])
+        missing = db_ids - set(self._row_of)
+        if missing:
+            self._append(self._rows(db, DBDocumentChunk.id.in_(missing)))
+
+    def _after_sync(self) -> None:
+        self._maybe_compact()
+
+    # -------------------------------------------------------------------------
+    # Row storage
+    # -------------------------------------------------------------------------
+
+    def _append(self, rows: Iterable[Tuple[int, int, np.ndarray]]) -> None:
+        """Append (chunk_id, document_id, embedding) rows, replacing existing chunk ids."""
+        chunk_ids, document_ids, vectors = [], [], []
+        for chunk_id, document_id, embedding in rows:
+            if embedding is None or not len(embedding):
+                continue
+            if chunk_id in self._row_of:
+                self._tombstone(self._row_of[chunk_id])
+            chunk_ids.append(chunk_id)
+            document_ids.append(document_id)
+            vectors.append(embedding)
+        if not vectors:
+            return
+
+        dim = self.dim or len(vectors[0])
+        keep = [i for i, v in enumerate(vectors) if len(v) == dim]
+        if len(keep) != len(vectors):
+            logger.warning(
+                f"Skipping {len(vectors) - len(keep)} chunk embeddings in KB {self.kb_id} "
+                f"whose dimension differs from {dim}"
+            )
+        if not keep:
+            return
+        block = normalize_rows(np.stack([vectors[i] for i in keep]).astype(np.float32))
+
+        start, end = self._n_rows, self._n_rows + len(keep)
+        if end > len(self._matrix):
+            capacity = max(end, 2 * len(self._matrix), 1024)
+            self._matrix = self._grow(self._matrix, (capacity, dim))
+            self._chunk_ids = self._grow(self._chunk_ids, (capacity,))
+            self._document_ids = self._grow(self._document_ids, (capacity,))
+            self._live = self._grow(self._live, (capacity,))
+        self._matrix[start:end] = block
+        self._chunk_ids[start:end] = [chunk_ids[i] for i in keep]
+        self._document_ids[start:end] = [document_ids[i] for i in keep]
+        self._live[start:end] = True
+        for offset, i in enumerate(keep):
+            self._row_of[chunk_ids[i]] = start + offset
+        self._n_rows = end
+
+    @staticmethod
+    def _grow(array: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        grown = np.zeros(shape, dtype=array.dtype)
+        if len(array):
+            grown[:len(array)] = array
+        return grown
+
+    def _tombstone(self, row: int) -> None:
+        if not self._live[row]:
+            return
+        self._live[row] = False
+        del self._row_of[int(self._chunk_ids[row])]
+        self._n_dead += 1
+
+    def _maybe_compact(self) -> None:
+        if not self._n_rows or self._n_dead <= VECTOR_COMPACTION_RATIO * self._n_rows:
+            return
+        keep = np.flatnonzero(self._live[:self._n_rows])
+        self._matrix = np.ascontiguousarray(self._matrix[keep])
+        self._chunk_ids = self._chunk_ids[keep]
+        self._document_ids = self._document_ids[keep]
+        self._live = np.ones(len(keep), dtype=bool)
+        self._row_of = {int(chunk_id): row for row, chunk_id in enumerate(self._chunk_ids)}
+        self._n_rows = len(keep)
+        self._n_dead = 0
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def search(
+        self,
+        db: Session,
+        query_embedding: List[float],
+        top_k: int = 20,
+        min_similarity: float = 0.0
+    ) -> List[Tuple[int, int, float]]:
+        """
+        Find the chunks most similar to a query embedding.
+
+        Args:
+            db: Database session (used only when the index needs syncing)
+            query_embedding: Query vector
+            top_k: Number of results
+            min_similarity: Minimum cosine similarity
+
+        Returns:
+            List of (chunk_id, document_id, similarity), best first
+        """
+        with self._lock:
+            self.sync(db)
+            if not len(self) or len(query_embedding) != self.dim:
+                return []
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return []
+
+            n = self._n_rows
+            scores = self._matrix[:n] @ (query / norm)
+            candidates = np.flatnonzero(self._live[:n] & (scores >= min_similarity))
+            best = candidates[top_k_indices(scores[candidates], top_k)]
+            return [
+                (int(self._chunk_ids[row]), int(self._document_ids[row]), float(scores[row]))
+                for row in best
+            ]
+
+    def document_embeddings(
+        self,
+        db: Session,
+        document_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, np.ndarray]:
+        """
+        Mean chunk embedding of each document, L2-normalised.
+
+        Args:
+            db: Database session (used only when the index needs syncing)
+            document_ids: Only these documents (documents.id); default all
+
+        Returns:
+            Dict of documents.id -> embedding, for documents with embedded chunks
+        """
+        with self._lock:
+            self.sync(db)
+            rows = np.flatnonzero(self._live[:self._n_rows])
+            if document_ids is not None:
+                wanted = np.fromiter(document_ids, dtype=np.int64)
+                rows = rows[np.isin(self._document_ids[rows], wanted)]
+            if not len(rows):
+                return {}
+            owners = self._document_ids[rows]
+            order = np.argsort(owners, kind="stable")
+            rows, owners = rows[order], owners[order]
+            starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            sums = np.add.reduceat(self._matrix[rows], starts, axis=0)
+        return dict(zip(owners[starts].tolist(), normalize_rows(sums)))
+
+
+# One index per (engine, knowledge base); throwaway test engines get their own
+_indexes = EngineRegistry()
+
+
+def get_chunk_index(db: Session, kb_id: str) -> ChunkEmbeddingIndex:
+    """Get the process-wide chunk embedding index for a knowledge base."""
+    return _indexes.get(db, lambda: ChunkEmbeddingIndex(kb_id), kb_id)
+
+
+def invalidate_document_chunks(db: Session, kb_id: Optional[str], document_id: int) -> None:
+    """Invalidate a document's cached chunk embeddings after its chunks are rewritten."""
+    index = _indexes.peek(db, kb_id)
+    if index is not None:
+        index.invalidate_document(document_id)
@@ -0,0 +1,197 @@
+"""
+Cached BM25 chunk indexes for SyncBoard 3.0.
+
+HybridSearcher used to fit a TF-IDF vectorizer over every chunk of a
+knowledge base on each RAG request. Instead each knowledge base gets a
+ChunkLexicalIndex:
+- An inverted index (term -> chunk -> term frequency) scored with BM25, so
+  a query only touches the postings of its own terms
+- IDF comes from live document frequencies at query time, so adding or
+  removing chunks never requires a refit
+- Kept current the same way as ChunkEmbeddingIndex: loaded once per
+  process, invalidated per document when the chunking pipeline rewrites
+  that document's chunks, and synced by a (count, max id) watermark
+"""
+
+import heapq
+import logging
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sklearn.feature_extraction.text import CountVectorizer
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .db_models import DBDocumentChunk
+from .constants import (
+    DB_BULK_LOAD_BATCH_SIZE,
+    LEXICAL_BM25_B,
+    LEXICAL_BM25_K1,
+    LEXICAL_INDEX_SYNC_INTERVAL_SECONDS,
+)
+from .watermark_index import EngineRegistry, WatermarkIndex
+
+logger = logging.getLogger(__name__)
+
+# Same analysis as the per-request TF-IDF index this replaces
+_analyze = CountVectorizer(ngram_range=(1, 2), stop_words='english').build_analyzer()
+
+
+class ChunkLexicalIndex(WatermarkIndex):
+    """BM25 inverted index over the chunk texts of one knowledge base."""
+
+    def __init__(self, kb_id: str, sync_interval: float = LEXICAL_INDEX_SYNC_INTERVAL_SECONDS):
+        """
+        Initialize an empty, not-yet-loaded index.
+
+        Args:
+            kb_id: Knowledge base the index covers
+            sync_interval: Minimum seconds between watermark checks
+        """
+        super().__init__(sync_interval)
+        self.kb_id = kb_id
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms_of: Dict[int, Dict[str, int]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._document_of: Dict[int, int] = {}
+        self._chunks_of: Dict[int, Set[int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    # -------------------------------------------------------------------------
+    # Synchronization
+    # -------------------------------------------------------------------------
+
+    def invalidate_document(self, document_id: int) -> None:
+        """Drop a document's chunks now and re-read them on the next search."""
+        with self._lock:
+            for chunk_id in list(self._chunks_of.get(document_id, ())):
+                self._remove(chunk_id)
+            self._dirty = True
+
+    def _rows(self, db: Session, *criteria) -> Iterable[Tuple[int, int, str]]:
+        """Yield (chunk_id, document_id, content) for this KB's chunks."""
+        return db.query(
+            DBDocumentChunk.id, DBDocumentChunk.document_id, DBDocumentChunk.content
+        ).filter(
+            DBDocumentChunk.knowledge_base_id == self.kb_id,
+            *criteria
+        ).order_by(DBDocumentChunk.id).yield_per(DB_BULK_LOAD_BATCH_SIZE)
+
+    def _watermark(self, db: Session) -> Tuple[int, int]:
+        row_count, max_chunk_id = db.query(
+            func.count(DBDocumentChunk.id), func.max(DBDocumentChunk.id)
+        ).filter(DBDocumentChunk.knowledge_base_id == self.kb_id).one()
+        return row_count, max_chunk_id or 0
+
+    def _load_rows(self, db: Session) -> None:
+        self._add_rows(self._rows(db))
+        logger.info(f"Loaded lexical index of {len(self)} chunks for KB {self.kb_id}")
+
+    def _add_rows_after(self, db: Session, row_id: int) -> None:
+        self._add_rows(self._rows(db, DBDocumentChunk.id > row_id))
+
+    def _reconcile(self, db: Session) -> None:
+        db_ids = {
+            chunk_id for (chunk_id,) in db.query(DBDocumentChunk.id).filter(
+                DBDocumentChunk.knowledge_base_id == self.kb_id
+            )
+        }
+        for chunk_id in set(self._lengths) - db_ids:
+            self._remove(chunk_id)
+        missing = db_ids - set(self._lengths)
+        if missing:
+            self._add_rows(self._rows(db, DBDocumentChunk.id.in_(missing)))
+
+    # -------------------------------------------------------------------------
+    # Postings
+    # -------------------------------------------------------------------------
+
+    def _add_rows(self, rows: Iterable[Tuple[int, int, str]]) -> None:
+        for chunk_id, document_id, content in rows:
+            self._add(chunk_id, document_id, content or "")
+
+    def _add(self, chunk_id: int, document_id: int, content: str) -> None:
+        """Index one chunk, replacing any previous version of it."""
+        if chunk_id in self._lengths:
+            self._remove(chunk_id)
+        terms = Counter(_analyze(content))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[chunk_id] = tf
+        length = sum(terms.values())
+        self._terms_of[chunk_id] = dict(terms)
+        self._lengths[chunk_id] = length
+        self._total_length += length
+        self._document_of[chunk_id] = document_id
+        self._chunks_of.setdefault(document_id, set()).add(chunk_id)
+
+    def _remove(self, chunk_id: int) -> None:
+        for term in self._terms_of.pop(chunk_id, {}):
+            postings = self._postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id, 0)
+        document_id = self._document_of.pop(chunk_id, None)
+        chunks = self._chunks_of.get(document_id)
+        if chunks is not None:
+            chunks.discard(chunk_id)
+            if not chunks:
+                del self._chunks_of[document_id]
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def search(self, db: Session, query: str, top_k: int = 50) -> List[Tuple[int, int, float]]:
+        """
+        Find the chunks that best match a query's terms.
+
+        Args:
+            db: Database session (used only when the index needs syncing)
+            query: Query text
+            top_k: Number of results
+
+        Returns:
+            List of (chunk_id, document_id, BM25 score), best first; only
+            chunks sharing at least one term with the query
+        """
+        with self._lock:
+            self.sync(db)
+            n_chunks = len(self)
+            if not n_chunks:
+                return []
+            avg_length = self._total_length / n_chunks or 1.0
+
+            scores: Dict[int, float] = {}
+            for term in set(_analyze(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = LEXICAL_BM25_K1 * (1 - LEXICAL_BM25_B + LEXICAL_BM25_B * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (LEXICAL_BM25_K1 + 1) / (tf + norm)
+
+            best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            return [(chunk_id, self._document_of[chunk_id], score) for chunk_id, score in best]
+
+
+# One index per (engine, knowledge base); throwaway test engines get their own
+_indexes = EngineRegistry()
+
+
+def get_lexical_index(db: Session, kb_id: str) -> ChunkLexicalIndex:
+    """Get the process-wide BM25 chunk index for a knowledge base."""
+    return _indexes.get(db, lambda: ChunkLexicalIndex(kb_id), kb_id)
+
+
+def invalidate_lexical_chunks(db: Session, kb_id: Optional[str], document_id: int) -> None:
+    """Invalidate a document's indexed chunk texts after its chunks are rewritten."""
+    index = _indexes.peek(db, kb_id)
+    if index is not None:
+        index.invalidate_document(document_id)
@@ -9,6 +9,7 @@ Orchestrates the document chunking and embedding process:
 5. Update document status
 """
 
+import asyncio
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime
@@ -17,6 +18,12 @@ from sqlalchemy.orm import Session
 from .document_chunker import DocumentChunker, Chunk, get_document_chunker
 from .embedding_service import EmbeddingService, get_embedding_service
 from .db_models import DBDocument, DBDocumentChunk, DBKnowledgeBase
+from .chunk_embedding_index import get_chunk_index, invalidate_document_chunks
+from .chunk_lexical_index import invalidate_lexical_chunks
+from .enhanced_rag import invalidate_parent_context
+from .embedding_codec import chunk_embedding_columns, decode_chunk_embedding
+from .config import settings
+from .constants import DB_BULK_LOAD_BATCH_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +56,9 @@ class ChunkingPipeline:
         document: DBDocument,
         content: str,
         generate_embeddings: bool = True,
-        generate_summaries: bool = False
+        generate_summaries: bool = False,
+        chunks: Optional[List[Chunk]] = None,
+        embeddings: Optional[List[Optional[List[float]]]] = None
     ) -> Dict:
         """
         Process a document: chunk it, embed it, store it, summarize it.
@@ -60,6 +69,8 @@ class ChunkingPipeline:
             content: Full document text
             generate_embeddings: Whether to generate embeddings (costs API calls)
             generate_summaries: Whether to generate hierarchical summaries (costs API calls)
+            chunks: Chunks already computed for ``content`` (skips step 1)
+            embeddings: Embeddings already computed for ``chunks`` (skips step 2)
 
         Returns:
             Dict with processing results
@@ -69,55 +80,29 @@ class ChunkingPipeline:
 
         logger.info(f"Processing document {doc_id} for chunking")
 
-        # Update status to processing
+        # Update status to processing; database work runs in a worker thread
         document.chunking_status = "processing"
-        db.commit()
+        await asyncio.to_thread(db.commit)
 
         try:
             # Step 1: Chunk the document
-            chunks = self.chunker.chunk_document(content, doc_id)
+            if chunks is None:
+                chunks = self.chunker.chunk_document(content, doc_id)
 
             if not chunks:
                 document.chunking_status = "completed"
                 document.chunk_count = 0
-                db.commit()
+                await asyncio.to_thread(db.commit)
                 return {"doc_id": doc_id, "chunks": 0, "status": "empty"}
 
             # Step 2: Generate embeddings (if enabled)
-            embeddings = []
-            if generate_embeddings:
-                chunk_texts = [c.content for c in chunks]
-                embeddings = await self.embedding_service.embed_batch(
-                    chunk_texts, show_progress=True
-                )
-            else:
+            if embeddings is None and generate_embeddings:
+                embeddings = await self._embed_chunks(db, doc_id, chunks)
+            elif embeddings is None:
                 embeddings = [None] * len(chunks)
 
-            # Step 3: Delete existing chunks for this document
-            db.query(DBDocumentChunk).filter(
-                DBDocumentChunk.document_id == doc_id
-            ).delete()
-
-            # Step 4: Store new chunks
-            db_chunks = []
-            for i, chunk in enumerate(chunks):
-                db_chunk = DBDocumentChunk(
-                    document_id=doc_id,
-                    knowledge_base_id=kb_id,
-                    chunk_index=chunk.index,
-                    start_token=chunk.start_token,
-                    end_token=chunk.end_token,
-                    content=chunk.content,
-                    embedding=embeddings[i] if embeddings[i] else None,
-                    created_at=datetime.utcnow()
-                )
-                db.add(db_chunk)
-                db_chunks.append(db_chunk)
-
-            # Step 5: Update document status
-            document.chunking_status = "completed"
-            document.chunk_count = len(chunks)
-            db.commit()
+            # Steps 3-5: Replace the stored chunks, update document status
+            db_chunks = await asyncio.to_thread(self._store_chunks, db, document, chunks, embeddings)
 
             logger.info(f"Document {doc_id}: created {len(chunks)} chunks")
 
@@ -159,9 +144,79 @@ class ChunkingPipeline:
         except Exception as e:
             logger.error(f"Chunking failed for doc {doc_id}: {e}")
             document.chunking_status = "failed"
-            db.commit()
+            await asyncio.to_thread(db.commit)
             raise
 
+    def _store_chunks(
+        self,
+        db: Session,
+        document: DBDocument,
+        chunks: List[Chunk],
+        embeddings: List[Optional[List[float]]]
+    ) -> List[DBDocumentChunk]:
+        """Replace a document's stored chunks and mark it chunked; blocking."""
+        doc_id = document.id
+        kb_id = document.knowledge_base_id
+
+        # Step 3: Delete existing chunks for this document
+        db.query(DBDocumentChunk).filter(
+            DBDocumentChunk.document_id == doc_id
+        ).delete()
+
+        # Step 4: Store new chunks
+        db_chunks = []
+        for i, chunk in enumerate(chunks):
+            db_chunk = DBDocumentChunk(
+                document_id=doc_id,
+                knowledge_base_id=kb_id,
+                chunk_index=chunk.index,
+                start_token=chunk.start_token,
+                end_token=chunk.end_token,
+                content=chunk.content,
+                created_at=datetime.utcnow(),
+                **chunk_embedding_columns(embeddings[i], settings.embedding_storage_format)
+            )
+            db.add(db_chunk)
+            db_chunks.append(db_chunk)
+
+        # Step 5: Update document status
+        document.chunking_status = "completed"
+        document.chunk_count = len(chunks)
+        db.commit()
+        invalidate_document_chunks(db, kb_id, doc_id)
+        invalidate_lexical_chunks(db, kb_id, doc_id)
+        invalidate_parent_context(db, doc_id)
+        return db_chunks
+
+    async def _embed_chunks(
+        self,
+        db: Session,
+        doc_id: int,
+        chunks: List[Chunk]
+    ) -> List[Optional[List[float]]]:
+        """
+        Embed chunks, reusing the stored embeddings of chunks whose text
+        has not changed since the document was last processed.
+        """
+        stored = {}
+        rows = await asyncio.to_thread(lambda: db.query(
+            DBDocumentChunk.content, DBDocumentChunk.embedding, DBDocumentChunk.embedding_blob
+        ).filter(
+            DBDocumentChunk.document_id == doc_id,
+            DBDocumentChunk.has_embedding
+        ).all())
+        for content, embedding, embedding_blob in rows:
+            vector = decode_chunk_embedding(embedding, embedding_blob)
+            if len(vector) == self.embedding_service.dimensions:
+                stored[content] = vector.tolist()
+
+        missing = [c.content for c in chunks if c.content not in stored]
+        if stored:
+            logger.info(f"Document {doc_id}: reusing {len(chunks) - len(missing)} unchanged chunk embeddings")
+
+        fresh = iter(await self.embedding_service.embed_batch(missing, show_progress=True) if missing else [])
+        return [stored[c.content] if c.content in stored else next(fresh) for c in chunks]
+
     async def process_batch(
         self,
         db: Session,
@@ -172,6 +227,11 @@ class ChunkingPipeline:
         """
         Process multiple documents.
 
+        All documents are chunked first and their chunks embedded with a
+        single embed_batch() call, so embedding requests for the whole
+        batch are packed and run concurrently instead of document by
+        document.
+
         Args:
             db: Database session
             documents: List of DBDocument instances
@@ -183,12 +243,26 @@ class ChunkingPipeline:
         """
         results = []
 
+        chunked = {
+            doc.id: self.chunker.chunk_document(contents[doc.id], doc.id)
+            for doc in documents if contents.get(doc.id)
+        }
+        embedded = {}
+        if generate_embeddings:
+            texts = [chunk.content for doc_chunks in chunked.values() for chunk in doc_chunks]
+            vectors = iter(await self.embedding_service.embed_batch(texts, show_progress=True))
+            embedded = {
+                doc_id: [next(vectors) for _ in doc_chunks]
+                for doc_id, doc_chunks in chunked.items()
+            }
+
         for doc in documents:
             content = contents.get(doc.id, "")
             if content:
                 try:
                     result = await self.process_document(
-                        db, doc, content, generate_embeddings
+                        db, doc, content, generate_embeddings,
+                        chunks=chunked[doc.id], embeddings=embedded.get(doc.id)
                     )
                     results.append(result)
                 except Exception as e:
@@ -281,48 +355,88 @@ async def search_chunks_by_embedding(
     Returns:
         List of dicts with chunk info and similarity
     """
-    import numpy as np
-
-    # Get all chunks with embeddings in this KB
-    chunks = db.query(DBDocumentChunk).filter(
-        DBDocumentChunk.knowledge_base_id == kb_id,
-        DBDocumentChunk.embedding.isnot(None)
-    ).all()
-
-    if not chunks:
+    # Score against the KB's cached, pre-normalised embedding matrix
+    hits = get_chunk_index(db, kb_id).search(db, query_embedding, top_k, min_similarity)
+    if not hits:
         return []
 
-    # Calculate similarities
-    query_vec = np.array(query_embedding)
-    query_norm = np.linalg.norm(query_vec)
-
-    if query_norm == 0:
-        return []
+    # Fetch details for the winning chunks only
+    details = {
+        row.id: row
+        for row in db.query(
+            DBDocumentChunk.id,
+            DBDocumentChunk.chunk_index,
+            DBDocumentChunk.content,
+            DBDocumentChunk.start_token,
+            DBDocumentChunk.end_token
+        ).filter(DBDocumentChunk.id.in_([chunk_id for chunk_id, _, _ in hits]))
+    }
 
     results = []
-    for chunk in chunks:
-        if not chunk.embedding:
+    for chunk_id, document_id, similarity in hits:
+        chunk = details.get(chunk_id)
+        if chunk is None:
+            # Deleted since the index last synced
             continue
+        results.append({
+            "chunk_id": chunk_id,
+            "document_id": document_id,
+            "chunk_index": chunk.chunk_index,
+            "content": chunk.content,
+            "similarity": similarity,
+            "token_count": chunk.end_token - chunk.start_token
+        })
 
-        chunk_vec = np.array(chunk.embedding)
-        chunk_norm = np.linalg.norm(chunk_vec)
+    return results
 
-        if chunk_norm == 0:
-            continue
 
-        similarity = float(np.dot(query_vec, chunk_vec) / (query_norm * chunk_norm))
+def convert_chunk_embeddings(
+    db: Session,
+    storage_format: Optional[str] = None,
+    batch_size: int = DB_BULK_LOAD_BATCH_SIZE
+) -> Dict:
+    """
+    Rewrite stored chunk embeddings into another storage format, in batches.
+
+    Converts legacy JSON embeddings to packed binary (or, with "json",
+    binary back to JSON before a downgrade). Each batch is committed on
+    its own, so the conversion can run online and be resumed.
+
+    Args:
+        db: Database session
+        storage_format: Target format (defaults to settings.embedding_storage_format)
+        batch_size: Rows converted per batch
 
-        if similarity >= min_similarity:
-            results.append({
-                "chunk_id": chunk.id,
-                "document_id": chunk.document_id,
-                "chunk_index": chunk.chunk_index,
-                "content": chunk.content,
-                "similarity": similarity,
-                "token_count": chunk.end_token - chunk.start_token
-            })
+    Returns:
+        Dict with converted row count and batch count
+    """
+    storage_format = storage_format or settings.embedding_storage_format
+    to_json = storage_format == "json"
+    source_column = DBDocumentChunk.embedding_blob if to_json else DBDocumentChunk.embedding
+
+    converted = batches = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            DBDocumentChunk.id, DBDocumentChunk.embedding, DBDocumentChunk.embedding_blob
+        ).filter(
+            source_column.isnot(None),
+            DBDocumentChunk.id > last_id
+        ).order_by(DBDocumentChunk.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        db.bulk_update_mappings(DBDocumentChunk, [
+            {"id": row.id, **chunk_embedding_columns(
+                decode_chunk_embedding(row.embedding, row.embedding_blob), storage_format
+            )}
+            for row in rows
+        ])
+        db.commit()
 
-    # Sort by similarity
-    results.sort(key=lambda x: x["similarity"], reverse=True)
+        last_id = rows[-1].id
+        converted += len(rows)
+        batches += 1
+        logger.info(f"Converted {converted} chunk embeddings to {storage_format} (up to chunk {last_id})")
 
-    return results[:top_k]
+    return {"converted": converted, "batches": batches, "storage_format": storage_format}
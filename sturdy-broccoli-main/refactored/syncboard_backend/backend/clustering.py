@@ -8,16 +8,109 @@ IMPROVEMENTS over basic clustering.py:
 4. Knowledge area identification
 5. Depth analysis per cluster
 6. SELF-LEARNING semantic dictionary that grows with user's content
+
+Concept sets are compared as interned term IDs: every concept name is
+expanded with its synonyms once, and each KB's clusters are kept as a
+binary sparse matrix (rows refreshed only when a cluster changes), so
+matching a document against thousands of clusters is one sparse product.
 """
 
 import logging
-from typing import List, Dict, Optional, Set
-from collections import Counter
+import threading
+from typing import Callable, List, Dict, Optional, Set, Tuple
+from collections import Counter, OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from .constants import CLUSTER_SIGNATURE_CACHE_SIZE
 from .models import Cluster, Concept
 from .semantic_dictionary import SemanticDictionaryManager
 
 logger = logging.getLogger(__name__)
 
+_NO_TERMS = np.zeros(0, dtype=np.int64)
+
+
+def _binary_rows(rows: List[np.ndarray], n_terms: int) -> sparse.csr_matrix:
+    """Stack sorted term-ID arrays into a binary CSR matrix."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    indices = np.concatenate(rows) if rows else _NO_TERMS
+    data = np.ones(len(indices), dtype=np.float64)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), n_terms))
+
+
+class ClusterSignatures:
+    """Expanded concept and name term IDs of one collection of clusters."""
+
+    def __init__(self):
+        self.order: List[int] = []  # Cluster IDs in row (= dict) order
+        self._keys: Dict[int, Tuple[List[str], str]] = {}
+        self._concept_rows: Dict[int, np.ndarray] = {}
+        self._name_rows: Dict[int, np.ndarray] = {}
+        self.concepts: Optional[sparse.csr_matrix] = None
+        self.names: Optional[sparse.csr_matrix] = None
+        self.sizes: np.ndarray = np.zeros(0)
+        self._overlaps: Optional[sparse.csr_matrix] = None
+
+    def refresh(
+        self,
+        clusters: Dict[int, Cluster],
+        encode: Callable[[List[str]], np.ndarray],
+        n_terms: Callable[[], int]
+    ) -> None:
+        """Re-encode clusters whose concepts or name changed; rebuild the matrices if any did."""
+        changed = len(self.order) != len(clusters) or any(
+            a != b for a, b in zip(self.order, clusters)
+        )
+        for cluster_id, cluster in clusters.items():
+            key = self._keys.get(cluster_id)
+            if key is not None and key[0] == cluster.primary_concepts and key[1] == cluster.name:
+                continue
+            self._keys[cluster_id] = (list(cluster.primary_concepts), cluster.name)
+            self._concept_rows[cluster_id] = encode(cluster.primary_concepts)
+            self._name_rows[cluster_id] = encode([cluster.name])
+            changed = True
+        if not changed:
+            return
+
+        self.order = list(clusters)
+        for cluster_id in set(self._keys) - set(clusters):
+            del self._keys[cluster_id], self._concept_rows[cluster_id], self._name_rows[cluster_id]
+        width = n_terms()
+        self.concepts = _binary_rows([self._concept_rows[cid] for cid in self.order], width)
+        self.names = _binary_rows([self._name_rows[cid] for cid in self.order], width)
+        self.sizes = np.array([len(self._concept_rows[cid]) for cid in self.order], dtype=np.float64)
+        self._overlaps = None
+
+    def _indicator(self, terms: np.ndarray) -> np.ndarray:
+        # Terms interned after the last rebuild appear in no cluster
+        indicator = np.zeros(self.concepts.shape[1])
+        indicator[terms[terms < len(indicator)]] = 1.0
+        return indicator
+
+    def similarities(self, terms: np.ndarray) -> np.ndarray:
+        """Jaccard similarity of a term set with every cluster's concepts."""
+        scores = np.zeros(len(self.order))
+        if not len(terms) or not len(self.order):
+            return scores
+        intersection = self.concepts @ self._indicator(terms)
+        union = self.sizes + len(terms) - intersection
+        return np.divide(intersection, union, out=scores, where=self.sizes > 0)
+
+    def related_names(self, terms: np.ndarray) -> np.ndarray:
+        """Whether each cluster's expanded name overlaps a term set."""
+        if not len(terms) or not len(self.order):
+            return np.zeros(len(self.order), dtype=bool)
+        return (self.names @ self._indicator(terms)) > 0
+
+    def overlaps(self) -> sparse.csr_matrix:
+        """Shared concept terms of every pair of clusters (sparse, computed once per rebuild)."""
+        if self._overlaps is None:
+            self._overlaps = (self.concepts @ self.concepts.T).tocsr()
+        return self._overlaps
+
 
 class ImprovedClusteringEngine:
     """
@@ -50,6 +143,14 @@ class ImprovedClusteringEngine:
         else:
             self.semantic_dict = semantic_dict
 
+        # Interned expansions, valid for one version of the semantic dictionary
+        self._term_ids: Dict[str, int] = {}
+        self._expansions: Dict[str, np.ndarray] = {}
+        self._dictionary_version = self.semantic_dict.version
+        # Signatures per cluster collection; the collection itself is kept so its id() stays unique
+        self._signatures: "OrderedDict[int, Tuple[Dict[int, Cluster], ClusterSignatures]]" = OrderedDict()
+        self._lock = threading.RLock()
+
         stats = self.semantic_dict.get_stats()
         logger.info(
             f"ClusteringEngine initialized with semantic dictionary: "
@@ -66,6 +167,46 @@ class ImprovedClusteringEngine:
         """
         return self.semantic_dict.expand_concepts(concept_names)
 
+    def _check_dictionary(self) -> None:
+        """Drop cached expansions and signatures once the dictionary learned a synonym."""
+        if self.semantic_dict.version != self._dictionary_version:
+            self._dictionary_version = self.semantic_dict.version
+            self._expansions.clear()
+            self._signatures.clear()
+
+    def _encode(self, concept_names: List[str]) -> np.ndarray:
+        """Expanded concept names as sorted, unique term IDs (expansions are cached per name)."""
+        with self._lock:
+            self._check_dictionary()
+            rows = []
+            for name in concept_names:
+                key = name.lower()
+                terms = self._expansions.get(key)
+                if terms is None:
+                    ids = {
+                        self._term_ids.setdefault(term, len(self._term_ids))
+                        for term in self._expand_concepts([key])
+                    }
+                    terms = self._expansions[key] = np.array(sorted(ids), dtype=np.int64)
+                rows.append(terms)
+        if not rows:
+            return _NO_TERMS
+        return rows[0] if len(rows) == 1 else np.unique(np.concatenate(rows))
+
+    def _cluster_signatures(self, clusters: Dict[int, Cluster]) -> ClusterSignatures:
+        """Up-to-date signatures of a cluster collection (normally one KB's clusters)."""
+        with self._lock:
+            self._check_dictionary()
+            entry = self._signatures.get(id(clusters))
+            if entry is None or entry[0] is not clusters:
+                entry = self._signatures[id(clusters)] = (clusters, ClusterSignatures())
+                while len(self._signatures) > CLUSTER_SIGNATURE_CACHE_SIZE:
+                    self._signatures.popitem(last=False)
+            self._signatures.move_to_end(id(clusters))
+            signatures = entry[1]
+            signatures.refresh(clusters, self._encode, lambda: len(self._term_ids))
+            return signatures
+
     def _semantic_similarity(
         self,
         concepts_a: List[str],
@@ -76,18 +217,15 @@ class ImprovedClusteringEngine:
 
         Accounts for synonyms and related terms.
         """
-        # Expand both concept sets with synonyms
-        expanded_a = self._expand_concepts(concepts_a)
-        expanded_b = self._expand_concepts(concepts_b)
+        # Jaccard similarity on the expanded sets
+        expanded_a = self._encode(concepts_a)
+        expanded_b = self._encode(concepts_b)
 
-        if not expanded_a or not expanded_b:
+        if not len(expanded_a) or not len(expanded_b):
             return 0.0
 
-        # Jaccard similarity on expanded sets
-        intersection = len(expanded_a & expanded_b)
-        union = len(expanded_a | expanded_b)
-
-        return intersection / union if union > 0 else 0.0
+        intersection = len(np.intersect1d(expanded_a, expanded_b, assume_unique=True))
+        return intersection / (len(expanded_a) + len(expanded_b) - intersection)
 
     def find_best_cluster(
         self,
@@ -103,28 +241,22 @@ class ImprovedClusteringEngine:
         if not existing_clusters:
             return None
 
-        doc_concept_names = [c["name"] for c in doc_concepts]
-
-        best_match = None
-        best_score = 0.0
+        doc_terms = self._encode([c["name"] for c in doc_concepts])
+        name_terms = self._encode([suggested_name])
 
-        for cluster_id, cluster in existing_clusters.items():
-            # Calculate semantic similarity
-            similarity = self._semantic_similarity(
-                doc_concept_names,
-                cluster.primary_concepts
+        with self._lock:
+            signatures = self._cluster_signatures(existing_clusters)
+            # Semantic similarity to every cluster at once, boosted where
+            # the suggested name semantically matches the cluster name
+            scores = signatures.similarities(doc_terms) + np.where(
+                signatures.related_names(name_terms), self.synonym_boost, 0.0
             )
-
-            # Boost if suggested name semantically matches cluster name
-            if self._names_are_related(suggested_name, cluster.name):
-                similarity += self.synonym_boost
-
-            if similarity > best_score:
-                best_score = similarity
-                best_match = cluster_id
+            best = int(np.argmax(scores))  # First best cluster wins ties
+            best_match = signatures.order[best]
+        best_score = float(scores[best])
 
         # Return match if above threshold
-        if best_score >= self.similarity_threshold:
+        if best_score > 0.0 and best_score >= self.similarity_threshold:
             logger.info(
                 f"Found semantic match: cluster {best_match} "
                 f"(similarity: {best_score:.2f})"
@@ -136,11 +268,11 @@ class ImprovedClusteringEngine:
     def _names_are_related(self, name_a: str, name_b: str) -> bool:
         """Check if two cluster names are semantically related."""
         # Expand both names with synonyms using semantic dictionary
-        expanded_a = self._expand_concepts([name_a])
-        expanded_b = self._expand_concepts([name_b])
+        expanded_a = self._encode([name_a])
+        expanded_b = self._encode([name_b])
 
         # Check for overlap
-        return len(expanded_a & expanded_b) > 0
+        return len(np.intersect1d(expanded_a, expanded_b, assume_unique=True)) > 0
 
     def create_cluster(
         self,
@@ -209,24 +341,25 @@ class ImprovedClusteringEngine:
         knowledge_areas = []
         processed = set()
 
-        for cluster_id, cluster in clusters.items():
+        with self._lock:
+            signatures = self._cluster_signatures(clusters)
+            order, sizes, overlaps = signatures.order, signatures.sizes, signatures.overlaps()
+
+        for row, cluster_id in enumerate(order):
             if cluster_id in processed:
                 continue
+            cluster = clusters[cluster_id]
 
-            # Find all related clusters
+            # Find all related clusters: only clusters sharing a concept can be related
             related = [cluster_id]
-
-            for other_id, other_cluster in clusters.items():
-                if other_id == cluster_id or other_id in processed:
-                    continue
-
-                # Check if semantically related
-                similarity = self._semantic_similarity(
-                    cluster.primary_concepts,
-                    other_cluster.primary_concepts
-                )
-
-                if similarity >= 0.3:  # Related threshold
+            start, end = overlaps.indptr[row], overlaps.indptr[row + 1]
+            others = overlaps.indices[start:end]
+            intersection = overlaps.data[start:end]
+            similarity = intersection / (sizes[row] + sizes[others] - intersection)
+
+            for other in np.sort(others[(similarity >= 0.3) & (others != row)]):  # Related threshold
+                other_id = order[other]
+                if other_id not in processed:
                     related.append(other_id)
                     processed.add(other_id)
 
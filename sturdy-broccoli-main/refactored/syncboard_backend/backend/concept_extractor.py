@@ -6,14 +6,23 @@ Improvement #5: Redis-based caching to save 20-40% on API costs.
 Improvement #7: Agentic Learning - extract_with_learning() closes the feedback loop.
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from .llm_providers import LLMProvider, OpenAIProvider, get_representative_sample
 from .config import settings
-from .constants import VALID_CONCEPT_CATEGORIES
+from .constants import (
+    LLM_BATCH_ITEM_MAX_TOKENS,
+    LLM_BATCH_MAX_CONCURRENT_REQUESTS,
+    LLM_BATCH_MAX_ITEMS,
+    LLM_BATCH_MAX_TOKENS,
+    VALID_CONCEPT_CATEGORIES,
+)
 from .cache import get_cached_concepts, cache_concepts
+from .document_chunker import get_document_chunker
+from .llm_batching import format_batch_items, pack_batches, parse_batch_results
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +83,66 @@ def filter_concepts_by_confidence(concepts: list, min_confidence: float = 0.7) -
     return filtered
 
 
+def _learning_section(learning_additions: str) -> str:
+    """Prompt section carrying corrections and preferences from past feedback."""
+    if not learning_additions:
+        return ""
+    return f"""
+---
+## LEARNING FROM PAST USER FEEDBACK
+{learning_additions}
+
+IMPORTANT: Apply these learnings to improve extraction accuracy. The user has corrected similar extractions before.
+---
+"""
+
+
+# Shared by the single-document and batched learning prompts
+_EXTRACTION_RULES = """EXTRACTION RULES:
+1. Extract 5-15 concepts in TWO types (prioritize CAPABILITIES):
+
+   TYPE 1 - CAPABILITIES (extract these FIRST):
+   What problems does this code/document solve? What can it DO?
+   Examples: "cloud cost estimation", "CVE vulnerability scoring",
+   "multi-tenant isolation", "real-time data sync", "payment processing"
+
+   PRIORITIZE:   - Domain-specific engines (cost calculators, security analyzers, risk scorers)
+   - Complex business logic (industry multipliers, compliance checks, audit trails)
+   - Data processing algorithms (parsing, scoring, matching, detection)
+   OVER:
+   - Generic CRUD operations (create/read/update/delete)
+   - Simple API scaffolds (basic REST endpoints)
+   - Standard auth patterns (login/logout/token refresh)
+
+   TYPE 2 - TECHNOLOGIES (extract these SECOND):
+   What tools/frameworks does it use?
+   Examples: "python", "django", "postgresql", "celery"
+
+2. For versioned tools, use base name: "python" not "python 3.11"
+3. Code blocks = HIGH confidence (0.9+), prose mentions = MEDIUM confidence (0.7-0.85)
+4. Skip concepts only mentioned as alternatives or historical context
+
+CONFIDENCE SCORING:
+- 0.95-1.0: Main topic, extensively covered with examples
+- 0.85-0.94: Clearly explained with code or detailed explanation
+- 0.75-0.84: Mentioned and briefly explained
+- 0.70-0.74: Mentioned but not explained in detail
+
+CATEGORIES:
+Technologies: language | framework | library | tool | platform | database | devops
+Patterns: methodology | architecture | testing | concept
+Capabilities: capability | problem_domain | business_logic | algorithm | integration_pattern
+
+CATEGORY DEFINITIONS FOR CAPABILITIES:
+- capability: Functional ability (e.g., "cost estimation", "vulnerability scanning", "text-to-speech")
+- problem_domain: Business/domain area (e.g., "e-commerce", "healthcare compliance", "financial reporting")
+- business_logic: Specific logic patterns (e.g., "tenant isolation", "rate limiting", "audit logging")
+- algorithm: Computational approaches (e.g., "risk scoring", "similarity matching", "anomaly detection")
+- integration_pattern: How systems connect (e.g., "webhook handling", "API orchestration", "event streaming")
+
+"""
+
+
 class ConceptExtractor:
     """Extract concepts from content using configurable LLM provider."""
 
@@ -437,14 +506,146 @@ Return ONLY valid JSON:"""
                 }
             }
         """
-        from .feedback_service import FeedbackService
-
         logger.info(f"Starting learning-aware extraction for {username}")
 
-        # Step 1: Get learning context
+        # Steps 1-2: Get learning context and the prompt additions it implies
+        learning_context, learning_metadata = await self._get_learning_context(username, content[:500])
+        prompt_additions = learning_context.get("prompt_additions", "")
+
+        # Step 3: Extract with enhanced prompt
+        result = await self._extract_with_learning_prompt(
+            content=content,
+            source_type=source_type,
+            learning_additions=prompt_additions
+        )
+
+        # Steps 4-5: Calibrate confidence, critique if still low
+        return await self._finish_learning_result(result, content, learning_context, learning_metadata)
+
+    async def extract_batch_with_learning(
+        self,
+        items: List[Tuple[str, str]],
+        username: str,
+        knowledge_base_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Learning-aware extraction for many documents at once.
+
+        Small documents are packed into shared prompts (up to
+        LLM_BATCH_MAX_TOKENS / LLM_BATCH_MAX_ITEMS each) and the JSON response
+        is split back into per-document results. YouTube transcripts, larger
+        documents, failed batches and documents a batch response leaves out
+        go through extract_with_learning() one at a time.
+
+        Args:
+            items: (content, source_type) per document
+            username: User whose preferences to apply
+            knowledge_base_id: Optional KB ID for scoped learning
+
+        Returns:
+            One extract_with_learning()-shaped result per item, in input order
+        """
+        results: List[Optional[Dict]] = [None] * len(items)
+        semaphore = asyncio.Semaphore(LLM_BATCH_MAX_CONCURRENT_REQUESTS)
+
+        async def extract_single(index: int) -> None:
+            content, source_type = items[index]
+            async with semaphore:
+                results[index] = await self.extract_with_learning(
+                    content=content,
+                    source_type=source_type,
+                    username=username,
+                    knowledge_base_id=knowledge_base_id
+                )
+
+        if not settings.enable_llm_batching or len(items) < 2:
+            await asyncio.gather(*(extract_single(i) for i in range(len(items))))
+            return results
+
+        # Split into documents that can share a prompt and those that cannot
+        chunker = get_document_chunker()
+        singles: List[int] = []
+        batchable: List[Tuple[int, str, int]] = []
+        for index, (content, source_type) in enumerate(items):
+            sample, _ = self._sample_content(content)
+            tokens = chunker.count_tokens(sample)
+            if self._is_youtube(content, source_type) or tokens > LLM_BATCH_ITEM_MAX_TOKENS:
+                singles.append(index)
+            else:
+                batchable.append((index, sample, tokens))
+
+        # One learning context for the batch: same user, same upload
+        learning_context, learning_metadata = await self._get_learning_context(
+            username, items[batchable[0][0]][0][:500]
+        ) if batchable else ({}, {})
+
+        async def extract_batch(batch: List[Tuple[int, str, int]]) -> None:
+            if len(batch) == 1:
+                await extract_single(batch[0][0])
+                return
+
+            prompt = self._build_batch_learning_prompt(
+                [(sample, items[index][1]) for index, sample, _ in batch],
+                learning_context.get("prompt_additions", "")
+            )
+            try:
+                async with semaphore:
+                    response = await self._call_provider_extract(
+                        prompt, max_completion_tokens=4000 + 1500 * len(batch)
+                    )
+                parsed = parse_batch_results(response, len(batch))
+            except Exception as e:
+                logger.warning(f"Batched concept extraction of {len(batch)} documents failed, retrying singly: {e}")
+                parsed = {}
+
+            missing = []
+            for number, (index, _, _) in enumerate(batch, start=1):
+                result = parsed.get(number)
+                if result is None:
+                    missing.append(index)
+                    continue
+                content = items[index][0]
+                try:
+                    self._score_extraction(result, content)
+                    results[index] = await self._finish_learning_result(
+                        result, content, learning_context,
+                        dict(learning_metadata, preferences_applied=list(learning_metadata["preferences_applied"]))
+                    )
+                except Exception as e:
+                    # A malformed entry (e.g. concepts not a list of objects) only costs its own document
+                    logger.warning(f"Malformed batch entry {number}, retrying singly: {e}")
+                    missing.append(index)
+            if missing:
+                logger.info(f"Batch response covered {len(batch) - len(missing)}/{len(batch)} documents")
+                await asyncio.gather(*(extract_single(index) for index in missing))
+
+        groups = pack_batches([tokens for _, _, tokens in batchable], LLM_BATCH_MAX_TOKENS, LLM_BATCH_MAX_ITEMS)
+        logger.info(
+            f"Extracting concepts for {len(items)} documents: "
+            f"{len(batchable)} in {len(groups)} batched requests, {len(singles)} individually"
+        )
+        await asyncio.gather(
+            *(extract_batch([batchable[i] for i in group]) for group in groups),
+            *(extract_single(index) for index in singles)
+        )
+        return results
+
+    async def _get_learning_context(
+        self,
+        username: str,
+        content_sample: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Retrieve past corrections and preferences for ``username``.
+
+        Returns:
+            (learning context from FeedbackService, initial learning metadata)
+        """
+        from .feedback_service import FeedbackService
+
         learning_context = await FeedbackService.get_learning_context_for_extraction(
             username=username,
-            content_sample=content[:500],
+            content_sample=content_sample,
             decision_type="concept_extraction",
             max_corrections=5
         )
@@ -457,10 +658,7 @@ Return ONLY valid JSON:"""
             "calibration_adjustment": 0.0
         }
 
-        # Step 2: Build enhanced prompt with learning context
-        prompt_additions = learning_context.get("prompt_additions", "")
-
-        if prompt_additions:
+        if learning_context.get("prompt_additions", ""):
             logger.info(
                 f"Injecting learning context: {learning_metadata['corrections_used']} corrections, "
                 f"preferences={learning_context.get('user_preferences', {}).get('has_feedback', False)}"
@@ -475,14 +673,17 @@ Return ONLY valid JSON:"""
             if prefs.get("avg_concepts_preferred"):
                 learning_metadata["preferences_applied"].append("target_concept_count")
 
-        # Step 3: Extract with enhanced prompt
-        result = await self._extract_with_learning_prompt(
-            content=content,
-            source_type=source_type,
-            learning_additions=prompt_additions
-        )
+        return learning_context, learning_metadata
 
-        # Step 4: Calibrate confidence based on historical accuracy
+    async def _finish_learning_result(
+        self,
+        result: Dict,
+        content: str,
+        learning_context: Dict[str, Any],
+        learning_metadata: Dict[str, Any]
+    ) -> Dict:
+        """Calibrate confidence, critique if still low, and attach learning metadata."""
+        # Calibrate confidence based on historical accuracy
         raw_confidence = result.get("confidence_score", 0.5)
         learning_metadata["original_confidence"] = raw_confidence
 
@@ -501,7 +702,7 @@ Return ONLY valid JSON:"""
                 f"(Δ{learning_metadata['calibration_adjustment']:+.2f})"
             )
 
-        # Step 5: Optional dual-pass critique for low confidence
+        # Optional dual-pass critique for low confidence
         if settings.enable_dual_pass and calibrated_confidence < settings.dual_pass_threshold:
             logger.info(
                 f"Low confidence ({calibrated_confidence:.2f}), applying dual-pass critique"
@@ -538,19 +739,10 @@ Return ONLY valid JSON:"""
         Returns:
             Extraction result with concepts and metadata
         """
-        # Smart sampling: extract from beginning, middle, and end
-        if settings.concept_sample_method == "smart":
-            sample = get_representative_sample(content, max_chars=settings.concept_sample_size)
-            sampling_note = "\nNOTE: For long documents, this is a representative sample from beginning, middle, and end."
-        else:
-            sample = content[:settings.concept_sample_size] if len(content) > settings.concept_sample_size else content
-            sampling_note = ""
-
-        # Detect YouTube transcripts
-        is_youtube = "YOUTUBE VIDEO TRANSCRIPT" in content or source_type == "youtube"
+        sample, sampling_note = self._sample_content(content)
 
         # Build the enhanced prompt
-        if is_youtube:
+        if self._is_youtube(content, source_type):
             base_prompt = self._build_youtube_learning_prompt(sample, sampling_note, learning_additions)
         else:
             base_prompt = self._build_standard_learning_prompt(sample, source_type, sampling_note, learning_additions)
@@ -563,44 +755,7 @@ Return ONLY valid JSON:"""
             ) if hasattr(self.provider, '_call_llm') else await self._call_provider_extract(base_prompt)
 
             result = json.loads(response)
-
-            # Apply confidence filtering
-            original_count = len(result.get('concepts', []))
-            result['concepts'] = filter_concepts_by_confidence(
-                result.get('concepts', []),
-                min_confidence=settings.min_concept_confidence
-            )
-            filtered_count = len(result['concepts'])
-
-            # Calculate confidence score
-            if result['concepts']:
-                avg_confidence = sum(c.get('confidence', 0.0) for c in result['concepts']) / len(result['concepts'])
-
-                concept_count_factor = 1.0
-                if filtered_count < 2:
-                    concept_count_factor = 0.85
-                elif filtered_count > 15:
-                    concept_count_factor = 0.90
-
-                content_length_factor = 1.0
-                content_len = len(content)
-                if content_len < 200:
-                    content_length_factor = 0.80
-                elif content_len > 50000:
-                    content_length_factor = 0.90
-
-                result['confidence_score'] = max(0.0, min(1.0,
-                    avg_confidence * concept_count_factor * content_length_factor
-                ))
-            else:
-                result['confidence_score'] = 0.3
-
-            logger.info(
-                f"Learning-enhanced extraction: {original_count} → {filtered_count} concepts, "
-                f"confidence={result.get('confidence_score', 0):.2f}"
-            )
-
-            return result
+            return self._score_extraction(result, content)
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON from learning extraction: {e}")
@@ -621,11 +776,66 @@ Return ONLY valid JSON:"""
                 "confidence_score": 0.3
             }
 
-    async def _call_provider_extract(self, prompt: str) -> str:
+    def _sample_content(self, content: str) -> Tuple[str, str]:
+        """Return (prompt sample, sampling note) for ``content``."""
+        # Smart sampling: extract from beginning, middle, and end
+        if settings.concept_sample_method == "smart":
+            sample = get_representative_sample(content, max_chars=settings.concept_sample_size)
+            sampling_note = "\nNOTE: For long documents, this is a representative sample from beginning, middle, and end."
+        else:
+            sample = content[:settings.concept_sample_size] if len(content) > settings.concept_sample_size else content
+            sampling_note = ""
+        return sample, sampling_note
+
+    @staticmethod
+    def _is_youtube(content: str, source_type: str) -> bool:
+        """Detect YouTube transcripts."""
+        return "YOUTUBE VIDEO TRANSCRIPT" in content or source_type == "youtube"
+
+    def _score_extraction(self, result: Dict, content: str) -> Dict:
+        """Filter low-confidence concepts and set the overall confidence_score (in place)."""
+        # Apply confidence filtering
+        original_count = len(result.get('concepts', []))
+        result['concepts'] = filter_concepts_by_confidence(
+            result.get('concepts', []),
+            min_confidence=settings.min_concept_confidence
+        )
+        filtered_count = len(result['concepts'])
+
+        # Calculate confidence score
+        if result['concepts']:
+            avg_confidence = sum(c.get('confidence', 0.0) for c in result['concepts']) / len(result['concepts'])
+
+            concept_count_factor = 1.0
+            if filtered_count < 2:
+                concept_count_factor = 0.85
+            elif filtered_count > 15:
+                concept_count_factor = 0.90
+
+            content_length_factor = 1.0
+            content_len = len(content)
+            if content_len < 200:
+                content_length_factor = 0.80
+            elif content_len > 50000:
+                content_length_factor = 0.90
+
+            result['confidence_score'] = max(0.0, min(1.0,
+                avg_confidence * concept_count_factor * content_length_factor
+            ))
+        else:
+            result['confidence_score'] = 0.3
+
+        logger.info(
+            f"Learning-enhanced extraction: {original_count} → {filtered_count} concepts, "
+            f"confidence={result.get('confidence_score', 0):.2f}"
+        )
+
+        return result
+
+    async def _call_provider_extract(self, prompt: str, max_completion_tokens: int = 4000) -> str:
         """Fallback method to call provider's extract via chat completion."""
-        from openai import AsyncOpenAI
-        api_key = settings.openai_api_key
-        client = AsyncOpenAI(api_key=api_key)
+        from .openai_clients import get_async_openai
+        client = get_async_openai()
 
         # GPT-5 models use max_completion_tokens and don't support temperature
         response = await client.chat.completions.create(
@@ -634,7 +844,7 @@ Return ONLY valid JSON:"""
                 {"role": "system", "content": "You are a concept extraction system. Return only valid JSON."},
                 {"role": "user", "content": prompt}
             ],
-            max_completion_tokens=4000
+            max_completion_tokens=max_completion_tokens
         )
 
         return response.choices[0].message.content or ""
@@ -647,16 +857,7 @@ Return ONLY valid JSON:"""
         learning_additions: str
     ) -> str:
         """Build standard prompt enhanced with learning context."""
-        learning_section = ""
-        if learning_additions:
-            learning_section = f"""
----
-## LEARNING FROM PAST USER FEEDBACK
-{learning_additions}
-
-IMPORTANT: Apply these learnings to improve extraction accuracy. The user has corrected similar extractions before.
----
-"""
+        learning_section = _learning_section(learning_additions)
 
         return f"""Analyze this {source_type} document and extract BOTH capabilities AND technologies.{sampling_note}
 {learning_section}
@@ -665,49 +866,7 @@ DOCUMENT CONTENT:
 
 ---
 
-EXTRACTION RULES:
-1. Extract 5-15 concepts in TWO types (prioritize CAPABILITIES):
-
-   TYPE 1 - CAPABILITIES (extract these FIRST):
-   What problems does this code/document solve? What can it DO?
-   Examples: "cloud cost estimation", "CVE vulnerability scoring",
-   "multi-tenant isolation", "real-time data sync", "payment processing"
-
-   PRIORITIZE:   - Domain-specific engines (cost calculators, security analyzers, risk scorers)
-   - Complex business logic (industry multipliers, compliance checks, audit trails)
-   - Data processing algorithms (parsing, scoring, matching, detection)
-   OVER:
-   - Generic CRUD operations (create/read/update/delete)
-   - Simple API scaffolds (basic REST endpoints)
-   - Standard auth patterns (login/logout/token refresh)
-
-   TYPE 2 - TECHNOLOGIES (extract these SECOND):
-   What tools/frameworks does it use?
-   Examples: "python", "django", "postgresql", "celery"
-
-2. For versioned tools, use base name: "python" not "python 3.11"
-3. Code blocks = HIGH confidence (0.9+), prose mentions = MEDIUM confidence (0.7-0.85)
-4. Skip concepts only mentioned as alternatives or historical context
-
-CONFIDENCE SCORING:
-- 0.95-1.0: Main topic, extensively covered with examples
-- 0.85-0.94: Clearly explained with code or detailed explanation
-- 0.75-0.84: Mentioned and briefly explained
-- 0.70-0.74: Mentioned but not explained in detail
-
-CATEGORIES:
-Technologies: language | framework | library | tool | platform | database | devops
-Patterns: methodology | architecture | testing | concept
-Capabilities: capability | problem_domain | business_logic | algorithm | integration_pattern
-
-CATEGORY DEFINITIONS FOR CAPABILITIES:
-- capability: Functional ability (e.g., "cost estimation", "vulnerability scanning", "text-to-speech")
-- problem_domain: Business/domain area (e.g., "e-commerce", "healthcare compliance", "financial reporting")
-- business_logic: Specific logic patterns (e.g., "tenant isolation", "rate limiting", "audit logging")
-- algorithm: Computational approaches (e.g., "risk scoring", "similarity matching", "anomaly detection")
-- integration_pattern: How systems connect (e.g., "webhook handling", "API orchestration", "event streaming")
-
-Return ONLY valid JSON (no markdown backticks):
+{_EXTRACTION_RULES}Return ONLY valid JSON (no markdown backticks):
 {{
   "concepts": [{{"name": "...", "category": "...", "confidence": 0.9}}],
   "skill_level": "beginner|intermediate|advanced",
@@ -715,6 +874,31 @@ Return ONLY valid JSON (no markdown backticks):
   "suggested_cluster": "cluster name for grouping"
 }}"""
 
+    def _build_batch_learning_prompt(self, samples: List[Tuple[str, str]], learning_additions: str) -> str:
+        """Build one prompt asking for a separate extraction per numbered (sample, source_type) document."""
+        texts = [f"Source type: {source_type}\n{sample}" for sample, source_type in samples]
+        return f"""Analyze each of the following {len(samples)} documents INDEPENDENTLY and extract BOTH capabilities AND technologies for each one, taking its source type into account.
+{_learning_section(learning_additions)}
+{format_batch_items(texts, "DOCUMENT")}
+
+---
+
+Apply these rules to every document separately:
+
+{_EXTRACTION_RULES}
+Return ONLY valid JSON (no markdown backticks), with exactly one entry per document, using the document number as "id":
+{{
+  "results": [
+    {{
+      "id": 1,
+      "concepts": [{{"name": "...", "category": "...", "confidence": 0.9}}],
+      "skill_level": "beginner|intermediate|advanced",
+      "primary_topic": "main topic in 2-4 words",
+      "suggested_cluster": "cluster name for grouping"
+    }}
+  ]
+}}"""
+
     def _build_youtube_learning_prompt(
         self,
         sample: str,
@@ -722,16 +906,7 @@ Return ONLY valid JSON (no markdown backticks):
         learning_additions: str
     ) -> str:
         """Build YouTube prompt enhanced with learning context."""
-        learning_section = ""
-        if learning_additions:
-            learning_section = f"""
----
-## LEARNING FROM PAST USER FEEDBACK
-{learning_additions}
-
-IMPORTANT: Apply these learnings to improve extraction accuracy. The user has corrected similar extractions before.
----
-"""
+        learning_section = _learning_section(learning_additions)
 
         return f"""Analyze this YouTube video transcript and extract learning content.{sampling_note}
 {learning_section}
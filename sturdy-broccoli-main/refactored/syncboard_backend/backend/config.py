@@ -131,6 +131,18 @@ class Settings(BaseSettings):
         validation_alias="SIMILARITY_CACHE_TTL_DAYS"
     )
 
+    enable_embedding_caching: bool = Field(
+        default=True,
+        description="Enable Redis caching of embeddings by content hash (shared across processes)",
+        validation_alias="ENABLE_EMBEDDING_CACHING"
+    )
+
+    embedding_cache_ttl_days: int = Field(
+        default=30,
+        description="Embedding cache TTL in days",
+        validation_alias="EMBEDDING_CACHE_TTL_DAYS"
+    )
+
     # =============================================================================
     # LLM Providers
     # =============================================================================
@@ -189,6 +201,18 @@ class Settings(BaseSettings):
         validation_alias="SUMMARY_MODEL"
     )
 
+    summary_max_concurrency: int = Field(
+        default=8,
+        description="Max concurrent summarization requests per document",
+        validation_alias="SUMMARY_MAX_CONCURRENCY"
+    )
+
+    enable_llm_batching: bool = Field(
+        default=True,
+        description="Pack several small documents/chunks into one concept extraction or summary request",
+        validation_alias="ENABLE_LLM_BATCHING"
+    )
+
     idea_model: str = Field(
         default="gpt-5-mini",
         description="Model for idea generation",
@@ -239,6 +263,30 @@ class Settings(BaseSettings):
         validation_alias="SYNCBOARD_VECTOR_DIM"
     )
 
+    vector_store_incremental: bool = Field(
+        default=True,
+        description="Append new documents to the TF-IDF index instead of refitting the whole corpus",
+        validation_alias="SYNCBOARD_VECTOR_INCREMENTAL"
+    )
+
+    vector_snapshot_dir: Optional[str] = Field(
+        default=None,
+        description="Directory for memory-mapped vector index snapshots shared by API and worker processes (disabled if unset)",
+        validation_alias="SYNCBOARD_VECTOR_SNAPSHOT_DIR"
+    )
+
+    embedding_storage_format: Literal["json", "float32", "float16", "int8"] = Field(
+        default="float32",
+        description="How chunk embeddings are stored: packed binary (float32/float16/int8) or legacy JSON",
+        validation_alias="SYNCBOARD_EMBEDDING_STORAGE_FORMAT"
+    )
+
+    clustering_mode: Literal["concepts", "embeddings"] = Field(
+        default="concepts",
+        description="How uploads are assigned to clusters: by concept names, or by document embedding against cluster centroids",
+        validation_alias="SYNCBOARD_CLUSTERING_MODE"
+    )
+
     # =============================================================================
     # Storage & Files
     # =============================================================================
@@ -255,6 +303,22 @@ class Settings(BaseSettings):
         validation_alias="MAX_BATCH_FILES"
     )
 
+    duplicate_upload_policy: Literal["reuse", "reject", "allow"] = Field(
+        default="reuse",
+        description="What to do with uploads already in the knowledge base "
+                    "(reuse the existing document, reject the upload, or process it anyway)",
+        validation_alias="SYNCBOARD_DUPLICATE_UPLOAD_POLICY"
+    )
+
+    duplicate_upload_threshold: float = Field(
+        default=1.0,
+        ge=0.0,
+        le=1.0,
+        description="Estimated similarity at which an upload counts as a duplicate (1.0 = identical only; "
+                    "lower values make \"reuse\" drop the edits of near-identical uploads)",
+        validation_alias="SYNCBOARD_DUPLICATE_UPLOAD_THRESHOLD"
+    )
+
     # =============================================================================
     # Transcription & OCR
     # =============================================================================
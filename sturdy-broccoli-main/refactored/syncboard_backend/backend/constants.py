@@ -30,6 +30,80 @@ MAX_SUGGESTIONS = 20  # Maximum build suggestions
 DEFAULT_VECTOR_DIM = 256  # Default vector dimension
 SNIPPET_LENGTH = 500  # Character length for search result snippets
 
+# Incremental TF-IDF index (VectorStore(incremental=True))
+VECTOR_IDF_REFRESH_RATIO = 0.2  # Refresh IDF once adds+deletes exceed 20% of the live corpus
+VECTOR_COMPACTION_RATIO = 0.25  # Compact tombstoned rows once they exceed 25% of all rows
+VECTOR_MERGE_BATCH_SIZE = 512  # Pending rows folded into the main matrix per merge
+DB_BULK_LOAD_BATCH_SIZE = 1000  # Rows fetched per round trip when loading the cache from the DB
+VECTOR_SNAPSHOT_FORMAT = 1  # Bump when the on-disk snapshot layout changes
+VECTOR_SNAPSHOT_KEEP = 2  # Snapshot versions kept on disk (older ones may still be mapped)
+SHARED_INDEX_SYNC_INTERVAL_SECONDS = 2.0  # Min seconds between watermark checks of the shared repository index
+CHUNK_INDEX_SYNC_INTERVAL_SECONDS = 2.0  # Min seconds between watermark checks of a KB's chunk embedding matrix
+GRAPH_SYNC_INTERVAL_SECONDS = 2.0  # Min seconds between watermark checks of a cached knowledge graph
+
+# BM25 chunk index for hybrid RAG search (chunk_lexical_index)
+LEXICAL_INDEX_SYNC_INTERVAL_SECONDS = 2.0  # Min seconds between watermark checks of a KB's lexical index
+LEXICAL_BM25_K1 = 1.5  # Term frequency saturation
+LEXICAL_BM25_B = 0.75  # Chunk length normalization
+
+# Cross-encoder reranking for RAG (rerank_service)
+RERANK_BATCH_WINDOW_SECONDS = 0.005  # How long to collect pairs from concurrent requests before scoring
+RERANK_MAX_BATCH_PAIRS = 256  # Score immediately once this many pairs are waiting
+RERANK_INFERENCE_THREADS = 1  # Threads running model inference (one model instance shared by all)
+RERANK_SCORE_CACHE_SIZE = 50000  # (query, chunk) scores kept in memory
+RAG_PARENT_CACHE_SIZE = 2048  # Parent contents of hot child chunks kept in memory (enhanced_rag)
+
+# Near-duplicate detection (duplicate_index): MinHash signatures + LSH buckets
+DUPLICATE_INDEX_SYNC_INTERVAL_SECONDS = 2.0  # Min seconds between watermark checks of the duplicate index
+DUPLICATE_SHINGLE_WORDS = 3  # Words per shingle
+DUPLICATE_MINHASH_PERMUTATIONS = 128  # Signature length
+DUPLICATE_LSH_BANDS = 32  # Bands of PERMUTATIONS / BANDS rows; pairs near (1/BANDS)^(BANDS/PERMUTATIONS) ~ 0.42 similarity become candidates
+DUPLICATE_MIN_THRESHOLD = 0.5  # Lowest shingle Jaccard threshold the LSH bands still find reliably (~87% candidate recall)
+DUPLICATE_DEFAULT_THRESHOLD = 0.7  # Default shingle Jaccard threshold for duplicate listings (~7% of words changed)
+
+# Concept-set cluster matching (clustering.ImprovedClusteringEngine)
+CLUSTER_SIGNATURE_CACHE_SIZE = 64  # Cluster collections (one per KB) whose expanded concept signatures stay in memory
+
+# Embedding-centroid clustering (embedding_clustering, settings.clustering_mode = "embeddings")
+CLUSTER_CENTROID_MIN_SIMILARITY = 0.6  # Min cosine similarity between a document and a cluster centroid to join it
+CLUSTER_KMEANS_BATCH_SIZE = 1024  # Mini-batch size for offline k-means re-clustering
+CLUSTER_HDBSCAN_MIN_SIZE = 3  # Smallest group HDBSCAN re-clustering turns into a cluster
+
+# =============================================================================
+# Embedding API Batching
+# =============================================================================
+
+EMBEDDING_MAX_BATCH_TOKENS = 300_000  # OpenAI cap on total input tokens per embeddings request
+EMBEDDING_MAX_CONCURRENT_REQUESTS = 4  # Embedding requests in flight per embed_batch() call
+EMBEDDING_MAX_RETRIES = 5  # Retries per sub-batch on 429 / 5xx / connection errors
+EMBEDDING_BACKOFF_BASE_SECONDS = 1.0  # First retry delay when no Retry-After hint is given (doubles per attempt)
+EMBEDDING_BACKOFF_MAX_SECONDS = 60.0  # Upper bound on any single backoff
+EMBEDDING_CACHE_MAX_ENTRIES = 4096  # Process-local LRU of embeddings by content hash (~25MB at 1536 dims)
+
+# =============================================================================
+# Summarization API Calls
+# =============================================================================
+
+SUMMARY_MAX_RETRIES = 3  # Retries per summary request on 429 / 5xx / connection errors
+SUMMARY_BACKOFF_BASE_SECONDS = 1.0  # First retry delay when no Retry-After hint is given (doubles per attempt)
+SUMMARY_BACKOFF_MAX_SECONDS = 30.0  # Upper bound on any single backoff
+
+# Multi-item prompts (settings.enable_llm_batching): small documents / chunks share one request
+LLM_BATCH_MAX_TOKENS = 6000  # Input tokens of packed content per batched request
+LLM_BATCH_MAX_ITEMS = 8  # Documents or chunks per batched request
+LLM_BATCH_ITEM_MAX_TOKENS = 1500  # Larger documents are always extracted on their own
+LLM_BATCH_MAX_CONCURRENT_REQUESTS = 4  # Batched concept extraction requests in flight
+
+# =============================================================================
+# OpenAI HTTP Clients & Worker Event Loop
+# =============================================================================
+
+OPENAI_HTTP_MAX_CONNECTIONS = 100  # Connections per shared AsyncOpenAI client (see openai_clients)
+OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS = 20  # Idle connections kept open for reuse
+OPENAI_HTTP_KEEPALIVE_EXPIRY_SECONDS = 60.0  # Idle time before a kept-alive connection is closed
+RUN_ASYNC_TIMEOUT_SECONDS = 3300  # Max wait for one run_async() call (stays under Celery's 3600s hard limit)
+WORKER_LOOP_SHUTDOWN_TIMEOUT_SECONDS = 5.0  # Time allowed to close clients and stop the worker loop
+
 # =============================================================================
 # User & Content Limits
 # =============================================================================
@@ -50,6 +124,21 @@ ZIP_MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB max per file
 ZIP_MAX_TOTAL_SIZE = 100 * 1024 * 1024  # 100MB total extracted size
 ZIP_MAX_COMPRESSION_RATIO = 1500  # Max ratio of uncompressed/compressed size (text compresses ~1000x)
 
+# =============================================================================
+# ZIP Ingestion Pipeline
+# =============================================================================
+
+ZIP_PIPELINE_EXTRACTION_WAVE = 32  # Documents per concept extraction wave
+ZIP_PIPELINE_INSERT_BATCH = 16  # Max documents saved per database transaction
+ZIP_PIPELINE_MAX_CONCURRENT_DOCUMENTS = 4  # Documents chunked/embedded/summarized at once
+
+# =============================================================================
+# Usage Tracking
+# =============================================================================
+
+USAGE_FLUSH_INTERVAL_SECONDS = 5.0  # Seconds between batched writes of buffered usage counters (usage_buffer)
+USAGE_LIMITS_CACHE_SECONDS = 60.0  # How long quota checks reuse a user's plan limits and overrides
+
 # =============================================================================
 # Authentication Configuration
 # =============================================================================
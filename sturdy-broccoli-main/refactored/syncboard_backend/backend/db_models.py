@@ -5,8 +5,9 @@ Maps application domain models to PostgreSQL tables.
 Separate from Pydantic models (models.py) which handle API validation.
 """
 
-from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, DateTime, JSON, ForeignKey, Boolean, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, DateTime, JSON, LargeBinary, ForeignKey, Boolean, Index, or_
 from sqlalchemy.orm import relationship, declarative_base, backref
+from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime
 
 Base = declarative_base()
@@ -437,7 +438,8 @@ class DBDocumentChunk(Base):
     start_token = Column(Integer, nullable=False)  # Token position in original doc
     end_token = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
-    embedding = Column(JSON, nullable=True)  # Vector embedding as JSON array
+    embedding = Column(JSON(none_as_null=True), nullable=True)  # Legacy: vector embedding as JSON array
+    embedding_blob = Column(LargeBinary, nullable=True)  # Packed embedding (see embedding_codec)
     summary = Column(Text, nullable=True)  # 100-200 token summary of this chunk
     concepts = Column(JSON, nullable=True)  # Extracted concepts from this chunk
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -459,6 +461,15 @@ class DBDocumentChunk(Base):
         Index('idx_chunks_type', 'chunk_type'),
     )
 
+    @hybrid_property
+    def has_embedding(self):
+        """True if the chunk has an embedding in either storage column."""
+        return self.embedding_blob is not None or self.embedding is not None
+
+    @has_embedding.expression
+    def has_embedding(cls):
+        return or_(cls.embedding_blob.isnot(None), cls.embedding.isnot(None))
+
     def __repr__(self):
         return f"<DBDocumentChunk(doc_id={self.document_id}, chunk={self.chunk_index}, type={self.chunk_type})>"
 
@@ -15,7 +15,9 @@ from sqlalchemy import and_, or_
 
 from .models import DocumentMetadata, Cluster, Concept
 from .db_models import DBUser, DBCluster, DBDocument, DBConcept, DBVectorDocument, DBBuildIdeaSeed
-from .vector_store import VectorStore
+from .vector_store import PartitionedVectorStore
+from .shared_vector_index import get_shared_index
+from .duplicate_index import get_duplicate_index
 from .repository_interface import KnowledgeBankRepository
 
 logger = logging.getLogger(__name__)
@@ -40,29 +42,19 @@ class DatabaseKnowledgeBankRepository(KnowledgeBankRepository):
         self.db = db_session
         self.vector_dim = vector_dim
 
-        # Vector store for semantic search (private attribute)
-        self._vector_store = VectorStore(dim=vector_dim)
+        # Process-wide vector index shared by every repository on this engine.
+        # Loaded lazily and kept in sync incrementally, so constructing a
+        # repository never scans the vector table.
+        self._index = get_shared_index(db_session, dim=vector_dim)
 
         # Async lock for thread-safe operations
         self._lock = asyncio.Lock()
 
-        # Load vector store from database
-        self._load_vector_store()
-
     @property
-    def vector_store(self) -> VectorStore:
-        """Get the vector store instance for semantic search."""
-        return self._vector_store
-
-    def _load_vector_store(self) -> None:
-        """Load documents into vector store for semantic search."""
-        try:
-            vector_docs = self.db.query(DBVectorDocument).all()
-            for vdoc in vector_docs:
-                self._vector_store.add_document(vdoc.content, doc_id=vdoc.doc_id)
-            logger.info(f"Loaded {len(vector_docs)} documents into vector store")
-        except Exception as e:
-            logger.error(f"Failed to load vector store: {e}")
+    def vector_store(self) -> PartitionedVectorStore:
+        """Get the (shared) vector store instance for semantic search."""
+        self._index.sync(self.db)
+        return self._index.store
 
     # =============================================================================
     # KNOWLEDGE BASE SCOPED OPERATIONS (Primary Pattern)
@@ -143,92 +135,161 @@ class DatabaseKnowledgeBankRepository(KnowledgeBankRepository):
         """
         async with self._lock:
             # Add to vector store first to get doc_id
-            doc_id = self.vector_store.add_document(content)
-
-            # CRITICAL FIX: Ensure cluster exists in database if cluster_id is set
-            # Previously, clusters were only created in memory, causing foreign key violations
-            actual_cluster_id = metadata.cluster_id
-            if metadata.cluster_id is not None:
-                # Check if cluster exists in database
-                existing_cluster = self.db.query(DBCluster).filter_by(id=metadata.cluster_id).first()
-
-                if not existing_cluster:
-                    # Cluster doesn't exist in DB - need to create it from in-memory state
-                    # Get the cluster from in-memory storage via knowledge base
-                    from .dependencies import get_kb_clusters
-                    kb_clusters = get_kb_clusters(metadata.knowledge_base_id)
-
-                    if metadata.cluster_id in kb_clusters:
-                        in_memory_cluster = kb_clusters[metadata.cluster_id]
-                        # Create cluster in database
-                        db_cluster = DBCluster(
-                            name=in_memory_cluster.name,
-                            primary_concepts=in_memory_cluster.primary_concepts,
-                            skill_level=in_memory_cluster.skill_level,
-                            knowledge_base_id=metadata.knowledge_base_id
-                        )
-                        self.db.add(db_cluster)
-                        self.db.flush()  # Get the auto-generated database ID
-                        actual_cluster_id = db_cluster.id
-
-                        # Update in-memory cluster with database ID
-                        in_memory_cluster.id = actual_cluster_id
-                        kb_clusters[actual_cluster_id] = in_memory_cluster
-                        # Remove old ID entry if different
-                        if actual_cluster_id != metadata.cluster_id:
-                            del kb_clusters[metadata.cluster_id]
-
-                        logger.info(f"Created cluster {actual_cluster_id} in database: {in_memory_cluster.name}")
-                    else:
-                        # Cluster not in memory either - set to NULL
-                        logger.warning(f"Cluster {metadata.cluster_id} not found in memory or database, setting to NULL")
-                        actual_cluster_id = None
-
-            # Create database document
-            # Convert ingested_at from ISO string to datetime object for database
-            ingested_datetime = (
-                datetime.fromisoformat(metadata.ingested_at.replace('Z', '+00:00'))
-                if isinstance(metadata.ingested_at, str)
-                else metadata.ingested_at
+            doc_id = self._index.reserve(self.db, content, metadata.knowledge_base_id)
+            try:
+                db_vector_doc = self._save_document(doc_id, content, metadata)
+            except Exception:
+                self._index.discard(doc_id)
+                raise
+            self._index.confirm(doc_id, db_vector_doc.id)
+            get_duplicate_index(self.db).add(
+                doc_id, content, metadata.owner, metadata.knowledge_base_id, db_vector_doc.id
             )
+            logger.debug(f"Added document {doc_id}")
+            return doc_id
 
-            db_doc = DBDocument(
-                doc_id=doc_id,
-                owner_username=metadata.owner,
-                cluster_id=actual_cluster_id,
-                knowledge_base_id=metadata.knowledge_base_id,
-                source_type=metadata.source_type,
-                source_url=metadata.source_url,
-                filename=metadata.filename,
-                image_path=metadata.image_path,
-                content_length=metadata.content_length,
-                skill_level=metadata.skill_level,
-                ingested_at=ingested_datetime
-            )
-            self.db.add(db_doc)
-            self.db.flush()  # Get the database ID
+    async def add_documents(self, items: List[Tuple[str, DocumentMetadata]]) -> List[int]:
+        """
+        Add several documents in a single transaction.
 
-            # Add concepts
-            logger.debug(f"Saving {len(metadata.concepts)} concepts for doc_id={doc_id}, doc.id={db_doc.id}")
-            for concept in metadata.concepts:
-                db_concept = DBConcept(
-                    document_id=db_doc.id,
-                    name=concept.name,
-                    category=concept.category,
-                    confidence=concept.confidence
-                )
-                self.db.add(db_concept)
+        Either every document is saved or none is.
 
-            # Add vector document content
-            db_vector_doc = DBVectorDocument(
-                doc_id=doc_id,
-                content=content
+        Args:
+            items: (content, metadata) pairs
+
+        Returns:
+            Document IDs, in the order of ``items``
+        """
+        async with self._lock:
+            doc_ids = [
+                self._index.reserve(self.db, content, metadata.knowledge_base_id)
+                for content, metadata in items
+            ]
+            try:
+                rows = []
+                # Clusters first created in memory get a new ID when saved;
+                # later documents in the batch must follow that ID
+                saved_cluster_ids: Dict[int, Optional[int]] = {}
+                for doc_id, (content, metadata) in zip(doc_ids, items):
+                    requested = metadata.cluster_id
+                    metadata.cluster_id = saved_cluster_ids.get(requested, requested)
+                    rows.append(self._save_document(doc_id, content, metadata, commit=False))
+                    if requested is not None:
+                        saved_cluster_ids[requested] = metadata.cluster_id
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                for doc_id in doc_ids:
+                    self._index.discard(doc_id)
+                raise
+            duplicate_index = get_duplicate_index(self.db)
+            for doc_id, row, (content, metadata) in zip(doc_ids, rows, items):
+                self._index.confirm(doc_id, row.id)
+                duplicate_index.add(doc_id, content, metadata.owner, metadata.knowledge_base_id, row.id)
+            logger.debug(f"Added {len(doc_ids)} documents")
+            return doc_ids
+
+    def _save_document(
+        self,
+        doc_id: int,
+        content: str,
+        metadata: DocumentMetadata,
+        commit: bool = True
+    ) -> DBVectorDocument:
+        """
+        Write a document, its concepts and content rows; returns the vector row.
+
+        ``metadata.cluster_id`` is updated to the cluster actually stored.
+        With ``commit=False`` the rows are only flushed, for callers that
+        commit several documents together.
+        """
+        # CRITICAL FIX: Ensure cluster exists in database if cluster_id is set
+        # Previously, clusters were only created in memory, causing foreign key violations
+        actual_cluster_id = metadata.cluster_id
+        if metadata.cluster_id is not None:
+            # Check if cluster exists in database
+            existing_cluster = self.db.query(DBCluster).filter_by(id=metadata.cluster_id).first()
+
+            if not existing_cluster:
+                # Cluster doesn't exist in DB - need to create it from in-memory state
+                # Get the cluster from in-memory storage via knowledge base
+                from .dependencies import get_kb_clusters
+                kb_clusters = get_kb_clusters(metadata.knowledge_base_id)
+
+                if metadata.cluster_id in kb_clusters:
+                    in_memory_cluster = kb_clusters[metadata.cluster_id]
+                    # Create cluster in database
+                    db_cluster = DBCluster(
+                        name=in_memory_cluster.name,
+                        primary_concepts=in_memory_cluster.primary_concepts,
+                        skill_level=in_memory_cluster.skill_level,
+                        knowledge_base_id=metadata.knowledge_base_id
+                    )
+                    self.db.add(db_cluster)
+                    self.db.flush()  # Get the auto-generated database ID
+                    actual_cluster_id = db_cluster.id
+
+                    # Update in-memory cluster with database ID
+                    in_memory_cluster.id = actual_cluster_id
+                    kb_clusters[actual_cluster_id] = in_memory_cluster
+                    # Remove old ID entry if different
+                    if actual_cluster_id != metadata.cluster_id:
+                        del kb_clusters[metadata.cluster_id]
+
+                    logger.info(f"Created cluster {actual_cluster_id} in database: {in_memory_cluster.name}")
+                else:
+                    # Cluster not in memory either - set to NULL
+                    logger.warning(f"Cluster {metadata.cluster_id} not found in memory or database, setting to NULL")
+                    actual_cluster_id = None
+            metadata.cluster_id = actual_cluster_id
+
+        # Create database document
+        # Convert ingested_at from ISO string to datetime object for database
+        ingested_datetime = (
+            datetime.fromisoformat(metadata.ingested_at.replace('Z', '+00:00'))
+            if isinstance(metadata.ingested_at, str)
+            else metadata.ingested_at
+        )
+
+        db_doc = DBDocument(
+            doc_id=doc_id,
+            owner_username=metadata.owner,
+            cluster_id=actual_cluster_id,
+            knowledge_base_id=metadata.knowledge_base_id,
+            source_type=metadata.source_type,
+            source_url=metadata.source_url,
+            filename=metadata.filename,
+            image_path=metadata.image_path,
+            content_length=metadata.content_length,
+            skill_level=metadata.skill_level,
+            ingested_at=ingested_datetime
+        )
+        self.db.add(db_doc)
+        self.db.flush()  # Get the database ID
+
+        # Add concepts
+        logger.debug(f"Saving {len(metadata.concepts)} concepts for doc_id={doc_id}, doc.id={db_doc.id}")
+        for concept in metadata.concepts:
+            db_concept = DBConcept(
+                document_id=db_doc.id,
+                name=concept.name,
+                category=concept.category,
+                confidence=concept.confidence
             )
-            self.db.add(db_vector_doc)
+            self.db.add(db_concept)
+
+        # Add vector document content
+        db_vector_doc = DBVectorDocument(
+            doc_id=doc_id,
+            content=content
+        )
+        self.db.add(db_vector_doc)
 
+        if commit:
             self.db.commit()
-            logger.debug(f"Added document {doc_id}")
-            return doc_id
+        else:
+            self.db.flush()
+        return db_vector_doc
 
     async def get_document(self, doc_id: int) -> Optional[str]:
         """Get document content by ID."""
@@ -329,8 +390,9 @@ class DatabaseKnowledgeBankRepository(KnowledgeBankRepository):
             self.db.delete(db_doc)
             self.db.commit()
 
-            # Remove from vector store
-            # Note: VectorStore doesn't have delete, would need to rebuild
+            # Remove from the shared vector index
+            self._index.remove(doc_id)
+            get_duplicate_index(self.db).remove(doc_id)
             logger.debug(f"Deleted document {doc_id}")
             return True
 
@@ -553,7 +615,8 @@ class DatabaseKnowledgeBankRepository(KnowledgeBankRepository):
         self,
         query: str,
         top_k: int = 10,
-        allowed_doc_ids: Optional[List[int]] = None
+        allowed_doc_ids: Optional[List[int]] = None,
+        knowledge_base_id: Optional[str] = None
     ) -> List[Tuple[int, float]]:
         """
         Semantic search for documents.
@@ -562,10 +625,13 @@ class DatabaseKnowledgeBankRepository(KnowledgeBankRepository):
             query: Search query
             top_k: Number of results to return
             allowed_doc_ids: Optional list of allowed document IDs
+            knowledge_base_id: Optional KB to search (only its partition is scored)
 
         Returns:
             List of (doc_id, score) tuples
         """
         # VectorStore.search returns (doc_id, score, snippet), but we only need (doc_id, score)
-        results = self.vector_store.search(query, top_k=top_k, allowed_doc_ids=allowed_doc_ids)
+        results = self._index.search(
+            self.db, query, top_k=top_k, allowed_doc_ids=allowed_doc_ids, knowledge_base_id=knowledge_base_id
+        )
         return [(doc_id, score) for doc_id, score, _ in results]
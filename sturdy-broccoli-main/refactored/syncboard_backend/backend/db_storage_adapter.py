@@ -8,13 +8,17 @@ Updated for Phase 8: Multi-Knowledge Base support with nested dict structure.
 """
 
 import logging
-from typing import Dict, Tuple
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from .models import DocumentMetadata, Cluster, Concept
 from .db_models import DBUser, DBCluster, DBDocument, DBConcept, DBVectorDocument, DBKnowledgeBase
 from .vector_store import VectorStore
 from .database import get_db_context
+from .config import settings
+from .constants import DB_BULK_LOAD_BATCH_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,11 @@ def load_storage_from_db(
     """
     Load documents, metadata, clusters, and users from database.
 
+    Bulk-load path used at startup and on cache reloads: rows are streamed
+    with ``yield_per``, concepts and cluster memberships are fetched in
+    set-based queries, and the vector index is built once at the end, so
+    load time scales linearly with corpus size.
+
     Args:
         vector_store: VectorStore instance where document embeddings will be added
 
@@ -42,17 +51,46 @@ def load_storage_from_db(
 
     try:
         with get_db_context() as db:
-            # Load vector documents and rebuild vector store
-            # CRITICAL FIX: Load in order and verify doc_id alignment
-            vector_docs = db.query(DBVectorDocument).order_by(DBVectorDocument.doc_id).all()
+            # Load vector documents and build the vector index once at the end.
+            # Rows are streamed as plain tuples; add_document() per row would
+            # refit the TF-IDF index for every document (O(N^2) cold start).
+            # With a snapshot directory configured, the index is memory-mapped
+            # from the latest snapshot and only changed documents re-indexed;
+            # the high-water mark (read first) versions the snapshot.
+            high_water_mark = db.query(func.max(DBVectorDocument.id)).scalar() or 0
+            contents: Dict[int, str] = {}
+            vector_rows = (
+                db.query(DBVectorDocument.doc_id, DBVectorDocument.content)
+                .order_by(DBVectorDocument.doc_id)
+                .yield_per(DB_BULK_LOAD_BATCH_SIZE)
+            )
+            for doc_id, content in vector_rows:
+                contents[doc_id] = content
+            vector_store.load_documents(
+                contents.items(),
+                snapshot_dir=settings.vector_snapshot_dir,
+                snapshot_version=high_water_mark
+            )
 
-            for vdoc in vector_docs:
-                # Add to vector store using the persisted document ID
-                vector_store.add_document(vdoc.content, doc_id=vdoc.doc_id)
+            # Load all concepts in one set-based query instead of
+            # lazy-loading db_doc.concepts per document
+            concepts_by_doc: Dict[int, List[Concept]] = defaultdict(list)
+            concept_rows = db.query(
+                DBConcept.document_id,
+                DBConcept.name,
+                DBConcept.category,
+                DBConcept.confidence
+            ).yield_per(DB_BULK_LOAD_BATCH_SIZE)
+            for document_id, name, category, confidence in concept_rows:
+                concepts_by_doc[document_id].append(
+                    Concept(name=name, category=category, confidence=confidence)
+                )
 
-            # Load document metadata (grouped by knowledge base)
-            db_docs = db.query(DBDocument).all()
-            for db_doc in db_docs:
+            # Load document metadata (grouped by knowledge base).
+            # Cluster memberships are collected here as well, so clusters
+            # don't need to lazy-load db_cluster.documents.
+            cluster_doc_ids: Dict[int, List[int]] = defaultdict(list)
+            for db_doc in db.query(DBDocument).yield_per(DB_BULK_LOAD_BATCH_SIZE):
                 kb_id = db_doc.knowledge_base_id or "default"
 
                 # Ensure KB exists in dicts
@@ -61,25 +99,17 @@ def load_storage_from_db(
                 if kb_id not in metadata:
                     metadata[kb_id] = {}
 
-                # Get content from vector store
-                vdoc = db.query(DBVectorDocument).filter_by(doc_id=db_doc.doc_id).first()
-                if vdoc:
-                    documents[kb_id][db_doc.doc_id] = vdoc.content
+                # Get content from the vector documents loaded above
+                if db_doc.doc_id in contents:
+                    documents[kb_id][db_doc.doc_id] = contents[db_doc.doc_id]
                 else:
                     # Vector document missing - still load metadata but log warning
                     # Document will be visible but content empty
                     logger.warning(f"Vector document missing for doc_id={db_doc.doc_id}, metadata will be loaded but content empty")
                     documents[kb_id][db_doc.doc_id] = ""  # Empty content so doc still appears
 
-                # Load concepts
-                concepts = [
-                    Concept(
-                        name=c.name,
-                        category=c.category,
-                        confidence=c.confidence
-                    )
-                    for c in db_doc.concepts
-                ]
+                if db_doc.cluster_id is not None:
+                    cluster_doc_ids[db_doc.cluster_id].append(db_doc.doc_id)
 
                 metadata[kb_id][db_doc.doc_id] = DocumentMetadata(
                     doc_id=db_doc.doc_id,
@@ -88,7 +118,7 @@ def load_storage_from_db(
                     source_url=db_doc.source_url,
                     filename=db_doc.filename,
                     image_path=db_doc.image_path,
-                    concepts=concepts,
+                    concepts=concepts_by_doc.get(db_doc.id, []),
                     skill_level=db_doc.skill_level,
                     cluster_id=db_doc.cluster_id,
                     knowledge_base_id=db_doc.knowledge_base_id,
@@ -105,7 +135,7 @@ def load_storage_from_db(
                     clusters[kb_id] = {}
 
                 # Get document IDs in this cluster
-                doc_ids = [doc.doc_id for doc in db_cluster.documents]
+                doc_ids = cluster_doc_ids.get(db_cluster.id, [])
 
                 clusters[kb_id][db_cluster.id] = Cluster(
                     id=db_cluster.id,
@@ -130,3 +160,180 @@ def load_storage_from_db(
         logger.warning(f"Database load failed: {e}. Starting with empty state.")
 
     return documents, metadata, clusters, users
+
+
+def apply_data_change(
+    change: dict,
+    vector_store: VectorStore,
+    documents: Dict[str, Dict[int, str]],
+    metadata: Dict[str, Dict[int, DocumentMetadata]],
+    clusters: Dict[str, Dict[int, Cluster]]
+) -> None:
+    """
+    Apply a single data change delta to the in-memory cache.
+
+    Only the documents, clusters or knowledge base named in the delta are
+    re-read from the database; everything else in the cache is left alone.
+
+    Args:
+        change: Delta published by redis_client.notify_data_changed()
+        vector_store: VectorStore instance to update
+        documents: Dict[kb_id, Dict[doc_id, full_text]] to update in place
+        metadata: Dict[kb_id, Dict[doc_id, DocumentMetadata]] to update in place
+        clusters: Dict[kb_id, Dict[cluster_id, Cluster]] to update in place
+
+    Raises:
+        ValueError: If the delta names an entity this function cannot apply
+    """
+    entity = change.get("entity")
+    action = change.get("action")
+    ids = change.get("ids") or []
+
+    if entity == "knowledge_base":
+        kb_id = change.get("knowledge_base_id")
+        if action == "deleted":
+            for doc_id in documents.pop(kb_id, {}):
+                vector_store.remove_document(doc_id)
+            metadata.pop(kb_id, None)
+            clusters.pop(kb_id, None)
+        else:
+            documents.setdefault(kb_id, {})
+            metadata.setdefault(kb_id, {})
+            clusters.setdefault(kb_id, {})
+        return
+
+    if entity == "document" and action == "deleted":
+        _drop_documents(ids, vector_store, documents, metadata, clusters)
+        return
+
+    with get_db_context() as db:
+        if entity == "document":
+            _refresh_documents(db, ids, vector_store, documents, metadata, clusters)
+        elif entity == "cluster":
+            _refresh_clusters(db, ids, clusters)
+        else:
+            raise ValueError(f"Cannot apply data change for entity '{entity}'")
+
+
+def _find_kb(doc_id: int, metadata: Dict[str, Dict[int, DocumentMetadata]]) -> Optional[str]:
+    """Return the cached knowledge base holding ``doc_id``, if any."""
+    for kb_id, kb_metadata in metadata.items():
+        if doc_id in kb_metadata:
+            return kb_id
+    return None
+
+
+def _drop_documents(
+    doc_ids: List[int],
+    vector_store: VectorStore,
+    documents: Dict[str, Dict[int, str]],
+    metadata: Dict[str, Dict[int, DocumentMetadata]],
+    clusters: Dict[str, Dict[int, Cluster]]
+) -> None:
+    """Remove documents from the cache and from their cached clusters."""
+    for doc_id in doc_ids:
+        vector_store.remove_document(doc_id)
+        kb_id = _find_kb(doc_id, metadata)
+        if kb_id is None:
+            continue
+        meta = metadata[kb_id].pop(doc_id)
+        documents.get(kb_id, {}).pop(doc_id, None)
+        cluster = clusters.get(kb_id, {}).get(meta.cluster_id)
+        if cluster and doc_id in cluster.doc_ids:
+            cluster.doc_ids.remove(doc_id)
+            cluster.doc_count = len(cluster.doc_ids)
+
+
+def _refresh_documents(
+    db: Session,
+    doc_ids: List[int],
+    vector_store: VectorStore,
+    documents: Dict[str, Dict[int, str]],
+    metadata: Dict[str, Dict[int, DocumentMetadata]],
+    clusters: Dict[str, Dict[int, Cluster]]
+) -> None:
+    """Re-read documents (and the clusters they left or joined) from the database."""
+    db_docs = db.query(DBDocument).filter(DBDocument.doc_id.in_(doc_ids)).all()
+    contents = dict(
+        db.query(DBVectorDocument.doc_id, DBVectorDocument.content)
+        .filter(DBVectorDocument.doc_id.in_(doc_ids))
+        .all()
+    )
+    concepts_by_doc: Dict[int, List[Concept]] = defaultdict(list)
+    concept_rows = db.query(
+        DBConcept.document_id, DBConcept.name, DBConcept.category, DBConcept.confidence
+    ).filter(DBConcept.document_id.in_([d.id for d in db_docs]))
+    for document_id, name, category, confidence in concept_rows:
+        concepts_by_doc[document_id].append(Concept(name=name, category=category, confidence=confidence))
+
+    # Documents named in the delta but gone from the database were deleted since
+    found = {d.doc_id for d in db_docs}
+    _drop_documents([d for d in doc_ids if d not in found], vector_store, documents, metadata, clusters)
+
+    affected_clusters = set()
+    for db_doc in db_docs:
+        kb_id = db_doc.knowledge_base_id or "default"
+        old_kb_id = _find_kb(db_doc.doc_id, metadata)
+        if old_kb_id is not None:
+            affected_clusters.add(metadata[old_kb_id][db_doc.doc_id].cluster_id)
+            if old_kb_id != kb_id:
+                metadata[old_kb_id].pop(db_doc.doc_id)
+                documents.get(old_kb_id, {}).pop(db_doc.doc_id, None)
+        if db_doc.cluster_id is not None:
+            affected_clusters.add(db_doc.cluster_id)
+
+        content = contents.get(db_doc.doc_id, "")
+        if vector_store.docs.get(db_doc.doc_id) != content:
+            vector_store.add_document(content, doc_id=db_doc.doc_id)
+        documents.setdefault(kb_id, {})[db_doc.doc_id] = content
+        metadata.setdefault(kb_id, {})[db_doc.doc_id] = DocumentMetadata(
+            doc_id=db_doc.doc_id,
+            owner=db_doc.owner_username,
+            source_type=db_doc.source_type,
+            source_url=db_doc.source_url,
+            filename=db_doc.filename,
+            image_path=db_doc.image_path,
+            concepts=concepts_by_doc.get(db_doc.id, []),
+            skill_level=db_doc.skill_level,
+            cluster_id=db_doc.cluster_id,
+            knowledge_base_id=db_doc.knowledge_base_id,
+            ingested_at=db_doc.ingested_at.isoformat() if db_doc.ingested_at else None,
+            content_length=db_doc.content_length
+        )
+
+    affected_clusters.discard(None)
+    if affected_clusters:
+        _refresh_clusters(db, list(affected_clusters), clusters)
+
+
+def _refresh_clusters(
+    db: Session,
+    cluster_ids: List[int],
+    clusters: Dict[str, Dict[int, Cluster]]
+) -> None:
+    """Re-read clusters and their memberships; drop clusters no longer in the database."""
+    db_clusters = db.query(DBCluster).filter(DBCluster.id.in_(cluster_ids)).all()
+    members: Dict[int, List[int]] = defaultdict(list)
+    member_rows = db.query(DBDocument.cluster_id, DBDocument.doc_id).filter(
+        DBDocument.cluster_id.in_(cluster_ids)
+    )
+    for cluster_id, doc_id in member_rows:
+        members[cluster_id].append(doc_id)
+
+    # Remove stale copies (deleted clusters, or clusters that moved KB)
+    for kb_clusters in clusters.values():
+        for cluster_id in cluster_ids:
+            kb_clusters.pop(cluster_id, None)
+
+    for db_cluster in db_clusters:
+        kb_id = db_cluster.knowledge_base_id or "default"
+        doc_ids = members.get(db_cluster.id, [])
+        clusters.setdefault(kb_id, {})[db_cluster.id] = Cluster(
+            id=db_cluster.id,
+            name=db_cluster.name,
+            doc_ids=doc_ids,
+            primary_concepts=db_cluster.primary_concepts,
+            skill_level=db_cluster.skill_level,
+            knowledge_base_id=db_cluster.knowledge_base_id,
+            doc_count=len(doc_ids)
+        )
@@ -19,6 +19,7 @@ from .models import User, DocumentMetadata, Cluster
 from .vector_store import VectorStore
 from .concept_extractor import ConceptExtractor
 from .clustering import ImprovedClusteringEngine
+from .embedding_clustering import EmbeddingClusteringEngine
 from .image_processor import ImageProcessor
 from .build_suggester import ImprovedBuildSuggester
 from .semantic_dictionary import SemanticDictionaryManager
@@ -43,7 +44,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 # =============================================================================
 
 # Vector store for semantic search (shared across all KBs, filtered by allowed_doc_ids)
-vector_store = VectorStore(dim=settings.vector_dim)
+vector_store = VectorStore(dim=settings.vector_dim, incremental=settings.vector_store_incremental)
 
 # Document storage (in-memory) - nested by knowledge_base_id
 # Structure: {kb_id: {doc_id: content/metadata/cluster}}
@@ -76,7 +77,11 @@ semantic_dictionary = SemanticDictionaryManager(llm_provider=llm_provider)
 
 # Core services
 concept_extractor = ConceptExtractor()
-clustering_engine = ImprovedClusteringEngine(semantic_dict=semantic_dictionary)
+clustering_engine = (
+    EmbeddingClusteringEngine(semantic_dict=semantic_dictionary)
+    if settings.clustering_mode == "embeddings"
+    else ImprovedClusteringEngine(semantic_dict=semantic_dictionary)
+)
 image_processor = ImageProcessor()
 build_suggester = ImprovedBuildSuggester(llm_provider=llm_provider)
 
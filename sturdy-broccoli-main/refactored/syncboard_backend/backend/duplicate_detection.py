@@ -1,16 +1,20 @@
 """
 Duplicate detection service (Phase 7.2).
 
-Uses TF-IDF vector similarity to identify potentially duplicate documents.
+Finds near-duplicate documents with the MinHash/LSH duplicate index:
+candidate pairs come from shared LSH buckets and are verified with the
+exact Jaccard similarity of their word shingles. Pairwise comparisons
+use TF-IDF vector similarity.
 """
 
 import logging
-from typing import List, Tuple, Dict, Any
+from collections import defaultdict
+from typing import Iterable, List, Tuple, Dict, Any
 from sqlalchemy.orm import Session
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 
+from .constants import DB_BULK_LOAD_BATCH_SIZE, DUPLICATE_DEFAULT_THRESHOLD
 from .db_models import DBDocument, DBVectorDocument
+from .duplicate_index import get_duplicate_index, jaccard, shingles
 from .vector_store import VectorStore
 
 logger = logging.getLogger(__name__)
@@ -63,44 +67,60 @@ class DuplicateDetector:
 
         return None
 
-    def _build_duplicate_list(self, duplicates: list, duplicate_docs_meta: list) -> list:
+    def _fetch_contents(self, doc_ids: Iterable[int]) -> Dict[int, str]:
+        """Load document contents in batched queries."""
+        doc_ids = list(doc_ids)
+        contents = {}
+        for start in range(0, len(doc_ids), DB_BULK_LOAD_BATCH_SIZE):
+            batch = doc_ids[start:start + DB_BULK_LOAD_BATCH_SIZE]
+            contents.update(self.db.query(DBVectorDocument.doc_id, DBVectorDocument.content).filter(
+                DBVectorDocument.doc_id.in_(batch)
+            ))
+        return contents
+
+    def _describe_document(self, doc_id: int, meta: DBDocument, content: str) -> Dict[str, Any]:
+        """Summary of a document for duplicate listings, with a title extracted from content."""
+        return {
+            "doc_id": doc_id,
+            "title": self._extract_title_from_content(content or "", meta.source_type if meta else ""),
+            "source_type": meta.source_type if meta else None,
+            "source_url": meta.source_url if meta else None,
+            "filename": meta.filename if meta else None,
+            "skill_level": meta.skill_level if meta else None,
+            "cluster_id": meta.cluster_id if meta else None,
+            "created_at": meta.ingested_at.isoformat() if meta and meta.ingested_at else None
+        }
+
+    def _build_duplicate_list(
+        self,
+        duplicates: list,
+        docs_by_id: Dict[int, DBDocument],
+        contents: Dict[int, str]
+    ) -> list:
         """Build list of duplicate documents with titles extracted from content."""
         result = []
         for dup in duplicates:
             doc_id = dup["doc_id"]
-            meta = next((d for d in duplicate_docs_meta if d.doc_id == doc_id), None)
-
-            # Get content for title extraction
-            doc_vec = self.db.query(DBVectorDocument).filter(
-                DBVectorDocument.doc_id == doc_id
-            ).first()
-            title = self._extract_title_from_content(
-                doc_vec.content if doc_vec else "",
-                meta.source_type if meta else ""
-            )
-
-            result.append({
-                "doc_id": doc_id,
-                "similarity": dup["similarity"],
-                "title": title,
-                "source_type": meta.source_type if meta else None,
-                "source_url": meta.source_url if meta else None,
-                "filename": meta.filename if meta else None,
-                "skill_level": meta.skill_level if meta else None,
-                "cluster_id": meta.cluster_id if meta else None,
-                "created_at": meta.ingested_at.isoformat() if meta and meta.ingested_at else None
-            })
+            entry = self._describe_document(doc_id, docs_by_id.get(doc_id), contents.get(doc_id))
+            entry["similarity"] = dup["similarity"]
+            result.append(entry)
         return result
 
     def find_duplicates(
         self,
         username: str,
-        similarity_threshold: float = 0.85,
+        similarity_threshold: float = DUPLICATE_DEFAULT_THRESHOLD,
         limit: int = 100
     ) -> Dict[str, Any]:
         """
         Find duplicate documents based on content similarity.
 
+        Candidate pairs come from the duplicate index's LSH buckets; only
+        those are verified, so the cost follows the number of near-duplicates
+        rather than the square of the number of documents. Similarities are
+        Jaccard similarities of word shingles; below DUPLICATE_MIN_THRESHOLD
+        the LSH bands miss a growing share of pairs.
+
         Args:
             username: Username to filter documents
             similarity_threshold: Minimum similarity score (0-1) to consider duplicates
@@ -109,7 +129,7 @@ class DuplicateDetector:
         Returns:
             Dictionary with duplicate_groups and total_duplicates_found
         """
-        # Get user's documents with content for title extraction
+        # Get user's documents (metadata for the listings)
         user_docs = self.db.query(DBDocument).filter(
             DBDocument.owner_username == username
         ).all()
@@ -117,33 +137,35 @@ class DuplicateDetector:
         if len(user_docs) < 2:
             return {"duplicate_groups": [], "total_duplicates_found": 0}
 
-        doc_ids = [doc.doc_id for doc in user_docs]
+        docs_by_id = {doc.doc_id: doc for doc in user_docs}
+
+        # Candidate pairs from shared LSH buckets
+        index = get_duplicate_index(self.db)
+        index.sync(self.db)
+        candidate_pairs = index.candidate_pairs(docs_by_id)
+
+        # Verify candidates exactly (contents fetched in batches, once)
+        contents = self._fetch_contents({doc_id for pair in candidate_pairs for doc_id in pair})
+        doc_shingles = {doc_id: shingles(content) for doc_id, content in contents.items()}
+        similar: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+        for doc_id1, doc_id2 in candidate_pairs:
+            similarity = jaccard(doc_shingles.get(doc_id1, set()), doc_shingles.get(doc_id2, set()))
+            if similarity >= similarity_threshold:
+                similar[doc_id1].append((doc_id2, similarity))
+                similar[doc_id2].append((doc_id1, similarity))
 
-        # Find duplicates using vector similarity
         duplicate_groups = []
 
         # Track which documents we've already grouped
         grouped_docs = set()
 
-        for i, doc_id1 in enumerate(doc_ids):
-            if doc_id1 in grouped_docs:
+        for doc_id1 in docs_by_id:
+            if doc_id1 in grouped_docs or doc_id1 not in similar:
                 continue
 
-            # Find similar documents
-            similar_docs = self.vector_store.search_by_doc_id(
-                doc_id1,
-                top_k=min(20, len(doc_ids))
-            )
-
-            # Filter by similarity threshold and user's documents
             duplicates = []
-            for sim_doc_id, similarity in similar_docs:
-                if (
-                    sim_doc_id != doc_id1
-                    and sim_doc_id in doc_ids
-                    and sim_doc_id not in grouped_docs
-                    and similarity >= similarity_threshold
-                ):
+            for sim_doc_id, similarity in sorted(similar[doc_id1], key=lambda s: s[1], reverse=True):
+                if sim_doc_id not in grouped_docs:
                     duplicates.append({
                         "doc_id": sim_doc_id,
                         "similarity": float(similarity)
@@ -151,35 +173,9 @@ class DuplicateDetector:
                     grouped_docs.add(sim_doc_id)
 
             if duplicates:
-                # Get document metadata
-                main_doc = next((d for d in user_docs if d.doc_id == doc_id1), None)
-
-                duplicate_ids = [d["doc_id"] for d in duplicates]
-                duplicate_docs_meta = [
-                    d for d in user_docs if d.doc_id in duplicate_ids
-                ]
-
-                # Get content for title extraction
-                main_doc_vec = self.db.query(DBVectorDocument).filter(
-                    DBVectorDocument.doc_id == doc_id1
-                ).first()
-                main_doc_title = self._extract_title_from_content(
-                    main_doc_vec.content if main_doc_vec else "",
-                    main_doc.source_type if main_doc else ""
-                )
-
                 group = {
-                    "primary_doc": {
-                        "doc_id": doc_id1,
-                        "title": main_doc_title,
-                        "source_type": main_doc.source_type if main_doc else None,
-                        "source_url": main_doc.source_url if main_doc else None,
-                        "filename": main_doc.filename if main_doc else None,
-                        "skill_level": main_doc.skill_level if main_doc else None,
-                        "cluster_id": main_doc.cluster_id if main_doc else None,
-                        "created_at": main_doc.ingested_at.isoformat() if main_doc and main_doc.ingested_at else None
-                    },
-                    "duplicates": self._build_duplicate_list(duplicates, duplicate_docs_meta),
+                    "primary_doc": self._describe_document(doc_id1, docs_by_id[doc_id1], contents.get(doc_id1)),
+                    "duplicates": self._build_duplicate_list(duplicates, docs_by_id, contents),
                     "group_size": len(duplicates) + 1
                 }
 
@@ -420,6 +416,10 @@ class DuplicateDetector:
 
         self.db.commit()
 
+        duplicate_index = get_duplicate_index(self.db)
+        for doc_id in deleted_ids:
+            duplicate_index.remove(doc_id)
+
         logger.info(f"Merged duplicates: kept doc {keep_doc_id}, deleted {len(deleted_ids)} documents")
 
         return {
@@ -0,0 +1,364 @@
+"""
+Near-duplicate document index for SyncBoard 3.0.
+
+DuplicateDetector used to score every document of a user against the
+whole corpus (O(N^2)). Instead every document gets a MinHash signature of
+its word shingles, split into LSH bands, and an exact content hash:
+- Documents sharing a band bucket become candidate pairs; only those are
+  verified with an exact shingle Jaccard similarity
+- Checking a new text against the index is a handful of dict lookups,
+  so an upload can be checked before anything is spent on it
+  (find_duplicate: identical content first, then near-duplicates)
+- Kept current like SharedVectorIndex: loaded once per process, updated
+  directly by repository writes, and synced by a (count, max id)
+  watermark for writes made by other processes
+"""
+
+import hashlib
+import logging
+import re
+import time
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .db_models import DBDocument, DBVectorDocument
+from .constants import (
+    DB_BULK_LOAD_BATCH_SIZE,
+    DUPLICATE_INDEX_SYNC_INTERVAL_SECONDS,
+    DUPLICATE_LSH_BANDS,
+    DUPLICATE_MINHASH_PERMUTATIONS,
+    DUPLICATE_SHINGLE_WORDS,
+)
+from .watermark_index import EngineRegistry, WatermarkIndex
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_HASH_BLOCK = 4096  # Shingles hashed per numpy block (bounds memory on huge documents)
+
+# Fixed seed: signatures are comparable across processes and restarts
+_rng = np.random.RandomState(20240607)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=DUPLICATE_MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=DUPLICATE_MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(content: str, size: int = DUPLICATE_SHINGLE_WORDS) -> Set[int]:
+    """Hashed word shingles of a text (the text itself if it is shorter than one shingle)."""
+    words = _WORD.findall((content or "").lower())
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def content_hash(content: str) -> bytes:
+    """Fingerprint for exact duplicates."""
+    return hashlib.sha256((content or "").encode("utf-8", "ignore")).digest()
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    """Exact Jaccard similarity of two shingle sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_signature(shingle_hashes: Iterable[int]) -> np.ndarray:
+    """MinHash signature (DUPLICATE_MINHASH_PERMUTATIONS uint32 values) of a shingle set."""
+    hashes = np.fromiter(shingle_hashes, dtype=np.uint64)
+    signature = np.full(DUPLICATE_MINHASH_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+    for start in range(0, len(hashes), _HASH_BLOCK):
+        block = hashes[start:start + _HASH_BLOCK, np.newaxis]
+        permuted = ((block * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+        np.minimum(signature, permuted.min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+
+class DuplicateMatch(NamedTuple):
+    """An indexed document matching a text."""
+    doc_id: int
+    similarity: float  # 1.0 for identical content, else estimated Jaccard similarity
+    exact: bool
+
+
+class DuplicateIndex(WatermarkIndex):
+    """MinHash/LSH index (plus exact content hashes) over every stored document."""
+
+    def __init__(
+        self,
+        bands: int = DUPLICATE_LSH_BANDS,
+        sync_interval: float = DUPLICATE_INDEX_SYNC_INTERVAL_SECONDS
+    ):
+        """
+        Initialize an empty, not-yet-loaded index.
+
+        Args:
+            bands: Number of LSH bands the signature is split into
+            sync_interval: Minimum seconds between watermark checks
+        """
+        if DUPLICATE_MINHASH_PERMUTATIONS % bands:
+            raise ValueError(f"{DUPLICATE_MINHASH_PERMUTATIONS} permutations do not split into {bands} bands")
+        super().__init__(sync_interval)
+        self.bands = bands
+        self._signatures: Dict[int, bytes] = {}
+        self._band_keys: Dict[int, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(bands)]
+        self._owner_of: Dict[int, Optional[str]] = {}
+        self._kb_of: Dict[int, Optional[str]] = {}
+        self._hash_of: Dict[int, bytes] = {}
+        self._exact: Dict[Tuple[Optional[str], bytes], Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._owner_of)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._owner_of
+
+    # -------------------------------------------------------------------------
+    # Synchronization
+    # -------------------------------------------------------------------------
+
+    def add(
+        self,
+        doc_id: int,
+        content: str,
+        owner: Optional[str] = None,
+        knowledge_base_id: Optional[str] = None,
+        row_id: Optional[int] = None
+    ) -> None:
+        """
+        Apply a document committed by this process.
+
+        Args:
+            doc_id: Document ID
+            content: Document text
+            owner: Owning username
+            knowledge_base_id: Knowledge base of the document
+            row_id: vector_documents row id (advances the watermark)
+        """
+        with self._lock:
+            if not self._loaded:
+                return  # The first load reads it from the database
+            if doc_id not in self._owner_of:
+                self._row_count += 1
+            self._add(doc_id, content, owner, knowledge_base_id)
+            if row_id is not None:
+                self._max_row_id = max(self._max_row_id, row_id)
+            self.version += 1
+
+    def remove(self, doc_id: int) -> None:
+        """Apply a document deleted by this process."""
+        with self._lock:
+            if doc_id in self._owner_of:
+                self._remove(doc_id)
+                self._row_count -= 1
+                self.version += 1
+
+    def _rows(self, db: Session):
+        """Query (row id, doc_id, content, owner, knowledge_base_id) for vector rows."""
+        return db.query(
+            DBVectorDocument.id,
+            DBVectorDocument.doc_id,
+            DBVectorDocument.content,
+            DBDocument.owner_username,
+            DBDocument.knowledge_base_id
+        ).outerjoin(DBDocument, DBDocument.doc_id == DBVectorDocument.doc_id)
+
+    def _watermark(self, db: Session) -> Tuple[int, int]:
+        row_count, max_row_id = db.query(
+            func.count(DBVectorDocument.id), func.max(DBVectorDocument.id)
+        ).one()
+        return row_count, max_row_id or 0
+
+    def _load_rows(self, db: Session) -> None:
+        started = time.monotonic()
+        self._add_rows(self._rows(db).order_by(DBVectorDocument.id).yield_per(DB_BULK_LOAD_BATCH_SIZE))
+        logger.info(
+            f"Loaded duplicate index of {len(self)} documents in {time.monotonic() - started:.1f}s"
+        )
+
+    def _add_rows_after(self, db: Session, row_id: int) -> None:
+        self._add_rows(self._rows(db).filter(DBVectorDocument.id > row_id))
+
+    def _reconcile(self, db: Session) -> None:
+        db_doc_ids = {doc_id for (doc_id,) in db.query(DBVectorDocument.doc_id)}
+        for doc_id in set(self._owner_of) - db_doc_ids:
+            self._remove(doc_id)
+        missing = db_doc_ids - set(self._owner_of)
+        if missing:
+            self._add_rows(self._rows(db).filter(DBVectorDocument.doc_id.in_(missing)))
+
+    # -------------------------------------------------------------------------
+    # Signatures and buckets
+    # -------------------------------------------------------------------------
+
+    def _add_rows(self, rows) -> None:
+        for _, doc_id, content, owner, kb_id in rows:
+            self._add(doc_id, content, owner, kb_id)
+
+    def _band_keys_of(self, signature: np.ndarray) -> Tuple[int, ...]:
+        return tuple(hash(band.tobytes()) for band in signature.reshape(self.bands, -1))
+
+    def _add(self, doc_id: int, content: str, owner: Optional[str], kb_id: Optional[str]) -> None:
+        """Index one document, replacing any previous version of it."""
+        if doc_id in self._owner_of:
+            self._remove(doc_id)
+        self._owner_of[doc_id] = owner
+        self._kb_of[doc_id] = kb_id
+        doc_shingles = shingles(content)
+        if not doc_shingles:
+            return  # Empty documents are never duplicates
+        digest = content_hash(content)
+        self._hash_of[doc_id] = digest
+        self._exact.setdefault((kb_id, digest), set()).add(doc_id)
+        signature = minhash_signature(doc_shingles)
+        keys = self._band_keys_of(signature)
+        self._signatures[doc_id] = signature.tobytes()
+        self._band_keys[doc_id] = keys
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, set()).add(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        self._signatures.pop(doc_id, None)
+        self._owner_of.pop(doc_id, None)
+        kb_id = self._kb_of.pop(doc_id, None)
+        digest = self._hash_of.pop(doc_id, None)
+        if digest is not None:
+            same_content = self._exact[(kb_id, digest)]
+            same_content.discard(doc_id)
+            if not same_content:
+                del self._exact[(kb_id, digest)]
+        for band, key in enumerate(self._band_keys.pop(doc_id, ())):
+            bucket = self._buckets[band][key]
+            bucket.discard(doc_id)
+            if not bucket:
+                del self._buckets[band][key]
+
+    def _estimate(self, signature: np.ndarray, doc_id: int) -> float:
+        """Estimated Jaccard similarity: the share of equal signature values."""
+        other = np.frombuffer(self._signatures[doc_id], dtype=np.uint32)
+        return float(np.mean(signature == other))
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def candidate_pairs(self, doc_ids: Iterable[int]) -> Set[Tuple[int, int]]:
+        """
+        Pairs of the given documents that share at least one LSH bucket.
+
+        Args:
+            doc_ids: Documents to pair up (e.g. one user's documents)
+
+        Returns:
+            (smaller doc_id, larger doc_id) pairs, both from ``doc_ids``
+        """
+        with self._lock:
+            allowed = set(doc_ids)
+            pairs: Set[Tuple[int, int]] = set()
+            for doc_id in allowed:
+                for band, key in enumerate(self._band_keys.get(doc_id, ())):
+                    for other in self._buckets[band][key]:
+                        if other > doc_id and other in allowed:
+                            pairs.add((doc_id, other))
+            return pairs
+
+    def find_similar(
+        self,
+        db: Session,
+        content: str,
+        min_similarity: float = 0.0,
+        owner: Optional[str] = None,
+        knowledge_base_id: Optional[str] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find indexed documents that are near-duplicates of a text.
+
+        Args:
+            db: Database session (used only when the index needs syncing)
+            content: Text to check
+            min_similarity: Minimum estimated Jaccard similarity
+            owner: Only consider this user's documents
+            knowledge_base_id: Only consider this knowledge base's documents
+
+        Returns:
+            (doc_id, estimated similarity) pairs, most similar first
+        """
+        content_shingles = shingles(content)
+        if not content_shingles:
+            return []
+        signature = minhash_signature(content_shingles)
+        keys = self._band_keys_of(signature)
+
+        with self._lock:
+            self.sync(db)
+            candidates: Set[int] = set()
+            for band, key in enumerate(keys):
+                candidates |= self._buckets[band].get(key, set())
+
+            matches = []
+            for doc_id in candidates:
+                if owner is not None and self._owner_of.get(doc_id) != owner:
+                    continue
+                if knowledge_base_id is not None and self._kb_of.get(doc_id) != knowledge_base_id:
+                    continue
+                similarity = self._estimate(signature, doc_id)
+                if similarity >= min_similarity:
+                    matches.append((doc_id, similarity))
+            return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def find_duplicate(
+        self,
+        db: Session,
+        content: str,
+        knowledge_base_id: Optional[str],
+        min_similarity: float = 1.0
+    ) -> Optional[DuplicateMatch]:
+        """
+        Find the stored document of a knowledge base that a text duplicates.
+
+        Identical content is found by hash; otherwise the most similar
+        near-duplicate at or above ``min_similarity`` is returned.
+
+        Args:
+            db: Database session (used only when the index needs syncing)
+            content: Text to check
+            knowledge_base_id: Knowledge base to look in
+            min_similarity: Minimum estimated Jaccard similarity for near-duplicates
+
+        Returns:
+            The match, or None if the text is new to the knowledge base
+        """
+        if not shingles(content):
+            return None
+        with self._lock:
+            self.sync(db)
+            same_content = self._exact.get((knowledge_base_id, content_hash(content)))
+            if same_content:
+                return DuplicateMatch(min(same_content), 1.0, True)
+            if min_similarity >= 1.0:
+                return None
+            matches = self.find_similar(db, content, min_similarity, knowledge_base_id=knowledge_base_id)
+        if not matches:
+            return None
+        doc_id, similarity = matches[0]
+        return DuplicateMatch(doc_id, similarity, False)
+
+
+# One index per database engine; throwaway test engines get their own
+_indexes = EngineRegistry()
+
+
+def get_duplicate_index(db: Session) -> DuplicateIndex:
+    """Get the process-wide duplicate index for the engine ``db`` is bound to."""
+    return _indexes.get(db, DuplicateIndex)
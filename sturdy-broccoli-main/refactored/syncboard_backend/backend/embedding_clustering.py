@@ -0,0 +1,453 @@
+"""
+Embedding-centroid clustering for SyncBoard 3.0.
+
+ImprovedClusteringEngine groups documents by the names of their LLM
+concepts only, although every document also gets chunk embeddings. With
+settings.clustering_mode = "embeddings", EmbeddingClusteringEngine places
+documents by embedding instead:
+- A document's embedding is the mean of its normalised chunk embeddings.
+  At upload its chunks are embedded before clustering; the chunking
+  pipeline then finds those embeddings in the embedding cache
+- Every cluster keeps a float32 centroid (running sum of its documents'
+  embeddings), updated in create_cluster / add_to_cluster, so assigning
+  a document is one matrix-vector product against all centroids of a KB
+- Centroids of clusters that grew elsewhere (other workers, restarts) are
+  rebuilt from stored chunk embeddings
+- recluster_knowledge_base regroups a whole KB offline with mini-batch
+  k-means or HDBSCAN, from stored embeddings only
+Without an embedding, or before any cluster has a centroid, matching falls
+back to concepts.
+"""
+
+import logging
+import math
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.cluster import HDBSCAN, MiniBatchKMeans
+from sqlalchemy.orm import Session
+
+from .chunk_embedding_index import get_chunk_index, normalize_rows
+from .clustering import ImprovedClusteringEngine
+from .constants import (
+    CLUSTER_CENTROID_MIN_SIMILARITY,
+    CLUSTER_HDBSCAN_MIN_SIZE,
+    CLUSTER_KMEANS_BATCH_SIZE,
+    CLUSTER_SIGNATURE_CACHE_SIZE,
+    DB_BULK_LOAD_BATCH_SIZE,
+)
+from .db_models import DBCluster, DBConcept, DBDocument
+from .document_chunker import get_document_chunker
+from .embedding_service import get_embedding_service
+from .models import Cluster
+from .semantic_dictionary import SemanticDictionaryManager
+
+logger = logging.getLogger(__name__)
+
+
+def mean_embedding(vectors: List[Optional[List[float]]]) -> Optional[np.ndarray]:
+    """Normalised mean of normalised vectors (None if there are none)."""
+    vectors = [v for v in vectors if v is not None and len(v)]
+    if not vectors:
+        return None
+    total = normalize_rows(np.asarray(vectors, dtype=np.float32)).sum(axis=0)
+    norm = np.linalg.norm(total)
+    return total / norm if norm > 0 else None
+
+
+async def embed_documents(contents: List[str]) -> List[Optional[np.ndarray]]:
+    """
+    Embed documents for clustering as the mean of their chunk embeddings.
+
+    The chunks are the ones the chunking pipeline will store; all of them
+    are embedded in one embed_batch() call.
+
+    Returns:
+        One embedding per document (None if it could not be embedded)
+    """
+    chunker = get_document_chunker()
+    chunk_texts = [[chunk.content for chunk in chunker.chunk_document(content)] for content in contents]
+    flat = [text for texts in chunk_texts for text in texts]
+    vectors = iter(await get_embedding_service().embed_batch(flat) if flat else [])
+    return [mean_embedding([next(vectors) for _ in texts]) for texts in chunk_texts]
+
+
+class CentroidIndex:
+    """Float32 centroids of the clusters of one cluster collection (one KB)."""
+
+    def __init__(self):
+        # Rows belong to Cluster objects, which keep their row when the
+        # repository re-keys a new cluster to its database ID
+        self._clusters: List[Cluster] = []
+        self._row_of: Dict[int, int] = {}  # id(Cluster) -> row
+        self._seen: List[int] = []  # cluster.doc_count each row accounts for
+        self._counts = np.zeros(0, dtype=np.int64)  # Embedded documents per row
+        self._sums = np.zeros((0, 0), dtype=np.float32)
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        """Number of clusters with a centroid."""
+        return int(np.count_nonzero(self._counts[:len(self._clusters)]))
+
+    @property
+    def dim(self) -> int:
+        return self._sums.shape[1]
+
+    def _row(self, cluster: Cluster) -> int:
+        row = self._row_of.get(id(cluster))
+        if row is None:
+            row = self._row_of[id(cluster)] = len(self._clusters)
+            self._clusters.append(cluster)
+            self._seen.append(0)
+            if row >= len(self._counts):
+                capacity = max(2 * len(self._counts), 64)
+                self._counts = self._grow(self._counts, (capacity,))
+                self._sums = self._grow(self._sums, (capacity, self.dim))
+                self._centroids = self._grow(self._centroids, (capacity, self.dim))
+        return row
+
+    @staticmethod
+    def _grow(array: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        grown = np.zeros(shape, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _fits(self, embedding: np.ndarray) -> bool:
+        if not self.dim:
+            # The first embedding fixes the dimension
+            self._sums = np.zeros((len(self._counts), len(embedding)), dtype=np.float32)
+            self._centroids = np.zeros_like(self._sums)
+        elif len(embedding) != self.dim:
+            logger.warning(f"Ignoring a {len(embedding)}-dim embedding for {self.dim}-dim cluster centroids")
+            return False
+        return True
+
+    def _update_centroid(self, row: int) -> None:
+        norm = np.linalg.norm(self._sums[row])
+        self._centroids[row] = self._sums[row] / norm if norm > 0 else 0.0
+
+    def add(self, cluster: Cluster, embedding: np.ndarray) -> None:
+        """Fold one more document into a cluster's centroid."""
+        if not self._fits(embedding):
+            return
+        row = self._row(cluster)
+        self._sums[row] += embedding
+        self._counts[row] += 1
+        self._update_centroid(row)
+        self._seen[row] = cluster.doc_count
+
+    def reset(self, cluster: Cluster, embeddings: List[np.ndarray]) -> None:
+        """Set a cluster's centroid from all of its documents' embeddings."""
+        embeddings = [e for e in embeddings if self._fits(e)]
+        row = self._row(cluster)
+        self._sums[row] = np.sum(embeddings, axis=0) if embeddings else 0.0
+        self._counts[row] = len(embeddings)
+        self._update_centroid(row)
+        self._seen[row] = cluster.doc_count
+
+    def stale(self, clusters: Dict[int, Cluster]) -> List[Cluster]:
+        """Drop rows of clusters that left the collection; return clusters whose centroid is out of date."""
+        present = {id(cluster) for cluster in clusters.values()}
+        keep = [row for row, cluster in enumerate(self._clusters) if id(cluster) in present]
+        if len(keep) != len(self._clusters):
+            self._clusters = [self._clusters[row] for row in keep]
+            self._seen = [self._seen[row] for row in keep]
+            self._counts = self._counts[keep]
+            self._sums = self._sums[keep]
+            self._centroids = self._centroids[keep]
+            self._row_of = {id(cluster): row for row, cluster in enumerate(self._clusters)}
+        return [
+            cluster for cluster in clusters.values()
+            if id(cluster) not in self._row_of or self._seen[self._row_of[id(cluster)]] != cluster.doc_count
+        ]
+
+    def best(self, embedding: np.ndarray, clusters: Dict[int, Cluster]) -> Optional[Tuple[int, float]]:
+        """(cluster_id, cosine similarity) of the closest centroid still in ``clusters``."""
+        n = len(self._clusters)
+        if not n or len(embedding) != self.dim:
+            return None
+        scores = self._centroids[:n] @ embedding
+        scores[self._counts[:n] == 0] = -np.inf
+        while True:
+            row = int(np.argmax(scores))
+            if scores[row] == -np.inf:
+                return None
+            cluster = self._clusters[row]
+            if clusters.get(cluster.id) is cluster:
+                return cluster.id, float(scores[row])
+            scores[row] = -np.inf  # Left the collection since the last sync
+
+
+class EmbeddingClusteringEngine(ImprovedClusteringEngine):
+    """
+    Clustering by document embedding against per-cluster centroids.
+
+    Drop-in for ImprovedClusteringEngine: the extra ``embedding`` arguments
+    are optional, and concept matching is used whenever they are missing.
+    """
+
+    def __init__(
+        self,
+        semantic_dict: Optional[SemanticDictionaryManager] = None,
+        min_similarity: float = CLUSTER_CENTROID_MIN_SIMILARITY
+    ):
+        """
+        Initialize embedding clustering engine.
+
+        Args:
+            semantic_dict: Semantic dictionary manager for the concept fallback
+            min_similarity: Minimum cosine similarity to join an existing cluster
+        """
+        super().__init__(semantic_dict)
+        self.min_similarity = min_similarity
+        # Centroids per cluster collection; the collection itself is kept so its id() stays unique
+        self._centroids: "OrderedDict[int, Tuple[Dict[int, Cluster], CentroidIndex]]" = OrderedDict()
+
+    def _centroid_index(self, clusters: Dict[int, Cluster]) -> CentroidIndex:
+        with self._lock:
+            entry = self._centroids.get(id(clusters))
+            if entry is None or entry[0] is not clusters:
+                entry = self._centroids[id(clusters)] = (clusters, CentroidIndex())
+                while len(self._centroids) > CLUSTER_SIGNATURE_CACHE_SIZE:
+                    self._centroids.popitem(last=False)
+            self._centroids.move_to_end(id(clusters))
+            return entry[1]
+
+    def sync_centroids(self, db: Session, kb_id: str, clusters: Dict[int, Cluster]) -> None:
+        """
+        Rebuild the centroids of clusters this process has not seen change.
+
+        Covers clusters created or grown by other processes, and the first
+        use after a restart; clusters kept current by add_to_cluster are skipped.
+
+        Args:
+            db: Database session
+            kb_id: Knowledge base the clusters belong to
+            clusters: The KB's clusters
+        """
+        with self._lock:
+            index = self._centroid_index(clusters)
+            stale = index.stale(clusters)
+            if not stale:
+                return
+
+            doc_ids = [doc_id for cluster in stale for doc_id in cluster.doc_ids]
+            query = db.query(DBDocument.doc_id, DBDocument.id).filter(DBDocument.knowledge_base_id == kb_id)
+            if len(doc_ids) <= DB_BULK_LOAD_BATCH_SIZE:
+                query = query.filter(DBDocument.doc_id.in_(doc_ids))
+            internal_ids = dict(query.all())
+            chunk_index = get_chunk_index(db, kb_id)
+            chunk_index.sync(db, force=True)  # The stale clusters' chunks were written elsewhere
+            embeddings = chunk_index.document_embeddings(db, internal_ids.values())
+
+            for cluster in stale:
+                index.reset(cluster, [
+                    embeddings[internal_ids[doc_id]] for doc_id in cluster.doc_ids
+                    if internal_ids.get(doc_id) in embeddings
+                ])
+            logger.debug(f"Rebuilt {len(stale)} cluster centroids for KB {kb_id}")
+
+    def find_best_cluster(
+        self,
+        doc_concepts: List[Dict],
+        suggested_name: str,
+        existing_clusters: Dict[int, Cluster],
+        embedding: Optional[np.ndarray] = None
+    ) -> Optional[int]:
+        """
+        Find the cluster whose centroid is closest to a document's embedding.
+
+        Falls back to concept matching without an embedding, or while no
+        cluster of the collection has a centroid yet.
+        """
+        if embedding is None or not existing_clusters:
+            return super().find_best_cluster(doc_concepts, suggested_name, existing_clusters)
+
+        with self._lock:
+            index = self._centroid_index(existing_clusters)
+            if not len(index):
+                return super().find_best_cluster(doc_concepts, suggested_name, existing_clusters)
+            match = index.best(embedding, existing_clusters)
+
+        if match is not None and match[1] >= self.min_similarity:
+            logger.info(f"Found embedding match: cluster {match[0]} (similarity: {match[1]:.2f})")
+            return match[0]
+        return None
+
+    def create_cluster(
+        self,
+        doc_id: int,
+        name: str,
+        concepts: List[Dict],
+        skill_level: str,
+        existing_clusters: Dict[int, Cluster],
+        embedding: Optional[np.ndarray] = None
+    ) -> int:
+        """Create new cluster; its centroid starts at the document's embedding."""
+        cluster_id = super().create_cluster(doc_id, name, concepts, skill_level, existing_clusters)
+        if embedding is not None:
+            with self._lock:
+                self._centroid_index(existing_clusters).add(existing_clusters[cluster_id], embedding)
+        return cluster_id
+
+    def add_to_cluster(
+        self,
+        cluster_id: int,
+        doc_id: int,
+        clusters: Dict[int, Cluster],
+        embedding: Optional[np.ndarray] = None
+    ):
+        """Add document to cluster and fold its embedding into the centroid."""
+        cluster = clusters.get(cluster_id)
+        joins = cluster is not None and doc_id not in cluster.doc_ids
+        super().add_to_cluster(cluster_id, doc_id, clusters)
+        if joins and embedding is not None:
+            with self._lock:
+                self._centroid_index(clusters).add(cluster, embedding)
+
+
+# =============================================================================
+# Offline re-clustering
+# =============================================================================
+
+def cluster_labels(
+    embeddings: np.ndarray,
+    method: str = "kmeans",
+    n_clusters: Optional[int] = None
+) -> np.ndarray:
+    """
+    Group normalised document embeddings.
+
+    Args:
+        embeddings: One L2-normalised row per document
+        method: "kmeans" (mini-batch k-means) or "hdbscan"
+        n_clusters: Number of k-means clusters (default sqrt(n / 2))
+
+    Returns:
+        A label per row; -1 marks documents HDBSCAN left unclustered
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    n = len(embeddings)
+    if method == "hdbscan":
+        if n < CLUSTER_HDBSCAN_MIN_SIZE:
+            return np.full(n, -1)
+        return HDBSCAN(min_cluster_size=CLUSTER_HDBSCAN_MIN_SIZE).fit_predict(embeddings)
+    if method != "kmeans":
+        raise ValueError(f"Unknown clustering method: {method}")
+
+    k = min(n, n_clusters or max(1, round(math.sqrt(n / 2))))
+    return MiniBatchKMeans(
+        n_clusters=k, batch_size=CLUSTER_KMEANS_BATCH_SIZE, n_init=3, random_state=0
+    ).fit_predict(embeddings)
+
+
+def recluster_knowledge_base(
+    db: Session,
+    kb_id: str,
+    method: str = "kmeans",
+    n_clusters: Optional[int] = None
+) -> Dict[str, List[int]]:
+    """
+    Regroup a knowledge base's documents by their stored chunk embeddings.
+
+    Each new group takes over the existing cluster it shares the most
+    documents with (keeping its name); other groups become new clusters
+    named after their most common concepts. Clusters emptied by the
+    regrouping are deleted. Documents without embeddings, and documents
+    HDBSCAN leaves unclustered, stay where they are.
+
+    Args:
+        db: Database session (committed on success)
+        kb_id: Knowledge base to regroup
+        method: "kmeans" or "hdbscan"
+        n_clusters: Number of k-means clusters (default sqrt(n / 2))
+
+    Returns:
+        Dict with the doc_ids of moved documents ("moved") and the IDs of
+        created, updated and removed clusters
+    """
+    result = {"moved": [], "clusters_created": [], "clusters_updated": [], "clusters_removed": []}
+    docs = db.query(
+        DBDocument.id, DBDocument.doc_id, DBDocument.cluster_id, DBDocument.skill_level
+    ).filter(DBDocument.knowledge_base_id == kb_id).all()
+    embeddings = get_chunk_index(db, kb_id).document_embeddings(db)
+    embedded = [doc for doc in docs if doc.id in embeddings]
+    if len(embedded) < 2:
+        return result
+
+    labels = cluster_labels(np.stack([embeddings[doc.id] for doc in embedded]), method, n_clusters)
+    groups: Dict[int, list] = defaultdict(list)
+    for doc, label in zip(embedded, labels):
+        if label >= 0:
+            groups[int(label)].append(doc)
+
+    # Each group takes over the cluster it overlaps most, largest overlaps first
+    overlaps = Counter(
+        (label, doc.cluster_id)
+        for label, members in groups.items() for doc in members if doc.cluster_id is not None
+    )
+    target: Dict[int, int] = {}
+    for label, cluster_id in (pair for pair, _ in overlaps.most_common()):
+        if label not in target and cluster_id not in target.values():
+            target[label] = cluster_id
+
+    concepts_of: Dict[int, List[str]] = defaultdict(list)
+    concept_rows = db.query(DBConcept.document_id, DBConcept.name).join(
+        DBDocument, DBConcept.document_id == DBDocument.id
+    ).filter(DBDocument.knowledge_base_id == kb_id)
+    for document_id, name in concept_rows:
+        concepts_of[document_id].append(name)
+
+    sources = set()
+    for label, members in groups.items():
+        primary = [
+            name for name, _ in Counter(name for doc in members for name in concepts_of[doc.id]).most_common(8)
+        ]
+        cluster_id = target.get(label)
+        if cluster_id is None:
+            skill_level = Counter(doc.skill_level for doc in members).most_common(1)[0][0]
+            db_cluster = DBCluster(
+                name=" & ".join(name.replace('_', ' ').title() for name in primary[:2]) or "General",
+                primary_concepts=primary,
+                skill_level=skill_level,
+                knowledge_base_id=kb_id
+            )
+            db.add(db_cluster)
+            db.flush()
+            cluster_id = db_cluster.id
+            result["clusters_created"].append(cluster_id)
+        elif primary:
+            db.query(DBCluster).filter_by(id=cluster_id).update(
+                {"primary_concepts": primary}, synchronize_session=False
+            )
+            result["clusters_updated"].append(cluster_id)
+
+        moving = [doc for doc in members if doc.cluster_id != cluster_id]
+        if moving:
+            db.query(DBDocument).filter(DBDocument.id.in_([doc.id for doc in moving])).update(
+                {"cluster_id": cluster_id}, synchronize_session=False
+            )
+            sources.update(doc.cluster_id for doc in moving if doc.cluster_id is not None)
+            result["moved"].extend(doc.doc_id for doc in moving)
+
+    # Delete the clusters the regrouping emptied
+    still_used = {
+        cluster_id for (cluster_id,) in db.query(DBDocument.cluster_id).filter(
+            DBDocument.cluster_id.in_(sources)
+        ).distinct()
+    } if sources else set()
+    emptied = sorted(sources - still_used)
+    if emptied:
+        db.query(DBCluster).filter(DBCluster.id.in_(emptied)).delete(synchronize_session=False)
+        result["clusters_removed"] = emptied
+
+    db.commit()
+    logger.info(
+        f"Re-clustered KB {kb_id} with {method}: {len(embedded)} documents in {len(groups)} groups, "
+        f"{len(result['moved'])} moved, {len(result['clusters_created'])} clusters created, "
+        f"{len(emptied)} removed"
+    )
+    return result
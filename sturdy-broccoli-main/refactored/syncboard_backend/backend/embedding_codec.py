@@ -0,0 +1,106 @@
+"""
+Binary embedding encoding for SyncBoard 3.0.
+
+Chunk embeddings used to be stored as JSON arrays of 1536-3072 decimal
+strings. They are now packed into DBDocumentChunk.embedding_blob:
+
+    float32  4 bytes/dim, lossless, decoded zero-copy
+    float16  2 bytes/dim, ~3 significant digits (plenty for cosine ranking)
+    int8     1 byte/dim, symmetric per-vector scale
+
+Every blob starts with a small header naming its format, so rows written
+under different settings can be mixed freely. Legacy rows that still hold
+a JSON ``embedding`` are decoded transparently until they are backfilled.
+"""
+
+import struct
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# Header: format code, reserved byte, 2 bytes padding (keeps float32 data aligned)
+_HEADER = struct.Struct("<BBxx")
+_INT8_SCALE = struct.Struct("<f")
+
+_FORMAT_CODES = {"float32": 1, "float16": 2, "int8": 3}
+_FORMAT_NAMES = {code: name for name, code in _FORMAT_CODES.items()}
+
+EMBEDDING_STORAGE_FORMATS = ("json",) + tuple(_FORMAT_CODES)
+
+
+def encode_embedding(values: Sequence[float], storage_format: str = "float32") -> bytes:
+    """
+    Pack an embedding into a self-describing binary blob.
+
+    Args:
+        values: Embedding vector
+        storage_format: "float32", "float16" or "int8"
+
+    Returns:
+        Header followed by the packed vector
+    """
+    if storage_format not in _FORMAT_CODES:
+        raise ValueError(f"Unknown binary embedding format: {storage_format}")
+
+    vector = np.asarray(values, dtype=np.float32)
+    header = _HEADER.pack(_FORMAT_CODES[storage_format], 0)
+    if storage_format == "float32":
+        return header + vector.tobytes()
+    if storage_format == "float16":
+        return header + vector.astype(np.float16).tobytes()
+
+    peak = float(np.max(np.abs(vector))) if len(vector) else 0.0
+    scale = peak / 127.0 if peak > 0 else 1.0
+    quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+    return header + _INT8_SCALE.pack(scale) + quantized.tobytes()
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """
+    Unpack a blob written by encode_embedding().
+
+    float32 blobs are returned as a read-only view of ``blob`` (no copy);
+    float16 and int8 blobs are widened to a new float32 array.
+    """
+    code, _ = _HEADER.unpack_from(blob)
+    storage_format = _FORMAT_NAMES.get(code)
+    offset = _HEADER.size
+    if storage_format == "float32":
+        return np.frombuffer(blob, dtype=np.float32, offset=offset)
+    if storage_format == "float16":
+        return np.frombuffer(blob, dtype=np.float16, offset=offset).astype(np.float32)
+    if storage_format == "int8":
+        (scale,) = _INT8_SCALE.unpack_from(blob, offset)
+        quantized = np.frombuffer(blob, dtype=np.int8, offset=offset + _INT8_SCALE.size)
+        return quantized.astype(np.float32) * np.float32(scale)
+    raise ValueError(f"Unknown binary embedding format code: {code}")
+
+
+def chunk_embedding_columns(values: Optional[Sequence[float]], storage_format: str) -> Dict:
+    """
+    Column values for storing ``values`` on a DBDocumentChunk.
+
+    Args:
+        values: Embedding vector (or None/empty for no embedding)
+        storage_format: "json" for the legacy JSON column, otherwise a binary format
+
+    Returns:
+        Keyword arguments for DBDocumentChunk(...) / bulk updates
+    """
+    if values is None or not len(values):
+        return {"embedding": None, "embedding_blob": None}
+    if storage_format == "json":
+        return {"embedding": [float(x) for x in values], "embedding_blob": None}
+    return {"embedding": None, "embedding_blob": encode_embedding(values, storage_format)}
+
+
+def decode_chunk_embedding(
+    embedding: Optional[Sequence[float]],
+    embedding_blob: Optional[bytes]
+) -> Optional[np.ndarray]:
+    """Decode a chunk's embedding from whichever column holds it."""
+    if embedding_blob is not None:
+        return decode_embedding(embedding_blob)
+    if embedding:
+        return np.asarray(embedding, dtype=np.float32)
+    return None
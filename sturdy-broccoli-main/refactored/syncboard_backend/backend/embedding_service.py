@@ -7,17 +7,30 @@ Supports batch processing and caching for efficiency.
 
 import logging
 import asyncio
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import numpy as np
 
 from .config import settings
+from .constants import (
+    EMBEDDING_BACKOFF_BASE_SECONDS,
+    EMBEDDING_BACKOFF_MAX_SECONDS,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_MAX_BATCH_TOKENS,
+    EMBEDDING_MAX_CONCURRENT_REQUESTS,
+    EMBEDDING_MAX_RETRIES,
+)
+from .api_retry import RequestLimiter, backoff_delay, is_bad_request, is_retryable
+from .document_chunker import get_document_chunker
+from .cache import embedding_content_hash, get_cached_embeddings, cache_embeddings
 
 logger = logging.getLogger(__name__)
 
 # Try to import OpenAI
 try:
-    from openai import AsyncOpenAI
+    from .openai_clients import get_async_openai
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
@@ -33,13 +46,90 @@ class EmbeddingResult:
     token_count: int
 
 
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache for one model.
+
+    Tier 1 is a process-local LRU; tier 2 is Redis, shared by the API and
+    Celery workers. Lookups resolve a whole batch at once: the LRU first,
+    then a single MGET for whatever is left. The Redis client is
+    synchronous, so its calls run in a worker thread off the event loop.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        use_redis: Optional[bool] = None
+    ):
+        """
+        Initialize an empty cache.
+
+        Args:
+            model_name: Embedding model the cached vectors belong to
+            max_entries: LRU capacity
+            use_redis: Use the Redis tier (defaults to settings.enable_embedding_caching)
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.use_redis = settings.enable_embedding_caching if use_redis is None else use_redis
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get_many(self, content_hashes: List[str]) -> Dict[str, List[float]]:
+        """Return cached embeddings for the given content hashes."""
+        found = self._lookup(content_hashes)
+
+        missing = [h for h in content_hashes if h not in found]
+        if missing and self.use_redis:
+            remote = await asyncio.to_thread(get_cached_embeddings, self.model_name, missing)
+            self._remember(remote)
+            found.update(remote)
+
+        self.hits += len(found)
+        self.misses += len(content_hashes) - len(found)
+        return found
+
+    async def put_many(self, embeddings: Dict[str, List[float]]) -> None:
+        """Cache freshly computed embeddings in both tiers."""
+        if not embeddings:
+            return
+        self._remember(embeddings)
+        if self.use_redis:
+            await asyncio.to_thread(
+                cache_embeddings, self.model_name, embeddings, ttl_days=settings.embedding_cache_ttl_days
+            )
+
+    def _lookup(self, content_hashes: List[str]) -> Dict[str, List[float]]:
+        """LRU hits among ``content_hashes``."""
+        found = {}
+        with self._lock:
+            for content_hash in content_hashes:
+                vector = self._entries.get(content_hash)
+                if vector is not None:
+                    self._entries.move_to_end(content_hash)
+                    found[content_hash] = vector.tolist()
+        return found
+
+    def _remember(self, embeddings: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for content_hash, embedding in embeddings.items():
+                self._entries[content_hash] = np.asarray(embedding, dtype=np.float32)
+                self._entries.move_to_end(content_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
 class EmbeddingService:
     """
     Service for generating text embeddings using OpenAI.
 
     Features:
-    - Batch processing for efficiency
-    - Automatic retries with backoff
+    - Token-budgeted, concurrent batch processing
+    - Content-addressed caching (identical texts are embedded once)
+    - Automatic retries with backoff (Retry-After aware)
     - Token counting and limits
     - Cosine similarity search
     """
@@ -58,15 +148,19 @@ class EmbeddingService:
         "text-embedding-ada-002": 1536,
     }
 
-    # Max tokens per request (8191 for embedding models)
+    # Max tokens per input text (8191 for embedding models)
     MAX_TOKENS = 8191
-    # Max batch size
-    MAX_BATCH_SIZE = 100
+    # Max inputs per request
+    MAX_BATCH_SIZE = 2048
+    # Max total input tokens per request
+    MAX_BATCH_TOKENS = EMBEDDING_MAX_BATCH_TOKENS
 
     def __init__(
         self,
         model: str = "small",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENT_REQUESTS,
+        max_retries: int = EMBEDDING_MAX_RETRIES
     ):
         """
         Initialize embedding service.
@@ -74,21 +168,39 @@ class EmbeddingService:
         Args:
             model: Model size ("small", "large", or "ada")
             api_key: OpenAI API key (defaults to env var)
+            max_concurrency: Embedding requests in flight per embed_batch() call
+            max_retries: Retries per request on rate limits and transient errors
         """
         self.model_name = self.MODELS.get(model, self.MODELS["small"])
         self.dimensions = self.DIMENSIONS[self.model_name]
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
 
-        api_key = api_key or settings.openai_api_key
-        if not api_key:
+        self.api_key = api_key or settings.openai_api_key
+        if not self.api_key:
             logger.warning("No OpenAI API key - embeddings will fail")
+        self._client = None
 
-        if OPENAI_AVAILABLE:
-            self.client = AsyncOpenAI(api_key=api_key)
-        else:
-            self.client = None
+        self.cache = EmbeddingCache(self.model_name)
 
         logger.info(f"Embedding service initialized with {self.model_name} ({self.dimensions} dims)")
 
+    @property
+    def client(self):
+        """
+        Shared OpenAI client for the running event loop (None without the SDK).
+
+        SDK retries are off: _embed_sub_batch's retry loop and request limiter
+        handle rate limits and transient errors.
+        """
+        if self._client is not None:
+            return self._client
+        return get_async_openai(self.api_key, max_retries=0) if OPENAI_AVAILABLE else None
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
     async def embed_text(self, text: str) -> Optional[List[float]]:
         """
         Generate embedding for a single text.
@@ -107,12 +219,20 @@ class EmbeddingService:
             logger.warning("Empty text for embedding")
             return None
 
+        text, _ = self._prepare_text(text)
+        content_hash = embedding_content_hash(text)
+        cached = await self.cache.get_many([content_hash])
+        if content_hash in cached:
+            return cached[content_hash]
+
         try:
             response = await self.client.embeddings.create(
                 model=self.model_name,
-                input=text.strip()
+                input=text
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            await self.cache.put_many({content_hash: embedding})
+            return embedding
 
         except Exception as e:
             logger.error(f"Embedding failed: {e}")
@@ -126,6 +246,14 @@ class EmbeddingService:
         """
         Generate embeddings for multiple texts efficiently.
 
+        Cached embeddings (by content hash) are reused and duplicate texts
+        are sent once. The rest are packed into requests by token count (up to
+        MAX_BATCH_TOKENS / MAX_BATCH_SIZE), and up to max_concurrency
+        requests run at once. A failed request is retried on its own with
+        backoff (honouring Retry-After on 429s); a request rejected for bad
+        input is split in half to isolate the offending text. Any other
+        error (auth, permissions, unknown model) fails the whole call.
+
         Args:
             texts: List of texts to embed
             show_progress: Log progress updates
@@ -141,49 +269,136 @@ class EmbeddingService:
 
         results = [None] * len(texts)
 
-        # Process in batches
-        for batch_start in range(0, len(texts), self.MAX_BATCH_SIZE):
-            batch_end = min(batch_start + self.MAX_BATCH_SIZE, len(texts))
-            batch_texts = texts[batch_start:batch_end]
+        # Filter empty texts and truncate oversized ones
+        items = [
+            (i, *self._prepare_text(text))
+            for i, text in enumerate(texts)
+            if text and text.strip()
+        ]
+
+        # Resolve cache hits for the whole batch, then send each distinct
+        # uncached text once
+        hashes = {i: embedding_content_hash(text) for i, text, _ in items}
+        cached = await self.cache.get_many(list(set(hashes.values())))
+        pending, queued = [], set()
+        for item in items:
+            content_hash = hashes[item[0]]
+            if content_hash in cached:
+                results[item[0]] = cached[content_hash]
+            elif content_hash not in queued:
+                queued.add(content_hash)
+                pending.append(item)
+
+        if show_progress and cached:
+            logger.info(f"Embedding cache: {len(items) - len(pending)} of {len(items)} texts already embedded")
+
+        batches = self._pack_batches(pending)
+
+        limiter = RequestLimiter(self.max_concurrency)
+        embedded = 0
+
+        async def run(batch: List[Tuple[int, str, int]]) -> None:
+            nonlocal embedded
+            await self._embed_sub_batch(batch, results, limiter)
+            embedded += len(batch)
+            if show_progress:
+                logger.info(f"Embedded {embedded} of {len(pending)} texts ({len(batches)} requests)")
+
+        outcomes = await asyncio.gather(*(run(batch) for batch in batches), return_exceptions=True)
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if errors:
+            logger.error(f"Embedding {len(pending)} texts failed: {errors[0]}")
+
+        fresh = {hashes[i]: results[i] for i, _, _ in pending if results[i] is not None}
+        await self.cache.put_many(fresh)
+        for i, _, _ in items:
+            if results[i] is None:
+                # Duplicate of a text embedded in this call
+                results[i] = fresh.get(hashes[i])
 
-            # Filter empty texts
-            valid_indices = []
-            valid_texts = []
-            for i, text in enumerate(batch_texts):
-                if text and text.strip():
-                    valid_indices.append(batch_start + i)
-                    valid_texts.append(text.strip())
+        return results
 
-            if not valid_texts:
-                continue
+    def _prepare_text(self, text: str) -> Tuple[str, int]:
+        """Strip a text and truncate it to MAX_TOKENS; returns (text, token_count)."""
+        text = text.strip()
+        chunker = get_document_chunker()
+        token_count = chunker.count_tokens(text)
+        if token_count > self.MAX_TOKENS:
+            tokens = chunker.encode_tokens(text)[:self.MAX_TOKENS]
+            text = chunker.decode_tokens(tokens) or text[:self.MAX_TOKENS * 4]
+            token_count = self.MAX_TOKENS
+        return text, token_count
+
+    def _pack_batches(self, items: List[Tuple[int, str, int]]) -> List[List[Tuple[int, str, int]]]:
+        """Greedily pack (index, text, tokens) items into request-sized batches."""
+        batches = []
+        batch, batch_tokens = [], 0
+        for item in items:
+            tokens = item[2]
+            if batch and (len(batch) >= self.MAX_BATCH_SIZE or batch_tokens + tokens > self.MAX_BATCH_TOKENS):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(item)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _embed_sub_batch(
+        self,
+        batch: List[Tuple[int, str, int]],
+        results: List[Optional[List[float]]],
+        limiter: RequestLimiter
+    ) -> None:
+        """
+        Embed one packed batch into ``results``, retrying only this batch.
 
+        Raises errors that are neither transient nor caused by the input.
+        """
+        for attempt in range(self.max_retries + 1):
             try:
-                response = await self.client.embeddings.create(
-                    model=self.model_name,
-                    input=valid_texts
-                )
-
-                for i, embedding_data in enumerate(response.data):
-                    results[valid_indices[i]] = embedding_data.embedding
-
-                if show_progress:
-                    logger.info(f"Embedded batch {batch_start}-{batch_end} of {len(texts)}")
+                async with limiter:
+                    response = await self.client.embeddings.create(
+                        model=self.model_name,
+                        input=[text for _, text, _ in batch]
+                    )
+                for (index, _, _), embedding_data in zip(batch, response.data):
+                    results[index] = embedding_data.embedding
+                return
 
             except Exception as e:
-                logger.error(f"Batch embedding failed: {e}")
-                # Try individual embeddings as fallback
-                for i, text in enumerate(valid_texts):
-                    try:
-                        embedding = await self.embed_text(text)
-                        results[valid_indices[i]] = embedding
-                    except Exception:
-                        pass
-
-            # Rate limiting - small delay between batches
-            if batch_end < len(texts):
-                await asyncio.sleep(0.1)
-
-        return results
+                status = getattr(e, "status_code", None)
+
+                if not is_retryable(e):
+                    if not is_bad_request(e):
+                        # Auth, permission or configuration error: every request would fail
+                        limiter.abort(e)
+                        raise
+                    if len(batch) > 1:
+                        # Bad input somewhere in the batch: split to isolate it
+                        middle = len(batch) // 2
+                        await asyncio.gather(
+                            self._embed_sub_batch(batch[:middle], results, limiter),
+                            self._embed_sub_batch(batch[middle:], results, limiter)
+                        )
+                    else:
+                        logger.error(f"Embedding rejected for text {batch[0][0]}: {e}")
+                    return
+
+                if attempt == self.max_retries:
+                    logger.error(f"Batch embedding failed after {attempt + 1} attempts ({len(batch)} texts): {e}")
+                    return
+
+                delay = backoff_delay(e, attempt, EMBEDDING_BACKOFF_BASE_SECONDS, EMBEDDING_BACKOFF_MAX_SECONDS)
+
+                if status == 429:
+                    # Rate limited: hold every request of this call, not just this one
+                    limiter.pause(delay)
+                logger.warning(
+                    f"Embedding request for {len(batch)} texts failed ({status or e}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
 
     def cosine_similarity(
         self,
@@ -234,32 +449,31 @@ class EmbeddingService:
         if not query_embedding or not embeddings:
             return []
 
-        similarities = []
-        query_vec = np.array(query_embedding)
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
         query_norm = np.linalg.norm(query_vec)
 
         if query_norm == 0:
             return []
 
-        for doc_id, embedding in embeddings:
-            if embedding is None:
-                continue
-
-            doc_vec = np.array(embedding)
-            doc_norm = np.linalg.norm(doc_vec)
-
-            if doc_norm == 0:
-                continue
-
-            similarity = float(np.dot(query_vec, doc_vec) / (query_norm * doc_norm))
-
-            if similarity >= threshold:
-                similarities.append((doc_id, similarity))
-
-        # Sort by similarity (descending)
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        candidates = [(doc_id, embedding) for doc_id, embedding in embeddings if embedding is not None]
+        if not candidates:
+            return []
 
-        return similarities[:top_k]
+        # Score every candidate with one matrix-vector product
+        ids = [doc_id for doc_id, _ in candidates]
+        matrix = np.asarray([embedding for _, embedding in candidates], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        scores = np.zeros(len(ids), dtype=np.float32)
+        np.divide(matrix @ query_vec, norms * query_norm, out=scores, where=norms > 0)
+
+        keep = np.flatnonzero((norms > 0) & (scores >= threshold))
+        if top_k < len(keep):
+            keep = keep[np.argpartition(-scores[keep], top_k - 1)[:top_k]]
+            keep.sort()
+        # Sort by similarity (descending), ties in input order
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+
+        return [(ids[i], float(scores[i])) for i in keep]
 
 
 # Singleton instance
@@ -3,7 +3,7 @@ Enhanced RAG (Retrieval-Augmented Generation) System for SyncBoard 3.0.
 
 This module implements production-grade RAG with:
 1. pgvector - Native PostgreSQL vector storage and search
-2. Hybrid Search - Combines TF-IDF lexical + embedding semantic search
+2. Hybrid Search - Combines BM25 lexical + embedding semantic search
 3. Cross-Encoder Reranking - Uses sentence-transformers for precise reranking
 4. Parent-Child Chunking - Small chunks for retrieval, larger for context
 5. Query Expansion - LLM-powered query enhancement before retrieval
@@ -21,13 +21,20 @@ Usage:
 
 import logging
 import asyncio
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from datetime import datetime
-import numpy as np
 
-from sqlalchemy import text, func
-from sqlalchemy.orm import Session
+from sqlalchemy import text, func, case, null
+from sqlalchemy.orm import Session, aliased
+
+from .chunk_lexical_index import get_lexical_index
+from .constants import RAG_PARENT_CACHE_SIZE
+from .db_models import DBDocument, DBDocumentChunk
+from .rerank_service import RerankService, get_rerank_service
+from .watermark_index import EngineRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +62,7 @@ class RAGConfig:
     # Query expansion
     enable_query_expansion: bool = True
     max_expanded_queries: int = 3
+    rrf_k: int = 60  # Reciprocal-rank fusion constant for merging query variants
 
     # Reranking
     enable_reranking: bool = True
@@ -80,6 +88,7 @@ class RetrievedChunk:
     embedding_score: float = 0.0
     tfidf_score: float = 0.0
     hybrid_score: float = 0.0
+    fusion_score: float = 0.0
     rerank_score: float = 0.0
     final_score: float = 0.0
 
@@ -100,11 +109,15 @@ class RAGResponse:
     answer: str
     chunks_used: List[RetrievedChunk]
     query_expanded: Optional[List[str]] = None
-    retrieval_time_ms: float = 0.0
+    retrieval_time_ms: float = 0.0  # Embedding + search + fusion
     rerank_time_ms: float = 0.0
     generation_time_ms: float = 0.0
     total_time_ms: float = 0.0
     model_used: str = ""
+    expansion_time_ms: float = 0.0
+    embedding_time_ms: float = 0.0
+    search_time_ms: float = 0.0
+    enrichment_time_ms: float = 0.0  # Parent context + document metadata
 
 
 @dataclass
@@ -198,6 +211,57 @@ class PgVectorStore:
             logger.error(f"pgvector search failed: {e}")
             return []
 
+    def search_similar_many(
+        self,
+        query_embeddings: List[List[float]],
+        kb_id: str,
+        top_k: int = 50,
+        min_similarity: float = 0.3
+    ) -> List[List[Tuple[int, int, str, float]]]:
+        """
+        Search for several query embeddings in one round trip.
+
+        Returns:
+            One list of (chunk_id, document_id, content, similarity_score) per
+            query embedding, best first
+        """
+        results: List[List[Tuple[int, int, str, float]]] = [[] for _ in query_embeddings]
+        if not query_embeddings or not self.ensure_extension():
+            return results
+
+        params = {"kb_id": kb_id, "min_sim": min_similarity, "top_k": top_k}
+        values = []
+        for i, embedding in enumerate(query_embeddings):
+            params[f"query_vec_{i}"] = "[" + ",".join(str(x) for x in embedding) + "]"
+            values.append(f"({i}, CAST(:query_vec_{i} AS vector))")
+
+        query = text(f"""
+            SELECT q.variant, hits.chunk_id, hits.document_id, hits.content, hits.similarity
+            FROM (VALUES {", ".join(values)}) AS q(variant, query_vec)
+            CROSS JOIN LATERAL (
+                SELECT
+                    dc.id as chunk_id,
+                    dc.document_id,
+                    dc.content,
+                    1 - (dc.embedding_vector <=> q.query_vec) as similarity
+                FROM document_chunks dc
+                WHERE dc.knowledge_base_id = :kb_id
+                  AND dc.embedding_vector IS NOT NULL
+                  AND 1 - (dc.embedding_vector <=> q.query_vec) >= :min_sim
+                ORDER BY dc.embedding_vector <=> q.query_vec
+                LIMIT :top_k
+            ) hits
+            ORDER BY q.variant, hits.similarity DESC
+        """)
+
+        try:
+            for row in self.db.execute(query, params):
+                results[row.variant].append((row.chunk_id, row.document_id, row.content, row.similarity))
+        except Exception as e:
+            logger.error(f"pgvector search failed: {e}")
+            return [[] for _ in query_embeddings]
+        return results
+
 
 # =============================================================================
 # Hybrid Search
@@ -205,12 +269,15 @@ class PgVectorStore:
 
 class HybridSearcher:
     """
-    Combines TF-IDF lexical search with embedding-based semantic search.
+    Combines BM25 lexical search with embedding-based semantic search.
 
     Benefits:
-    - TF-IDF catches exact keyword matches (good for technical terms)
+    - BM25 catches exact keyword matches (good for technical terms)
     - Embeddings capture semantic meaning (good for paraphrases)
     - Combined scoring improves overall retrieval quality
+
+    The lexical side uses the process-wide per-KB index from
+    chunk_lexical_index, so nothing is rebuilt per request.
     """
 
     def __init__(
@@ -224,64 +291,28 @@ class HybridSearcher:
         self.tfidf_weight = tfidf_weight
         self.pgvector = PgVectorStore(db)
 
-        # Lazy-load TF-IDF vectorizer
-        self._tfidf_vectorizer = None
-        self._tfidf_matrix = None
-        self._chunk_ids = None
-
-    def _build_tfidf_index(self, kb_id: str) -> None:
-        """Build TF-IDF index for a knowledge base."""
-        from sklearn.feature_extraction.text import TfidfVectorizer
-
-        # Fetch all chunks for this KB
-        query = text("""
-            SELECT id, content FROM document_chunks
-            WHERE knowledge_base_id = :kb_id
-            ORDER BY id
-        """)
-        result = self.db.execute(query, {"kb_id": kb_id})
-        rows = list(result)
-
-        if not rows:
-            return
-
-        self._chunk_ids = [row.id for row in rows]
-        texts = [row.content for row in rows]
-
-        self._tfidf_vectorizer = TfidfVectorizer(
-            max_features=10000,
-            ngram_range=(1, 2),  # Unigrams and bigrams
-            stop_words='english'
-        )
-        self._tfidf_matrix = self._tfidf_vectorizer.fit_transform(texts)
-        logger.info(f"Built TF-IDF index with {len(texts)} chunks")
-
     def _tfidf_search(
         self,
         query: str,
         kb_id: str,
         top_k: int = 50
     ) -> Dict[int, float]:
-        """Search using TF-IDF and return chunk_id -> score mapping."""
-        from sklearn.metrics.pairwise import cosine_similarity
-
-        if self._tfidf_vectorizer is None:
-            self._build_tfidf_index(kb_id)
-
-        if self._tfidf_vectorizer is None:
-            return {}
-
-        query_vec = self._tfidf_vectorizer.transform([query])
-        scores = cosine_similarity(self._tfidf_matrix, query_vec).flatten()
+        """Search the KB's lexical index and return chunk_id -> BM25 score mapping."""
+        hits = get_lexical_index(self.db, kb_id).search(self.db, query, top_k)
+        return {chunk_id: score for chunk_id, _, score in hits}
 
-        # Get top-k by score
-        top_indices = np.argsort(scores)[-top_k:][::-1]
-
-        return {
-            self._chunk_ids[idx]: float(scores[idx])
-            for idx in top_indices
-            if scores[idx] > 0
-        }
+    def _vector_search_many(
+        self,
+        query_embeddings: List[List[float]],
+        kb_id: str,
+        top_k: int,
+        min_similarity: float
+    ) -> List[List[Tuple[int, int, str, float]]]:
+        """pgvector search on a session of its own, so it can run in a worker thread."""
+        with Session(bind=self.db.get_bind()) as session:
+            return PgVectorStore(session).search_similar_many(
+                query_embeddings, kb_id, top_k, min_similarity
+            )
 
     async def search(
         self,
@@ -292,18 +323,69 @@ class HybridSearcher:
         min_similarity: float = 0.3
     ) -> List[RetrievedChunk]:
         """
-        Perform hybrid search combining embeddings and TF-IDF.
+        Perform hybrid search combining embeddings and BM25.
 
         Returns chunks sorted by combined score.
         """
-        # Get embedding-based results
-        embedding_results = self.pgvector.search_similar(
-            query_embedding, kb_id, top_k * 2, min_similarity
-        )
+        results = await self.search_many([query], [query_embedding], kb_id, top_k, min_similarity)
+        return results[0]
+
+    async def search_many(
+        self,
+        queries: List[str],
+        query_embeddings: List[List[float]],
+        kb_id: str,
+        top_k: int = 50,
+        min_similarity: float = 0.3
+    ) -> List[List[RetrievedChunk]]:
+        """
+        Hybrid search for several query variants at once.
+
+        The pgvector searches for all variants run as one query in a worker
+        thread while the BM25 searches run against the in-memory index;
+        content for lexical-only hits of every variant comes from one query.
 
-        # Get TF-IDF results
-        tfidf_scores = self._tfidf_search(query, kb_id, top_k * 2)
+        Returns:
+            One list of chunks per query, each sorted by combined score
+        """
+        if not queries:
+            return []
+
+        # Get embedding-based results (in the background)
+        vector_future = asyncio.ensure_future(asyncio.to_thread(
+            self._vector_search_many, query_embeddings, kb_id, top_k * 2, min_similarity
+        ))
 
+        # Get lexical results
+        try:
+            lexical_results = [self._tfidf_search(query, kb_id, top_k * 2) for query in queries]
+        finally:
+            vector_results = await vector_future
+
+        # Content for lexical-only hits comes from one query
+        embedded = {hit[0] for hits in vector_results for hit in hits}
+        lexical_only = {chunk_id for scores in lexical_results for chunk_id in scores} - embedded
+        rows = {}
+        if lexical_only:
+            rows = {
+                row.id: row for row in self.db.query(
+                    DBDocumentChunk.id, DBDocumentChunk.document_id, DBDocumentChunk.content
+                ).filter(DBDocumentChunk.id.in_(lexical_only))
+            }
+
+        return [
+            self._combine(embedding_results, tfidf_scores, rows, top_k)
+            for embedding_results, tfidf_scores in zip(vector_results, lexical_results)
+        ]
+
+    def _combine(
+        self,
+        embedding_results: List[Tuple[int, int, str, float]],
+        tfidf_scores: Dict[int, float],
+        rows: Dict[int, Any],
+        top_k: int
+    ) -> List[RetrievedChunk]:
+        """Merge one variant's embedding and lexical hits into hybrid-scored chunks."""
         # Normalize scores to [0, 1]
         max_embedding_score = max((r[3] for r in embedding_results), default=1.0)
         max_tfidf_score = max(tfidf_scores.values(), default=1.0)
@@ -321,22 +403,18 @@ class HybridSearcher:
                 embedding_score=normalized_score
             )
 
-        # Add TF-IDF scores
+        # Add lexical scores
         for chunk_id, score in tfidf_scores.items():
             normalized_score = score / max_tfidf_score if max_tfidf_score > 0 else 0
             if chunk_id in chunks_map:
                 chunks_map[chunk_id].tfidf_score = normalized_score
-            else:
-                # Need to fetch content for TF-IDF-only results
-                query = text("SELECT document_id, content FROM document_chunks WHERE id = :id")
-                result = self.db.execute(query, {"id": chunk_id}).fetchone()
-                if result:
-                    chunks_map[chunk_id] = RetrievedChunk(
-                        chunk_id=chunk_id,
-                        document_id=result.document_id,
-                        content=result.content,
-                        tfidf_score=normalized_score
-                    )
+            elif chunk_id in rows:
+                chunks_map[chunk_id] = RetrievedChunk(
+                    chunk_id=chunk_id,
+                    document_id=rows[chunk_id].document_id,
+                    content=rows[chunk_id].content,
+                    tfidf_score=normalized_score
+                )
 
         # Calculate hybrid scores
         for chunk in chunks_map.values():
@@ -351,6 +429,38 @@ class HybridSearcher:
         return results[:top_k]
 
 
+def reciprocal_rank_fusion(
+    result_lists: List[List[RetrievedChunk]],
+    k: int = 60
+) -> List[RetrievedChunk]:
+    """
+    Merge ranked result lists (one per query variant) with reciprocal-rank fusion.
+
+    A chunk scores sum(1 / (k + rank)) over the lists it appears in, and the
+    copy with the best hybrid score is kept. final_score is the fused score
+    scaled so the best chunk gets 1.0.
+
+    Returns:
+        Unique chunks sorted by fused score
+    """
+    fused: Dict[int, float] = {}
+    best: Dict[int, RetrievedChunk] = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, start=1):
+            fused[chunk.chunk_id] = fused.get(chunk.chunk_id, 0.0) + 1.0 / (k + rank)
+            current = best.get(chunk.chunk_id)
+            if current is None or chunk.hybrid_score > current.hybrid_score:
+                best[chunk.chunk_id] = chunk
+
+    if not fused:
+        return []
+    top_score = max(fused.values())
+    for chunk_id, chunk in best.items():
+        chunk.fusion_score = fused[chunk_id]
+        chunk.final_score = fused[chunk_id] / top_score
+    return sorted(best.values(), key=lambda c: c.fusion_score, reverse=True)
+
+
 # =============================================================================
 # Cross-Encoder Reranker
 # =============================================================================
@@ -362,25 +472,24 @@ class CrossEncoderReranker:
     Cross-encoders are more accurate than bi-encoders because they
     see the query and document together, allowing for better
     understanding of their relationship.
+
+    The model itself lives in the process-wide RerankService, so it is
+    loaded once and concurrent requests are scored together off the
+    event loop (see arerank).
     """
 
     def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
         self.model_name = model_name
         self._model = None
 
-    def _load_model(self):
-        """Lazy-load the cross-encoder model."""
-        if self._model is not None:
-            return
+    @property
+    def service(self) -> RerankService:
+        return get_rerank_service(self.model_name)
 
-        try:
-            from sentence_transformers import CrossEncoder
-            self._model = CrossEncoder(self.model_name)
-            logger.info(f"Loaded cross-encoder model: {self.model_name}")
-        except ImportError:
-            logger.warning("sentence-transformers not installed, reranking disabled")
-        except Exception as e:
-            logger.error(f"Failed to load cross-encoder: {e}")
+    def _load_model(self):
+        """Lazy-load the shared cross-encoder model."""
+        if self._model is None:
+            self._model = self.service.get_model()
 
     def rerank(
         self,
@@ -389,7 +498,7 @@ class CrossEncoderReranker:
         top_k: int = 10
     ) -> List[RetrievedChunk]:
         """
-        Rerank chunks using the cross-encoder.
+        Rerank chunks using the cross-encoder, on the calling thread.
 
         Args:
             query: The user's query
@@ -405,8 +514,8 @@ class CrossEncoderReranker:
         self._load_model()
 
         if self._model is None:
-            # Fallback: return chunks sorted by hybrid score
-            return sorted(chunks, key=lambda x: x.hybrid_score, reverse=True)[:top_k]
+            # Fallback: keep the retrieval ranking
+            return self._keep_ranking(chunks, top_k)
 
         # Prepare query-document pairs
         pairs = [(query, chunk.content) for chunk in chunks]
@@ -414,20 +523,64 @@ class CrossEncoderReranker:
         try:
             # Get cross-encoder scores
             scores = self._model.predict(pairs)
+        except Exception as e:
+            logger.error(f"Reranking failed: {e}")
+            return self._keep_ranking(chunks, top_k)
+
+        return self._apply_scores(chunks, scores, top_k)
 
-            # Update chunk scores
-            for chunk, score in zip(chunks, scores):
-                chunk.rerank_score = float(score)
-                # Final score is primarily rerank score, with small boost from hybrid
-                chunk.final_score = chunk.rerank_score * 0.8 + chunk.hybrid_score * 0.2
+    async def arerank(
+        self,
+        query: str,
+        chunks: List[RetrievedChunk],
+        top_k: int = 10
+    ) -> List[RetrievedChunk]:
+        """
+        Rerank chunks through the shared RerankService without blocking the event loop.
+
+        Args:
+            query: The user's query
+            chunks: Retrieved chunks to rerank
+            top_k: Number of top results to return
 
-            # Sort by final score
-            reranked = sorted(chunks, key=lambda x: x.final_score, reverse=True)
-            return reranked[:top_k]
+        Returns:
+            Reranked and filtered list of chunks
+        """
+        if not chunks:
+            return []
 
+        try:
+            scores = await self.service.score(
+                query, [(chunk.chunk_id, chunk.content) for chunk in chunks]
+            )
         except Exception as e:
             logger.error(f"Reranking failed: {e}")
-            return sorted(chunks, key=lambda x: x.hybrid_score, reverse=True)[:top_k]
+            return self._keep_ranking(chunks, top_k)
+
+        if scores is None:
+            # Fallback: keep the retrieval ranking
+            return self._keep_ranking(chunks, top_k)
+        return self._apply_scores(chunks, scores, top_k)
+
+    @staticmethod
+    def _keep_ranking(chunks: List[RetrievedChunk], top_k: int) -> List[RetrievedChunk]:
+        return sorted(chunks, key=lambda x: x.final_score, reverse=True)[:top_k]
+
+    @staticmethod
+    def _apply_scores(
+        chunks: List[RetrievedChunk],
+        scores: List[float],
+        top_k: int
+    ) -> List[RetrievedChunk]:
+        # Update chunk scores
+        for chunk, score in zip(chunks, scores):
+            chunk.rerank_score = float(score)
+            # Final score is primarily rerank score, with small boost from hybrid
+            chunk.final_score = chunk.rerank_score * 0.8 + chunk.hybrid_score * 0.2
+
+        # Sort by final score
+        reranked = sorted(chunks, key=lambda x: x.final_score, reverse=True)
+        return reranked[:top_k]
 
 
 # =============================================================================
@@ -448,12 +601,11 @@ class QueryExpander:
         self._client = None
 
     def _get_client(self):
-        """Lazy-load OpenAI client."""
-        if self._client is None:
-            from openai import AsyncOpenAI
-            from .config import settings
-            self._client = AsyncOpenAI(api_key=settings.openai_api_key)
-        return self._client
+        """Injected client, else the shared OpenAI client for the running event loop."""
+        if self._client is not None:
+            return self._client
+        from .openai_clients import get_async_openai
+        return get_async_openai()
 
     async def expand(
         self,
@@ -637,27 +789,136 @@ class ParentChildChunker:
         Enrich retrieved child chunks with their parent content.
 
         This provides more context for generation without affecting
-        retrieval precision.
+        retrieval precision. Document metadata is filled in by the same
+        query (see enrich_chunk_context).
         """
-        for chunk in chunks:
-            # Try to get parent chunk
-            query = text("""
-                SELECT pc.content, pc.id
-                FROM document_chunks pc
-                JOIN document_chunks cc ON cc.parent_chunk_id = pc.id
-                WHERE cc.id = :chunk_id
-            """)
-
-            try:
-                result = db.execute(query, {"chunk_id": chunk.chunk_id}).fetchone()
-                if result:
-                    chunk.parent_content = result.content
-                    chunk.parent_chunk_id = result.id
-            except Exception as e:
-                logger.debug(f"Could not get parent chunk: {e}")
+        return enrich_chunk_context(chunks, db)
+
+
+# =============================================================================
+# Parent Context Enrichment
+# =============================================================================
+
+class ParentContextCache:
+    """LRU of child chunk id -> (parent chunk id, parent content) for hot chunks."""
+
+    def __init__(self, max_size: int = RAG_PARENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[Optional[int], Optional[str]]]" = OrderedDict()
+        self._document_of: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, chunk_id: int) -> Optional[Tuple[Optional[int], Optional[str]]]:
+        """Cached (parent id, parent content) for a child chunk; None if not cached."""
+        with self._lock:
+            entry = self._entries.get(chunk_id)
+            if entry is not None:
+                self._entries.move_to_end(chunk_id)
+            return entry
 
+    def put(
+        self,
+        chunk_id: int,
+        document_id: int,
+        parent_id: Optional[int],
+        parent_content: Optional[str]
+    ) -> None:
+        with self._lock:
+            self._entries[chunk_id] = (parent_id, parent_content)
+            self._entries.move_to_end(chunk_id)
+            self._document_of[chunk_id] = document_id
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._document_of.pop(evicted, None)
+
+    def invalidate_document(self, document_id: int) -> None:
+        """Forget a document's chunks after it is reprocessed."""
+        with self._lock:
+            for chunk_id in [c for c, d in self._document_of.items() if d == document_id]:
+                self._entries.pop(chunk_id, None)
+                del self._document_of[chunk_id]
+
+
+# One cache per engine; throwaway test engines get their own
+_parent_caches = EngineRegistry()
+
+
+def get_parent_context_cache(db: Session) -> ParentContextCache:
+    """Get the process-wide parent content cache for the session's database."""
+    return _parent_caches.get(db, ParentContextCache)
+
+
+def invalidate_parent_context(db: Session, document_id: int) -> None:
+    """Invalidate a document's cached parent contents after its chunks are rewritten."""
+    cache = _parent_caches.peek(db)
+    if cache is not None:
+        cache.invalidate_document(document_id)
+
+
+def enrich_chunk_context(
+    chunks: List[RetrievedChunk],
+    db: Session
+) -> List[RetrievedChunk]:
+    """
+    Add parent content and document metadata to retrieved chunks in one query.
+
+    Parent contents already in the ParentContextCache are not fetched
+    again; document metadata always comes from the database.
+    """
+    if not chunks:
         return chunks
 
+    cache = get_parent_context_cache(db)
+    cached = {chunk.chunk_id: cache.get(chunk.chunk_id) for chunk in chunks}
+    missing = [chunk_id for chunk_id, entry in cached.items() if entry is None]
+
+    parent = aliased(DBDocumentChunk)
+    parent_content = case(
+        (DBDocumentChunk.id.in_(missing), parent.content), else_=null()
+    ) if missing else null()
+
+    try:
+        rows = db.query(
+            DBDocumentChunk.id,
+            DBDocumentChunk.document_id,
+            parent.id.label("parent_id"),
+            parent_content.label("parent_content"),
+            DBDocument.filename,
+            DBDocument.source_url,
+            DBDocument.source_type
+        ).outerjoin(
+            parent, DBDocumentChunk.parent_chunk_id == parent.id
+        ).outerjoin(
+            DBDocument, DBDocument.id == DBDocumentChunk.document_id
+        ).filter(DBDocumentChunk.id.in_(list(cached))).all()
+    except Exception as e:
+        logger.warning(f"Could not enrich chunks: {e}")
+        return chunks
+
+    rows_by_id = {row.id: row for row in rows}
+    for chunk in chunks:
+        row = rows_by_id.get(chunk.chunk_id)
+        if row is None:
+            continue
+
+        entry = cached[chunk.chunk_id]
+        if entry is None:
+            entry = (row.parent_id, row.parent_content)
+            cache.put(chunk.chunk_id, row.document_id, *entry)
+        parent_id, content = entry
+        if parent_id is not None:
+            chunk.parent_chunk_id = parent_id
+            chunk.parent_content = content
+
+        chunk.filename = row.filename
+        chunk.source_url = row.source_url
+        chunk.source_type = row.source_type
+
+    return chunks
+
 
 # =============================================================================
 # Main Enhanced RAG Service
@@ -701,13 +962,19 @@ class EnhancedRAGService:
         # Embedding service (lazy loaded)
         self._embedding_service = None
 
-    async def _get_embedding(self, text: str) -> Optional[List[float]]:
-        """Get embedding for text using the embedding service."""
+    def _get_embedding_service(self):
         if self._embedding_service is None:
             from .embedding_service import get_embedding_service
             self._embedding_service = get_embedding_service()
+        return self._embedding_service
 
-        return await self._embedding_service.embed_text(text)
+    async def _get_embedding(self, text: str) -> Optional[List[float]]:
+        """Get embedding for text using the embedding service."""
+        return await self._get_embedding_service().embed_text(text)
+
+    async def _get_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Get embeddings for several texts in one batched call."""
+        return await self._get_embedding_service().embed_batch(texts)
 
     async def generate(
         self,
@@ -721,7 +988,8 @@ class EnhancedRAGService:
 
         Pipeline:
         1. Query Expansion (optional)
-        2. Hybrid Search (embedding + TF-IDF)
+        2. Hybrid Search (embedding + BM25) for all variants, merged with
+           reciprocal-rank fusion
         3. Cross-Encoder Reranking
         4. Parent Context Enrichment
         5. LLM Generation with Citations
@@ -742,46 +1010,39 @@ class EnhancedRAGService:
         expanded_queries = [query]
 
         # Step 1: Query Expansion
+        expansion_start = time.time()
         if self.config.enable_query_expansion:
             expanded_queries = await self.query_expander.expand(
                 query, self.config.max_expanded_queries
             )
             logger.info(f"Expanded query to {len(expanded_queries)} variants")
+        expansion_time = (time.time() - expansion_start) * 1000
 
         # Step 2: Hybrid Search with all query variants
         retrieval_start = time.time()
-        all_chunks: Dict[int, RetrievedChunk] = {}
-
-        for exp_query in expanded_queries:
-            # Get embedding for this query variant
-            query_embedding = await self._get_embedding(exp_query)
-            if not query_embedding:
-                continue
-
-            # Search with this variant
-            chunks = await self.hybrid_searcher.search(
-                exp_query,
-                query_embedding,
+        embeddings = await self._get_embeddings(expanded_queries)
+        variants = [(q, e) for q, e in zip(expanded_queries, embeddings) if e]
+        embedding_time = (time.time() - retrieval_start) * 1000
+
+        search_start = time.time()
+        retrieved_chunks: List[RetrievedChunk] = []
+        if variants:
+            results = await self.hybrid_searcher.search_many(
+                [q for q, _ in variants],
+                [e for _, e in variants],
                 kb_id,
                 top_k=self.config.initial_retrieval_k,
                 min_similarity=self.config.min_similarity_threshold
             )
-
-            # Merge results (keep best score per chunk)
-            for chunk in chunks:
-                if chunk.chunk_id not in all_chunks:
-                    all_chunks[chunk.chunk_id] = chunk
-                elif chunk.hybrid_score > all_chunks[chunk.chunk_id].hybrid_score:
-                    all_chunks[chunk.chunk_id] = chunk
-
+            retrieved_chunks = reciprocal_rank_fusion(results, k=self.config.rrf_k)
+        search_time = (time.time() - search_start) * 1000
         retrieval_time = (time.time() - retrieval_start) * 1000
-        retrieved_chunks = list(all_chunks.values())
         logger.info(f"Retrieved {len(retrieved_chunks)} unique chunks")
 
         # Step 3: Cross-Encoder Reranking
         rerank_start = time.time()
         if self.config.enable_reranking and retrieved_chunks:
-            retrieved_chunks = self.reranker.rerank(
+            retrieved_chunks = await self.reranker.arerank(
                 query,
                 retrieved_chunks,
                 top_k=self.config.rerank_top_k
@@ -789,15 +1050,14 @@ class EnhancedRAGService:
         rerank_time = (time.time() - rerank_start) * 1000
         logger.info(f"Reranked to {len(retrieved_chunks)} chunks")
 
-        # Step 4: Enrich with parent context
+        # Step 4: Enrich with parent context and document metadata (one query)
+        enrichment_start = time.time()
         retrieved_chunks = self.parent_child_chunker.get_parent_context(
             retrieved_chunks, self.db
         )
+        enrichment_time = (time.time() - enrichment_start) * 1000
 
-        # Step 5: Enrich with document metadata
-        retrieved_chunks = await self._enrich_metadata(retrieved_chunks)
-
-        # Step 6: Generate response
+        # Step 5: Generate response
         gen_start = time.time()
         answer = await self._generate_answer(query, retrieved_chunks, model)
         gen_time = (time.time() - gen_start) * 1000
@@ -812,40 +1072,13 @@ class EnhancedRAGService:
             rerank_time_ms=rerank_time,
             generation_time_ms=gen_time,
             total_time_ms=total_time,
-            model_used=model
+            model_used=model,
+            expansion_time_ms=expansion_time,
+            embedding_time_ms=embedding_time,
+            search_time_ms=search_time,
+            enrichment_time_ms=enrichment_time
         )
 
-    async def _enrich_metadata(
-        self,
-        chunks: List[RetrievedChunk]
-    ) -> List[RetrievedChunk]:
-        """Add document metadata to chunks."""
-        if not chunks:
-            return chunks
-
-        doc_ids = list(set(c.document_id for c in chunks))
-
-        query = text("""
-            SELECT doc_id, filename, source_url, source_type
-            FROM documents
-            WHERE doc_id = ANY(:doc_ids)
-        """)
-
-        try:
-            result = self.db.execute(query, {"doc_ids": doc_ids})
-            metadata = {row.doc_id: row for row in result}
-
-            for chunk in chunks:
-                if chunk.document_id in metadata:
-                    meta = metadata[chunk.document_id]
-                    chunk.filename = meta.filename
-                    chunk.source_url = meta.source_url
-                    chunk.source_type = meta.source_type
-        except Exception as e:
-            logger.warning(f"Could not enrich metadata: {e}")
-
-        return chunks
-
     async def _generate_answer(
         self,
         query: str,
@@ -853,10 +1086,9 @@ class EnhancedRAGService:
         model: str
     ) -> str:
         """Generate answer using LLM with retrieved context."""
-        from openai import AsyncOpenAI
-        from .config import settings
+        from .openai_clients import get_async_openai
 
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
+        client = get_async_openai()
 
         # Build context from chunks
         context_parts = []
@@ -53,6 +53,20 @@ class FileDecodingError(FileProcessingError):
         super().__init__(msg)
 
 
+class DuplicateDocumentError(FileProcessingError):
+    """Raised when an upload duplicates a document already in the knowledge base."""
+
+    def __init__(self, name: str, doc_id: int, similarity: float = 1.0):
+        self.name = name
+        self.doc_id = doc_id
+        self.similarity = similarity
+        if similarity >= 1.0:
+            msg = f"{name} is identical to existing document {doc_id}"
+        else:
+            msg = f"{name} duplicates existing document {doc_id} ({similarity:.0%} similar)"
+        super().__init__(msg)
+
+
 # =============================================================================
 # Transcription Exceptions
 # =============================================================================
@@ -8,14 +8,24 @@ Builds and queries a graph of document relationships based on:
 - Cluster membership
 
 Enables discovering related documents and knowledge pathways.
+
+Each process builds a KB's graph once and then maintains it incrementally:
+uploads, deletes and cluster moves add or remove a single node and its
+edges, and every change bumps the graph's version.
 """
 
 import logging
-from typing import List, Dict, Optional, Set, Tuple, Any
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple, Any
 from dataclasses import dataclass, field
 from collections import defaultdict
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from .constants import GRAPH_SYNC_INTERVAL_SECONDS
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,13 +65,52 @@ class KnowledgeGraphStats:
 class KnowledgeGraphService:
     """Service for building and querying the knowledge graph."""
 
-    def __init__(self):
-        """Initialize the knowledge graph service."""
+    def __init__(self, sync_interval: float = GRAPH_SYNC_INTERVAL_SECONDS):
+        """
+        Initialize the knowledge graph service.
+
+        Args:
+            sync_interval: Minimum seconds between watermark checks in sync()
+        """
+        self.knowledge_base_id: Optional[str] = None
+        self.sync_interval = sync_interval
+        self.version = 0
         self._nodes: Dict[int, DocumentNode] = {}
-        self._relationships: List[DocumentRelationship] = []
+        # doc_id -> neighbour doc_id -> relationships between the two
+        self._adjacency: Dict[int, Dict[int, List[DocumentRelationship]]] = {}
+        self._relationship_count = 0
         self._concept_index: Dict[str, Set[int]] = defaultdict(set)
         self._tech_index: Dict[str, Set[int]] = defaultdict(set)
         self._cluster_index: Dict[int, Set[int]] = defaultdict(set)
+        self._updated_at: Dict[int, datetime] = {}
+        self._watermark: Optional[Tuple] = None
+        self._pending: Set[int] = set()
+        self._stale = False
+        self._synced_at = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def relationship_count(self) -> int:
+        """Number of relationships in the graph."""
+        return self._relationship_count
+
+    def relationships(self) -> Iterator[DocumentRelationship]:
+        """Iterate over every relationship once."""
+        for doc_id, neighbours in self._adjacency.items():
+            for rels in neighbours.values():
+                for rel in rels:
+                    if rel.source_doc_id == doc_id:
+                        yield rel
+
+    def get_stats(self) -> KnowledgeGraphStats:
+        """Statistics for the current graph."""
+        return KnowledgeGraphStats(
+            total_documents=len(self._nodes),
+            total_relationships=self._relationship_count,
+            unique_concepts=len(self._concept_index),
+            unique_technologies=len(self._tech_index),
+            avg_connections_per_doc=round(self._relationship_count / max(len(self._nodes), 1), 2)
+        )
 
     def build_graph(
         self,
@@ -78,42 +127,115 @@ class KnowledgeGraphService:
         Returns:
             KnowledgeGraphStats with graph statistics
         """
-        from .db_models import DBDocument, DBDocumentSummary
+        with self._lock:
+            # Clear existing graph
+            self.knowledge_base_id = knowledge_base_id
+            self._nodes.clear()
+            self._adjacency.clear()
+            self._relationship_count = 0
+            self._concept_index.clear()
+            self._tech_index.clear()
+            self._cluster_index.clear()
+            self._updated_at.clear()
+            self._pending.clear()
+            self._stale = False
+
+            nodes, max_summary_id = self._load_nodes(db)
+            for node, updated_at in nodes:
+                self._nodes[node.doc_id] = node
+                self._updated_at[node.doc_id] = updated_at
+                self._index_node(node)
+
+            # Build relationships
+            self._build_relationships()
+
+            # The loaded rows double as the first watermark
+            self._watermark = (
+                len(nodes),
+                max((node.internal_id for node, _ in nodes), default=0),
+                max((updated_at for _, updated_at in nodes), default=None),
+                max_summary_id
+            )
+            self._synced_at = time.monotonic()
+            self.version += 1
+
+            return self.get_stats()
+
+    def _load_nodes(
+        self,
+        db: Session,
+        doc_ids: Optional[Iterable[int]] = None
+    ) -> Tuple[List[Tuple[DocumentNode, datetime]], int]:
+        """
+        Load graph nodes for this KB's documents with three queries.
 
-        # Clear existing graph
-        self._nodes.clear()
-        self._relationships.clear()
-        self._concept_index.clear()
-        self._tech_index.clear()
-        self._cluster_index.clear()
+        Args:
+            db: Database session
+            doc_ids: Restrict to these documents (default: the whole KB)
 
-        # Load all documents with their summaries
-        documents = db.query(DBDocument).filter(
+        Returns:
+            ([(node, updated_at)], highest document summary id seen)
+        """
+        from .db_models import DBDocument, DBDocumentSummary, DBConcept
+
+        knowledge_base_id = self.knowledge_base_id
+        documents = db.query(
+            DBDocument.id, DBDocument.doc_id, DBDocument.filename, DBDocument.source_type,
+            DBDocument.skill_level, DBDocument.cluster_id, DBDocument.updated_at
+        ).filter(
             DBDocument.knowledge_base_id == knowledge_base_id
-        ).all()
+        )
 
+        # Document-level summaries (level 3) in one query
+        summary_rows = db.query(
+            DBDocumentSummary.id, DBDocumentSummary.document_id,
+            DBDocumentSummary.key_concepts, DBDocumentSummary.tech_stack
+        ).filter(
+            DBDocumentSummary.knowledge_base_id == knowledge_base_id,
+            DBDocumentSummary.summary_level == 3
+        ).order_by(DBDocumentSummary.id)
+
+        # Concepts table (fallback for documents without summaries), also one query
+        concept_rows = db.query(
+            DBConcept.document_id, DBConcept.name, DBConcept.category
+        ).join(
+            DBDocument, DBConcept.document_id == DBDocument.id
+        ).filter(
+            DBDocument.knowledge_base_id == knowledge_base_id
+        ).order_by(DBConcept.id)
+
+        if doc_ids is not None:
+            doc_ids = list(doc_ids)
+            documents = documents.filter(DBDocument.doc_id.in_(doc_ids))
+            summary_rows = summary_rows.join(
+                DBDocument, DBDocumentSummary.document_id == DBDocument.id
+            ).filter(DBDocument.doc_id.in_(doc_ids))
+            concept_rows = concept_rows.filter(DBDocument.doc_id.in_(doc_ids))
+
+        documents = documents.all()
+        summaries: Dict[int, Tuple[List[str], List[str]]] = {}
+        max_summary_id = 0
+        for summary_id, document_id, key_concepts, tech_stack in summary_rows:
+            summaries.setdefault(document_id, (key_concepts, tech_stack or []))
+            max_summary_id = max(max_summary_id, summary_id)
+
+        doc_concepts: Dict[int, List[Tuple[str, str]]] = defaultdict(list)
+        for document_id, name, category in concept_rows:
+            doc_concepts[document_id].append((name, category))
+
+        nodes = []
         for doc in documents:
-            # Try to get document-level summary (level 3) first
-            summary = db.query(DBDocumentSummary).filter(
-                DBDocumentSummary.document_id == doc.id,
-                DBDocumentSummary.summary_level == 3
-            ).first()
-
             # If summaries exist, use them; otherwise fall back to concepts table
-            if summary and summary.key_concepts:
-                concepts = summary.key_concepts
-                tech_stack = summary.tech_stack if summary.tech_stack else []
+            key_concepts, tech_stack = summaries.get(doc.id, (None, None))
+            if key_concepts:
+                concepts = key_concepts
             else:
-                # Fall back to concepts table
-                from .db_models import DBConcept
-                doc_concepts = db.query(DBConcept).filter(
-                    DBConcept.document_id == doc.id
-                ).all()
+                concepts = [name for name, _ in doc_concepts.get(doc.id, [])]
+                tech_stack = [
+                    name for name, category in doc_concepts.get(doc.id, [])
+                    if category in ('tool', 'framework', 'language')
+                ]
 
-                concepts = [c.name for c in doc_concepts]
-                tech_stack = [c.name for c in doc_concepts if c.category in ('tool', 'framework', 'language')]
-
-            # Create node
             node = DocumentNode(
                 doc_id=doc.doc_id,
                 internal_id=doc.id,
@@ -124,81 +246,251 @@ class KnowledgeGraphService:
                 skill_level=doc.skill_level,
                 cluster_id=doc.cluster_id
             )
-            self._nodes[doc.doc_id] = node
+            nodes.append((node, doc.updated_at))
+
+        return nodes, max_summary_id
+
+    def _index_node(self, node: DocumentNode) -> None:
+        for concept in node.concepts:
+            self._concept_index[concept].add(node.doc_id)
+        for tech in node.tech_stack:
+            self._tech_index[tech].add(node.doc_id)
+        if node.cluster_id is not None:
+            self._cluster_index[node.cluster_id].add(node.doc_id)
+
+    def _unindex_node(self, node: DocumentNode) -> None:
+        for index, keys in (
+            (self._concept_index, node.concepts),
+            (self._tech_index, node.tech_stack),
+            (self._cluster_index, [node.cluster_id] if node.cluster_id is not None else []),
+        ):
+            for key in keys:
+                postings = index.get(key)
+                if postings is not None:
+                    postings.discard(node.doc_id)
+                    if not postings:
+                        del index[key]
+
+    def _build_relationships(self):
+        """
+        Build relationships between documents from the posting lists.
+
+        Only pairs that co-occur in some concept, technology or cluster
+        posting list are visited, so the cost is proportional to the number
+        of relationships rather than to every pair of documents.
+        """
+        # Node order decides which document of a pair is the source
+        position = {doc_id: i for i, doc_id in enumerate(self._nodes)}
+        nodes = self._nodes
+
+        # Shared concepts
+        for (doc1_id, doc2_id), shared in self._shared_items(self._concept_index, position).items():
+            strength = len(shared) / max(len(nodes[doc1_id].concepts), len(nodes[doc2_id].concepts), 1)
+            self._add_relationship(DocumentRelationship(
+                doc1_id, doc2_id, "shared_concept", min(strength, 1.0), shared
+            ))
+
+        # Shared technologies
+        for (doc1_id, doc2_id), shared in self._shared_items(self._tech_index, position).items():
+            strength = len(shared) / max(len(nodes[doc1_id].tech_stack), len(nodes[doc2_id].tech_stack), 1)
+            self._add_relationship(DocumentRelationship(
+                doc1_id, doc2_id, "shared_tech", min(strength, 1.0), shared
+            ))
+
+        # Same cluster
+        for cluster_id, doc_ids in self._cluster_index.items():
+            postings = sorted(doc_ids, key=position.__getitem__)
+            shared = [f"cluster_{cluster_id}"]
+            for i, doc1_id in enumerate(postings):
+                for doc2_id in postings[i + 1:]:
+                    self._add_relationship(DocumentRelationship(
+                        doc1_id, doc2_id, "same_cluster", 0.8, list(shared)
+                    ))
 
-            # Build indexes
-            for concept in node.concepts:
-                self._concept_index[concept].add(doc.doc_id)
+    @staticmethod
+    def _shared_items(
+        index: Dict[str, Set[int]],
+        position: Dict[int, int]
+    ) -> Dict[Tuple[int, int], List[str]]:
+        """Map each (source, target) doc pair to the index keys both appear under."""
+        shared: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        for item, doc_ids in index.items():
+            if len(doc_ids) < 2:
+                continue
+            postings = sorted(doc_ids, key=position.__getitem__)
+            for i, doc1_id in enumerate(postings):
+                for doc2_id in postings[i + 1:]:
+                    shared[(doc1_id, doc2_id)].append(item)
+        return shared
+
+    def _add_relationship(self, relationship: DocumentRelationship) -> None:
+        source, target = relationship.source_doc_id, relationship.target_doc_id
+        self._adjacency.setdefault(source, {}).setdefault(target, []).append(relationship)
+        self._adjacency.setdefault(target, {}).setdefault(source, []).append(relationship)
+        self._relationship_count += 1
+
+    # -------------------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------------------
+
+    def add_document(self, node: DocumentNode) -> None:
+        """
+        Add (or replace) one document and link it to the graph.
 
-            for tech in node.tech_stack:
-                self._tech_index[tech].add(doc.doc_id)
+        Candidate neighbours come from the node's own posting lists, so the
+        cost is proportional to the new node's degree.
+        """
+        with self._lock:
+            self.remove_document(node.doc_id)
+            nodes = self._nodes
+            doc_id = node.doc_id
+
+            # Existing nodes come first in node order, so they are the source
+            for index, items, rel_type in (
+                (self._concept_index, node.concepts, "shared_concept"),
+                (self._tech_index, node.tech_stack, "shared_tech"),
+            ):
+                shared: Dict[int, List[str]] = defaultdict(list)
+                for item in dict.fromkeys(items):
+                    for other_id in index.get(item, ()):
+                        shared[other_id].append(item)
+                for other_id, other_shared in shared.items():
+                    other_items = nodes[other_id].concepts if rel_type == "shared_concept" else nodes[other_id].tech_stack
+                    strength = len(other_shared) / max(len(other_items), len(items), 1)
+                    self._add_relationship(DocumentRelationship(
+                        other_id, doc_id, rel_type, min(strength, 1.0), other_shared
+                    ))
 
             if node.cluster_id is not None:
-                self._cluster_index[node.cluster_id].add(doc.doc_id)
+                for other_id in self._cluster_index.get(node.cluster_id, ()):
+                    self._add_relationship(DocumentRelationship(
+                        other_id, doc_id, "same_cluster", 0.8, [f"cluster_{node.cluster_id}"]
+                    ))
 
-        # Build relationships
-        self._build_relationships()
+            nodes[doc_id] = node
+            self._index_node(node)
+            self.version += 1
+
+    def remove_document(self, doc_id: int) -> bool:
+        """Remove one document and its relationships. Returns False if absent."""
+        with self._lock:
+            node = self._nodes.pop(doc_id, None)
+            if node is None:
+                return False
+            for other_id, rels in self._adjacency.pop(doc_id, {}).items():
+                self._relationship_count -= len(rels)
+                neighbours = self._adjacency.get(other_id)
+                if neighbours is not None:
+                    neighbours.pop(doc_id, None)
+                    if not neighbours:
+                        del self._adjacency[other_id]
+            self._unindex_node(node)
+            self._updated_at.pop(doc_id, None)
+            self.version += 1
+            return True
+
+    def refresh_documents(self, db: Session, doc_ids: Iterable[int]) -> None:
+        """
+        Re-read the given documents and update their nodes and edges.
 
-        # Calculate stats
-        total_connections = sum(1 for r in self._relationships)
-        avg_connections = total_connections / len(self._nodes) if self._nodes else 0
+        Documents that no longer exist (or left this KB) are removed; the
+        rest are re-added with their current concepts and cluster.
+        """
+        doc_ids = set(doc_ids)
+        if not doc_ids:
+            return
+        with self._lock:
+            nodes, _ = self._load_nodes(db, doc_ids)
+            for doc_id in doc_ids:
+                self.remove_document(doc_id)
+            for node, updated_at in nodes:
+                self.add_document(node)
+                self._updated_at[node.doc_id] = updated_at
+
+    def mark_changed(self, doc_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Record documents changed elsewhere; applied on the next sync().
 
-        return KnowledgeGraphStats(
-            total_documents=len(self._nodes),
-            total_relationships=len(self._relationships),
-            unique_concepts=len(self._concept_index),
-            unique_technologies=len(self._tech_index),
-            avg_connections_per_doc=round(avg_connections, 2)
-        )
+        Args:
+            doc_ids: Changed documents, or None when the changes are unknown
+                and the next sync should diff the whole KB
+        """
+        with self._lock:
+            if doc_ids is None:
+                self._stale = True
+            else:
+                self._pending.update(doc_ids)
 
-    def _build_relationships(self):
-        """Build relationships between documents."""
-        doc_ids = list(self._nodes.keys())
-
-        for i, doc1_id in enumerate(doc_ids):
-            node1 = self._nodes[doc1_id]
-
-            for doc2_id in doc_ids[i + 1:]:
-                node2 = self._nodes[doc2_id]
-
-                # Check shared concepts
-                shared_concepts = set(node1.concepts) & set(node2.concepts)
-                if shared_concepts:
-                    strength = len(shared_concepts) / max(
-                        len(node1.concepts), len(node2.concepts), 1
-                    )
-                    self._relationships.append(DocumentRelationship(
-                        source_doc_id=doc1_id,
-                        target_doc_id=doc2_id,
-                        relationship_type="shared_concept",
-                        strength=min(strength, 1.0),
-                        shared_items=list(shared_concepts)
-                    ))
+    def sync(self, db: Session, force: bool = False) -> None:
+        """
+        Bring the graph up to date with the database.
 
-                # Check shared technologies
-                shared_tech = set(node1.tech_stack) & set(node2.tech_stack)
-                if shared_tech:
-                    strength = len(shared_tech) / max(
-                        len(node1.tech_stack), len(node2.tech_stack), 1
-                    )
-                    self._relationships.append(DocumentRelationship(
-                        source_doc_id=doc1_id,
-                        target_doc_id=doc2_id,
-                        relationship_type="shared_tech",
-                        strength=min(strength, 1.0),
-                        shared_items=list(shared_tech)
-                    ))
+        Documents named by mark_changed() are refreshed immediately. Other
+        writes are found by a (count, max id, last update, last summary)
+        watermark checked at most every ``sync_interval`` seconds; when it
+        moves, only documents whose rows changed are refreshed.
 
-                # Check same cluster
-                if (node1.cluster_id is not None and
-                    node1.cluster_id == node2.cluster_id):
-                    self._relationships.append(DocumentRelationship(
-                        source_doc_id=doc1_id,
-                        target_doc_id=doc2_id,
-                        relationship_type="same_cluster",
-                        strength=0.8,
-                        shared_items=[f"cluster_{node1.cluster_id}"]
-                    ))
+        Args:
+            db: Database session
+            force: Check the watermark even if the sync interval has not elapsed
+        """
+        with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, set()
+                self.refresh_documents(db, pending)
+                self._watermark = self._read_watermark(db)
+                self._synced_at = time.monotonic()
+                if not self._stale:
+                    return
+            elif not (force or self._stale) and time.monotonic() - self._synced_at < self.sync_interval:
+                return
+
+            watermark = self._read_watermark(db)
+            self._synced_at = time.monotonic()
+            if not self._stale and watermark == self._watermark:
+                return
+
+            self.refresh_documents(db, self._changed_documents(db))
+            self._watermark = watermark
+            self._stale = False
+
+    def _read_watermark(self, db: Session) -> Tuple:
+        from .db_models import DBDocument, DBDocumentSummary
+
+        doc_count, max_id, last_update = db.query(
+            func.count(DBDocument.id), func.max(DBDocument.id), func.max(DBDocument.updated_at)
+        ).filter(
+            DBDocument.knowledge_base_id == self.knowledge_base_id
+        ).one()
+        max_summary_id = db.query(func.max(DBDocumentSummary.id)).filter(
+            DBDocumentSummary.knowledge_base_id == self.knowledge_base_id,
+            DBDocumentSummary.summary_level == 3
+        ).scalar()
+        return doc_count, max_id or 0, last_update, max_summary_id or 0
+
+    def _changed_documents(self, db: Session) -> Set[int]:
+        """Documents added, removed, updated or newly summarized since the last sync."""
+        from .db_models import DBDocument, DBDocumentSummary
+
+        current = dict(db.query(DBDocument.doc_id, DBDocument.updated_at).filter(
+            DBDocument.knowledge_base_id == self.knowledge_base_id
+        ))
+        changed = {doc_id for doc_id, updated_at in current.items() if self._updated_at.get(doc_id) != updated_at}
+        changed.update(set(self._nodes) - set(current))
+
+        last_summary_id = self._watermark[3] if self._watermark else 0
+        changed.update(doc_id for (doc_id,) in db.query(DBDocument.doc_id).join(
+            DBDocumentSummary, DBDocumentSummary.document_id == DBDocument.id
+        ).filter(
+            DBDocumentSummary.knowledge_base_id == self.knowledge_base_id,
+            DBDocumentSummary.summary_level == 3,
+            DBDocumentSummary.id > last_summary_id
+        ))
+        return changed
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
 
     def get_related_documents(
         self,
@@ -224,33 +516,26 @@ class KnowledgeGraphService:
 
         related = []
 
-        for rel in self._relationships:
-            # Check if this relationship involves our document
-            if rel.source_doc_id == doc_id:
-                other_id = rel.target_doc_id
-            elif rel.target_doc_id == doc_id:
-                other_id = rel.source_doc_id
-            else:
-                continue
-
-            # Apply filters
-            if relationship_type and rel.relationship_type != relationship_type:
-                continue
-            if rel.strength < min_strength:
-                continue
-
+        for other_id, rels in self._adjacency.get(doc_id, {}).items():
             other_node = self._nodes.get(other_id)
             if not other_node:
                 continue
 
-            related.append({
-                "doc_id": other_id,
-                "filename": other_node.filename,
-                "source_type": other_node.source_type,
-                "relationship_type": rel.relationship_type,
-                "strength": rel.strength,
-                "shared_items": rel.shared_items
-            })
+            for rel in rels:
+                # Apply filters
+                if relationship_type and rel.relationship_type != relationship_type:
+                    continue
+                if rel.strength < min_strength:
+                    continue
+
+                related.append({
+                    "doc_id": other_id,
+                    "filename": other_node.filename,
+                    "source_type": other_node.source_type,
+                    "relationship_type": rel.relationship_type,
+                    "strength": rel.strength,
+                    "shared_items": rel.shared_items
+                })
 
         # Sort by strength and limit
         related.sort(key=lambda x: x["strength"], reverse=True)
@@ -367,14 +652,7 @@ class KnowledgeGraphService:
             current_id, path = queue.popleft()
 
             # Get related documents
-            for rel in self._relationships:
-                if rel.source_doc_id == current_id:
-                    next_id = rel.target_doc_id
-                elif rel.target_doc_id == current_id:
-                    next_id = rel.source_doc_id
-                else:
-                    continue
-
+            for next_id in self._adjacency.get(current_id, {}):
                 if next_id in visited:
                     continue
 
@@ -427,16 +705,50 @@ async def get_knowledge_graph(
     knowledge_base_id: str,
     rebuild: bool = False
 ) -> KnowledgeGraphService:
-    """Get or build knowledge graph for a KB."""
-    global _graph_cache
-
-    if knowledge_base_id not in _graph_cache or rebuild:
-        service = KnowledgeGraphService()
-        service.build_graph(db, knowledge_base_id)
-        _graph_cache[knowledge_base_id] = service
+    """
+    Get the knowledge graph for a KB.
+
+    The graph is built once per process and then kept current by
+    KnowledgeGraphService.sync(), which applies uploads, deletes and
+    cluster moves one document at a time. ``rebuild`` forces a full build.
+    """
+    graph = _graph_cache.get(knowledge_base_id)
+    if graph is None or rebuild:
+        graph = KnowledgeGraphService()
+        graph.build_graph(db, knowledge_base_id)
+        _graph_cache[knowledge_base_id] = graph
         logger.info(f"Built knowledge graph for KB {knowledge_base_id}")
+    else:
+        graph.sync(db)
+
+    return graph
+
 
-    return _graph_cache[knowledge_base_id]
+def apply_graph_change(change: Optional[dict]) -> None:
+    """
+    Queue a published data change for the cached graphs it affects.
+
+    Args:
+        change: Delta from redis_client.notify_data_changed(), or None when
+            deltas were missed and every cached graph should diff itself
+    """
+    if change is None or change.get("entity") == "all":
+        for graph in list(_graph_cache.values()):
+            graph.mark_changed()
+        return
+
+    kb_id = change.get("knowledge_base_id")
+    if change.get("entity") == "knowledge_base":
+        if change.get("action") == "deleted":
+            _graph_cache.pop(kb_id, None)
+        return
+    if change.get("entity") != "document":
+        return
+
+    # Cluster deletes are published as document updates for the moved documents
+    for graph_kb_id, graph in list(_graph_cache.items()):
+        if kb_id is None or graph_kb_id == kb_id:
+            graph.mark_changed(change.get("ids") or [])
 
 
 async def get_graph_stats(
@@ -445,21 +757,13 @@ async def get_graph_stats(
 ) -> Dict[str, Any]:
     """Get statistics about the knowledge graph."""
     graph = await get_knowledge_graph(db, knowledge_base_id)
-
-    stats = KnowledgeGraphStats(
-        total_documents=len(graph._nodes),
-        total_relationships=len(graph._relationships),
-        unique_concepts=len(graph._concept_index),
-        unique_technologies=len(graph._tech_index),
-        avg_connections_per_doc=round(
-            len(graph._relationships) / max(len(graph._nodes), 1), 2
-        )
-    )
+    stats = graph.get_stats()
 
     return {
         "total_documents": stats.total_documents,
         "total_relationships": stats.total_relationships,
         "unique_concepts": stats.unique_concepts,
         "unique_technologies": stats.unique_technologies,
-        "avg_connections_per_doc": stats.avg_connections_per_doc
+        "avg_connections_per_doc": stats.avg_connections_per_doc,
+        "version": graph.version
     }
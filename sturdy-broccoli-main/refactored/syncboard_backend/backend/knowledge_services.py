@@ -30,7 +30,7 @@ import json
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 from openai import AsyncOpenAI
-from .config import settings
+from .openai_clients import get_async_openai
 
 logger = logging.getLogger(__name__)
 
@@ -164,10 +164,10 @@ class KnowledgeServices:
         self._client = None
 
     def _get_client(self) -> AsyncOpenAI:
-        """Lazy-load OpenAI client."""
-        if self._client is None:
-            self._client = AsyncOpenAI(api_key=settings.openai_api_key)
-        return self._client
+        """Injected client, else the shared OpenAI client for the running event loop."""
+        if self._client is not None:
+            return self._client
+        return get_async_openai()
 
     async def _call_llm(
         self,
@@ -0,0 +1,82 @@
+"""
+Multi-item LLM prompts for SyncBoard 3.0.
+
+Small documents and chunks cost more in per-request overhead and prompt
+preamble than in content. These helpers pack several of them into one
+structured-JSON prompt and split the response back into per-item results:
+- pack_batches() groups items by token budget and item count
+- format_batch_items() numbers the items inside the prompt
+- parse_batch_results() maps the response back to item numbers
+
+Callers fall back to single-item calls for anything a batch response
+does not cover.
+"""
+
+import json
+import logging
+from typing import Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def pack_batches(token_counts: Sequence[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """
+    Group item indices, in order, so no group exceeds either limit.
+
+    An item larger than ``max_tokens`` gets a group of its own.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def format_batch_items(texts: Sequence[str], label: str) -> str:
+    """Number each text (1-based) under a header the model can refer back to."""
+    return "\n\n".join(
+        f"=== {label} {number} ===\n{text}"
+        for number, text in enumerate(texts, start=1)
+    )
+
+
+def parse_batch_results(response_text: str, count: int) -> Dict[int, dict]:
+    """
+    Parse a ``{"results": [{"id": n, ...}, ...]}`` response.
+
+    Args:
+        response_text: Raw model output
+        count: Number of items sent (valid ids are 1..count)
+
+    Returns:
+        Result dict per item number; items missing or malformed in the
+        response are simply absent
+    """
+    try:
+        payload = json.loads(response_text)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Batch response is not valid JSON: {e}")
+        return {}
+
+    entries = payload.get("results") if isinstance(payload, dict) else payload
+    if not isinstance(entries, list):
+        return {}
+
+    results: Dict[int, dict] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            number = int(entry.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if 1 <= number <= count and number not in results:
+            results[number] = {key: value for key, value in entry.items() if key != "id"}
+    return results
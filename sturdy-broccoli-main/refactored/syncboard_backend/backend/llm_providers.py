@@ -14,6 +14,7 @@ from openai import AsyncOpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from .config import settings
+from .openai_clients import get_async_openai
 
 logger = logging.getLogger(__name__)
 
@@ -310,13 +311,15 @@ class OpenAIProvider(LLMProvider):
         if not self.api_key:
             raise ValueError("OpenAI API key required")
 
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            max_retries=0  # Disable OpenAI client retries (we handle retries ourselves)
-        )
         self.concept_model = concept_model
         self.suggestion_model = suggestion_model
 
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared OpenAI client for the running event loop."""
+        # Disable OpenAI client retries (we handle retries ourselves)
+        return get_async_openai(self.api_key, max_retries=0)
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -61,7 +61,9 @@ from .db_storage_adapter import load_storage_from_db
 from .storage import load_storage
 from .auth import hash_password
 from .security_middleware import SecurityHeadersMiddleware, HTTPSRedirectMiddleware
-from .redis_client import redis_client
+from .redis_client import redis_client, get_data_version, DATA_CHANGED_CHANNEL
+from .cache_sync import CacheSynchronizer
+from .usage_buffer import usage_buffer
 from .config import settings
 import threading
 
@@ -89,10 +91,7 @@ def reload_cache_from_database():
         logger.info("Reloading cache from database...")
 
         # Clear vector store first
-        dependencies.vector_store.docs.clear()
-        dependencies.vector_store.doc_ids.clear()
-        dependencies.vector_store.vectorizer = None
-        dependencies.vector_store.doc_matrix = None
+        dependencies.vector_store.clear()
 
         # Load from database
         docs, meta, clusts, usrs = load_storage_from_db(dependencies.vector_store)
@@ -127,6 +126,17 @@ def reload_cache_from_database():
         raise  # Re-raise to make failure visible
 
 
+# Applies structured data_changed deltas to the in-memory cache; falls back to
+# reload_cache_from_database() only when it detects a version gap it cannot replay
+cache_sync = CacheSynchronizer(
+    vector_store=dependencies.vector_store,
+    documents=dependencies.documents,
+    metadata=dependencies.metadata,
+    clusters=dependencies.clusters,
+    full_reload=reload_cache_from_database
+)
+
+
 def listen_for_data_changes():
     """Background thread that listens for data change notifications via Redis pub/sub."""
     if not redis_client:
@@ -135,16 +145,18 @@ def listen_for_data_changes():
 
     try:
         pubsub = redis_client.pubsub()
-        pubsub.subscribe("syncboard:data_changed")
+        pubsub.subscribe(DATA_CHANGED_CHANNEL)
         logger.info("✅ Subscribed to data change notifications (Redis pub/sub)")
 
+        # Anything published between the startup load and the subscription
+        cache_sync.catch_up()
+
         for message in pubsub.listen():
             if message['type'] == 'message':
-                logger.info("📨 Received data_changed notification, reloading cache from database...")
                 try:
-                    reload_cache_from_database()
-                except Exception as reload_error:
-                    logger.error(f"❌ Cache reload failed after notification: {reload_error}", exc_info=True)
+                    cache_sync.handle_message(message['data'])
+                except Exception as sync_error:
+                    logger.error(f"❌ Cache sync failed after notification: {sync_error}", exc_info=True)
     except Exception as e:
         logger.error(f"❌ CRITICAL: Data change listener crashed: {e}", exc_info=True)
         logger.error("⚠️  Cache will NOT auto-reload - uploads will NOT appear until restart!")
@@ -165,6 +177,9 @@ async def lifespan(app: FastAPI):
         init_db()
         logger.info("✅ Database initialized")
 
+        # Record the data version before loading so later deltas are replayed
+        cache_sync.version = get_data_version()
+
         # Load from database
         docs, meta, clusts, usrs = load_storage_from_db(dependencies.vector_store)
 
@@ -224,9 +239,13 @@ async def lifespan(app: FastAPI):
     listener_thread.start()
     logger.info("Started data change listener thread")
 
+    # Write buffered usage counters in batches
+    usage_buffer.start()
+
     yield  # Application runs here
 
-    # Shutdown: cleanup code goes here (if needed)
+    # Shutdown: write usage counted since the last flush
+    usage_buffer.stop()
     logger.info("Application shutting down")
 
 # =============================================================================
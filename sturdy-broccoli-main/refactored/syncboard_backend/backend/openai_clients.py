@@ -0,0 +1,85 @@
+"""
+Shared AsyncOpenAI clients for SyncBoard 3.0.
+
+Every AsyncOpenAI instance owns an HTTP connection pool. Creating one per
+service instance or per call throws away keep-alive connections (and their
+TLS sessions) after each use. get_async_openai() hands out one client per
+event loop and configuration instead:
+- the API process reuses its clients on the server's event loop
+- Celery workers reuse theirs on the process-wide loop from worker_loop
+
+Connection pools belong to the loop that opened them, which is why clients
+are never shared between loops.
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from .config import settings
+from .constants import (
+    OPENAI_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    OPENAI_HTTP_MAX_CONNECTIONS,
+    OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+ClientKey = Tuple[Optional[str], Optional[int]]
+
+# Clients per event loop, dropped together with their loop
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[ClientKey, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+# Clients requested outside any running loop
+_unbound_clients: Dict[ClientKey, AsyncOpenAI] = {}
+
+
+def get_async_openai(api_key: Optional[str] = None, max_retries: Optional[int] = None) -> AsyncOpenAI:
+    """
+    Shared client for the running event loop.
+
+    Args:
+        api_key: OpenAI API key (defaults to settings.openai_api_key)
+        max_retries: Client-level retries (None keeps the SDK default)
+
+    Returns:
+        An AsyncOpenAI whose keep-alive connections are reused across calls
+    """
+    api_key = api_key or settings.openai_api_key
+    key = (api_key, max_retries)
+    try:
+        clients = _loop_clients.setdefault(asyncio.get_running_loop(), {})
+    except RuntimeError:
+        clients = _unbound_clients
+
+    client = clients.get(key)
+    if client is None:
+        options = {} if max_retries is None else {"max_retries": max_retries}
+        client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=OPENAI_HTTP_KEEPALIVE_EXPIRY_SECONDS
+                )
+            ),
+            **options
+        )
+        clients[key] = client
+    return client
+
+
+async def close_async_openai_clients() -> None:
+    """Close the running loop's shared clients and their connections."""
+    clients = _loop_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close OpenAI client: {e}")
@@ -12,7 +12,7 @@ Uses Redis for fast in-memory caching with TTL (time-to-live) expiration.
 
 import json
 import logging
-from typing import Optional, Any
+from typing import Optional, Any, List
 import redis
 from redis.exceptions import RedisError, ConnectionError
 
@@ -429,20 +429,129 @@ def invalidate_search(user_id: str) -> int:
 # Data Change Notifications (Pub/Sub)
 # =============================================================================
 
-def notify_data_changed():
+DATA_CHANGED_CHANNEL = "syncboard:data_changed"
+DATA_VERSION_KEY = "syncboard:data_version"
+DATA_CHANGE_LOG_KEY = "syncboard:data_change_log"
+DATA_CHANGE_LOG_SIZE = 1000  # Deltas kept for subscribers catching up after a gap
+
+# Assign the next version, append the delta to the change log and publish it
+# in one atomic step so versions are logged and delivered in order.
+_PUBLISH_CHANGE_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+local change = cjson.decode(ARGV[1])
+change['version'] = version
+local payload = cjson.encode(change)
+redis.call('RPUSH', KEYS[2], payload)
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+redis.call('PUBLISH', ARGV[3], payload)
+return version
+"""
+
+
+def notify_data_changed(
+    entity: str = "all",
+    action: str = "reload",
+    ids: Optional[List[int]] = None,
+    knowledge_base_id: Optional[str] = None
+) -> Optional[int]:
     """
-    Notify that data has changed (for cache invalidation).
-    Publishes to Redis pub/sub channel so backend can reload from database.
+    Notify that data has changed (for cache synchronization).
+
+    Publishes a structured delta to the Redis pub/sub channel and appends it
+    to a bounded change log. Each delta carries a monotonic version so
+    subscribers can apply changes in order and detect gaps.
+
+    Args:
+        entity: "document", "cluster", "knowledge_base", or "all" (full reload)
+        action: "added", "updated", "deleted", or "reload"
+        ids: Affected doc_ids (documents) or cluster IDs (clusters)
+        knowledge_base_id: Knowledge base the change belongs to
+
+    Returns:
+        Version assigned to the change, or None if Redis is unavailable
     """
     if not redis_client:
         logger.warning("❌ Cannot notify data_changed: Redis not connected!")
-        return
+        return None
 
+    change = {
+        "entity": entity,
+        "action": action,
+        "ids": list(ids or []),
+        "knowledge_base_id": knowledge_base_id,
+    }
     try:
-        subscribers = redis_client.publish("syncboard:data_changed", "reload")
-        logger.info(f"📢 Published data_changed notification ({subscribers} subscribers)")
+        version = redis_client.eval(
+            _PUBLISH_CHANGE_SCRIPT, 2, DATA_VERSION_KEY, DATA_CHANGE_LOG_KEY,
+            json.dumps(change), DATA_CHANGE_LOG_SIZE, DATA_CHANGED_CHANNEL
+        )
+        logger.info(f"📢 Published data_changed v{version}: {entity} {action} {change['ids'] or ''}")
+        return int(version)
     except RedisError as e:
         logger.error(f"❌ Failed to publish data_changed notification: {e}", exc_info=True)
+        return None
+
+
+def parse_data_change(raw: Any) -> Optional[dict]:
+    """
+    Decode a data_changed message.
+
+    Returns:
+        Change dict, or None for legacy/unparseable payloads (treat as full reload)
+    """
+    try:
+        change = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(change, dict) or not isinstance(change.get("version"), int):
+        return None
+    # cjson encodes an empty list as an empty object
+    if not change.get("ids"):
+        change["ids"] = []
+    return change
+
+
+def get_data_version() -> int:
+    """Get the latest published data version (0 if unknown)."""
+    if not redis_client:
+        return 0
+
+    try:
+        version = redis_client.get(DATA_VERSION_KEY)
+        return int(version) if version else 0
+    except (RedisError, ValueError) as e:
+        logger.warning(f"Data version get error: {e}")
+        return 0
+
+
+def get_data_changes_since(version: int) -> Optional[List[dict]]:
+    """
+    Get all logged changes newer than ``version``, in order.
+
+    Returns:
+        List of change dicts (empty if up to date), or None if the log no
+        longer covers the gap and the caller must do a full reload
+    """
+    if not redis_client:
+        return None
+
+    try:
+        current = get_data_version()
+        if current <= version:
+            return []
+        changes = [parse_data_change(raw) for raw in redis_client.lrange(DATA_CHANGE_LOG_KEY, 0, -1)]
+    except RedisError as e:
+        logger.warning(f"Data change log read error: {e}")
+        return None
+
+    newer = sorted(
+        (c for c in changes if c is not None and c["version"] > version),
+        key=lambda c: c["version"]
+    )
+    expected = list(range(version + 1, current + 1))
+    if [c["version"] for c in newer][:len(expected)] != expected:
+        return None
+    return newer
 
 
 # =============================================================================
@@ -471,4 +580,7 @@ __all__ = [
     "get_user_job_count",
     "decrement_user_job_count",
     "notify_data_changed",
+    "parse_data_change",
+    "get_data_version",
+    "get_data_changes_since",
 ]
@@ -0,0 +1,217 @@
+"""
+Cross-Encoder Rerank Service for SyncBoard 3.0.
+
+CrossEncoderReranker used to load its model once per EnhancedRAGService
+(i.e. per request) and call predict() on the event loop, so every RAG
+request blocked the server while it scored its candidates. RerankService
+is shared by the whole process:
+- The model is loaded once, on the inference thread
+- Pairs from concurrent requests are collected for a short window and
+  scored together in one predict() call off the event loop
+- Scores are cached per (query hash, chunk id); chunk ids are never reused
+  for different content, since rewritten chunks get new ids
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constants import (
+    RERANK_BATCH_WINDOW_SECONDS,
+    RERANK_INFERENCE_THREADS,
+    RERANK_MAX_BATCH_PAIRS,
+    RERANK_SCORE_CACHE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+ScoreKey = Tuple[str, int]
+
+
+class _PendingBatch:
+    """Pairs waiting to be scored on one event loop."""
+
+    def __init__(self):
+        self.keys: List[ScoreKey] = []
+        self.pairs: List[Tuple[str, str]] = []
+        self.futures: Dict[ScoreKey, asyncio.Future] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class RerankService:
+    """Process-wide cross-encoder that micro-batches scoring across requests."""
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_window: float = RERANK_BATCH_WINDOW_SECONDS,
+        max_batch_pairs: int = RERANK_MAX_BATCH_PAIRS,
+        cache_size: int = RERANK_SCORE_CACHE_SIZE
+    ):
+        """
+        Initialize the service (the model is loaded on first use).
+
+        Args:
+            model_name: sentence-transformers cross-encoder model
+            batch_window: Seconds to collect pairs before scoring them
+            max_batch_pairs: Score at once when this many pairs are waiting
+            cache_size: Maximum number of cached scores
+        """
+        self.model_name = model_name
+        self.batch_window = batch_window
+        self.max_batch_pairs = max_batch_pairs
+        self.cache_size = cache_size
+
+        self._model = None
+        self._load_attempted = False
+        self._load_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=RERANK_INFERENCE_THREADS, thread_name_prefix="reranker"
+        )
+        self._cache: "OrderedDict[ScoreKey, float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Futures belong to the loop that created them, so batches are per loop
+        self._batches: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _PendingBatch]" = \
+            weakref.WeakKeyDictionary()
+
+    # -------------------------------------------------------------------------
+    # Model
+    # -------------------------------------------------------------------------
+
+    def get_model(self) -> Optional[Any]:
+        """Load the cross-encoder once; None if it is unavailable."""
+        with self._load_lock:
+            if not self._load_attempted:
+                self._load_attempted = True
+                try:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+                    logger.info(f"Loaded cross-encoder model: {self.model_name}")
+                except ImportError:
+                    logger.warning("sentence-transformers not installed, reranking disabled")
+                except Exception as e:
+                    logger.error(f"Failed to load cross-encoder: {e}")
+            return self._model
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        return [float(score) for score in self._model.predict(pairs)]
+
+    # -------------------------------------------------------------------------
+    # Scoring
+    # -------------------------------------------------------------------------
+
+    async def score(self, query: str, chunks: List[Tuple[int, str]]) -> Optional[List[float]]:
+        """
+        Score chunks against a query.
+
+        Args:
+            query: The user's query
+            chunks: (chunk_id, content) pairs
+
+        Returns:
+            One score per chunk, or None if no model is available
+
+        Raises:
+            Exception: Whatever the model raised while scoring
+        """
+        if not chunks:
+            return []
+
+        loop = asyncio.get_running_loop()
+        if not self._load_attempted:
+            await loop.run_in_executor(self._executor, self.get_model)
+        if self._model is None:
+            return None
+
+        query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        scores: List[Optional[float]] = []
+        waiting: List[Tuple[int, asyncio.Future]] = []
+        for i, (chunk_id, content) in enumerate(chunks):
+            key = (query_hash, chunk_id)
+            cached = self._cached(key)
+            scores.append(cached)
+            if cached is None:
+                waiting.append((i, self._enqueue(loop, key, (query, content))))
+
+        if waiting:
+            # Shielded: futures may be shared with other requests
+            results = await asyncio.gather(*(asyncio.shield(future) for _, future in waiting))
+            for (i, _), score in zip(waiting, results):
+                scores[i] = score
+        return scores
+
+    def _cached(self, key: ScoreKey) -> Optional[float]:
+        with self._cache_lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _enqueue(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        key: ScoreKey,
+        pair: Tuple[str, str]
+    ) -> asyncio.Future:
+        """Add a pair to this loop's pending batch (pairs already pending are shared)."""
+        batch = self._batches.get(loop)
+        if batch is None:
+            batch = self._batches[loop] = _PendingBatch()
+            batch.timer = loop.call_later(self.batch_window, self._flush, loop)
+
+        future = batch.futures.get(key)
+        if future is None:
+            future = batch.futures[key] = loop.create_future()
+            batch.keys.append(key)
+            batch.pairs.append(pair)
+            if len(batch.pairs) >= self.max_batch_pairs:
+                self._flush(loop)
+        return future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Send this loop's pending batch to the inference thread."""
+        batch = self._batches.pop(loop, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        logger.debug(f"Scoring {len(batch.pairs)} query/chunk pairs")
+        inference = loop.run_in_executor(self._executor, self._predict, batch.pairs)
+        inference.add_done_callback(lambda done: self._resolve(batch, done))
+
+    def _resolve(self, batch: _PendingBatch, inference: asyncio.Future) -> None:
+        error = asyncio.CancelledError() if inference.cancelled() else inference.exception()
+        if error is None:
+            scores = inference.result()
+            with self._cache_lock:
+                for key, score in zip(batch.keys, scores):
+                    self._cache[key] = score
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        for i, key in enumerate(batch.keys):
+            future = batch.futures[key]
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(scores[i])
+            else:
+                future.set_exception(error)
+
+
+# Global instances, one per model
+_rerank_services: Dict[str, RerankService] = {}
+_rerank_services_lock = threading.Lock()
+
+
+def get_rerank_service(model_name: str) -> RerankService:
+    """Get or create the process-wide RerankService for a model."""
+    with _rerank_services_lock:
+        service = _rerank_services.get(model_name)
+        if service is None:
+            service = _rerank_services[model_name] = RerankService(model_name)
+        return service
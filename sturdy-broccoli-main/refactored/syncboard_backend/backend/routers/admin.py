@@ -26,7 +26,7 @@ from ..dependencies import (
 from ..repository_interface import KnowledgeBankRepository
 from ..database import get_db
 from ..db_models import DBDocument, DBDocumentChunk, DBKnowledgeBase
-from ..chunking_pipeline import chunk_document_on_upload
+from ..chunking_pipeline import ChunkingPipeline, chunk_document_on_upload
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -106,7 +106,7 @@ async def get_chunk_status(
     # Reduces 2 separate queries to 1
     chunk_stats = db.query(
         func.count(DBDocumentChunk.id).label('total_chunks'),
-        func.sum(case((DBDocumentChunk.embedding.isnot(None), 1), else_=0)).label('with_embeddings')
+        func.sum(case((DBDocumentChunk.has_embedding, 1), else_=0)).label('with_embeddings')
     ).filter(
         DBDocumentChunk.knowledge_base_id == kb_id
     ).first()
@@ -178,6 +178,8 @@ async def backfill_chunks(
     failed = 0
     skipped = 0
 
+    # Collect content for every pending document up front
+    contents = {}
     for doc in pending_docs:
         doc_id = doc.doc_id
 
@@ -200,33 +202,37 @@ async def backfill_chunks(
             })
             continue
 
-        try:
-            # Process document through chunking pipeline
-            chunk_result = await chunk_document_on_upload(
-                db=db,
-                document=doc,
-                content=content,
-                generate_embeddings=req.generate_embeddings
-            )
-
-            succeeded += 1
-            results.append({
-                "doc_id": doc_id,
-                "status": "success",
-                "chunks": chunk_result.get("chunks", 0),
-                "embeddings": chunk_result.get("embeddings", 0)
-            })
+        contents[doc.id] = content
 
-            logger.info(f"Backfilled doc {doc_id}: {chunk_result.get('chunks', 0)} chunks")
+    # Chunk all documents, then embed all their chunks as one concurrent,
+    # token-packed batch instead of one document at a time
+    docs_to_process = [doc for doc in pending_docs if doc.id in contents]
+    public_ids = {doc.id: doc.doc_id for doc in docs_to_process}
+    batch_results = await ChunkingPipeline().process_batch(
+        db, docs_to_process, contents, generate_embeddings=req.generate_embeddings
+    )
 
-        except Exception as e:
+    for chunk_result in batch_results:
+        doc_id = public_ids[chunk_result["doc_id"]]
+        if chunk_result.get("status") == "failed":
             failed += 1
             results.append({
                 "doc_id": doc_id,
                 "status": "failed",
-                "error": str(e)
+                "error": chunk_result.get("error")
             })
-            logger.error(f"Backfill failed for doc {doc_id}: {e}")
+            logger.error(f"Backfill failed for doc {doc_id}: {chunk_result.get('error')}")
+            continue
+
+        succeeded += 1
+        results.append({
+            "doc_id": doc_id,
+            "status": "success",
+            "chunks": chunk_result.get("chunks", 0),
+            "embeddings": chunk_result.get("embeddings", 0)
+        })
+
+        logger.info(f"Backfilled doc {doc_id}: {chunk_result.get('chunks', 0)} chunks")
 
     logger.info(
         f"Backfill complete for user {current_user.username}: "
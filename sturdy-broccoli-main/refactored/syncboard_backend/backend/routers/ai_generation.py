@@ -139,7 +139,7 @@ async def generate_content(
         # Check if user has any chunks
         chunk_count = db.query(DBDocumentChunk).filter(
             DBDocumentChunk.knowledge_base_id == kb_id,
-            DBDocumentChunk.embedding.isnot(None)
+            DBDocumentChunk.has_embedding
         ).count()
 
         if chunk_count > 0:
@@ -332,8 +332,12 @@ async def generate_enhanced(
                 for c in response.chunks_used[:10]  # Top 10 citations
             ],
             "timing": {
+                "expansion_ms": round(response.expansion_time_ms, 2),
+                "embedding_ms": round(response.embedding_time_ms, 2),
+                "search_ms": round(response.search_time_ms, 2),
                 "retrieval_ms": round(response.retrieval_time_ms, 2),
                 "rerank_ms": round(response.rerank_time_ms, 2),
+                "enrichment_ms": round(response.enrichment_time_ms, 2),
                 "generation_ms": round(response.generation_time_ms, 2),
                 "total_ms": round(response.total_time_ms, 2)
             },
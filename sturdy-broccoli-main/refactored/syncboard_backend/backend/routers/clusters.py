@@ -24,6 +24,7 @@ from ..database import get_db
 from sqlalchemy.orm import Session
 from ..sanitization import sanitize_cluster_name
 from ..constants import SKILL_LEVELS
+from ..redis_client import notify_data_changed
 from ..websocket_manager import broadcast_cluster_updated, broadcast_cluster_deleted
 
 # Initialize logger
@@ -142,6 +143,7 @@ async def update_cluster(
         raise HTTPException(500, "Failed to update cluster")
 
     logger.info(f"Updated cluster {cluster_id} in KB {kb_id}: {cluster.name}")
+    notify_data_changed("cluster", "updated", [cluster_id], kb_id)
 
     # Broadcast WebSocket event for real-time updates
     try:
@@ -229,6 +231,8 @@ async def delete_cluster(
             logger.warning(f"Failed to delete cluster {cluster_id} from repository")
 
         logger.info(f"Deleted cluster {cluster_id} '{cluster_name}' in KB {kb_id} and DELETED {deleted_count} documents permanently")
+        notify_data_changed("document", "updated", doc_ids_to_process, kb_id)
+        notify_data_changed("cluster", "deleted", [cluster_id], kb_id)
 
         # Broadcast WebSocket event for real-time updates
         try:
@@ -252,6 +256,8 @@ async def delete_cluster(
             raise HTTPException(500, "Failed to delete cluster")
 
         logger.info(f"Deleted cluster {cluster_id} '{cluster_name}' in KB {kb_id} ({doc_count} documents now unclustered)")
+        notify_data_changed("document", "updated", doc_ids_to_process, kb_id)
+        notify_data_changed("cluster", "deleted", [cluster_id], kb_id)
 
         # Broadcast WebSocket event for real-time updates
         try:
@@ -26,7 +26,8 @@ from ..constants import SKILL_LEVELS
 from ..redis_client import (
     invalidate_analytics,
     invalidate_build_suggestions,
-    invalidate_search
+    invalidate_search,
+    notify_data_changed
 )
 from ..websocket_manager import broadcast_document_deleted, broadcast_document_updated
 from ..feedback_service import feedback_service
@@ -278,6 +279,7 @@ async def delete_document(
     invalidate_build_suggestions(user.username)
     invalidate_search(user.username)
     logger.info(f"Invalidated caches for {user.username} after document deletion")
+    notify_data_changed("document", "deleted", [doc_id], kb_id)
 
     # Structured logging with request context
     logger.info(
@@ -374,6 +376,7 @@ async def update_document_metadata(
         raise HTTPException(500, "Failed to update metadata")
 
     logger.info(f"Updated metadata for document {doc_id} in KB {kb_id}")
+    notify_data_changed("document", "updated", [doc_id], kb_id)
 
     # Broadcast WebSocket event for real-time updates
     try:
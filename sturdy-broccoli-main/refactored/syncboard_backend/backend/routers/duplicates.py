@@ -5,10 +5,11 @@ Provides endpoints for finding and merging duplicate documents.
 """
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
 
 from ..models import User
+from ..constants import DUPLICATE_DEFAULT_THRESHOLD, DUPLICATE_MIN_THRESHOLD
 from ..dependencies import get_current_user, get_vector_store
 from ..database import get_db_context
 from ..duplicate_detection import DuplicateDetector
@@ -21,7 +22,7 @@ router = APIRouter(tags=["duplicates"])
 
 @router.get("/duplicates")
 async def find_duplicates(
-    threshold: float = 0.85,
+    threshold: float = Query(DUPLICATE_DEFAULT_THRESHOLD, ge=DUPLICATE_MIN_THRESHOLD, le=1.0),
     limit: int = 100,
     current_user: User = Depends(get_current_user),
     vector_store: VectorStore = Depends(get_vector_store)
@@ -29,7 +30,8 @@ async def find_duplicates(
     """Find potentially duplicate documents based on content similarity.
 
     Args:
-        threshold: Similarity threshold (0-1), default 0.85 (85% similar)
+        threshold: Minimum word-shingle Jaccard similarity, 0.5-1 (default 0.7,
+            roughly 7% of words changed)
         limit: Maximum number of duplicate groups to return
         current_user: Authenticated user
 
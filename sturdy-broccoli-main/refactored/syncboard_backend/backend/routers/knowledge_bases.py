@@ -13,6 +13,7 @@ from datetime import datetime
 from ..database import get_db
 from ..dependencies import get_current_user, get_repository, get_kb_documents, get_kb_metadata, get_kb_clusters, get_build_suggester
 from ..repository_interface import KnowledgeBankRepository
+from ..redis_client import notify_data_changed
 from ..db_models import DBKnowledgeBase, DBBuildSuggestion, DBDocument, DBCluster, DBBuildIdeaSeed
 from ..models import (
     KnowledgeBase,
@@ -197,6 +198,7 @@ async def delete_knowledge_base(
 
     db.delete(kb)
     db.commit()
+    notify_data_changed("knowledge_base", "deleted", knowledge_base_id=kb_id)
 
 
 @router.get("/{kb_id}/stats")
@@ -89,16 +89,21 @@ async def build_knowledge_graph(
     kb_id = get_user_default_kb_id(current_user.username, db)
 
     try:
-        graph = await get_knowledge_graph(db, kb_id, rebuild=True)
+        graph = await get_knowledge_graph(db, kb_id)
+        # The cached graph is maintained incrementally; catch up on any
+        # writes made since the last watermark check instead of rebuilding
+        graph.sync(db, force=True)
+        stats = graph.get_stats()
 
         return {
             "status": "success",
             "knowledge_base_id": kb_id,
+            "version": graph.version,
             "stats": {
-                "total_documents": len(graph._nodes),
-                "total_relationships": len(graph._relationships),
-                "unique_concepts": len(graph._concept_index),
-                "unique_technologies": len(graph._tech_index)
+                "total_documents": stats.total_documents,
+                "total_relationships": stats.total_relationships,
+                "unique_concepts": stats.unique_concepts,
+                "unique_technologies": stats.unique_technologies
             }
         }
     except Exception as e:
@@ -149,35 +149,26 @@ async def search_full_content(
     if not user_doc_ids:
         return {"results": [], "grouped_by_cluster": {}}
     
-    # Apply filters
-    filtered_ids = user_doc_ids.copy()
-
-    # Filter by cluster
-    if cluster_id is not None:
-        filtered_ids = [
-            doc_id for doc_id in filtered_ids
-            if kb_metadata[doc_id].cluster_id == cluster_id
-        ]
-
-    # Filter by source type
-    if source_type:
-        filtered_ids = [
-            doc_id for doc_id in filtered_ids
-            if kb_metadata[doc_id].source_type == source_type
-        ]
-
-    # Filter by skill level
-    if skill_level:
-        filtered_ids = [
-            doc_id for doc_id in filtered_ids
-            if kb_metadata[doc_id].skill_level == skill_level
-        ]
-
-    # Filter by date range (using pre-validated dates)
-    if parsed_date_from or parsed_date_to:
-        date_filtered = []
-        for doc_id in filtered_ids:
-            meta = kb_metadata[doc_id]
+    # Apply all filters in one pass; the result is a set so the vector
+    # store can turn it into a row mask without per-row list scans
+    filtered_ids = set()
+    for doc_id in user_doc_ids:
+        meta = kb_metadata[doc_id]
+
+        # Filter by cluster
+        if cluster_id is not None and meta.cluster_id != cluster_id:
+            continue
+
+        # Filter by source type
+        if source_type and meta.source_type != source_type:
+            continue
+
+        # Filter by skill level
+        if skill_level and meta.skill_level != skill_level:
+            continue
+
+        # Filter by date range (using pre-validated dates)
+        if parsed_date_from or parsed_date_to:
             if not meta.ingested_at:
                 continue
 
@@ -189,14 +180,12 @@ async def search_full_content(
 
                 if parsed_date_to and doc_date > parsed_date_to:
                     continue
-
-                date_filtered.append(doc_id)
             except (ValueError, TypeError):
                 # Skip documents with invalid or missing dates in metadata
                 continue
 
-        filtered_ids = date_filtered
-    
+        filtered_ids.add(doc_id)
+
     if not filtered_ids:
         return {"results": [], "grouped_by_cluster": {}, "filters_applied": {
             "source_type": source_type,
@@ -228,10 +217,12 @@ async def search_full_content(
 
     # Cache miss - perform search (expensive TF-IDF computation)
     logger.info(f"Cache MISS: Searching for '{q}' by {current_user.username}")
+    # Only the caller's KB partition is scored
     search_results = vector_store.search(
         query=q,
         top_k=top_k,
-        allowed_doc_ids=filtered_ids
+        allowed_doc_ids=filtered_ids,
+        knowledge_base_id=kb_id
     )
 
     # Build response with metadata
@@ -27,6 +27,7 @@ from ..models import User
 from ..dependencies import get_current_user
 from ..database import get_db
 from ..db_models import DBUserSubscription, DBUsageRecord, DBRateLimitOverride, DBUser
+from ..usage_buffer import usage_buffer, usage_period
 
 logger = logging.getLogger(__name__)
 limiter = Limiter(key_func=get_remote_address)
@@ -160,32 +161,6 @@ def get_or_create_subscription(db: Session, username: str) -> DBUserSubscription
     return subscription
 
 
-def get_current_usage(db: Session, subscription_id: int, username: str) -> DBUsageRecord:
-    """Get or create current month's usage record."""
-    now = datetime.utcnow()
-    period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-
-    usage = db.query(DBUsageRecord).filter(
-        DBUsageRecord.subscription_id == subscription_id,
-        DBUsageRecord.period_start == period_start
-    ).first()
-
-    if not usage:
-        usage = DBUsageRecord(
-            subscription_id=subscription_id,
-            username=username,
-            period_start=period_start,
-            period_end=period_end
-        )
-        db.add(usage)
-        db.commit()
-        db.refresh(usage)
-        logger.info(f"Created usage record for {username}")
-
-    return usage
-
-
 def get_user_limits(db: Session, username: str, plan: str) -> Dict[str, Any]:
     """Get effective limits for a user (plan limits + overrides)."""
     base_limits = PLAN_LIMITS.get(plan, PLAN_LIMITS["free"]).copy()
@@ -210,18 +185,24 @@ def get_user_limits(db: Session, username: str, plan: str) -> Dict[str, Any]:
     return base_limits
 
 
-def calculate_usage_percentage(usage: DBUsageRecord, limits: Dict[str, Any]) -> Dict[str, float]:
-    """Calculate usage as percentage of limits."""
+def load_user_limits(db: Session, username: str) -> Dict[str, Any]:
+    """Effective limits of a user's current plan (creating a free subscription if needed)."""
+    subscription = get_or_create_subscription(db, username)
+    return get_user_limits(db, username, subscription.plan)
+
+
+def calculate_usage_percentage(usage: Dict[str, int], limits: Dict[str, Any]) -> Dict[str, float]:
+    """Calculate usage (counter name -> value) as percentage of limits."""
     def calc_pct(used: int, limit: int) -> float:
         if limit <= 0:  # Unlimited
             return 0.0
         return min(100.0, (used / limit) * 100)
 
     return {
-        "api_calls": calc_pct(usage.api_calls, limits.get("api_calls_per_day", 100)),
-        "documents": calc_pct(usage.documents_uploaded, limits.get("documents_per_month", 50)),
-        "ai_requests": calc_pct(usage.ai_requests, limits.get("ai_requests_per_day", 10)),
-        "storage": calc_pct(usage.storage_bytes, limits.get("storage_mb", 100) * 1024 * 1024),
+        "api_calls": calc_pct(usage["api_calls"], limits.get("api_calls_per_day", 100)),
+        "documents": calc_pct(usage["documents_uploaded"], limits.get("documents_per_month", 50)),
+        "ai_requests": calc_pct(usage["ai_requests"], limits.get("ai_requests_per_day", 10)),
+        "storage": calc_pct(usage["storage_bytes"], limits.get("storage_mb", 100) * 1024 * 1024),
         "search_queries": 0.0,  # Usually unlimited
         "build_suggestions": 0.0  # Usually unlimited
     }
@@ -231,13 +212,14 @@ async def check_quota(db: Session, username: str, resource: str, amount: int = 1
     """
     Check if user has quota for a resource. Returns True if allowed, False if exceeded.
 
+    Reads the buffered usage counters, which include requests not yet
+    written to the database, and the user's cached limits.
+
     Usage:
         if not await check_quota(db, username, "documents"):
             raise HTTPException(429, "Document upload quota exceeded")
     """
-    subscription = get_or_create_subscription(db, username)
-    usage = get_current_usage(db, subscription.id, username)
-    limits = get_user_limits(db, username, subscription.plan)
+    limits = usage_buffer.limits(db, username, load_user_limits)
 
     resource_map = {
         "api_calls": ("api_calls", "api_calls_per_day"),
@@ -250,7 +232,7 @@ async def check_quota(db: Session, username: str, resource: str, amount: int = 1
         return True
 
     usage_field, limit_field = resource_map[resource]
-    current = getattr(usage, usage_field, 0)
+    current = usage_buffer.counters(db, username)[usage_field]
     limit = limits.get(limit_field, 0)
 
     # -1 means unlimited
@@ -265,10 +247,7 @@ async def check_quota(db: Session, username: str, resource: str, amount: int = 1
 
 
 async def increment_usage(db: Session, username: str, resource: str, amount: int = 1):
-    """Increment usage counter for a resource."""
-    subscription = get_or_create_subscription(db, username)
-    usage = get_current_usage(db, subscription.id, username)
-
+    """Increment usage counter for a resource (written with the next usage flush)."""
     resource_map = {
         "api_calls": "api_calls",
         "documents": "documents_uploaded",
@@ -279,9 +258,7 @@ async def increment_usage(db: Session, username: str, resource: str, amount: int
     }
 
     if resource in resource_map:
-        field = resource_map[resource]
-        setattr(usage, field, getattr(usage, field, 0) + amount)
-        db.commit()
+        usage_buffer.record(username, {resource_map[resource]: amount})
 
 
 # =============================================================================
@@ -295,20 +272,16 @@ async def get_usage(
 ):
     """Get current usage for authenticated user."""
     subscription = get_or_create_subscription(db, current_user.username)
-    usage = get_current_usage(db, subscription.id, current_user.username)
     limits = get_user_limits(db, current_user.username, subscription.plan)
+    period_start, period_end = usage_period()
+    usage = usage_buffer.counters(db, current_user.username)
 
     return UsageResponse(
-        period_start=usage.period_start,
-        period_end=usage.period_end,
-        api_calls=usage.api_calls,
-        documents_uploaded=usage.documents_uploaded,
-        ai_requests=usage.ai_requests,
-        storage_bytes=usage.storage_bytes,
-        search_queries=usage.search_queries,
-        build_suggestions=usage.build_suggestions,
+        period_start=period_start,
+        period_end=period_end,
         limits=limits,
-        usage_percentage=calculate_usage_percentage(usage, limits)
+        usage_percentage=calculate_usage_percentage(usage, limits),
+        **usage
     )
 
 
@@ -379,6 +352,7 @@ async def upgrade_subscription(
     subscription.plan = req.plan
     subscription.updated_at = datetime.utcnow()
     db.commit()
+    usage_buffer.forget_limits(current_user.username)
 
     logger.info(f"User {current_user.username} upgraded to {req.plan}")
 
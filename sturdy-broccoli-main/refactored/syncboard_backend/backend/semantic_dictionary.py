@@ -172,6 +172,7 @@ class SemanticDictionaryManager:
         self.seed_synonyms = SEED_SYNONYMS
         self.learned_synonyms: Dict[str, Set[str]] = {}
         self.similarity_cache: Dict[tuple, bool] = {}  # (concept_a, concept_b) -> is_similar
+        self.version = 0  # Bumped whenever a synonym is learned (invalidates expansions cached elsewhere)
 
         # Persistence
         if persistence_path:
@@ -412,6 +413,7 @@ Respond with ONLY a JSON object:
             if concept_b not in self.learned_synonyms:
                 self.learned_synonyms[concept_b] = set()
             self.learned_synonyms[concept_b].add(concept_a)
+            self.version += 1
 
             logger.info(f"Learned synonym: '{concept_a}' <-> '{concept_b}'")
 
@@ -0,0 +1,142 @@
+"""
+Process-wide shared vector index for DatabaseKnowledgeBankRepository.
+
+Repositories are built per request (and per document in batch tasks), so
+they must not each scan the vector_documents table and refit TF-IDF.
+Instead every repository bound to the same database engine shares one
+SharedVectorIndex:
+- Loaded lazily, once per process, on first use
+- Writes made through a repository are applied to it directly
+- Writes made by other processes are picked up by a cheap (count, max id)
+  watermark check, at most every SHARED_INDEX_SYNC_INTERVAL_SECONDS, and
+  only the rows that changed are read
+- ``version`` increases on every change so callers can detect staleness
+- Documents are partitioned by knowledge base, so KB-scoped searches only
+  score the caller's KB
+"""
+
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .db_models import DBDocument, DBVectorDocument
+from .vector_store import PartitionedVectorStore
+from .config import settings
+from .constants import DB_BULK_LOAD_BATCH_SIZE, SHARED_INDEX_SYNC_INTERVAL_SECONDS
+from .watermark_index import EngineRegistry, WatermarkIndex
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVectorIndex(WatermarkIndex):
+    """Read-mostly, KB-partitioned vector store mirrored from the vector_documents table."""
+
+    def __init__(self, dim: int = 256, sync_interval: float = SHARED_INDEX_SYNC_INTERVAL_SECONDS):
+        """
+        Initialize an empty, not-yet-loaded index.
+
+        Args:
+            dim: Dimension for vector store
+            sync_interval: Minimum seconds between watermark checks
+        """
+        super().__init__(sync_interval)
+        self.store = PartitionedVectorStore(dim=dim, incremental=settings.vector_store_incremental)
+        self._reserved = set()  # doc_ids indexed by reserve() but not yet committed
+
+    def __len__(self) -> int:
+        return len(self.store.docs) - len(self._reserved)
+
+    def reserve(self, db: Session, content: str, knowledge_base_id: Optional[str] = None) -> int:
+        """
+        Sync with the database, then index ``content`` under a new doc_id
+        in the partition of ``knowledge_base_id``.
+
+        Follow with confirm() once the row is committed, or discard() if
+        the write fails.
+        """
+        with self._lock:
+            self.sync(db, force=True)
+            doc_id = self.store.add_document(content, knowledge_base_id=knowledge_base_id)
+            self._reserved.add(doc_id)
+            self.version += 1
+            return doc_id
+
+    def confirm(self, doc_id: int, row_id: int) -> None:
+        """Record that a reserved document was committed as ``row_id``."""
+        with self._lock:
+            self._reserved.discard(doc_id)
+            self._row_count += 1
+            self._max_row_id = max(self._max_row_id, row_id)
+
+    def discard(self, doc_id: int) -> None:
+        """Drop a reserved doc_id whose database write did not happen."""
+        with self._lock:
+            self._reserved.discard(doc_id)
+            self.store.remove_document(doc_id)
+            self.version += 1
+
+    def remove(self, doc_id: int) -> None:
+        """Apply a document deleted by this process."""
+        with self._lock:
+            if doc_id in self.store.docs:
+                self.store.remove_document(doc_id)
+                self._row_count -= 1
+                self.version += 1
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        top_k: int = 10,
+        allowed_doc_ids: Optional[Iterable[int]] = None,
+        knowledge_base_id: Optional[str] = None
+    ) -> List[Tuple[int, float, str]]:
+        """Sync if due, then search the shared store (one KB partition if given)."""
+        with self._lock:
+            self.sync(db)
+            return self.store.search(
+                query, top_k=top_k, allowed_doc_ids=allowed_doc_ids, knowledge_base_id=knowledge_base_id
+            )
+
+    def _rows(self, db: Session):
+        """Query (doc_id, content, knowledge_base_id) for vector rows."""
+        return db.query(
+            DBVectorDocument.doc_id, DBVectorDocument.content, DBDocument.knowledge_base_id
+        ).outerjoin(DBDocument, DBDocument.doc_id == DBVectorDocument.doc_id)
+
+    def _watermark(self, db: Session) -> Tuple[int, int]:
+        row_count, max_row_id = db.query(
+            func.count(DBVectorDocument.id), func.max(DBVectorDocument.id)
+        ).one()
+        return row_count, max_row_id or 0
+
+    def _load_rows(self, db: Session) -> None:
+        rows = self._rows(db).order_by(DBVectorDocument.doc_id).yield_per(DB_BULK_LOAD_BATCH_SIZE)
+        loaded = self.store.load_documents(rows)
+        logger.info(f"Loaded {loaded} documents into shared vector index")
+
+    def _add_rows_after(self, db: Session, row_id: int) -> None:
+        for doc_id, content, kb_id in self._rows(db).filter(DBVectorDocument.id > row_id):
+            self.store.add_document(content, doc_id=doc_id, knowledge_base_id=kb_id)
+
+    def _reconcile(self, db: Session) -> None:
+        db_doc_ids = {doc_id for (doc_id,) in db.query(DBVectorDocument.doc_id)}
+        for doc_id in set(self.store.docs) - db_doc_ids - self._reserved:
+            self.store.remove_document(doc_id)
+        missing = db_doc_ids - set(self.store.docs)
+        if missing:
+            rows = self._rows(db).filter(DBVectorDocument.doc_id.in_(missing))
+            for doc_id, content, kb_id in rows:
+                self.store.add_document(content, doc_id=doc_id, knowledge_base_id=kb_id)
+
+
+# One index per database engine (in practice one per process; tests that
+# create throwaway engines get isolated indexes that die with the engine)
+_indexes = EngineRegistry()
+
+
+def get_shared_index(db: Session, dim: int = 256) -> SharedVectorIndex:
+    """Get the shared index for the engine ``db`` is bound to."""
+    return _indexes.get(db, lambda: SharedVectorIndex(dim=dim))
@@ -7,15 +7,29 @@ Generates multi-level summaries:
 - Level 3: Document summaries (full document)
 
 Uses OpenAI GPT models for summarization with structured output.
+Chunk and section summaries are requested concurrently (bounded by
+settings.summary_max_concurrency) and retried individually; small chunks
+share one request when settings.enable_llm_batching is on.
 """
 
+import asyncio
 import json
 import logging
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
 
+from .api_retry import RequestLimiter, backoff_delay, is_retryable
 from .config import settings
+from .constants import (
+    LLM_BATCH_MAX_ITEMS,
+    LLM_BATCH_MAX_TOKENS,
+    SUMMARY_BACKOFF_BASE_SECONDS,
+    SUMMARY_BACKOFF_MAX_SECONDS,
+    SUMMARY_MAX_RETRIES,
+)
+from .document_chunker import get_document_chunker
+from .llm_batching import format_batch_items, pack_batches, parse_batch_results
 
 logger = logging.getLogger(__name__)
 
@@ -38,23 +52,66 @@ class SummaryResult:
 class SummarizationService:
     """Service for generating hierarchical document summaries."""
 
-    def __init__(self):
-        """Initialize the summarization service."""
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_retries: int = SUMMARY_MAX_RETRIES
+    ):
+        """
+        Initialize the summarization service.
+
+        Args:
+            max_concurrency: Max completion requests in flight (default: settings.summary_max_concurrency)
+            max_retries: Retries per request on 429 / 5xx / connection errors
+        """
         self.api_key = OPENAI_API_KEY
         self.model = SUMMARY_MODEL
-        self._client = None
+        self.max_concurrency = max(1, max_concurrency or settings.summary_max_concurrency)
+        self.max_retries = max_retries
+        self._limiter: Optional[RequestLimiter] = None
+        self._limiter_loop = None
 
     @property
     def client(self):
-        """Lazy-load OpenAI client."""
-        if self._client is None:
+        """
+        Shared OpenAI client for the running event loop.
+
+        SDK retries are off: _create_completion's retry loop and request
+        limiter handle rate limits and transient errors.
+        """
+        try:
+            from .openai_clients import get_async_openai
+        except ImportError:
+            logger.error("OpenAI package not installed")
+            raise
+        return get_async_openai(self.api_key, max_retries=0)
+
+    def _get_limiter(self) -> RequestLimiter:
+        """The request limiter for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._limiter is None or self._limiter_loop is not loop:
+            self._limiter = RequestLimiter(self.max_concurrency)
+            self._limiter_loop = loop
+        return self._limiter
+
+    async def _create_completion(self, params: Dict[str, Any]):
+        """Run one chat completion under the concurrency limit, retrying transient errors."""
+        limiter = self._get_limiter()
+        for attempt in range(self.max_retries + 1):
             try:
-                from openai import OpenAI
-                self._client = OpenAI(api_key=self.api_key)
-            except ImportError:
-                logger.error("OpenAI package not installed")
-                raise
-        return self._client
+                async with limiter:
+                    return await self.client.chat.completions.create(**params)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(e, attempt, SUMMARY_BACKOFF_BASE_SECONDS, SUMMARY_BACKOFF_MAX_SECONDS)
+                status = getattr(e, "status_code", None)
+                if status == 429:
+                    limiter.pause(delay)
+                logger.warning(
+                    f"Summary request failed ({status or e}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
 
     def is_available(self) -> bool:
         """Check if summarization service is available."""
@@ -119,7 +176,7 @@ Return ONLY valid JSON:
             if not self.model.startswith("gpt-5"):
                 params["temperature"] = 0.3
 
-            response = self.client.chat.completions.create(**params)
+            response = await self._create_completion(params)
 
             result = json.loads(response.choices[0].message.content)
 
@@ -136,6 +193,101 @@ Return ONLY valid JSON:
                 key_concepts=[]
             )
 
+    async def summarize_chunks(self, chunk_texts: List[str]) -> List[SummaryResult]:
+        """
+        Summarize many chunks, packing small ones into shared requests.
+
+        Chunks are grouped up to LLM_BATCH_MAX_TOKENS / LLM_BATCH_MAX_ITEMS
+        per request and the batches run concurrently. A chunk left out of
+        (or a whole failed) batch response falls back to summarize_chunk().
+
+        Args:
+            chunk_texts: Chunk contents, in order
+
+        Returns:
+            One SummaryResult per chunk, in the same order
+        """
+        if not settings.enable_llm_batching or not self.is_available() or len(chunk_texts) < 2:
+            return list(await asyncio.gather(*(self.summarize_chunk(text) for text in chunk_texts)))
+
+        chunker = get_document_chunker()
+        groups = pack_batches(
+            [chunker.count_tokens(text[:3000]) for text in chunk_texts],
+            LLM_BATCH_MAX_TOKENS,
+            LLM_BATCH_MAX_ITEMS
+        )
+        results: List[Optional[SummaryResult]] = [None] * len(chunk_texts)
+
+        async def run(group: List[int]) -> None:
+            parsed = await self._summarize_chunk_batch([chunk_texts[i] for i in group]) if len(group) > 1 else {}
+            for number, index in enumerate(group, start=1):
+                results[index] = parsed.get(number)
+            missing = [index for index in group if results[index] is None]
+            if missing:
+                singles = await asyncio.gather(*(self.summarize_chunk(chunk_texts[i]) for i in missing))
+                for index, result in zip(missing, singles):
+                    results[index] = result
+
+        await asyncio.gather(*(run(group) for group in groups))
+        return results
+
+    async def _summarize_chunk_batch(self, chunk_texts: List[str]) -> Dict[int, SummaryResult]:
+        """Summarize several chunks in one request; returns results by 1-based chunk number."""
+        system_prompt = """You are a technical documentation summarizer optimized for knowledge management.
+
+YOUR TASK: Summarize EACH numbered chunk of technical content independently, for later retrieval and understanding.
+
+SUMMARY REQUIREMENTS (per chunk):
+- short_summary: 2-3 sentences, max 100 words, focus on WHAT the chunk teaches
+- key_concepts: Up to 5 specific technical concepts (not vague terms)
+- tech_stack: Technologies/tools explicitly mentioned
+
+QUALITY CRITERIA:
+- Summaries should help someone decide if this chunk is relevant to their question
+- Concepts should be specific: "react hooks" not "frontend"
+- Only list tech_stack items actually used/discussed, not just mentioned
+- Never mix content between chunks
+
+Return ONLY valid JSON, with exactly one entry per chunk, using the chunk number as "id":
+{
+    "results": [
+        {"id": 1, "short_summary": "...", "key_concepts": ["concept1"], "tech_stack": ["tech1"]}
+    ]
+}"""
+
+        user_prompt = "Summarize each of these text chunks:\n\n" + format_batch_items(
+            [text[:3000] for text in chunk_texts], "CHUNK"
+        )
+
+        params = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "response_format": {"type": "json_object"},
+            "max_completion_tokens": 5000 + 1500 * len(chunk_texts)
+        }
+        if not self.model.startswith("gpt-5"):
+            params["temperature"] = 0.3
+
+        try:
+            response = await self._create_completion(params)
+            parsed = parse_batch_results(response.choices[0].message.content, len(chunk_texts))
+        except Exception as e:
+            logger.warning(f"Batched summarization of {len(chunk_texts)} chunks failed, retrying singly: {e}")
+            return {}
+
+        return {
+            number: SummaryResult(
+                short_summary=result.get("short_summary", ""),
+                key_concepts=result.get("key_concepts", []),
+                tech_stack=result.get("tech_stack", [])
+            )
+            for number, result in parsed.items()
+            if result.get("short_summary")
+        }
+
     async def summarize_section(
         self,
         chunk_summaries: List[SummaryResult],
@@ -214,7 +366,7 @@ Return ONLY valid JSON:
             if not self.model.startswith("gpt-5"):
                 params["temperature"] = 0.3
 
-            response = self.client.chat.completions.create(**params)
+            response = await self._create_completion(params)
 
             result = json.loads(response.choices[0].message.content)
 
@@ -327,7 +479,7 @@ Return ONLY valid JSON:"""
             if not self.model.startswith("gpt-5"):
                 params["temperature"] = 0.3
 
-            response = self.client.chat.completions.create(**params)
+            response = await self._create_completion(params)
 
             result = json.loads(response.choices[0].message.content)
 
@@ -383,12 +535,12 @@ async def generate_hierarchical_summaries(
     # Sort chunks by index
     sorted_chunks = sorted(chunks, key=lambda c: c.get('chunk_index', 0))
 
-    # Level 1: Generate chunk summaries
+    # Level 1: Generate chunk summaries (batched and concurrent; records keep chunk order)
+    chunk_results = await service.summarize_chunks([chunk['content'] for chunk in sorted_chunks])
     chunk_summaries = []
     chunk_summary_records = []
 
-    for chunk in sorted_chunks:
-        result = await service.summarize_chunk(chunk['content'])
+    for chunk, result in zip(sorted_chunks, chunk_results):
         chunk_summaries.append({
             'chunk_id': chunk['id'],
             'result': result
@@ -410,17 +562,15 @@ async def generate_hierarchical_summaries(
 
     db.flush()  # Get IDs for chunk summaries
 
-    # Level 2: Generate section summaries (group chunks)
-    section_summaries = []
+    # Level 2: Generate section summaries (group chunks), also concurrently
+    section_starts = range(0, len(chunk_summaries), CHUNKS_PER_SECTION)
+    section_summaries = list(await asyncio.gather(*(
+        service.summarize_section([c['result'] for c in chunk_summaries[i:i + CHUNKS_PER_SECTION]])
+        for i in section_starts
+    )))
     section_records = []
 
-    for i in range(0, len(chunk_summaries), CHUNKS_PER_SECTION):
-        section_chunks = chunk_summaries[i:i + CHUNKS_PER_SECTION]
-        section_results = [c['result'] for c in section_chunks]
-
-        section_result = await service.summarize_section(section_results)
-        section_summaries.append(section_result)
-
+    for section_result in section_summaries:
         # Create DB record
         section_record = DBDocumentSummary(
             document_id=document_id,
@@ -434,11 +584,13 @@ async def generate_hierarchical_summaries(
             skill_profile=section_result.skill_profile
         )
         db.add(section_record)
-        db.flush()
         section_records.append(section_record)
 
-        # Link chunk summaries to section
-        for j, chunk_rec in enumerate(chunk_summary_records[i:i + CHUNKS_PER_SECTION]):
+    db.flush()  # Get IDs for section summaries
+
+    # Link chunk summaries to sections
+    for i, section_record in zip(section_starts, section_records):
+        for chunk_rec in chunk_summary_records[i:i + CHUNKS_PER_SECTION]:
             chunk_rec.parent_id = section_record.id
 
     # Level 3: Generate document summary
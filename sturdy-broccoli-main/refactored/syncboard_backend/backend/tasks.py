@@ -14,9 +14,11 @@ Each task updates its progress state for real-time frontend feedback.
 import base64
 import logging
 from datetime import datetime
-from typing import List, Dict, Optional
+from functools import partial
+from typing import Callable, List, Dict, Optional, Tuple
+import numpy as np
 from celery import Task
-from celery.signals import worker_process_init
+from celery.signals import worker_process_init, worker_process_shutdown
 from sqlalchemy import func
 
 from .celery_app import celery_app
@@ -37,15 +39,27 @@ from .dependencies import (
     ensure_kb_exists,
 )
 from .sanitization import sanitize_filename, sanitize_text_content, validate_url
-from .constants import MAX_UPLOAD_SIZE_BYTES
+from .constants import (
+    DUPLICATE_DEFAULT_THRESHOLD,
+    MAX_UPLOAD_SIZE_BYTES,
+    RUN_ASYNC_TIMEOUT_SECONDS,
+    WORKER_LOOP_SHUTDOWN_TIMEOUT_SECONDS,
+    ZIP_PIPELINE_EXTRACTION_WAVE,
+    ZIP_PIPELINE_INSERT_BATCH,
+    ZIP_PIPELINE_MAX_CONCURRENT_DOCUMENTS,
+)
 from .config import settings
 from . import ingest
 from .db_storage_adapter import load_storage_from_db
 from .db_repository import DatabaseKnowledgeBankRepository
 from .redis_client import notify_data_changed
+from .cache_sync import CacheSynchronizer
 from .chunking_pipeline import chunk_document_on_upload
-from .db_models import DBDocument
+from .db_models import DBConcept, DBDocument
 from .database import get_db_context
+from .duplicate_index import get_duplicate_index
+from .embedding_clustering import EmbeddingClusteringEngine, embed_documents, recluster_knowledge_base
+from .exceptions import DuplicateDocumentError
 from .websocket_manager import (
     broadcast_document_created,
     broadcast_cluster_created,
@@ -53,6 +67,7 @@ from .websocket_manager import (
     broadcast_job_failed
 )
 from .feedback_service import feedback_service
+from .worker_loop import worker_loop
 import asyncio
 
 # Initialize logger
@@ -63,12 +78,18 @@ def run_async(coro):
     """
     Safely run an async coroutine from sync Celery context.
 
+    In a worker process the coroutine runs on the process-wide event loop
+    (see worker_loop), so async HTTP clients keep their connections between
+    calls. Elsewhere it gets a fresh loop.
+
     Handles the case where an event loop may or may not exist.
     This avoids 'run_async() cannot be called from a running event loop' errors.
     """
     try:
         loop = asyncio.get_running_loop()
     except RuntimeError:
+        if worker_loop.is_running:
+            return worker_loop.run(coro, timeout=RUN_ASYNC_TIMEOUT_SECONDS)
         # No running loop, safe to use asyncio.run()
         return asyncio.run(coro)
     else:
@@ -81,7 +102,7 @@ def run_async(coro):
             # Upload operations include: AI extraction, clustering, DB save, chunking, summarization
             # Stays under Celery's hard limit (3600s/60min) for safety
             # Individual operations still complete in seconds; this prevents spurious timeouts on batch processing
-            return future.result(timeout=3300)
+            return future.result(timeout=RUN_ASYNC_TIMEOUT_SECONDS)
 
 CONCEPT_SAMPLE_CHARS = 12_000  # limit sent to LLM for concept extraction
 MAX_SINGLE_DOCUMENT_CHARS = 200_000  # cap single-document payloads to keep processing responsive
@@ -156,10 +177,7 @@ def reload_cache_from_db():
     """Reload in-memory cache from database after Celery task updates."""
     try:
         # Clear vector store first to prevent ID mismatch
-        vector_store.docs.clear()
-        vector_store.doc_ids.clear()
-        vector_store.vectorizer = None
-        vector_store.doc_matrix = None
+        vector_store.clear()
 
         docs, meta, clusts, usrs = load_storage_from_db(vector_store)
 
@@ -190,6 +208,83 @@ def reload_cache_from_db():
     except Exception as e:
         logger.error(f"Failed to reload cache from database: {e}")
 
+# Applies this worker's own and other workers' data deltas to its cache;
+# falls back to reload_cache_from_db() only when the change log has a gap
+worker_cache_sync = CacheSynchronizer(
+    vector_store=vector_store,
+    documents=documents,
+    metadata=metadata,
+    clusters=clusters,
+    full_reload=reload_cache_from_db
+)
+
+
+def publish_documents_added(doc_ids: List[int], kb_id: str) -> None:
+    """
+    Publish a document delta and bring this worker's cache up to date.
+
+    Replaces a full cache reload after each upload: the API process and
+    this worker only re-read the documents (and clusters) that changed.
+    """
+    if not doc_ids:
+        return
+    notify_data_changed("document", "added", doc_ids, kb_id)
+    worker_cache_sync.catch_up()
+
+
+def check_duplicate_upload(content: str, kb_id: str, name: str) -> Optional[Dict]:
+    """
+    Look an upload up in the knowledge base before any LLM work is spent on it.
+
+    Identical content counts as a duplicate; with ``duplicate_upload_threshold``
+    below 1.0, so does content at least that similar (its edits are then
+    lost under "reuse"). What happens depends on ``duplicate_upload_policy``:
+    - "reuse": the existing document (with its concepts, chunks, embeddings
+      and summaries) stands in for the upload; nothing new is stored
+    - "reject": DuplicateDocumentError is raised
+    - "allow": uploads are never checked
+
+    Returns:
+        Result for the existing document (marked with ``duplicate_of``),
+        or None if the upload should be processed
+
+    Raises:
+        DuplicateDocumentError: If the policy is "reject" and the upload is a duplicate
+    """
+    if settings.duplicate_upload_policy == "allow":
+        return None
+
+    with get_db_context() as db:
+        match = get_duplicate_index(db).find_duplicate(
+            db, content, kb_id, min_similarity=settings.duplicate_upload_threshold
+        )
+        if match is None:
+            return None
+        if settings.duplicate_upload_policy == "reject":
+            raise DuplicateDocumentError(name, match.doc_id, match.similarity)
+
+        db_doc = db.query(DBDocument).filter_by(doc_id=match.doc_id).first()
+        if db_doc is None:
+            return None  # Deleted since the index last synced
+        concepts = [
+            {"name": c.name, "category": c.category, "confidence": c.confidence}
+            for c in db.query(DBConcept).filter_by(document_id=db_doc.id)
+        ]
+        cluster_id = db_doc.cluster_id
+
+    logger.info(
+        f"{name} duplicates doc {match.doc_id} in KB {kb_id} "
+        f"({'identical' if match.exact else f'{match.similarity:.0%} similar'}), reusing it"
+    )
+    return {
+        "doc_id": match.doc_id,
+        "cluster_id": cluster_id,
+        "concepts": concepts,
+        "duplicate_of": match.doc_id,
+        "similarity": match.similarity,
+        "chunks_created": 0
+    }
+
 def generate_cluster_name_from_concepts(concepts_list: List[Dict], primary_topic: str = None) -> str:
     """
     Generate a meaningful cluster name from concepts when LLM returns 'General'.
@@ -237,7 +332,8 @@ def find_or_create_cluster_sync(
     concepts_list: List[Dict],
     skill_level: str,
     kb_id: str,
-    primary_topic: str = None
+    primary_topic: str = None,
+    embedding: Optional[np.ndarray] = None
 ) -> int:
     """
     Synchronous version of find_or_create_cluster for Celery tasks.
@@ -249,10 +345,43 @@ def find_or_create_cluster_sync(
         skill_level: Document skill level
         kb_id: Knowledge base ID
         primary_topic: Optional primary topic for better naming
+        embedding: Document embedding from clustering_embedding(), if any
 
     Returns:
         Cluster ID
     """
+    cluster_id, created = assign_cluster(
+        doc_id, suggested_cluster, concepts_list, skill_level, kb_id, primary_topic, embedding
+    )
+
+    # Broadcast WebSocket event for real-time updates (new cluster created)
+    if created:
+        try:
+            run_async(broadcast_new_cluster(kb_id, cluster_id))
+        except Exception as ws_err:
+            logger.warning(f"WebSocket broadcast failed (non-critical): {ws_err}")
+
+    return cluster_id
+
+
+def assign_cluster(
+    doc_id: int,
+    suggested_cluster: str,
+    concepts_list: List[Dict],
+    skill_level: str,
+    kb_id: str,
+    primary_topic: str = None,
+    embedding: Optional[np.ndarray] = None
+) -> Tuple[int, bool]:
+    """
+    Add a document to the best in-memory cluster of its KB, creating one if needed.
+
+    With a document embedding (embedding clustering mode) the document goes
+    to the nearest cluster centroid; otherwise clusters match by concepts.
+
+    Returns:
+        (cluster_id, created) - created is True for a new cluster
+    """
     # Fix: If suggested_cluster is "General" or empty, generate better name from concepts
     if not suggested_cluster or suggested_cluster.lower() == 'general':
         suggested_cluster = generate_cluster_name_from_concepts(concepts_list, primary_topic)
@@ -261,16 +390,27 @@ def find_or_create_cluster_sync(
     # Get KB-scoped clusters
     kb_clusters = get_kb_clusters(kb_id)
 
+    # Centroids of clusters grown by other processes come from stored chunk embeddings
+    placement = {}
+    if embedding is not None:
+        try:
+            with get_db_context() as db:
+                clustering_engine.sync_centroids(db, kb_id, kb_clusters)
+        except Exception as e:
+            logger.warning(f"Failed to sync cluster centroids for KB {kb_id}: {e}")
+        placement = {"embedding": embedding}
+
     # Try to find existing cluster in this KB
     cluster_id = clustering_engine.find_best_cluster(
         doc_concepts=concepts_list,
         suggested_name=suggested_cluster,
-        existing_clusters=kb_clusters
+        existing_clusters=kb_clusters,
+        **placement
     )
 
     if cluster_id is not None:
-        clustering_engine.add_to_cluster(cluster_id, doc_id, kb_clusters)
-        return cluster_id
+        clustering_engine.add_to_cluster(cluster_id, doc_id, kb_clusters, **placement)
+        return cluster_id, False
 
     # Create new cluster in this KB
     cluster_id = clustering_engine.create_cluster(
@@ -278,187 +418,394 @@ def find_or_create_cluster_sync(
         name=suggested_cluster,
         concepts=concepts_list,
         skill_level=skill_level,
-        existing_clusters=kb_clusters
+        existing_clusters=kb_clusters,
+        **placement
     )
 
     # Set knowledge_base_id on the cluster
     kb_clusters[cluster_id].knowledge_base_id = kb_id
+    return cluster_id, True
 
-    # Broadcast WebSocket event for real-time updates (new cluster created)
+
+async def embed_for_clustering(contents: List[str]) -> List[Optional[np.ndarray]]:
+    """
+    Document embeddings for cluster assignment, one per content.
+
+    All None unless the clustering engine places documents by embedding, or
+    if embedding fails (the documents then cluster by concepts). The chunk
+    embeddings computed here are reused from the embedding cache when the
+    documents are chunked after saving.
+    """
+    if not isinstance(clustering_engine, EmbeddingClusteringEngine) or not contents:
+        return [None] * len(contents)
     try:
-        run_async(broadcast_cluster_created(
-            knowledge_base_id=kb_id,
-            cluster_id=cluster_id,
-            cluster_name=kb_clusters[cluster_id].name,
-            document_count=len(kb_clusters[cluster_id].doc_ids)
-        ))
-    except Exception as ws_err:
-        logger.warning(f"WebSocket broadcast failed (non-critical): {ws_err}")
+        return await embed_documents(contents)
+    except Exception as e:
+        logger.warning(f"Embedding {len(contents)} documents for clustering failed, matching by concepts: {e}")
+        return [None] * len(contents)
 
-    return cluster_id
 
+def clustering_embedding(content: str) -> Optional[np.ndarray]:
+    """Synchronous embed_for_clustering() for a single document."""
+    if not isinstance(clustering_engine, EmbeddingClusteringEngine):
+        return None
+    return run_async(embed_for_clustering([content]))[0]
 
-# =============================================================================
-# Worker Initialization Hook
-# =============================================================================
 
-@worker_process_init.connect
-def initialize_worker_state(**kwargs):
+async def broadcast_new_cluster(kb_id: str, cluster_id: int) -> None:
+    """Announce a newly created in-memory cluster over WebSocket."""
+    cluster = get_kb_clusters(kb_id)[cluster_id]
+    await broadcast_cluster_created(
+        knowledge_base_id=kb_id,
+        cluster_id=cluster_id,
+        cluster_name=cluster.name,
+        document_count=len(cluster.doc_ids)
+    )
+
+
+def save_documents_blocking(items: List[Tuple[str, DocumentMetadata]]) -> List[int]:
     """
-    Ensure each Celery worker process loads the latest documents, metadata,
-    and clusters before handling uploads so IDs stay in sync with the DB.
+    Save documents in one transaction; blocking, for asyncio.to_thread.
+
+    The repository's coroutines only do blocking database work, so they
+    run on a private event loop in the calling thread.
     """
-    logger.info("Initializing Celery worker cache from database")
-    reload_cache_from_db()
+    with get_db_context() as db:
+        return asyncio.run(DatabaseKnowledgeBankRepository(db).add_documents(items))
 
 
-# =============================================================================
-# Multi-Document ZIP Processing Helper
-# =============================================================================
+async def chunk_and_summarize_document(
+    doc_id: int,
+    content: str,
+    kb_id: str,
+    doc_filename: str
+) -> Tuple[Dict, Dict]:
+    """
+    Chunk, embed and summarize a saved document on the running event loop.
 
-def process_multi_document_zip(
-    self: Task,
+    Uses its own database session, so several documents can be processed
+    concurrently; its own queries and commit run in a worker thread.
+
+    Returns:
+        (chunk_result, summarization_result) - empty dicts for steps that failed
+    """
+    from .summarization_service import generate_hierarchical_summaries
+    from .db_models import DBDocumentChunk
+
+    chunk_result: Dict = {}
+    summarization_result: Dict = {}
+    with get_db_context() as db:
+        db_doc = await asyncio.to_thread(lambda: db.query(DBDocument).filter_by(doc_id=doc_id).first())
+        if not db_doc:
+            logger.warning(f"Document {doc_id} not found for chunking")
+            return chunk_result, summarization_result
+
+        try:
+            chunk_result = await chunk_document_on_upload(
+                db=db,
+                document=db_doc,
+                content=content,
+                generate_embeddings=True
+            )
+            logger.info(f"Chunked document {doc_id}: {chunk_result.get('chunks', 0)} chunks")
+        except Exception as e:
+            logger.warning(f"Chunking failed for document {doc_id}: {e}")
+            return {}, summarization_result
+
+        if chunk_result.get('chunks', 0) > 0:
+            try:
+                db_chunks = await asyncio.to_thread(lambda: db.query(DBDocumentChunk).filter_by(
+                    document_id=db_doc.id
+                ).order_by(DBDocumentChunk.chunk_index).all())
+
+                if db_chunks:
+                    chunks_data = [
+                        {
+                            'id': chunk.id,
+                            'content': chunk.content,
+                            'chunk_index': chunk.chunk_index
+                        }
+                        for chunk in db_chunks
+                    ]
+                    summarization_result = await generate_hierarchical_summaries(
+                        db=db,
+                        document_id=db_doc.id,
+                        knowledge_base_id=kb_id,
+                        chunks=chunks_data,
+                        generate_ideas=True
+                    )
+                    db_doc.summary_status = 'completed'
+                    await asyncio.to_thread(db.commit)
+            except Exception as e:
+                logger.warning(f"Summarization failed for {doc_filename}: {e}")
+
+    return chunk_result, summarization_result
+
+
+async def run_zip_pipeline(
+    report_progress: Callable[..., None],
     user_id: str,
     filename: str,
     documents_list: List[Dict],
     kb_id: str
-) -> Dict:
+) -> Tuple[List[Dict], List[Dict]]:
     """
-    Process multiple documents from a ZIP file (smart extraction).
+    Ingest the documents of a ZIP as a staged pipeline on one event loop.
 
-    Each document in the list gets:
-    - AI concept extraction
-    - Clustering
-    - Vector store addition
-    - Database persistence
-    - Chunking and summarization
+    Stages are connected by queues and overlap:
+    1. Concept extraction in waves of batched LLM requests (bounded concurrency)
+    2. Clustering and doc_id assignment in file order, then one database
+       transaction per group of documents
+    3. Chunking, embedding and summarization, several documents at a time
 
-    Args:
-        self: Celery task instance
-        user_id: Username
-        filename: Original ZIP filename
-        documents_list: List of document dicts from smart ZIP extraction
-        kb_id: Knowledge base ID
+    Progress is reported through ``report_progress(meta=...)``, normally the
+    task's update_state bound to its task ID (Celery's request context is
+    thread-local and this coroutine may run on the worker loop thread).
 
     Returns:
-        dict: {doc_ids: [...], filenames: [...], total_documents: N}
+        (processed_docs, failed_docs), both in file order
     """
-    import asyncio
-
-    logger.info(f"Processing multi-document ZIP: {filename} with {len(documents_list)} documents")
-
-    # CRITICAL FIX: Sync vector_store._next_id with database before batch operations
-    # This prevents doc_id collisions when processing multiple documents
-    # See: Non-atomic doc_id generation bug where vector store assigns IDs in-memory
-    # but database is the source of truth. When these get out of sync, constraint violations occur.
-    sync_vector_store_next_id()
-
-    # Get KB-scoped storage
     kb_documents = get_kb_documents(kb_id)
     kb_metadata = get_kb_metadata(kb_id)
-
-    processed_docs = []
-    failed_docs = []
+    kb_clusters = get_kb_clusters(kb_id)
     total_docs = len(documents_list)
 
+    processed: Dict[int, Dict] = {}
+    failed: Dict[int, Dict] = {}
+    finished = 0
+    extracted: asyncio.Queue = asyncio.Queue()
+    saved: asyncio.Queue = asyncio.Queue()
+    doc_embeddings: Dict[int, Optional[np.ndarray]] = {}  # For embedding clustering mode
+    unsaved: Dict[int, Tuple[int, bool]] = {}  # idx -> (doc_id, cluster created) cached but not stored yet
+
+    def doc_filename(idx: int) -> str:
+        return documents_list[idx].get('filename', f'file_{idx+1}')
+
+    def report(stage: str, message: str) -> None:
+        report_progress(
+            meta={
+                "stage": stage,
+                "message": message,
+                "percent": 25 + int((finished / max(total_docs, 1)) * 70),  # 25% to 95%
+                "current_file": finished,
+                "total_files": total_docs
+            }
+        )
+
+    def forget(idx: int) -> None:
+        # Undo the cache and cluster changes of a document that was never stored
+        doc_id, created = unsaved.pop(idx)
+        vector_store.remove_document(doc_id)
+        if vector_store._next_id == doc_id + 1:
+            # Hand the id back so the next document does not skip it
+            vector_store._next_id = doc_id
+        kb_documents.pop(doc_id, None)
+        meta = kb_metadata.pop(doc_id, None)
+        cluster = kb_clusters.get(meta.cluster_id) if meta is not None else None
+        if cluster is not None and doc_id in cluster.doc_ids:
+            cluster.doc_ids.remove(doc_id)
+            cluster.doc_count = len(cluster.doc_ids)
+            if created and not cluster.doc_ids:
+                del kb_clusters[meta.cluster_id]
+
+    def rekey(moved: List[Tuple[int, DocumentMetadata, int]]) -> None:
+        # Move documents the database saved under another doc_id to that id.
+        # Every old id is dropped first, since a new id may be one that
+        # another document of the group was cached under.
+        clusters = []
+        for _, meta, _ in moved:
+            cluster = next((c for c in kb_clusters.values() if meta.doc_id in c.doc_ids), None)
+            if cluster is not None:
+                cluster.doc_ids.remove(meta.doc_id)
+            clusters.append(cluster)
+            kb_documents.pop(meta.doc_id, None)
+            kb_metadata.pop(meta.doc_id, None)
+            vector_store.remove_document(meta.doc_id)
+        for (idx, meta, doc_id), cluster in zip(moved, clusters):
+            logger.warning(f"ZIP document {doc_filename(idx)} saved as doc_id={doc_id}, cached as {meta.doc_id}; re-keying")
+            content = documents_list[idx]['content']
+            vector_store.add_document(content, doc_id=doc_id)
+            kb_documents[doc_id] = content
+            meta.doc_id = doc_id
+            kb_metadata[doc_id] = meta
+            if cluster is not None:
+                cluster.doc_ids.append(doc_id)
+
+    def fail(idx: int, error: Exception) -> None:
+        nonlocal finished
+        logger.error(f"Failed to process ZIP document {doc_filename(idx)}: {error}", exc_info=True)
+        failed[idx] = {"filename": doc_filename(idx), "error": str(error), "index": idx}
+        if idx in unsaved:
+            forget(idx)
+        finished += 1
+
+    # Skip empty documents and documents the KB already has
+    extractable = []
     for idx, doc_dict in enumerate(documents_list):
+        if len((doc_dict.get('content') or '').strip()) < 10:
+            logger.warning(f"Skipping empty document: {doc_filename(idx)}")
+            finished += 1
+            continue
         try:
-            # Extract document info
-            doc_filename = doc_dict.get('filename', f'file_{idx+1}')
-            document_text = doc_dict.get('content', '')
-            doc_metadata = doc_dict.get('metadata', {})
-
-            # Log what we're processing
-            logger.info(f"[DIAG] Processing ZIP file {idx+1}/{total_docs}: {doc_filename}, content_length={len(document_text)}")
-
-            # Progress update
-            progress = 25 + int((idx / total_docs) * 70)  # 25% to 95%
-
-            self.update_state(
-                state="PROCESSING",
-                meta={
-                    "stage": "processing_zip_files",
-                    "message": f"Processing file {idx+1}/{total_docs}: {doc_filename[:40]}...",
-                    "percent": progress,
-                    "current_file": idx + 1,
-                    "total_files": total_docs
-                }
-            )
-
-            # Skip empty documents
-            if not document_text or len(document_text.strip()) < 10:
-                logger.warning(f"Skipping empty document: {doc_filename}")
-                continue
+            existing = await asyncio.to_thread(check_duplicate_upload, doc_dict['content'], kb_id, doc_filename(idx))
+        except DuplicateDocumentError as e:
+            fail(idx, e)
+            continue
+        if existing is None:
+            extractable.append(idx)
+            continue
+        processed[idx] = {
+            "doc_id": existing["doc_id"],
+            "filename": doc_filename(idx),
+            "cluster_id": existing["cluster_id"],
+            "concepts": len(existing["concepts"]),
+            "chunks": 0,
+            "folder": doc_dict.get('folder'),
+            "original_zip": filename,
+            "duplicate_of": existing["duplicate_of"]
+        }
+        finished += 1
 
-            # Stage: AI analysis with AGENTIC LEARNING
-            # Uses extract_with_learning() which applies past corrections and user preferences
-            extraction = run_async(
-                concept_extractor.extract_with_learning(
-                    content=document_text,
-                    source_type="file",
-                    username=user_id,
-                    knowledge_base_id=kb_id
+    async def extract_stage() -> None:
+        # Stage 1: AI analysis with AGENTIC LEARNING (past corrections and user preferences).
+        # Small files share batched requests; anything left out is extracted per file.
+        try:
+            for start in range(0, len(extractable), ZIP_PIPELINE_EXTRACTION_WAVE):
+                wave = extractable[start:start + ZIP_PIPELINE_EXTRACTION_WAVE]
+                report(
+                    "extracting_concepts",
+                    f"Analyzing files {start + 1}-{start + len(wave)} of {len(extractable)}..."
                 )
-            )
-
-            # Log learning metadata if applied
-            learning_applied = extraction.get("learning_applied", {})
-            if learning_applied.get("corrections_used", 0) > 0:
-                logger.info(
-                    f"Agentic learning applied to ZIP file {doc_filename}: "
-                    f"{learning_applied['corrections_used']} corrections used"
+                # The wave's embeddings are computed while its concepts are extracted
+                embedding = asyncio.ensure_future(
+                    embed_for_clustering([documents_list[idx]['content'] for idx in wave])
                 )
+                try:
+                    extractions = await concept_extractor.extract_batch_with_learning(
+                        [(documents_list[idx]['content'], "file") for idx in wave],
+                        username=user_id,
+                        knowledge_base_id=kb_id
+                    )
+                except Exception as e:
+                    logger.warning(f"Batched concept extraction failed for {filename}, extracting per file: {e}")
+                    extractions = [None] * len(wave)
+                doc_embeddings.update(zip(wave, await embedding))
+
+                for idx, extraction in zip(wave, extractions):
+                    if extraction is None:
+                        try:
+                            extraction = await concept_extractor.extract_with_learning(
+                                content=documents_list[idx]['content'],
+                                source_type="file",
+                                username=user_id,
+                                knowledge_base_id=kb_id
+                            )
+                        except Exception as e:
+                            fail(idx, e)
+                            continue
+                    extracted.put_nowait((idx, extraction))
+        finally:
+            extracted.put_nowait(None)
+
+    async def prepare_document(idx: int, extraction: Dict) -> Tuple[DocumentMetadata, bool]:
+        document_text = documents_list[idx]['content']
+        name = doc_filename(idx)
+        logger.info(f"[DIAG] Processing ZIP file {idx+1}/{total_docs}: {name}, content_length={len(document_text)}")
 
-            # Record AI decision for concept extraction (agentic learning)
-            try:
-                run_async(feedback_service.record_ai_decision(
-                    decision_type="concept_extraction",
-                    username=user_id,
-                    input_data={"content_sample": document_text[:500], "source_type": "file", "filename": doc_filename},
-                    output_data={"concepts": extraction.get("concepts", []), "skill_level": extraction.get("skill_level"), "learning_applied": learning_applied},
-                    confidence_score=extraction.get("confidence_score", 0.5),
-                    knowledge_base_id=kb_id,
-                    model_name="gpt-5-mini"
-                ))
-                logger.debug(f"Recorded concept extraction decision for ZIP file {doc_filename} (confidence: {extraction.get('confidence_score', 0.5):.2f})")
-            except Exception as e:
-                logger.warning(f"Failed to record concept extraction decision: {e}")
-
-            # Add to vector store
-            doc_id = vector_store.add_document(document_text)
-            kb_documents[doc_id] = document_text
+        # Log learning metadata if applied
+        learning_applied = extraction.get("learning_applied", {})
+        if learning_applied.get("corrections_used", 0) > 0:
+            logger.info(
+                f"Agentic learning applied to ZIP file {name}: "
+                f"{learning_applied['corrections_used']} corrections used"
+            )
 
-            # Create metadata
-            meta = DocumentMetadata(
-                doc_id=doc_id,
-                owner=user_id,
-                source_type="file",
-                filename=doc_filename,
-                concepts=[Concept(**c) for c in extraction.get("concepts", [])],
-                skill_level=extraction.get("skill_level", "unknown"),
-                cluster_id=None,
+        # Record AI decision for concept extraction (agentic learning)
+        try:
+            await feedback_service.record_ai_decision(
+                decision_type="concept_extraction",
+                username=user_id,
+                input_data={"content_sample": document_text[:500], "source_type": "file", "filename": name},
+                output_data={"concepts": extraction.get("concepts", []), "skill_level": extraction.get("skill_level"), "learning_applied": learning_applied},
+                confidence_score=extraction.get("confidence_score", 0.5),
                 knowledge_base_id=kb_id,
-                ingested_at=datetime.utcnow().isoformat(),
-                content_length=len(document_text)
+                model_name="gpt-5-mini"
             )
-            kb_metadata[doc_id] = meta
+        except Exception as e:
+            logger.warning(f"Failed to record concept extraction decision: {e}")
 
-            # Find or create cluster
-            cluster_id = find_or_create_cluster_sync(
-                doc_id=doc_id,
-                suggested_cluster=extraction.get("suggested_cluster", "General"),
-                concepts_list=extraction.get("concepts", []),
-                skill_level=meta.skill_level,
-                kb_id=kb_id,
-                primary_topic=extraction.get("primary_topic")
-            )
-            kb_metadata[doc_id].cluster_id = cluster_id
+        # Add to vector store
+        doc_id = vector_store.add_document(document_text)
+        unsaved[idx] = (doc_id, False)
+        kb_documents[doc_id] = document_text
 
-            # Save document to database immediately via repository
-            # This ensures doc_id and cluster_id exist before recording AI decisions
-            with get_db_context() as db:
-                repo = DatabaseKnowledgeBankRepository(db)
-                run_async(repo.add_document(document_text, meta))
+        meta = DocumentMetadata(
+            doc_id=doc_id,
+            owner=user_id,
+            source_type="file",
+            filename=name,
+            concepts=[Concept(**c) for c in extraction.get("concepts", [])],
+            skill_level=extraction.get("skill_level", "unknown"),
+            cluster_id=None,
+            knowledge_base_id=kb_id,
+            ingested_at=datetime.utcnow().isoformat(),
+            content_length=len(document_text)
+        )
+        kb_metadata[doc_id] = meta
+
+        # Embedding mode syncs centroids from the database
+        meta.cluster_id, created = await asyncio.to_thread(
+            assign_cluster,
+            doc_id=doc_id,
+            suggested_cluster=extraction.get("suggested_cluster", "General"),
+            concepts_list=extraction.get("concepts", []),
+            skill_level=meta.skill_level,
+            kb_id=kb_id,
+            primary_topic=extraction.get("primary_topic"),
+            embedding=doc_embeddings.pop(idx, None)
+        )
+        unsaved[idx] = (doc_id, created)
+        return meta, created
+
+    async def save_documents(group: List[Tuple[int, Dict]]) -> None:
+        report("processing_zip_files", f"Saving {len(group)} files ({finished}/{total_docs} done)...")
+
+        prepared = []
+        for idx, extraction in group:
+            try:
+                meta, created = await prepare_document(idx, extraction)
+                prepared.append((idx, extraction, meta, created))
+            except Exception as e:
+                fail(idx, e)
+        if not prepared:
+            return
+
+        items = [(documents_list[idx]['content'], meta) for idx, _, meta, _ in prepared]
+        try:
+            doc_ids = await asyncio.to_thread(save_documents_blocking, items)
+        except Exception as e:
+            # Retry one by one so a single bad document does not sink the group
+            logger.warning(f"Saving {len(items)} ZIP documents together failed, saving one by one: {e}")
+            doc_ids = []
+            for (idx, *_), item in zip(prepared, items):
+                try:
+                    doc_ids.extend(await asyncio.to_thread(save_documents_blocking, [item]))
+                except Exception as save_error:
+                    fail(idx, save_error)
+                    doc_ids.append(None)
+
+        stored = [(item, doc_id) for item, doc_id in zip(prepared, doc_ids) if doc_id is not None]
+        rekey([(idx, meta, doc_id) for (idx, _, meta, _), doc_id in stored if doc_id != meta.doc_id])
+        for (idx, extraction, meta, created), doc_id in stored:
+            unsaved.pop(idx, None)
+            cluster_id = meta.cluster_id
+
+            # Broadcast WebSocket event for real-time updates (new cluster created)
+            if created and cluster_id is not None:
+                try:
+                    await broadcast_new_cluster(kb_id, cluster_id)
+                except Exception as ws_err:
+                    logger.warning(f"WebSocket broadcast failed (non-critical): {ws_err}")
 
             # Record AI decision for clustering (agentic learning)
             # Must happen AFTER document save so cluster exists in DB
@@ -467,7 +814,7 @@ def process_multi_document_zip(
                 if cluster_id and len(extraction.get("concepts", [])) >= 3:
                     clustering_confidence = 0.85  # Higher confidence with more concepts
 
-                run_async(feedback_service.record_ai_decision(
+                await feedback_service.record_ai_decision(
                     decision_type="clustering",
                     username=user_id,
                     input_data={"concepts": extraction.get("concepts", []), "suggested_cluster": extraction.get("suggested_cluster")},
@@ -477,93 +824,148 @@ def process_multi_document_zip(
                     document_id=doc_id,
                     cluster_id=cluster_id,
                     model_name="heuristic"
-                ))
-                logger.debug(f"Recorded clustering decision for ZIP doc {doc_id} → cluster {cluster_id} (confidence: {clustering_confidence:.2f})")
+                )
             except Exception as e:
                 logger.warning(f"Failed to record clustering decision: {e}")
 
-            # Chunk document for RAG
-            chunk_result = chunk_document_sync(doc_id, document_text, kb_id)
-
-            # Document Summarization
-            summarization_result = {}
-            if chunk_result.get('chunks', 0) > 0:
-                try:
-                    from .summarization_service import generate_hierarchical_summaries
+            saved.put_nowait((idx, doc_id, extraction, cluster_id))
 
-                    with get_db_context() as db:
-                        db_doc = db.query(DBDocument).filter_by(doc_id=doc_id).first()
-                        if db_doc:
-                            from .db_models import DBDocumentChunk
-
-                            db_chunks = db.query(DBDocumentChunk).filter_by(
-                                document_id=db_doc.id
-                            ).order_by(DBDocumentChunk.chunk_index).all()
-
-                            if db_chunks:
-                                chunks_data = [
-                                    {
-                                        'id': chunk.id,
-                                        'content': chunk.content,
-                                        'chunk_index': chunk.chunk_index
-                                    }
-                                    for chunk in db_chunks
-                                ]
-
-                                try:
-                                    loop = asyncio.get_event_loop()
-                                except RuntimeError:
-                                    loop = asyncio.new_event_loop()
-                                    asyncio.set_event_loop(loop)
-
-                                summarization_result = loop.run_until_complete(
-                                    generate_hierarchical_summaries(
-                                        db=db,
-                                        document_id=db_doc.id,
-                                        knowledge_base_id=kb_id,
-                                        chunks=chunks_data,
-                                        generate_ideas=True
-                                    )
-                                )
-
-                                db_doc.summary_status = 'completed'
-                                db.commit()
-                except Exception as e:
-                    logger.warning(f"Summarization failed for {doc_filename}: {e}")
+    async def save_stage() -> None:
+        # Stage 2: serialized clustering and doc_id assignment, batched inserts
+        try:
+            done = False
+            while not done:
+                group = [await extracted.get()]
+                while len(group) < ZIP_PIPELINE_INSERT_BATCH and not extracted.empty():
+                    group.append(extracted.get_nowait())
+                if group[-1] is None:
+                    done = True
+                    group.pop()
+                if group:
+                    await save_documents(group)
+        finally:
+            for _ in range(ZIP_PIPELINE_MAX_CONCURRENT_DOCUMENTS):
+                saved.put_nowait(None)
+
+    async def enrich_stage() -> None:
+        # Stage 3: chunking for RAG, embeddings and document summarization
+        nonlocal finished
+        while (item := await saved.get()) is not None:
+            idx, doc_id, extraction, cluster_id = item
+            name = doc_filename(idx)
+            try:
+                chunk_result, summarization_result = await chunk_and_summarize_document(
+                    doc_id, documents_list[idx]['content'], kb_id, name
+                )
+            except Exception as e:
+                fail(idx, e)
+                continue
 
-            # Idea seeds are now generated inside summarization when generate_ideas=True
-            # Log the result for debugging
-            logger.info(f"[DIAG] ZIP doc {doc_filename}: chunks={chunk_result.get('chunks', 0)}, summarization={summarization_result.get('status')}, ideas={summarization_result.get('ideas_generated', 0)}")
+            # Idea seeds are generated inside summarization when generate_ideas=True
+            logger.info(f"[DIAG] ZIP doc {name}: chunks={chunk_result.get('chunks', 0)}, summarization={summarization_result.get('status')}, ideas={summarization_result.get('ideas_generated', 0)}")
 
-            # Track processed document
-            processed_docs.append({
+            processed[idx] = {
                 "doc_id": doc_id,
-                "filename": doc_filename,
+                "filename": name,
                 "cluster_id": cluster_id,
                 "concepts": len(extraction.get("concepts", [])),
                 "chunks": chunk_result.get("chunks", 0),
-                "folder": doc_dict.get('folder'),
+                "folder": documents_list[idx].get('folder'),
                 "original_zip": filename
-            })
-
+            }
+            finished += 1
             logger.info(
-                f"Processed ZIP document {idx+1}/{total_docs}: {doc_filename} → "
+                f"Processed ZIP document {idx+1}/{total_docs}: {name} → "
                 f"doc_id={doc_id}, cluster={cluster_id}, chunks={chunk_result.get('chunks', 0)}"
             )
+            report("processing_zip_files", f"Processed file {finished}/{total_docs}: {name[:40]}...")
+
+    await asyncio.gather(
+        extract_stage(),
+        save_stage(),
+        *(enrich_stage() for _ in range(ZIP_PIPELINE_MAX_CONCURRENT_DOCUMENTS))
+    )
+    return (
+        [processed[idx] for idx in sorted(processed)],
+        [failed[idx] for idx in sorted(failed)]
+    )
+
+
+# =============================================================================
+# Worker Initialization Hook
+# =============================================================================
+
+@worker_process_init.connect
+def initialize_worker_state(**kwargs):
+    """
+    Ensure each Celery worker process loads the latest documents, metadata,
+    and clusters before handling uploads so IDs stay in sync with the DB.
+    """
+    # One event loop per worker process, shared by every task's async calls;
+    # started first so tasks can run even if the initial resync fails
+    worker_loop.start()
+    logger.info("Initializing Celery worker cache from database")
+    worker_cache_sync.full_resync()
 
-        except Exception as e:
-            logger.error(f"Failed to process ZIP document {doc_filename}: {e}", exc_info=True)
-            failed_docs.append({
-                "filename": doc_filename,
-                "error": str(e),
-                "index": idx
-            })
-            continue
 
-    # Reload cache and notify
-    # Documents already saved via repository in the loop above
-    reload_cache_from_db()
-    notify_data_changed()
+@worker_process_shutdown.connect
+def shutdown_worker_loop(**kwargs):
+    """Close shared async clients and stop the worker's event loop."""
+    worker_loop.stop(timeout=WORKER_LOOP_SHUTDOWN_TIMEOUT_SECONDS)
+
+
+# =============================================================================
+# Multi-Document ZIP Processing Helper
+# =============================================================================
+
+def process_multi_document_zip(
+    self: Task,
+    user_id: str,
+    filename: str,
+    documents_list: List[Dict],
+    kb_id: str
+) -> Dict:
+    """
+    Process multiple documents from a ZIP file (smart extraction).
+
+    Each document in the list gets:
+    - AI concept extraction
+    - Clustering
+    - Vector store addition
+    - Database persistence
+    - Chunking and summarization
+
+    The steps run as overlapping stages on one event loop (see
+    run_zip_pipeline), so later files are analyzed while earlier ones are
+    being chunked and summarized.
+
+    Args:
+        self: Celery task instance
+        user_id: Username
+        filename: Original ZIP filename
+        documents_list: List of document dicts from smart ZIP extraction
+        kb_id: Knowledge base ID
+
+    Returns:
+        dict: {doc_ids: [...], filenames: [...], total_documents: N}
+    """
+    logger.info(f"Processing multi-document ZIP: {filename} with {len(documents_list)} documents")
+
+    # CRITICAL FIX: Sync vector_store._next_id with database before batch operations
+    # This prevents doc_id collisions when processing multiple documents
+    # See: Non-atomic doc_id generation bug where vector store assigns IDs in-memory
+    # but database is the source of truth. When these get out of sync, constraint violations occur.
+    sync_vector_store_next_id()
+
+    total_docs = len(documents_list)
+    report_progress = partial(self.update_state, task_id=self.request.id, state="PROCESSING")
+    processed_docs, failed_docs = run_async(
+        run_zip_pipeline(report_progress, user_id, filename, documents_list, kb_id)
+    )
+
+    # Publish one delta for the whole ZIP
+    # Documents already saved via repository in the pipeline above (reused duplicates are not new)
+    publish_documents_added([d["doc_id"] for d in processed_docs if "duplicate_of" not in d], kb_id)
 
     # Log completion with failure summary
     if failed_docs:
@@ -690,6 +1092,26 @@ def process_file_upload(
             f"({len(document_text):,} chars, original {original_length:,})"
         )
 
+        # Identical or near-identical content already in the KB skips all LLM work
+        existing = check_duplicate_upload(document_text, kb_id, filename_safe)
+        if existing is not None:
+            existing.update(filename=filename_safe, user_id=user_id, knowledge_base_id=kb_id)
+            try:
+                run_async(broadcast_job_completed(
+                    username=user_id,
+                    job_id=self.request.id,
+                    job_type="file_upload",
+                    result={
+                        "doc_id": existing["doc_id"],
+                        "filename": filename_safe,
+                        "chunks_created": 0,
+                        "duplicate_of": existing["duplicate_of"]
+                    }
+                ))
+            except Exception as ws_err:
+                logger.warning(f"Job completion broadcast failed (non-critical): {ws_err}")
+            return existing
+
         # Stage 3: AI analysis
         content_length = len(document_text)
         cache_status = "checking cache" if settings.enable_concept_caching else "analyzing"
@@ -792,7 +1214,8 @@ def process_file_upload(
             concepts_list=extraction.get("concepts", []),
             skill_level=meta.skill_level,
             kb_id=kb_id,
-            primary_topic=extraction.get("primary_topic")
+            primary_topic=extraction.get("primary_topic"),
+            embedding=clustering_embedding(document_text)
         )
         kb_metadata[doc_id].cluster_id = cluster_id
 
@@ -833,8 +1256,7 @@ def process_file_upload(
             logger.debug(f"Recorded clustering decision for doc {doc_id} → cluster {cluster_id} (confidence: {clustering_confidence:.2f})")
         except Exception as e:
             logger.warning(f"Failed to record clustering decision: {e}")
-        reload_cache_from_db()
-        notify_data_changed()  # Notify backend to reload
+        publish_documents_added([doc_id], kb_id)  # Sync caches with just this document
 
         # Stage 6: Chunk document for RAG
         self.update_state(
@@ -886,15 +1308,7 @@ def process_file_upload(
                                 for chunk in db_chunks
                             ]
 
-                            # Run async summarization in sync context
-                            import asyncio
-                            try:
-                                loop = asyncio.get_event_loop()
-                            except RuntimeError:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-
-                            summarization_result = loop.run_until_complete(
+                            summarization_result = run_async(
                                 generate_hierarchical_summaries(
                                     db=db,
                                     document_id=db_doc.id,
@@ -1110,6 +1524,26 @@ def process_url_upload(
         document_text = ingest.download_url(url_safe)
         content_length = len(document_text)
 
+        # Re-imported pages and videos skip all LLM work
+        existing = check_duplicate_upload(document_text, kb_id, url_safe)
+        if existing is not None:
+            existing.update(url=url_safe, user_id=user_id, knowledge_base_id=kb_id)
+            try:
+                run_async(broadcast_job_completed(
+                    username=user_id,
+                    job_id=self.request.id,
+                    job_type="url_upload",
+                    result={
+                        "doc_id": existing["doc_id"],
+                        "url": url_safe[:100],
+                        "chunks_created": 0,
+                        "duplicate_of": existing["duplicate_of"]
+                    }
+                ))
+            except Exception as ws_err:
+                logger.warning(f"Job completion broadcast failed (non-critical): {ws_err}")
+            return existing
+
         # Detect YouTube content for enhanced AI extraction
         is_youtube = "YOUTUBE VIDEO TRANSCRIPT" in document_text
 
@@ -1125,17 +1559,10 @@ def process_url_upload(
             }
         )
 
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
         # AGENTIC LEARNING: Use extract_with_learning() for YouTube/URL extraction
         # Pass 'youtube' as source_type for YouTube videos to trigger enhanced extraction
         source_type = "youtube" if is_youtube else "url"
-        extraction = loop.run_until_complete(
+        extraction = run_async(
             concept_extractor.extract_with_learning(
                 content=document_text,
                 source_type=source_type,
@@ -1155,7 +1582,7 @@ def process_url_upload(
 
         # Record AI decision for concept extraction (agentic learning)
         try:
-            loop.run_until_complete(feedback_service.record_ai_decision(
+            run_async(feedback_service.record_ai_decision(
                 decision_type="concept_extraction",
                 username=user_id,
                 input_data={"content_sample": document_text[:500], "source_type": source_type, "url": url_safe[:100]},
@@ -1246,7 +1673,8 @@ def process_url_upload(
             concepts_list=extraction.get("concepts", []),
             skill_level=meta.skill_level,
             kb_id=kb_id,
-            primary_topic=extraction.get("primary_topic")
+            primary_topic=extraction.get("primary_topic"),
+            embedding=clustering_embedding(document_text)
         )
         kb_metadata[doc_id].cluster_id = cluster_id
 
@@ -1273,7 +1701,7 @@ def process_url_upload(
             if cluster_id and len(extraction.get("concepts", [])) >= 3:
                 clustering_confidence = 0.85  # Higher confidence with more concepts
 
-            loop.run_until_complete(feedback_service.record_ai_decision(
+            run_async(feedback_service.record_ai_decision(
                 decision_type="clustering",
                 username=user_id,
                 input_data={"concepts": extraction.get("concepts", []), "suggested_cluster": extraction.get("suggested_cluster")},
@@ -1287,8 +1715,7 @@ def process_url_upload(
             logger.debug(f"Recorded clustering decision for URL doc {doc_id} → cluster {cluster_id} (confidence: {clustering_confidence:.2f})")
         except Exception as e:
             logger.warning(f"Failed to record clustering decision: {e}")
-        reload_cache_from_db()
-        notify_data_changed()  # Notify backend to reload
+        publish_documents_added([doc_id], kb_id)  # Sync caches with just this document
 
         # Stage 5: Chunk document for RAG
         self.update_state(
@@ -1340,15 +1767,7 @@ def process_url_upload(
                                 for chunk in db_chunks
                             ]
 
-                            # Run async summarization in sync context
-                            import asyncio
-                            try:
-                                loop = asyncio.get_event_loop()
-                            except RuntimeError:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-
-                            summarization_result = loop.run_until_complete(
+                            summarization_result = run_async(
                                 generate_hierarchical_summaries(
                                     db=db,
                                     document_id=db_doc.id,
@@ -1559,15 +1978,8 @@ def process_image_upload(
             }
         )
 
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
         # AGENTIC LEARNING: Use extract_with_learning() for image extraction
-        extraction = loop.run_until_complete(
+        extraction = run_async(
             concept_extractor.extract_with_learning(
                 content=combined_text,
                 source_type="image",
@@ -1587,7 +1999,7 @@ def process_image_upload(
 
         # Record AI decision for concept extraction (agentic learning)
         try:
-            loop.run_until_complete(feedback_service.record_ai_decision(
+            run_async(feedback_service.record_ai_decision(
                 decision_type="concept_extraction",
                 username=user_id,
                 input_data={"content_sample": combined_text[:500], "source_type": "image", "filename": filename_safe},
@@ -1653,7 +2065,8 @@ def process_image_upload(
             concepts_list=extraction.get("concepts", []),
             skill_level=meta.skill_level,
             kb_id=kb_id,
-            primary_topic=extraction.get("primary_topic")
+            primary_topic=extraction.get("primary_topic"),
+            embedding=clustering_embedding(combined_text)
         )
         kb_metadata[doc_id].cluster_id = cluster_id
 
@@ -1669,7 +2082,7 @@ def process_image_upload(
             if cluster_id and len(extraction.get("concepts", [])) >= 3:
                 clustering_confidence = 0.85  # Higher confidence with more concepts
 
-            loop.run_until_complete(feedback_service.record_ai_decision(
+            run_async(feedback_service.record_ai_decision(
                 decision_type="clustering",
                 username=user_id,
                 input_data={"concepts": extraction.get("concepts", []), "suggested_cluster": extraction.get("suggested_cluster")},
@@ -1683,8 +2096,7 @@ def process_image_upload(
             logger.debug(f"Recorded clustering decision for image doc {doc_id} → cluster {cluster_id} (confidence: {clustering_confidence:.2f})")
         except Exception as e:
             logger.warning(f"Failed to record clustering decision: {e}")
-        reload_cache_from_db()
-        notify_data_changed()  # Notify backend to reload
+        publish_documents_added([doc_id], kb_id)  # Sync caches with just this document
 
         # Stage 5: Chunk document for RAG
         self.update_state(
@@ -1736,15 +2148,7 @@ def process_image_upload(
                                 for chunk in db_chunks
                             ]
 
-                            # Run async summarization in sync context
-                            import asyncio
-                            try:
-                                loop = asyncio.get_event_loop()
-                            except RuntimeError:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-
-                            summarization_result = loop.run_until_complete(
+                            summarization_result = run_async(
                                 generate_hierarchical_summaries(
                                     db=db,
                                     document_id=db_doc.id,
@@ -1885,7 +2289,7 @@ def process_image_upload(
 def find_duplicates_background(
     self: Task,
     user_id: str,
-    threshold: float = 0.85
+    threshold: float = DUPLICATE_DEFAULT_THRESHOLD
 ) -> Dict:
     """
     Find duplicates in background (O(n²) operation).
@@ -1893,7 +2297,7 @@ def find_duplicates_background(
     Args:
         self: Celery task instance
         user_id: Username
-        threshold: Similarity threshold
+        threshold: Minimum word-shingle Jaccard similarity
 
     Returns:
         dict: {duplicate_groups: [...]}
@@ -1944,6 +2348,125 @@ def find_duplicates_background(
         raise
 
 
+# =============================================================================
+# Chunk Embedding Storage Task
+# =============================================================================
+
+@celery_app.task(bind=True, name="backend.tasks.convert_chunk_embeddings_task")
+def convert_chunk_embeddings_task(
+    self: Task,
+    storage_format: Optional[str] = None,
+    batch_size: int = 1000
+) -> Dict:
+    """
+    Convert stored chunk embeddings to another storage format in batches.
+
+    Run once after the emb_001 migration to move legacy JSON embeddings
+    into packed binary storage (safe to re-run; converted rows are skipped).
+
+    Args:
+        self: Celery task instance
+        storage_format: Target format (defaults to SYNCBOARD_EMBEDDING_STORAGE_FORMAT)
+        batch_size: Rows converted per committed batch
+
+    Returns:
+        dict: {converted, batches, storage_format}
+    """
+    try:
+        self.update_state(
+            state="PROCESSING",
+            meta={
+                "stage": "converting",
+                "message": "Converting chunk embeddings...",
+                "percent": 10
+            }
+        )
+
+        from .chunking_pipeline import convert_chunk_embeddings
+
+        with get_db_context() as db:
+            result = convert_chunk_embeddings(db, storage_format, batch_size)
+
+        logger.info(
+            f"Background task: Converted {result['converted']} chunk embeddings to {result['storage_format']}"
+        )
+        return result
+
+    except Exception as e:
+        logger.error(f"Chunk embedding conversion task failed: {e}", exc_info=True)
+        self.update_state(
+            state="FAILURE",
+            meta={
+                "error": str(e),
+                "message": f"Failed to convert chunk embeddings: {str(e)}"
+            }
+        )
+        raise
+
+
+# =============================================================================
+# Re-clustering Task
+# =============================================================================
+
+@celery_app.task(bind=True, name="backend.tasks.recluster_knowledge_base_task")
+def recluster_knowledge_base_task(
+    self: Task,
+    kb_id: str,
+    method: str = "kmeans",
+    n_clusters: Optional[int] = None
+) -> Dict:
+    """
+    Regroup a knowledge base's documents by their stored chunk embeddings.
+
+    Uses no API calls; see embedding_clustering.recluster_knowledge_base.
+
+    Args:
+        self: Celery task instance
+        kb_id: Knowledge base ID
+        method: "kmeans" or "hdbscan"
+        n_clusters: Number of k-means clusters (default sqrt(n / 2))
+
+    Returns:
+        dict: {knowledge_base_id, method, moved, clusters_created, clusters_updated, clusters_removed}
+    """
+    try:
+        self.update_state(
+            state="PROCESSING",
+            meta={
+                "stage": "clustering",
+                "message": f"Re-clustering documents by embedding ({method})...",
+                "percent": 20
+            }
+        )
+
+        with get_db_context() as db:
+            result = recluster_knowledge_base(db, kb_id, method=method, n_clusters=n_clusters)
+
+        # Let every process refresh the moved documents and changed clusters
+        if result["moved"]:
+            notify_data_changed("document", "updated", result["moved"], kb_id)
+        changed = result["clusters_created"] + result["clusters_updated"] + result["clusters_removed"]
+        if changed:
+            notify_data_changed("cluster", "updated", changed, kb_id)
+        worker_cache_sync.catch_up()
+
+        logger.info(
+            f"Background task: Re-clustered KB {kb_id}, moved {len(result['moved'])} documents"
+        )
+        return {"knowledge_base_id": kb_id, "method": method, **result}
+
+    except Exception as e:
+        logger.error(f"Re-clustering task failed: {e}", exc_info=True)
+        self.update_state(
+            state="FAILURE",
+            meta={
+                "error": str(e),
+                "message": f"Failed to re-cluster knowledge base: {str(e)}"
+            }
+        )
+        raise
+
+
 # =============================================================================
 # Build Suggestions Task
 # =============================================================================
@@ -2000,14 +2523,8 @@ def generate_build_suggestions(
         )
 
         # Generate suggestions
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
 
-        suggestions = loop.run_until_complete(
+        suggestions = run_async(
             build_suggester.generate_suggestions(
                 clusters=user_clusters,
                 metadata=user_docs,
@@ -2197,6 +2714,19 @@ def import_github_files_task(
                 kb_documents = get_kb_documents(kb_id)
                 kb_metadata = get_kb_metadata(kb_id)
 
+                # Files unchanged since the last sync keep their existing document
+                existing = check_duplicate_upload(file_content, kb_id, file_path)
+                if existing is not None:
+                    imported_docs.append({
+                        "doc_id": existing["doc_id"],
+                        "file_path": file_path,
+                        "cluster_id": existing["cluster_id"],
+                        "size": len(file_content),
+                        "duplicate_of": existing["duplicate_of"]
+                    })
+                    files_processed += 1
+                    continue
+
                 # AGENTIC LEARNING: Use extract_with_learning() which applies past corrections
                 import asyncio
                 extraction = run_async(
@@ -2247,7 +2777,8 @@ def import_github_files_task(
                     concepts_list=concepts_list,
                     skill_level=skill_level,
                     kb_id=kb_id,
-                    primary_topic=primary_topic
+                    primary_topic=primary_topic,
+                    embedding=clustering_embedding(file_content)
                 )
 
                 # Store metadata (KB-scoped)
@@ -2297,8 +2828,7 @@ def import_github_files_task(
         # Reload cache and notify
         # Documents already saved via repository in the loop above
         try:
-            reload_cache_from_db()
-            notify_data_changed()  # Notify backend to reload
+            publish_documents_added([d["doc_id"] for d in imported_docs if "duplicate_of" not in d], kb_id)
             logger.info(f"GitHub import: Processed {files_processed} files")
         except Exception as e:
             logger.error(f"Failed to reload cache after GitHub import: {e}")
@@ -0,0 +1,325 @@
+"""
+Buffered usage counters for SyncBoard 3.0.
+
+The usage tracking middleware used to open a database session on the event
+loop for every authenticated request (subscription lookup, usage record
+lookup or insert, increment, commit). UsageBuffer takes that off the
+request path:
+- record() only adds to in-memory counters under a lock
+- A background thread flushes them every few seconds: one query for the
+  subscriptions and one for the usage records of all pending users, inserts
+  for the missing ones, and one batched UPDATE ... SET col = col + n, so
+  increments from several API processes add up
+- counters() serves quota checks from the totals read back at the last
+  flush plus this process's unflushed counts (other processes' counts show
+  up after their next flush)
+- limits() caches each user's effective limits (plan plus overrides) for
+  ``limits_ttl`` seconds, so quota checks do not query them per request
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .constants import DB_BULK_LOAD_BATCH_SIZE, USAGE_FLUSH_INTERVAL_SECONDS, USAGE_LIMITS_CACHE_SECONDS
+from .database import get_db_context
+from .db_models import DBUsageRecord, DBUserSubscription
+
+logger = logging.getLogger(__name__)
+
+# DBUsageRecord counter columns
+USAGE_COUNTERS = (
+    "api_calls", "documents_uploaded", "ai_requests", "storage_bytes", "search_queries", "build_suggestions"
+)
+
+UsageKey = Tuple[str, datetime]  # (username, period_start)
+
+
+def usage_period(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """(start, end) of the monthly usage period containing ``now`` (default: the current one)."""
+    period_start = (now or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+    return period_start, period_end
+
+
+def _batches(items: List, size: int = DB_BULK_LOAD_BATCH_SIZE) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class UsageBuffer:
+    """Per-process usage counters, flushed to usage_records in batches."""
+
+    def __init__(
+        self,
+        flush_interval: float = USAGE_FLUSH_INTERVAL_SECONDS,
+        limits_ttl: float = USAGE_LIMITS_CACHE_SECONDS
+    ):
+        """
+        Initialize usage buffer.
+
+        Args:
+            flush_interval: Seconds between background flushes
+            limits_ttl: Seconds a user's cached limits are reused
+        """
+        self.flush_interval = flush_interval
+        self.limits_ttl = limits_ttl
+        self._pending: Dict[UsageKey, Counter] = {}
+        self._flushing: Dict[UsageKey, Counter] = {}  # Taken by a running flush, still counted by counters()
+        self._totals: Dict[UsageKey, Dict[str, int]] = {}  # Stored totals as of the last flush or read
+        self._limits: Dict[str, Tuple[float, Dict[str, Any]]] = {}  # username -> (loaded at, limits)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, username: str, counts: Dict[str, int], now: Optional[datetime] = None) -> None:
+        """Add to a user's counters for the current period (no I/O)."""
+        key = (username, usage_period(now)[0])
+        with self._lock:
+            self._pending.setdefault(key, Counter()).update(counts)
+
+    def counters(self, db: Session, username: str) -> Dict[str, int]:
+        """
+        A user's usage in the current period, including counts not yet flushed.
+
+        Reads the database only the first time a user is seen (or after the
+        period rolls over); flushes keep the stored totals current.
+        """
+        key = (username, usage_period()[0])
+        with self._lock:
+            totals = self._totals.get(key)
+        if totals is None:
+            totals = self._load_totals(db, [key])[key]
+            with self._lock:
+                totals = self._totals.setdefault(key, totals)
+
+        with self._lock:
+            current = Counter(totals)
+            for counts in (self._flushing.get(key), self._pending.get(key)):
+                if counts:
+                    current.update(counts)
+        return {field: current[field] for field in USAGE_COUNTERS}
+
+    def limits(
+        self, db: Session, username: str, load: Callable[[Session, str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        A user's effective limits, read with ``load`` at most every limits_ttl seconds.
+
+        Plan changes made through this process call forget_limits(); other
+        changes (e.g. rate limit overrides) apply once the entry expires.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._limits.get(username)
+        if cached is not None and now - cached[0] < self.limits_ttl:
+            return cached[1]
+
+        limits = load(db, username)
+        with self._lock:
+            self._limits[username] = (now, limits)
+        return limits
+
+    def forget_limits(self, username: str) -> None:
+        """Drop a user's cached limits, e.g. after a plan change."""
+        with self._lock:
+            self._limits.pop(username, None)
+
+    @staticmethod
+    def _load_totals(db: Session, keys: List[UsageKey]) -> Dict[UsageKey, Dict[str, int]]:
+        totals = {key: dict.fromkeys(USAGE_COUNTERS, 0) for key in keys}
+        usernames_by_period: Dict[datetime, List[str]] = defaultdict(list)
+        for username, period_start in keys:
+            usernames_by_period[period_start].append(username)
+
+        columns = [getattr(DBUsageRecord, field) for field in USAGE_COUNTERS]
+        for period_start, usernames in usernames_by_period.items():
+            for batch in _batches(usernames):
+                rows = db.query(DBUsageRecord.username, *columns).filter(
+                    DBUsageRecord.period_start == period_start,
+                    DBUsageRecord.username.in_(batch)
+                )
+                for username, *values in rows:
+                    stored = totals[(username, period_start)]
+                    for field, value in zip(USAGE_COUNTERS, values):
+                        stored[field] += value or 0
+        return totals
+
+    def _write(self, db: Session, batch: Dict[UsageKey, Counter]) -> None:
+        """Add a batch of counts to usage_records, creating missing subscriptions and records."""
+        usernames = sorted({username for username, _ in batch})
+        subscriptions: Dict[str, int] = {}
+        for names in _batches(usernames):
+            subscriptions.update(db.query(DBUserSubscription.username, DBUserSubscription.id).filter(
+                DBUserSubscription.username.in_(names)
+            ).all())
+        new_subscriptions = [
+            DBUserSubscription(username=username, plan="free", status="active", cancel_at_period_end=False)
+            for username in usernames if username not in subscriptions
+        ]
+        if new_subscriptions:
+            db.add_all(new_subscriptions)
+            db.flush()
+            subscriptions.update((s.username, s.id) for s in new_subscriptions)
+
+        # Existing records get SQL-side increments; missing ones are inserted with the counts
+        records: Dict[UsageKey, int] = {}
+        usernames_by_period: Dict[datetime, List[str]] = defaultdict(list)
+        for username, period_start in batch:
+            usernames_by_period[period_start].append(username)
+        for period_start, names in usernames_by_period.items():
+            for chunk in _batches(names):
+                rows = db.query(DBUsageRecord.username, DBUsageRecord.id).filter(
+                    DBUsageRecord.period_start == period_start,
+                    DBUsageRecord.username.in_(chunk)
+                ).order_by(DBUsageRecord.id)
+                for username, record_id in rows:
+                    records.setdefault((username, period_start), record_id)
+
+        db.add_all([
+            DBUsageRecord(
+                subscription_id=subscriptions[username],
+                username=username,
+                period_start=period_start,
+                period_end=usage_period(period_start)[1],
+                **{field: counts.get(field, 0) for field in USAGE_COUNTERS}
+            )
+            for (username, period_start), counts in batch.items() if (username, period_start) not in records
+        ])
+
+        table = DBUsageRecord.__table__
+        increments = [
+            {"record_id": records[key], **{f"add_{field}": counts.get(field, 0) for field in USAGE_COUNTERS}}
+            for key, counts in batch.items() if key in records
+        ]
+        if increments:
+            db.execute(
+                table.update().where(table.c.id == bindparam("record_id")).values(
+                    **{field: table.c[field] + bindparam(f"add_{field}") for field in USAGE_COUNTERS}
+                ),
+                increments
+            )
+        db.flush()
+
+    def _write_separately(self, batch: Dict[UsageKey, Counter]) -> Dict[UsageKey, Counter]:
+        """Write a failed batch one user at a time; return the counts to retry later."""
+        retry = {}
+        for key, counts in batch.items():
+            try:
+                with get_db_context() as db:
+                    self._write(db, {key: counts})
+            except IntegrityError as e:
+                # E.g. a still-valid token of a deleted user
+                logger.error(f"Dropping usage counts of {key[0]} that cannot be stored: {e}")
+            except Exception as e:
+                logger.warning(f"Failed to flush usage counts of {key[0]}, retrying later: {e}")
+                retry[key] = counts
+        return retry
+
+    @staticmethod
+    @contextmanager
+    def _session(db: Optional[Session]) -> Iterator[Session]:
+        if db is None:
+            with get_db_context() as session:
+                yield session
+            return
+        try:
+            yield db
+        except Exception:
+            db.rollback()
+            raise
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write pending counts to usage_records and refresh the stored totals.
+
+        Args:
+            db: Session to use (committed); default a new session. Without
+                it a failed batch is retried one user at a time
+
+        Returns:
+            Number of (user, period) counters written
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                batch = self._flushing
+                cached = [key for key in self._totals if key[1] == usage_period()[0]]
+            retry: Dict[UsageKey, Counter] = {}
+            totals: Dict[UsageKey, Dict[str, int]] = {}
+
+            try:
+                with self._session(db) as session:
+                    if batch:
+                        self._write(session, batch)
+                    session.commit()
+            except Exception as e:
+                logger.warning(f"Flushing usage counts of {len(batch)} users failed: {e}")
+                retry = self._write_separately(batch) if db is None else batch
+            else:
+                try:
+                    with self._session(db) as session:
+                        totals = self._load_totals(session, sorted(set(batch) | set(cached)))
+                except Exception as e:
+                    logger.warning(f"Failed to reload usage totals after a flush: {e}")
+
+            with self._lock:
+                # Counts that could not be written go back in front of newer ones
+                for key, counts in retry.items():
+                    self._pending.setdefault(key, Counter()).update(counts)
+                if totals:
+                    # Only keys of the current period stay cached
+                    self._totals = {key: value for key, value in self._totals.items() if key in totals}
+                    self._totals.update(totals)
+                else:
+                    # Written counts are not in the cached totals; reload those users
+                    for key in batch:
+                        if key not in retry:
+                            self._totals.pop(key, None)
+                self._flushing = {}
+
+        written = len(batch) - len(retry)
+        if written:
+            logger.debug(f"Flushed usage counts of {written} users")
+        return written
+
+    def start(self) -> None:
+        """Start the background flush thread (no-op if it is already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(self.flush_interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Usage flush failed: {e}", exc_info=True)
+
+        self._thread = threading.Thread(target=run, name="usage-flush", daemon=True)
+        self._thread.start()
+        logger.info(f"Usage flush thread started (every {self.flush_interval}s)")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flush thread and write what is still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final usage flush failed: {e}", exc_info=True)
+
+
+# Global instance, flushed from the API process's lifespan
+usage_buffer = UsageBuffer()
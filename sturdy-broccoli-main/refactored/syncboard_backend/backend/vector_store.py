@@ -9,17 +9,61 @@ external language models.  When new documents are added the
 internal vectors are rebuilt, which is acceptable for small to
 medium‑sized datasets typical of a personal or team knowledge base.
 
+For larger corpora the store can run in *incremental* mode
+(``VectorStore(incremental=True)``).  New documents are then appended
+as rows against a stable, append‑only vocabulary, IDF weights are
+refreshed lazily once enough of the corpus has changed, and deletions
+become tombstones that are compacted away in bulk.  Single‑document
+inserts no longer refit the whole corpus.
+
+Incremental indexes can be persisted as versioned on‑disk snapshots
+(vocabulary, IDF weights, CSR arrays and the row → doc‑id map).  A
+process starting up memory‑maps the latest snapshot read‑only, so every
+API and worker process shares one copy in the page cache, and only
+documents that changed since the snapshot are re‑tokenised.
+
 If scikit‑learn is unavailable, you can fall back to the original
 hash‑based embeddings by importing and using the previous version of
 this module.
 """
 
-from bisect import insort
-from typing import Dict, List, Tuple
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+from bisect import bisect_left, insort
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from .constants import (
+    VECTOR_COMPACTION_RATIO,
+    VECTOR_IDF_REFRESH_RATIO,
+    VECTOR_MERGE_BATCH_SIZE,
+    VECTOR_SNAPSHOT_FORMAT,
+    VECTOR_SNAPSHOT_KEEP,
+)
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_ARRAYS = (
+    "df", "idf", "hashes",
+    "counts_data", "counts_indices", "counts_indptr",
+    "weighted_data", "weighted_indices", "weighted_indptr",
+)
+
+
+def _content_hash(text: str) -> int:
+    """Cheap fingerprint used to spot documents edited since a snapshot."""
+    return zlib.crc32(text.encode("utf-8", "surrogatepass"))
 
 
 class VectorStore:
@@ -29,11 +73,18 @@ class VectorStore:
     TF‑IDF vocabulary and document matrix are rebuilt.  This keeps
     search results consistent with the current corpus at the cost of
     slightly higher insertion overhead.  For datasets larger than a
-    few thousand documents you may wish to swap this out for a
-    streaming or database‑backed vector index.
+    few thousand documents pass ``incremental=True`` to switch to the
+    append‑only index described in the module docstring.
     """
 
-    def __init__(self, dim: int = 256) -> None:
+    def __init__(
+        self,
+        dim: int = 256,
+        incremental: bool = False,
+        idf_refresh_ratio: float = VECTOR_IDF_REFRESH_RATIO,
+        compaction_ratio: float = VECTOR_COMPACTION_RATIO,
+        merge_batch_size: int = VECTOR_MERGE_BATCH_SIZE,
+    ) -> None:
         # ``dim`` is accepted for API compatibility but unused because
         # TF‑IDF determines the dimensionality automatically.
         self.dim = dim
@@ -48,6 +99,18 @@ class VectorStore:
         self.doc_matrix = None  # type: ignore
         self._next_id: int = 0
 
+        # Incremental index configuration
+        self.incremental = incremental
+        self.idf_refresh_ratio = idf_refresh_ratio
+        self.compaction_ratio = compaction_ratio
+        self.merge_batch_size = merge_batch_size
+        self._analyzer = TfidfVectorizer().build_analyzer()
+        self._reset_index()
+
+    # ------------------------------------------------------------------
+    # Full‑refit mode
+    # ------------------------------------------------------------------
+
     def _rebuild_vectors(self) -> None:
         """(Re)fit the TF‑IDF vectoriser and document matrix.
 
@@ -67,6 +130,363 @@ class VectorStore:
             self.vectorizer = None
             self.doc_matrix = None
 
+    # ------------------------------------------------------------------
+    # Incremental mode internals
+    # ------------------------------------------------------------------
+
+    def _reset_index(self) -> None:
+        """Drop all incremental index state (vocabulary, rows, tombstones)."""
+        # Append‑only vocabulary: a term keeps its column forever
+        self._vocab: Dict[str, int] = {}
+        # Document frequency per column, over live rows only
+        self._df = np.zeros(0, dtype=np.float64)
+        # IDF snapshot used to weight rows; columns beyond its length
+        # are weighted on the fly from the current document frequency
+        self._idf = np.zeros(0, dtype=np.float64)
+        # Raw term counts and weighted rows.  ``_main_*`` are merged CSR
+        # blocks, ``_pending_*`` are single‑row CSR matrices not yet merged.
+        self._main_counts: Optional[sparse.csr_matrix] = None
+        self._pending_counts: List[sparse.csr_matrix] = []
+        self._pending_weighted: List[sparse.csr_matrix] = []
+        self._pending_block: Optional[sparse.csr_matrix] = None
+        # Row bookkeeping: row index -> doc_id, doc_id -> live row index
+        self._row_doc_ids: List[int] = []
+        self._row_of: Dict[int, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._n_dead = 0
+        self._changes_since_idf = 0
+
+    def _n_rows(self) -> int:
+        return len(self._row_doc_ids)
+
+    def _idf_for(self, cols: np.ndarray) -> np.ndarray:
+        """Return IDF weights for ``cols`` (smooth IDF, as scikit‑learn)."""
+        idf = np.empty(len(cols), dtype=np.float64)
+        known = cols < len(self._idf)
+        idf[known] = self._idf[cols[known]]
+        if not known.all():
+            n_live = self._n_rows() - self._n_dead
+            df = self._df[cols[~known]]
+            idf[~known] = np.log((1.0 + n_live) / (1.0 + df)) + 1.0
+        return idf
+
+    def _count_row(self, text: str, grow: bool) -> sparse.csr_matrix:
+        """Tokenise ``text`` into a 1×V term‑count row.
+
+        Args:
+            text: Document or query text.
+            grow: Append unseen terms to the vocabulary (documents) or
+                drop them (queries).
+        """
+        counts = Counter(self._analyzer(text))
+        cols: List[int] = []
+        vals: List[float] = []
+        for term, count in counts.items():
+            col = self._vocab.get(term)
+            if col is None:
+                if not grow:
+                    continue
+                col = len(self._vocab)
+                self._vocab[term] = col
+            cols.append(col)
+            vals.append(float(count))
+        if grow and len(self._vocab) > len(self._df):
+            capacity = max(len(self._vocab), 2 * len(self._df), 1024)
+            self._df = np.concatenate([self._df, np.zeros(capacity - len(self._df))])
+        order = np.argsort(cols)
+        return sparse.csr_matrix(
+            (np.asarray(vals)[order], np.asarray(cols, dtype=np.int32)[order], [0, len(cols)]),
+            shape=(1, len(self._vocab)),
+        )
+
+    def _weight_row(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Apply IDF weights and L2 normalisation to a 1×V count row."""
+        data = counts.data * self._idf_for(counts.indices)
+        norm = np.sqrt(np.dot(data, data))
+        if norm > 0:
+            data = data / norm
+        return sparse.csr_matrix((data, counts.indices.copy(), counts.indptr.copy()), shape=counts.shape)
+
+    @staticmethod
+    def _widen(matrix: sparse.csr_matrix, n_cols: int) -> sparse.csr_matrix:
+        """Return ``matrix`` viewed with ``n_cols`` columns (no data copy)."""
+        if matrix.shape[1] == n_cols:
+            return matrix
+        return sparse.csr_matrix(
+            (matrix.data, matrix.indices, matrix.indptr),
+            shape=(matrix.shape[0], n_cols),
+        )
+
+    def _row_counts(self, row: int) -> sparse.csr_matrix:
+        """Return the raw count row for an index row (main or pending)."""
+        n_main = 0 if self._main_counts is None else self._main_counts.shape[0]
+        if row < n_main:
+            return self._main_counts[row]
+        return self._pending_counts[row - n_main]
+
+    def _row_vector(self, row: int) -> sparse.csr_matrix:
+        """Return the weighted (search) vector for an index row."""
+        n_main = 0 if self.doc_matrix is None else self.doc_matrix.shape[0]
+        if row < n_main:
+            return self.doc_matrix[row]
+        return self._pending_weighted[row - n_main]
+
+    def _blocks(self) -> List[sparse.csr_matrix]:
+        """Return the weighted row blocks covering every index row in order."""
+        blocks = []
+        if self.doc_matrix is not None:
+            blocks.append(self.doc_matrix)
+        if self._pending_weighted:
+            if self._pending_block is None:
+                width = len(self._vocab)
+                self._pending_block = sparse.vstack(
+                    [self._widen(r, width) for r in self._pending_weighted], format="csr"
+                )
+            blocks.append(self._pending_block)
+        return blocks
+
+    def _merge_pending(self) -> None:
+        """Fold pending rows into the main count and weighted matrices."""
+        if not self._pending_counts:
+            return
+        width = len(self._vocab)
+        counts = [self._widen(r, width) for r in self._pending_counts]
+        weighted = [self._widen(r, width) for r in self._pending_weighted]
+        if self._main_counts is not None:
+            counts.insert(0, self._widen(self._main_counts, width))
+            weighted.insert(0, self._widen(self.doc_matrix, width))
+        self._main_counts = sparse.vstack(counts, format="csr")
+        self.doc_matrix = sparse.vstack(weighted, format="csr")
+        self._pending_counts = []
+        self._pending_weighted = []
+        self._pending_block = None
+
+    def _append_row(self, doc_id: int, text: str) -> None:
+        """Append ``text`` as a new index row for ``doc_id``."""
+        counts = self._count_row(text, grow=True)
+        self._df[counts.indices] += 1.0
+        row = self._n_rows()
+        self._row_doc_ids.append(doc_id)
+        self._row_of[doc_id] = row
+        if row >= len(self._live):
+            capacity = max(row + 1, 2 * len(self._live), 1024)
+            self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+        self._live[row] = True
+        self._pending_counts.append(counts)
+        self._pending_weighted.append(self._weight_row(counts))
+        self._pending_block = None
+        self._changes_since_idf += 1
+        if len(self._pending_counts) >= self.merge_batch_size:
+            self._merge_pending()
+
+    def _tombstone(self, doc_id: int) -> None:
+        """Mark the live row for ``doc_id`` as deleted."""
+        row = self._row_of.pop(doc_id, None)
+        if row is None:
+            return
+        self._live[row] = False
+        self._df[self._row_counts(row).indices] -= 1.0
+        self._n_dead += 1
+        self._changes_since_idf += 1
+
+    def _maybe_maintain(self) -> None:
+        """Run deferred IDF refresh and compaction once their thresholds trip."""
+        if self._n_rows() and self._n_dead > self.compaction_ratio * self._n_rows():
+            self.compact()
+        n_live = self._n_rows() - self._n_dead
+        if self._changes_since_idf > self.idf_refresh_ratio * max(n_live, 1):
+            self.refresh_idf()
+
+    def refresh_idf(self) -> None:
+        """Recompute IDF weights from current document frequencies.
+
+        Reweights every stored row from its raw counts; no text is
+        re‑tokenised.  Called automatically once the number of adds and
+        deletes since the last refresh exceeds ``idf_refresh_ratio`` of
+        the live corpus, and safe to call on a schedule.
+        """
+        if not self.incremental:
+            return
+        self._merge_pending()
+        n_live = self._n_rows() - self._n_dead
+        width = len(self._vocab)
+        self._idf = np.log((1.0 + n_live) / (1.0 + self._df[:width])) + 1.0
+        self._changes_since_idf = 0
+        if self._main_counts is None:
+            return
+        weighted = self._widen(self._main_counts, width).multiply(self._idf).tocsr()
+        self.doc_matrix = normalize(weighted, norm="l2", copy=False)
+
+    def compact(self) -> None:
+        """Physically drop tombstoned rows from the incremental index.
+
+        The vocabulary is left untouched so column indices stay stable.
+        """
+        if not self.incremental or not self._n_dead:
+            return
+        self._merge_pending()
+        keep = np.flatnonzero(self._live[: self._n_rows()])
+        self._main_counts = self._main_counts[keep] if len(keep) else None
+        self.doc_matrix = self.doc_matrix[keep] if len(keep) else None
+        self._row_doc_ids = [self._row_doc_ids[i] for i in keep]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._row_doc_ids)}
+        self._live = np.ones(len(keep), dtype=bool)
+        self._n_dead = 0
+
+    def _live_scores(self, vec: sparse.csr_matrix) -> np.ndarray:
+        """Score ``vec`` against every index row; dead rows score ``-inf``."""
+        width = len(self._vocab)
+        vec = self._widen(vec, width)
+        parts = [np.asarray(self._widen(block, width).dot(vec.T).todense()).ravel() for block in self._blocks()]
+        scores = np.concatenate(parts) if parts else np.zeros(0)
+        scores[~self._live[: len(scores)]] = -np.inf
+        return scores
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def save_snapshot(self, directory: str, version: int) -> Path:
+        """Write the incremental index to ``directory`` as snapshot ``version``.
+
+        The snapshot is written to a temporary directory and renamed into
+        place, then ``CURRENT`` is switched to it, so readers never see a
+        partial snapshot.  Older snapshots beyond ``VECTOR_SNAPSHOT_KEEP``
+        are pruned (processes that still map them keep working).
+
+        Returns:
+            Path of the snapshot directory.
+        """
+        if not self.incremental:
+            raise ValueError("Snapshots require an incremental VectorStore")
+        if self._changes_since_idf or len(self._idf) != len(self._vocab):
+            self.refresh_idf()
+        self.compact()
+        self._merge_pending()
+
+        root = Path(directory)
+        root.mkdir(parents=True, exist_ok=True)
+        name = f"v{version:012d}"
+        final = root / name
+        if not final.exists():
+            width = len(self._vocab)
+            terms = [""] * width
+            for term, col in self._vocab.items():
+                terms[col] = term
+            empty = sparse.csr_matrix((0, width))
+            counts = self._widen(self._main_counts, width) if self._main_counts is not None else empty
+            weighted = self._widen(self.doc_matrix, width) if self.doc_matrix is not None else empty
+            arrays = {
+                "df": self._df[:width],
+                "idf": self._idf,
+                "hashes": np.array([_content_hash(self.docs.get(d, "")) for d in self._row_doc_ids], dtype=np.uint32),
+                "counts_data": counts.data, "counts_indices": counts.indices, "counts_indptr": counts.indptr,
+                "weighted_data": weighted.data, "weighted_indices": weighted.indices, "weighted_indptr": weighted.indptr,
+            }
+            meta = {
+                "format": VECTOR_SNAPSHOT_FORMAT,
+                "version": version,
+                "next_id": self._next_id,
+                "terms": terms,
+                "row_doc_ids": self._row_doc_ids,
+            }
+            tmp = Path(tempfile.mkdtemp(prefix=f".{name}-", dir=root))
+            try:
+                for key, array in arrays.items():
+                    np.save(tmp / f"{key}.npy", np.ascontiguousarray(array))
+                (tmp / "meta.json").write_text(json.dumps(meta))
+                os.replace(tmp, final)
+            except OSError:
+                # Another process published the same version first
+                shutil.rmtree(tmp, ignore_errors=True)
+                if not final.exists():
+                    raise
+
+        pointer = root / f".CURRENT-{os.getpid()}"
+        pointer.write_text(name)
+        os.replace(pointer, root / "CURRENT")
+
+        for old in sorted(p for p in root.glob("v*") if p.is_dir())[:-VECTOR_SNAPSHOT_KEEP]:
+            if old != final:
+                shutil.rmtree(old, ignore_errors=True)
+        logger.info(f"Saved vector index snapshot {name} ({len(self._row_doc_ids)} rows)")
+        return final
+
+    def _open_snapshot(self, directory: str) -> Tuple[int, Dict[int, int]] | None:
+        """Map the latest snapshot in ``directory`` read-only as the index.
+
+        Returns:
+            ``(version, {doc_id: content hash})``, or ``None`` if there is
+            no usable snapshot (the index is left untouched).
+        """
+        root = Path(directory)
+        if not (root / "CURRENT").exists():
+            return None
+        try:
+            path = root / (root / "CURRENT").read_text().strip()
+            meta = json.loads((path / "meta.json").read_text())
+            if meta.get("format") != VECTOR_SNAPSHOT_FORMAT:
+                return None
+            arrays = {key: np.load(path / f"{key}.npy", mmap_mode="r") for key in _SNAPSHOT_ARRAYS}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable vector index snapshot in {directory}: {e}")
+            return None
+
+        row_doc_ids = meta["row_doc_ids"]
+        shape = (len(row_doc_ids), len(meta["terms"]))
+        self._reset_index()
+        self._vocab = {term: col for col, term in enumerate(meta["terms"])}
+        # Small per-term arrays are copied (they are updated in place);
+        # the CSR arrays stay memory-mapped and shared between processes.
+        self._df = np.array(arrays["df"], dtype=np.float64)
+        self._idf = np.array(arrays["idf"], dtype=np.float64)
+        if shape[0]:
+            self._main_counts = sparse.csr_matrix(
+                (arrays["counts_data"], arrays["counts_indices"], arrays["counts_indptr"]), shape=shape, copy=False
+            )
+            self.doc_matrix = sparse.csr_matrix(
+                (arrays["weighted_data"], arrays["weighted_indices"], arrays["weighted_indptr"]), shape=shape, copy=False
+            )
+        self._row_doc_ids = list(row_doc_ids)
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._row_doc_ids)}
+        self._live = np.ones(shape[0], dtype=bool)
+        if meta["next_id"] > self._next_id:
+            self._next_id = meta["next_id"]
+        return meta["version"], dict(zip(self._row_doc_ids, arrays["hashes"].tolist()))
+
+    def _load_with_snapshot(self, loaded: List[int], directory: str, version: int | None) -> None:
+        """Open the snapshot, then re-index only documents that differ from it."""
+        opened = self._open_snapshot(directory)
+        snapshot_version, hashes = opened if opened else (None, {})
+        if opened is None and loaded:
+            self.load_documents([(doc_id, self.docs[doc_id]) for doc_id in loaded])
+            changed = len(loaded)
+        else:
+            changed = 0
+            unique_ids = list(dict.fromkeys(loaded))
+            self.doc_ids = sorted(set(self.doc_ids).union(unique_ids))
+            for doc_id in unique_ids:
+                if hashes.pop(doc_id, None) != _content_hash(self.docs[doc_id]):
+                    self._tombstone(doc_id)
+                    self._append_row(doc_id, self.docs[doc_id])
+                    changed += 1
+            # Rows in the snapshot whose documents are gone from the database
+            for doc_id in hashes:
+                self._tombstone(doc_id)
+                changed += 1
+            self._maybe_maintain()
+            logger.info(f"Opened vector index snapshot v{snapshot_version}, re-indexed {changed} changed documents")
+
+        if version is not None and (changed or snapshot_version != version):
+            try:
+                self.save_snapshot(directory, version)
+            except OSError as e:
+                logger.warning(f"Could not save vector index snapshot to {directory}: {e}")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
     def _request_new_id(self) -> int:
         """Return the next available document ID and advance the counter."""
         doc_id = self._next_id
@@ -78,8 +498,26 @@ class VectorStore:
         if doc_id >= self._next_id:
             self._next_id = doc_id + 1
 
+    def _index_doc_id(self, doc_id: int) -> None:
+        """Insert ``doc_id`` into the sorted ``doc_ids`` list if missing."""
+        pos = bisect_left(self.doc_ids, doc_id)
+        if pos == len(self.doc_ids) or self.doc_ids[pos] != doc_id:
+            self.doc_ids.insert(pos, doc_id)
+
+    def clear(self) -> None:
+        """Remove every document and reset the index (keeps ``_next_id``)."""
+        self.docs.clear()
+        self.doc_ids.clear()
+        self.vectorizer = None
+        self.doc_matrix = None
+        self._reset_index()
+
     def add_document(self, text: str, doc_id: int | None = None) -> int:
-        """Add a document to the vector store and rebuild vectors."""
+        """Add a document to the vector store and rebuild vectors.
+
+        In incremental mode the document is appended as a single row
+        instead; re‑adding an existing ``doc_id`` replaces its row.
+        """
         if doc_id is None:
             doc_id = self._request_new_id()
         else:
@@ -87,6 +525,13 @@ class VectorStore:
 
         self.docs[doc_id] = text
 
+        if self.incremental:
+            self._index_doc_id(doc_id)
+            self._tombstone(doc_id)
+            self._append_row(doc_id, text)
+            self._maybe_maintain()
+            return doc_id
+
         if doc_id not in self.doc_ids:
             insort(self.doc_ids, doc_id)
 
@@ -103,14 +548,93 @@ class VectorStore:
         for text in texts:
             doc_id = self._request_new_id()
             self.docs[doc_id] = text
-            if doc_id not in self.doc_ids:
+            if self.incremental:
+                self._index_doc_id(doc_id)
+                self._append_row(doc_id, text)
+            elif doc_id not in self.doc_ids:
                 insort(self.doc_ids, doc_id)
             doc_ids.append(doc_id)
 
+        if self.incremental:
+            self._maybe_maintain()
+            return doc_ids
+
         # Rebuild vectors once after all documents are added
         self._rebuild_vectors()
         return doc_ids
 
+    def load_documents(
+        self,
+        items: Iterable[Tuple[int, str]],
+        snapshot_dir: str | None = None,
+        snapshot_version: int | None = None,
+    ) -> int:
+        """Bulk-load ``(doc_id, text)`` pairs and build the index once.
+
+        Used for startup and cache reloads, where calling add_document()
+        per row would refit (or re-weight) the corpus for every row.  An
+        empty incremental store is built in a single vectorisation pass;
+        otherwise rows are appended and maintenance runs once at the end.
+
+        Args:
+            items: ``(doc_id, text)`` pairs.
+            snapshot_dir: Optional snapshot directory (incremental mode
+                only).  An empty store opens the latest snapshot there
+                and re-indexes only documents that are new, edited or
+                gone; a fresh snapshot is written when the one on disk
+                is stale.
+            snapshot_version: Database high-water mark the loaded
+                documents correspond to; tags the written snapshot.
+
+        Returns:
+            Number of documents loaded.
+        """
+        loaded = []
+        for doc_id, text in items:
+            self._ensure_next_id(doc_id)
+            self.docs[doc_id] = text
+            loaded.append(doc_id)
+
+        if snapshot_dir and self.incremental and self._n_rows() == 0:
+            self._load_with_snapshot(loaded, snapshot_dir, snapshot_version)
+            return len(loaded)
+
+        if not loaded:
+            return 0
+
+        if not self.incremental:
+            self.doc_ids = sorted(set(self.doc_ids).union(loaded))
+            self._rebuild_vectors()
+            return len(loaded)
+
+        for doc_id in loaded:
+            self._index_doc_id(doc_id)
+        if self._n_rows() == 0:
+            # Keep the last text for duplicate IDs, in load order
+            unique_ids = list(dict.fromkeys(reversed(loaded)))[::-1]
+            counter = CountVectorizer(analyzer=self._analyzer)
+            try:
+                counts = counter.fit_transform([self.docs[d] for d in unique_ids]).tocsr()
+            except ValueError:
+                # Empty vocabulary - fall through to the row-by-row path
+                counts = None
+            if counts is not None:
+                counts.sort_indices()
+                self._vocab = {term: int(col) for term, col in counter.vocabulary_.items()}
+                self._df = np.asarray((counts > 0).sum(axis=0), dtype=np.float64).ravel()
+                self._main_counts = counts
+                self._row_doc_ids = unique_ids
+                self._row_of = {doc_id: row for row, doc_id in enumerate(unique_ids)}
+                self._live = np.ones(len(unique_ids), dtype=bool)
+                self.refresh_idf()
+                return len(loaded)
+
+        for doc_id in loaded:
+            self._tombstone(doc_id)
+            self._append_row(doc_id, self.docs[doc_id])
+        self._maybe_maintain()
+        return len(loaded)
+
     def remove_document(self, doc_id: int) -> None:
         """Remove a document from the store and rebuild vectors.
 
@@ -121,49 +645,96 @@ class VectorStore:
             If the given document ID does not exist, this method
             silently ignores the call.  After removal the TF‑IDF
             vocabulary and document matrix are rebuilt to reflect the
-            remaining documents.
+            remaining documents.  In incremental mode the row is
+            tombstoned instead and compacted later.
         """
         if doc_id not in self.docs:
             return
         # Remove from mapping and order list
         del self.docs[doc_id]
+        if self.incremental:
+            pos = bisect_left(self.doc_ids, doc_id)
+            if pos < len(self.doc_ids) and self.doc_ids[pos] == doc_id:
+                del self.doc_ids[pos]
+            self._tombstone(doc_id)
+            self._maybe_maintain()
+            return
         self.doc_ids = [d for d in self.doc_ids if d != doc_id]
         # Rebuild vectors from remaining docs
         self._rebuild_vectors()
 
-    def search(self, query: str, top_k: int = 5, allowed_doc_ids: List[int] | None = None) -> List[Tuple[int, float, str]]:
+    def _top_rows(
+        self,
+        scores: np.ndarray,
+        row_doc_ids: List[int],
+        top_k: int,
+        allowed_doc_ids: Iterable[int] | None = None,
+        exclude_doc_id: int | None = None,
+    ) -> List[Tuple[int, float]]:
+        """Return the best ``top_k`` ``(row, score)`` pairs, best first.
+
+        Rows are filtered with a boolean mask (tombstones, rows outside
+        ``allowed_doc_ids``, the excluded document) and the winners are
+        picked with ``argpartition``, so only ``top_k`` scores are sorted.
+        Ties keep row order.
+        """
+        n = min(len(scores), len(row_doc_ids))
+        if top_k <= 0 or n == 0:
+            return []
+        scores = scores[:n]
+        row_ids = np.asarray(row_doc_ids[:n], dtype=np.int64)
+        mask = scores != -np.inf
+        if allowed_doc_ids is not None:
+            allowed = np.fromiter(allowed_doc_ids, dtype=np.int64)
+            mask &= np.isin(row_ids, allowed)
+        if exclude_doc_id is not None:
+            mask &= row_ids != exclude_doc_id
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > len(self.docs):
+            # Documents were dropped from ``docs`` behind the index's back
+            candidates = candidates[[int(row_ids[i]) in self.docs for i in candidates]]
+        if len(candidates) == 0:
+            return []
+
+        cand_scores = scores[candidates]
+        if len(candidates) > top_k:
+            best = np.argpartition(-cand_scores, top_k - 1)[:top_k]
+            best.sort()
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-cand_scores[best], kind="stable")]
+        return [(int(candidates[i]), float(cand_scores[i])) for i in best]
+
+    def search(self, query: str, top_k: int = 5, allowed_doc_ids: Iterable[int] | None = None) -> List[Tuple[int, float, str]]:
         """Return documents semantically similar to the query.
 
         Args:
             query: User query text.
             top_k: Number of results to return.
-            allowed_doc_ids: Optional list of document IDs to restrict
-                search to (e.g., documents belonging to a particular
-                board).
+            allowed_doc_ids: Optional collection of document IDs to
+                restrict search to (e.g., documents belonging to a
+                particular board).  Applied as a vectorised row mask.
 
         Returns:
             A list of tuples ``(document_id, similarity_score, snippet)``
             sorted by descending similarity.
         """
-        if self.vectorizer is None or self.doc_matrix is None:
-            return []
-        # Transform query using existing vocabulary
-        q_vec = self.vectorizer.transform([query])
-        # Compute cosine similarities between query and all documents
-        scores = cosine_similarity(self.doc_matrix, q_vec).flatten()
-        # Build list of candidate (index, score) pairs
-        candidates: List[Tuple[int, float]] = []
-        for idx, score in enumerate(scores):
-            # Map row index to document ID
-            doc_id = self.doc_ids[idx]
-            if allowed_doc_ids is not None and doc_id not in allowed_doc_ids:
-                continue
-            candidates.append((idx, float(score)))
-        # Sort candidates by score descending
-        candidates.sort(key=lambda x: x[1], reverse=True)
+        if self.incremental:
+            if not self._row_of:
+                return []
+            scores = self._live_scores(self._weight_row(self._count_row(query, grow=False)))
+            row_doc_ids = self._row_doc_ids
+        else:
+            if self.vectorizer is None or self.doc_matrix is None:
+                return []
+            # Transform query using existing vocabulary
+            q_vec = self.vectorizer.transform([query])
+            # Compute cosine similarities between query and all documents
+            scores = cosine_similarity(self.doc_matrix, q_vec).flatten()
+            row_doc_ids = self.doc_ids
         results: List[Tuple[int, float, str]] = []
-        for row_idx, score in candidates[:top_k]:
-            doc_id = self.doc_ids[row_idx]
+        for row_idx, score in self._top_rows(scores, row_doc_ids, top_k, allowed_doc_ids):
+            doc_id = row_doc_ids[row_idx]
             text = self.docs[doc_id]
             snippet = text[:100] + ("..." if len(text) > 100 else "")
             results.append((doc_id, score, snippet))
@@ -179,6 +750,15 @@ class VectorStore:
         Returns:
             List of tuples (document_id, similarity_score) sorted by similarity
         """
+        if self.incremental:
+            if doc_id not in self.docs or doc_id not in self._row_of:
+                return []
+            scores = self._live_scores(self._row_vector(self._row_of[doc_id]))
+            return [
+                (self._row_doc_ids[row], score)
+                for row, score in self._top_rows(scores, self._row_doc_ids, top_k, exclude_doc_id=doc_id)
+            ]
+
         if self.vectorizer is None or self.doc_matrix is None:
             return []
 
@@ -197,14 +777,114 @@ class VectorStore:
         # Compute cosine similarities between this doc and all others
         scores = cosine_similarity(self.doc_matrix, doc_vec).flatten()
 
-        # Build list of (doc_id, score) pairs, excluding the query document itself
-        results = []
-        for idx, score in enumerate(scores):
-            other_doc_id = self.doc_ids[idx]
-            if other_doc_id != doc_id:
-                results.append((other_doc_id, float(score)))
+        # Best (doc_id, score) pairs, excluding the query document itself
+        return [
+            (self.doc_ids[row], score)
+            for row, score in self._top_rows(scores, self.doc_ids, top_k, exclude_doc_id=doc_id)
+        ]
+
 
-        # Sort by similarity descending
-        results.sort(key=lambda x: x[1], reverse=True)
+class PartitionedVectorStore:
+    """Vector store split into one independent index per knowledge base.
 
-        return results[:top_k]
\ No newline at end of file
+    Each partition is a :class:`VectorStore` with its own vocabulary and
+    matrix, so a query scoped to a knowledge base only scores that
+    knowledge base's rows.  Document IDs stay globally unique and the
+    ``docs`` mapping covers every partition, so the store can stand in
+    for a single :class:`VectorStore`.
+    """
+
+    def __init__(self, dim: int = 256, **store_kwargs) -> None:
+        self.dim = dim
+        self._store_kwargs = store_kwargs
+        self.partitions: Dict[Optional[str], VectorStore] = {}
+        self.docs: Dict[int, str] = {}
+        self._kb_of: Dict[int, Optional[str]] = {}
+        self._next_id: int = 0
+
+    def partition(self, knowledge_base_id: Optional[str]) -> VectorStore:
+        """Return (creating if needed) the partition for a knowledge base."""
+        store = self.partitions.get(knowledge_base_id)
+        if store is None:
+            store = VectorStore(dim=self.dim, **self._store_kwargs)
+            self.partitions[knowledge_base_id] = store
+        return store
+
+    def knowledge_base_of(self, doc_id: int) -> Optional[str]:
+        """Return the knowledge base a document is indexed under."""
+        return self._kb_of.get(doc_id)
+
+    def _place(self, doc_id: int, text: str, knowledge_base_id: Optional[str]) -> VectorStore:
+        """Record ``doc_id`` under a knowledge base, leaving any old partition."""
+        if doc_id in self._kb_of and self._kb_of[doc_id] != knowledge_base_id:
+            self.partitions[self._kb_of[doc_id]].remove_document(doc_id)
+        if doc_id >= self._next_id:
+            self._next_id = doc_id + 1
+        self.docs[doc_id] = text
+        self._kb_of[doc_id] = knowledge_base_id
+        return self.partition(knowledge_base_id)
+
+    def add_document(self, text: str, doc_id: int | None = None, knowledge_base_id: Optional[str] = None) -> int:
+        """Add a document to its knowledge base's partition."""
+        if doc_id is None:
+            doc_id = self._next_id
+        self._place(doc_id, text, knowledge_base_id).add_document(text, doc_id=doc_id)
+        return doc_id
+
+    def load_documents(self, items: Iterable[Tuple[int, str, Optional[str]]]) -> int:
+        """Bulk-load ``(doc_id, text, knowledge_base_id)`` rows, one build per partition."""
+        grouped: Dict[Optional[str], List[Tuple[int, str]]] = {}
+        for doc_id, text, knowledge_base_id in items:
+            self._place(doc_id, text, knowledge_base_id)
+            grouped.setdefault(knowledge_base_id, []).append((doc_id, text))
+        return sum(self.partition(kb_id).load_documents(rows) for kb_id, rows in grouped.items())
+
+    def remove_document(self, doc_id: int) -> None:
+        """Remove a document from its partition (no-op if unknown)."""
+        if doc_id not in self._kb_of:
+            return
+        knowledge_base_id = self._kb_of.pop(doc_id)
+        self.docs.pop(doc_id, None)
+        self.partitions[knowledge_base_id].remove_document(doc_id)
+
+    def clear(self) -> None:
+        """Remove every document and partition (keeps ``_next_id``)."""
+        self.partitions.clear()
+        self.docs.clear()
+        self._kb_of.clear()
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        allowed_doc_ids: Iterable[int] | None = None,
+        knowledge_base_id: Optional[str] = None,
+    ) -> List[Tuple[int, float, str]]:
+        """Search one knowledge base, or every partition holding a candidate.
+
+        With ``knowledge_base_id`` only that partition is scored.  Without
+        it, the partitions touched by ``allowed_doc_ids`` (or all of them)
+        are searched and their results merged by score.
+        """
+        if knowledge_base_id is not None:
+            store = self.partitions.get(knowledge_base_id)
+            return store.search(query, top_k=top_k, allowed_doc_ids=allowed_doc_ids) if store else []
+
+        if allowed_doc_ids is None:
+            kb_ids = list(self.partitions)
+        else:
+            allowed_doc_ids = set(allowed_doc_ids)
+            kb_ids = {self._kb_of[d] for d in allowed_doc_ids if d in self._kb_of}
+        results = [
+            hit
+            for kb_id in kb_ids
+            for hit in self.partitions[kb_id].search(query, top_k=top_k, allowed_doc_ids=allowed_doc_ids)
+        ]
+        results.sort(key=lambda hit: hit[1], reverse=True)
+        return results[:top_k]
+
+    def search_by_doc_id(self, doc_id: int, top_k: int = 10) -> List[Tuple[int, float]]:
+        """Find documents similar to ``doc_id`` within its knowledge base."""
+        if doc_id not in self._kb_of:
+            return []
+        return self.partitions[self._kb_of[doc_id]].search_by_doc_id(doc_id, top_k=top_k)
@@ -0,0 +1,135 @@
+"""
+Shared plumbing for process-wide in-memory indexes in SyncBoard 3.0.
+
+SharedVectorIndex, ChunkEmbeddingIndex, ChunkLexicalIndex and
+DuplicateIndex all mirror a database table in memory the same way:
+- WatermarkIndex: loaded lazily once per process, then kept current by a
+  cheap (count, max id) watermark check at most every ``sync_interval``
+  seconds; only rows past the last max id are read, and ids are diffed
+  only when the row count still disagrees (deletes, out-of-order writes)
+- EngineRegistry: one object per database engine (and key, e.g. a
+  knowledge base), held weakly so throwaway test engines get their own
+"""
+
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+
+def engine_of(db: Session):
+    """The engine behind a session; process-wide indexes are cached per engine."""
+    bind = db.get_bind()
+    return getattr(bind, "engine", bind)
+
+
+class EngineRegistry:
+    """Process-wide objects keyed by (database engine, key)."""
+
+    def __init__(self):
+        self._by_engine: "weakref.WeakKeyDictionary[Any, Dict[Hashable, Any]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, factory: Callable[[], Any], key: Hashable = None) -> Any:
+        """Get the object for the session's engine and ``key``, creating it with ``factory``."""
+        with self._lock:
+            per_engine = self._by_engine.setdefault(engine_of(db), {})
+            value = per_engine.get(key)
+            if value is None:
+                value = per_engine[key] = factory()
+            return value
+
+    def peek(self, db: Session, key: Hashable = None) -> Optional[Any]:
+        """The object for the session's engine and ``key`` if one was created."""
+        with self._lock:
+            return self._by_engine.get(engine_of(db), {}).get(key)
+
+
+class WatermarkIndex:
+    """
+    Base for in-memory indexes synced from a table by a (count, max id) watermark.
+
+    Subclasses implement _watermark, _load_rows, _add_rows_after and
+    _reconcile; len() must count the committed rows the index holds.
+    """
+
+    def __init__(self, sync_interval: float):
+        """
+        Initialize an empty, not-yet-loaded index.
+
+        Args:
+            sync_interval: Minimum seconds between watermark checks
+        """
+        self.sync_interval = sync_interval
+        self.version = 0
+        self._loaded = False
+        self._dirty = False  # Set when this process knows the index is stale
+        self._row_count = 0
+        self._max_row_id = 0
+        self._synced_at = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """
+        Bring the index up to date with the database.
+
+        Args:
+            db: Database session
+            force: Check the watermark even if the sync interval has not elapsed
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load(db)
+                return
+            if not (force or self._dirty) and time.monotonic() - self._synced_at < self.sync_interval:
+                return
+
+            row_count, max_row_id = self._watermark(db)
+            self._synced_at = time.monotonic()
+            if not self._dirty and (row_count, max_row_id) == (self._row_count, self._max_row_id):
+                return
+
+            # Fast path: new rows always get new ids
+            self._add_rows_after(db, self._max_row_id)
+            if len(self) != row_count:
+                # Deletes, or out-of-order changes: diff ids
+                self._reconcile(db)
+
+            self._row_count = row_count
+            self._max_row_id = max_row_id
+            self._dirty = False
+            self._after_sync()
+            self.version += 1
+
+    def _load(self, db: Session) -> None:
+        row_count, max_row_id = self._watermark(db)
+        self._load_rows(db)
+        self._row_count = row_count
+        self._max_row_id = max_row_id
+        self._synced_at = time.monotonic()
+        self._loaded = True
+        self.version += 1
+
+    def _watermark(self, db: Session) -> Tuple[int, int]:
+        """(row count, max row id) of the rows the index mirrors."""
+        raise NotImplementedError
+
+    def _load_rows(self, db: Session) -> None:
+        """Read every row into the empty index."""
+        raise NotImplementedError
+
+    def _add_rows_after(self, db: Session, row_id: int) -> None:
+        """Read the rows with ids above ``row_id``."""
+        raise NotImplementedError
+
+    def _reconcile(self, db: Session) -> None:
+        """Diff the indexed ids against the table: drop deleted rows, read missing ones."""
+        raise NotImplementedError
+
+    def _after_sync(self) -> None:
+        """Hook run after a sync that changed the index."""
@@ -0,0 +1,96 @@
+"""
+Process-wide event loop for Celery workers.
+
+Celery tasks are synchronous, but most of the ingestion work (LLM calls,
+embeddings, feedback recording) is async. Running every coroutine with
+asyncio.run() builds and tears down a loop per call, and with it the
+HTTP connection pools of the async clients used on that loop.
+
+WorkerEventLoop keeps one loop running in a daemon thread for the life of
+the worker process. Tasks submit coroutines to it and block on the result,
+so clients from openai_clients keep their connections between calls and
+between tasks. Started from worker_process_init, after the prefork.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Coroutine, Optional
+
+from .openai_clients import close_async_openai_clients
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerEventLoop:
+    """One long-lived event loop running in a background thread."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self) -> None:
+        """Start the loop thread (no-op if it is already running)."""
+        with self._lock:
+            if self.is_running:
+                return
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name="worker-event-loop", daemon=True)
+            thread.start()
+            started.wait()
+            self._loop, self._thread = loop, thread
+            logger.info("Worker event loop started")
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and wait for its result.
+
+        Must not be called from the loop's own thread (it would deadlock).
+
+        Raises:
+            RuntimeError: If the loop is not running
+            concurrent.futures.TimeoutError: If the coroutine outlives ``timeout``
+                (it is cancelled)
+        """
+        if not self.is_running:
+            coro.close()
+            raise RuntimeError("Worker event loop is not running")
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float) -> None:
+        """Close shared clients, stop the loop and join its thread."""
+        with self._lock:
+            if not self.is_running:
+                return
+            try:
+                self.run(close_async_openai_clients(), timeout)
+            except Exception as e:
+                logger.warning(f"Failed to close async clients on shutdown: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._loop.close()
+            self._loop, self._thread = None, None
+            logger.info("Worker event loop stopped")
+
+
+# Global instance, started per worker process
+worker_loop = WorkerEventLoop()
@@ -3,6 +3,8 @@ Shared test fixtures for all test modules.
 
 Provides:
 - db_session: SQLite in-memory database session for testing
+- kb_session / kb_session_factory: in-memory database seeded with a user
+  and a knowledge base; add_document / add_chunks fixtures store rows in it
 - Test environment setup (TESTING=true, secrets, etc.)
 - Test state cleanup between tests
 - OpenAI mock fixtures (Critical Fix #1)
@@ -12,6 +14,7 @@ import pytest
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 from typing import Dict, List
 
 # =============================================================================
@@ -62,6 +65,110 @@ def db_session() -> Session:
     engine.dispose()
 
 
+TEST_USER = "testuser"
+TEST_KB_ID = "kb-1"
+
+
+@pytest.fixture
+def kb_session_factory():
+    """
+    Session factory for an in-memory database seeded with user "testuser"
+    and knowledge base "kb-1".
+
+    All sessions share one connection (StaticPool), so code under test may
+    open its own sessions, also from worker threads.
+    """
+    from backend.db_models import Base, DBUser, DBKnowledgeBase
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(DBUser(username=TEST_USER, hashed_password="hash"))
+        session.add(DBKnowledgeBase(id=TEST_KB_ID, name="KB", owner_username=TEST_USER))
+        session.commit()
+
+    yield factory
+
+    engine.dispose()
+
+
+@pytest.fixture
+def kb_session(kb_session_factory) -> Session:
+    """Session on the seeded database of kb_session_factory."""
+    session = kb_session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def add_chunks(kb_session):
+    """
+    Store chunks of a document and commit.
+
+    add_chunks(document_id, texts=None, embeddings=None, kb_id="kb-1", **columns)
+    takes chunk texts and/or one embedding per chunk (texts default to
+    "doc <document_id> chunk <i>"); columns apply to every chunk.
+    Returns the DBDocumentChunk rows.
+    """
+    from backend.db_models import DBDocumentChunk
+
+    def add(document_id, texts=None, embeddings=None, kb_id=TEST_KB_ID, **columns):
+        count = len(texts) if texts is not None else len(embeddings)
+        chunks = [
+            DBDocumentChunk(
+                document_id=document_id,
+                knowledge_base_id=kb_id,
+                chunk_index=i,
+                start_token=i * 10,
+                end_token=i * 10 + 7,
+                content=texts[i] if texts is not None else f"doc {document_id} chunk {i}",
+                embedding=[float(x) for x in embeddings[i]] if embeddings is not None else None,
+                **columns
+            )
+            for i in range(count)
+        ]
+        kb_session.add_all(chunks)
+        kb_session.commit()
+        return chunks
+
+    return add
+
+
+@pytest.fixture
+def add_document(kb_session, add_chunks):
+    """
+    Store a document of "testuser" in "kb-1" (documents.id = doc_id) and commit.
+
+    add_document(doc_id, content=None, chunks=None, embeddings=None, kb_id="kb-1", **columns)
+    - content: also store its vector_documents row
+    - chunks / embeddings: also store chunks, as for add_chunks
+    - columns: other DBDocument columns (owner_username, cluster_id, id, ...)
+    Returns the DBDocument.
+    """
+    from backend.db_models import DBDocument, DBVectorDocument
+
+    def add(doc_id, content=None, chunks=None, embeddings=None, kb_id=TEST_KB_ID, **columns):
+        columns = {
+            "id": doc_id,
+            "owner_username": TEST_USER,
+            "source_type": "text",
+            "content_length": len(content) if content is not None else 10,
+            "skill_level": "beginner",
+            **columns
+        }
+        document = DBDocument(doc_id=doc_id, knowledge_base_id=kb_id, **columns)
+        kb_session.add(document)
+        if content is not None:
+            kb_session.add(DBVectorDocument(doc_id=doc_id, content=content))
+        kb_session.commit()
+        if chunks is not None or embeddings is not None:
+            add_chunks(document.id, chunks, embeddings, kb_id)
+        return document
+
+    return add
+
+
 # =============================================================================
 # State Cleanup
 # =============================================================================
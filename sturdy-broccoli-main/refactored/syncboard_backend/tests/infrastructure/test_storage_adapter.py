@@ -189,6 +189,39 @@ def test_load_rebuilds_vector_store(mock_context, test_db):
     assert 1 in documents["default"]
 
 
+@patch('backend.db_storage_adapter.get_db_context')
+def test_load_builds_vector_index_once(mock_context, test_db):
+    """Test loading hands every vector row to the store in a single bulk call."""
+    user = DBUser(username="testuser", hashed_password="hash")
+    test_db.add(user)
+    cluster = DBCluster(id=1, name="Cluster", primary_concepts=[], skill_level="beginner")
+    test_db.add(cluster)
+    for doc_id in range(3):
+        test_db.add(DBVectorDocument(doc_id=doc_id, content=f"Document {doc_id}"))
+        test_db.add(DBDocument(
+            doc_id=doc_id,
+            owner_username="testuser",
+            cluster_id=1 if doc_id < 2 else None,
+            source_type="text",
+            content_length=10,
+            skill_level="beginner"
+        ))
+    test_db.commit()
+
+    mock_context.return_value.__enter__ = MagicMock(return_value=test_db)
+    mock_context.return_value.__exit__ = MagicMock(return_value=False)
+
+    vs = MagicMock(spec=VectorStore)
+    _, _, clusters, _ = load_storage_from_db(vs)
+
+    vs.add_document.assert_not_called()
+    vs.load_documents.assert_called_once()
+    loaded = list(vs.load_documents.call_args[0][0])
+    assert loaded == [(0, "Document 0"), (1, "Document 1"), (2, "Document 2")]
+    assert sorted(clusters["default"][1].doc_ids) == [0, 1]
+    assert clusters["default"][1].doc_count == 2
+
+
 # =============================================================================
 # DATA CONSISTENCY TESTS
 # =============================================================================
@@ -0,0 +1,250 @@
+"""
+Tests for delta-based cache synchronization.
+
+Covers:
+- Decoding data_changed payloads (structured and legacy)
+- Applying document / cluster / knowledge base deltas to the in-memory cache
+- CacheSynchronizer version tracking, gap catch-up and full-resync fallback
+"""
+
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+from backend.cache_sync import CacheSynchronizer
+from backend.db_storage_adapter import apply_data_change
+from backend.db_models import DBCluster, DBDocument, DBVectorDocument, DBConcept
+from backend.models import DocumentMetadata, Cluster
+from backend.redis_client import parse_data_change
+from backend.vector_store import VectorStore
+
+
+@pytest.fixture
+def test_db(kb_session, add_document):
+    """The seeded test database plus two clustered documents outside any KB."""
+    kb_session.add(DBCluster(id=1, name="Python", primary_concepts=["python"], skill_level="beginner"))
+    kb_session.commit()
+    for doc_id in (0, 1):
+        add_document(doc_id, f"python document {doc_id}", kb_id=None, id=None, cluster_id=1)
+    return kb_session
+
+
+@pytest.fixture
+def db_context(test_db):
+    """Route the adapter's get_db_context to the test session."""
+    with patch('backend.db_storage_adapter.get_db_context') as mock_context:
+        mock_context.return_value.__enter__ = MagicMock(return_value=test_db)
+        mock_context.return_value.__exit__ = MagicMock(return_value=False)
+        yield mock_context
+
+
+@pytest.fixture
+def cache():
+    """In-memory cache already holding the fixture documents."""
+    vs = VectorStore(incremental=True)
+    vs.load_documents([(0, "python document 0"), (1, "python document 1")])
+    documents = {"default": {0: "python document 0", 1: "python document 1"}}
+    metadata = {
+        "default": {
+            doc_id: DocumentMetadata(
+                doc_id=doc_id, owner="testuser", source_type="text", concepts=[],
+                skill_level="beginner", cluster_id=1, knowledge_base_id=None,
+                ingested_at="2025-01-01T00:00:00", content_length=17
+            )
+            for doc_id in (0, 1)
+        }
+    }
+    clusters = {
+        "default": {
+            1: Cluster(id=1, name="Python", doc_ids=[0, 1], primary_concepts=["python"],
+                       skill_level="beginner", doc_count=2)
+        }
+    }
+    return vs, documents, metadata, clusters
+
+
+def change(version, entity, action, ids=None, kb_id=None):
+    return {"version": version, "entity": entity, "action": action, "ids": ids or [], "knowledge_base_id": kb_id}
+
+
+# =============================================================================
+# PAYLOAD DECODING
+# =============================================================================
+
+def test_parse_structured_change():
+    raw = json.dumps(change(3, "document", "added", [5]))
+    assert parse_data_change(raw) == change(3, "document", "added", [5])
+
+
+def test_parse_empty_ids_from_lua():
+    """cjson encodes empty lists as objects; they decode back to []."""
+    raw = '{"version": 2, "entity": "knowledge_base", "action": "deleted", "ids": {}, "knowledge_base_id": "kb"}'
+    assert parse_data_change(raw)["ids"] == []
+
+
+def test_parse_legacy_payload():
+    assert parse_data_change("reload") is None
+    assert parse_data_change(None) is None
+
+
+# =============================================================================
+# APPLYING DELTAS
+# =============================================================================
+
+def test_apply_document_added(db_context, test_db, add_document, cache):
+    vs, documents, metadata, clusters = cache
+    db_doc = add_document(
+        2, "rust ownership guide", kb_id=None, id=None, cluster_id=1, source_type="url",
+        source_url="https://example.com", skill_level="advanced"
+    )
+    test_db.add(DBConcept(document_id=db_doc.id, name="Rust", category="language", confidence=0.9))
+    test_db.commit()
+
+    apply_data_change(change(1, "document", "added", [2]), vs, documents, metadata, clusters)
+
+    assert documents["default"][2] == "rust ownership guide"
+    assert metadata["default"][2].source_url == "https://example.com"
+    assert [c.name for c in metadata["default"][2].concepts] == ["Rust"]
+    assert sorted(clusters["default"][1].doc_ids) == [0, 1, 2]
+    assert vs.search("rust ownership", top_k=1)[0][0] == 2
+
+
+def test_apply_document_deleted(db_context, cache):
+    vs, documents, metadata, clusters = cache
+
+    apply_data_change(change(1, "document", "deleted", [0]), vs, documents, metadata, clusters)
+
+    assert 0 not in documents["default"]
+    assert 0 not in metadata["default"]
+    assert 0 not in vs.docs
+    assert clusters["default"][1].doc_ids == [1]
+    assert clusters["default"][1].doc_count == 1
+    db_context.assert_not_called()
+
+
+def test_apply_document_updated_moves_cluster(db_context, test_db, cache):
+    vs, documents, metadata, clusters = cache
+    test_db.add(DBCluster(id=2, name="Other", primary_concepts=[], skill_level="beginner"))
+    test_db.query(DBDocument).filter_by(doc_id=1).update({"cluster_id": 2})
+    test_db.commit()
+
+    vs.add_document = MagicMock(wraps=vs.add_document)
+    apply_data_change(change(1, "document", "updated", [1]), vs, documents, metadata, clusters)
+
+    assert metadata["default"][1].cluster_id == 2
+    assert clusters["default"][1].doc_ids == [0]
+    assert clusters["default"][2].doc_ids == [1]
+    # Content unchanged, so the vector index is left alone
+    vs.add_document.assert_not_called()
+
+
+def test_apply_update_for_vanished_document_drops_it(db_context, test_db, cache):
+    vs, documents, metadata, clusters = cache
+    test_db.query(DBDocument).filter_by(doc_id=0).delete()
+    test_db.query(DBVectorDocument).filter_by(doc_id=0).delete()
+    test_db.commit()
+
+    apply_data_change(change(1, "document", "updated", [0]), vs, documents, metadata, clusters)
+
+    assert 0 not in metadata["default"]
+    assert clusters["default"][1].doc_ids == [1]
+
+
+def test_apply_cluster_updated_and_deleted(db_context, test_db, cache):
+    vs, documents, metadata, clusters = cache
+    test_db.query(DBCluster).filter_by(id=1).update({"name": "Renamed"})
+    test_db.commit()
+
+    apply_data_change(change(1, "cluster", "updated", [1]), vs, documents, metadata, clusters)
+    assert clusters["default"][1].name == "Renamed"
+
+    test_db.query(DBDocument).update({"cluster_id": None})
+    test_db.query(DBCluster).filter_by(id=1).delete()
+    test_db.commit()
+
+    apply_data_change(change(2, "cluster", "deleted", [1]), vs, documents, metadata, clusters)
+    assert 1 not in clusters["default"]
+
+
+def test_apply_knowledge_base_deleted(db_context, cache):
+    vs, documents, metadata, clusters = cache
+
+    apply_data_change(change(1, "knowledge_base", "deleted", kb_id="default"), vs, documents, metadata, clusters)
+
+    assert "default" not in documents
+    assert "default" not in metadata
+    assert "default" not in clusters
+    assert vs.docs == {}
+
+
+def test_apply_unknown_entity_raises(db_context, cache):
+    with pytest.raises(ValueError):
+        apply_data_change(change(1, "widget", "added", [1]), *cache)
+
+
+# =============================================================================
+# SYNCHRONIZER
+# =============================================================================
+
+@pytest.fixture
+def sync(cache):
+    vs, documents, metadata, clusters = cache
+    synchronizer = CacheSynchronizer(vs, documents, metadata, clusters, full_reload=MagicMock())
+    synchronizer.version = 5
+    return synchronizer
+
+
+@patch('backend.cache_sync.apply_data_change')
+def test_next_version_is_applied(mock_apply, sync):
+    sync.handle_message(json.dumps(change(6, "document", "added", [2])))
+
+    mock_apply.assert_called_once()
+    assert sync.version == 6
+    sync._full_reload.assert_not_called()
+
+
+@patch('backend.cache_sync.apply_data_change')
+def test_stale_version_is_skipped(mock_apply, sync):
+    sync.handle_message(json.dumps(change(5, "document", "added", [2])))
+
+    mock_apply.assert_not_called()
+    assert sync.version == 5
+
+
+@patch('backend.cache_sync.get_data_changes_since')
+@patch('backend.cache_sync.apply_data_change')
+def test_gap_replays_change_log(mock_apply, mock_since, sync):
+    mock_since.return_value = [change(6, "document", "added", [2]), change(7, "cluster", "updated", [1])]
+
+    sync.handle_message(json.dumps(change(7, "cluster", "updated", [1])))
+
+    mock_since.assert_called_once_with(5)
+    assert mock_apply.call_count == 2
+    assert sync.version == 7
+    sync._full_reload.assert_not_called()
+
+
+@patch('backend.cache_sync.get_data_version', return_value=42)
+@patch('backend.cache_sync.get_data_changes_since', return_value=None)
+def test_uncoverable_gap_falls_back_to_full_resync(mock_since, mock_version, sync):
+    sync.handle_message(json.dumps(change(9, "document", "added", [2])))
+
+    sync._full_reload.assert_called_once()
+    assert sync.version == 42
+
+
+@patch('backend.cache_sync.get_data_version', return_value=7)
+def test_legacy_message_triggers_full_resync(mock_version, sync):
+    sync.handle_message("reload")
+
+    sync._full_reload.assert_called_once()
+    assert sync.version == 7
+
+
+@patch('backend.cache_sync.get_data_version', return_value=6)
+@patch('backend.cache_sync.apply_data_change', side_effect=RuntimeError("db down"))
+def test_apply_failure_falls_back_to_full_resync(mock_apply, mock_version, sync):
+    sync.handle_message(json.dumps(change(6, "document", "added", [2])))
+
+    sync._full_reload.assert_called_once()
+    assert sync.version == 6
@@ -0,0 +1,132 @@
+"""
+Tests for the cached chunk embedding index.
+
+Covers:
+- search_chunks_by_embedding results match brute-force cosine similarity
+- Per-document invalidation after chunks are rewritten
+- Picking up chunks added or deleted outside this process
+- Per-document mean embeddings
+- Vectorized EmbeddingService.find_similar
+"""
+
+import asyncio
+import numpy as np
+import pytest
+
+from backend.chunk_embedding_index import get_chunk_index, invalidate_document_chunks
+from backend.chunking_pipeline import search_chunks_by_embedding
+from backend.db_models import DBKnowledgeBase, DBDocumentChunk
+from backend.embedding_service import EmbeddingService
+
+KB_ID = "kb-1"
+DIM = 8
+
+
+@pytest.fixture
+def test_db(kb_session, add_document):
+    """The seeded KB with two documents of random chunk embeddings, plus one in another KB."""
+    kb_session.add(DBKnowledgeBase(id="kb-2", name="Other", owner_username="testuser"))
+    kb_session.commit()
+
+    rng = np.random.default_rng(0)
+    for doc_id in (1, 2):
+        add_document(doc_id, embeddings=rng.normal(size=(10, DIM)))
+    add_document(3, embeddings=rng.normal(size=(5, DIM)), kb_id="kb-2")
+    return kb_session
+
+
+def brute_force(session, query, top_k, min_similarity):
+    results = []
+    for chunk in session.query(DBDocumentChunk).filter_by(knowledge_base_id=KB_ID):
+        vec = np.array(chunk.embedding)
+        similarity = float(vec @ query / (np.linalg.norm(vec) * np.linalg.norm(query)))
+        if similarity >= min_similarity:
+            results.append((chunk.id, similarity))
+    results.sort(key=lambda r: r[1], reverse=True)
+    return results[:top_k]
+
+
+def search(session, query, top_k=5, min_similarity=0.0):
+    return asyncio.run(search_chunks_by_embedding(session, list(query), KB_ID, top_k, min_similarity))
+
+
+def test_search_matches_brute_force(test_db):
+    query = np.random.default_rng(1).normal(size=DIM)
+
+    results = search(test_db, query, top_k=5, min_similarity=0.1)
+    expected = brute_force(test_db, query, 5, 0.1)
+
+    assert [r["chunk_id"] for r in results] == [chunk_id for chunk_id, _ in expected]
+    assert [r["similarity"] for r in results] == pytest.approx([s for _, s in expected], abs=1e-5)
+    assert results[0]["token_count"] == 7
+    assert results[0]["content"].startswith(f"doc {results[0]['document_id']} chunk")
+
+
+def test_search_is_scoped_to_kb_and_skips_bad_queries(test_db):
+    query = np.random.default_rng(2).normal(size=DIM)
+
+    results = search(test_db, query, top_k=100, min_similarity=-1.0)
+
+    assert len(results) == 20
+    assert {r["document_id"] for r in results} == {1, 2}
+    assert search(test_db, np.zeros(DIM)) == []
+    assert search(test_db, np.ones(DIM + 1)) == []
+
+
+def test_rewritten_document_is_invalidated(test_db, add_chunks):
+    query = np.ones(DIM)
+    search(test_db, query)
+
+    # Re-chunk document 1 so one chunk points straight at the query
+    test_db.query(DBDocumentChunk).filter_by(document_id=1).delete()
+    add_chunks(1, embeddings=[np.ones(DIM), -np.ones(DIM)])
+    invalidate_document_chunks(test_db, KB_ID, 1)
+
+    results = search(test_db, query, top_k=3)
+
+    assert results[0]["document_id"] == 1
+    assert results[0]["similarity"] == pytest.approx(1.0)
+    assert len(get_chunk_index(test_db, KB_ID)) == 12
+
+
+def test_external_writes_are_picked_up_on_sync(test_db, add_chunks):
+    index = get_chunk_index(test_db, KB_ID)
+    search(test_db, np.ones(DIM))
+    version = index.version
+
+    test_db.query(DBDocumentChunk).filter_by(document_id=2).delete()
+    add_chunks(1, embeddings=[np.ones(DIM)])
+    index.sync(test_db, force=True)
+
+    assert index.version == version + 1
+    assert len(index) == 11
+    hits = index.search(test_db, list(np.ones(DIM)), top_k=50, min_similarity=-1.0)
+    assert {document_id for _, document_id, _ in hits} == {1}
+
+
+
+def test_document_embeddings_are_normalised_means(test_db):
+    index = get_chunk_index(test_db, KB_ID)
+
+    embeddings = index.document_embeddings(test_db)
+
+    assert set(embeddings) == {1, 2}
+    for document_id, embedding in embeddings.items():
+        chunks = test_db.query(DBDocumentChunk.embedding).filter_by(document_id=document_id)
+        rows = np.array([row.embedding for row in chunks])
+        mean = (rows / np.linalg.norm(rows, axis=1, keepdims=True)).sum(axis=0)
+        assert embedding == pytest.approx(mean / np.linalg.norm(mean), abs=1e-5)
+    assert set(index.document_embeddings(test_db, [2, 3])) == {2}
+    assert index.document_embeddings(test_db, []) == {}
+
+
+def test_find_similar_vectorized():
+    service = EmbeddingService.__new__(EmbeddingService)
+    embeddings = [(1, [1.0, 0.0]), (2, None), (3, [0.0, 0.0]), (4, [1.0, 1.0]), (5, [-1.0, 0.0]), (6, [2.0, 0.0])]
+
+    results = service.find_similar([1.0, 0.0], embeddings, top_k=3, threshold=0.0)
+
+    assert [doc_id for doc_id, _ in results] == [1, 6, 4]
+    assert results[2][1] == pytest.approx(np.sqrt(0.5))
+    assert service.find_similar([0.0, 0.0], embeddings) == []
+    assert service.find_similar([1.0, 0.0], embeddings, threshold=0.9) == [(1, pytest.approx(1.0)), (6, pytest.approx(1.0))]
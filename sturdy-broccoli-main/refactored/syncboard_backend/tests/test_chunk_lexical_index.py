@@ -0,0 +1,144 @@
+"""
+Tests for the cached BM25 chunk index used by hybrid RAG search.
+
+Covers:
+- BM25 scores match a from-scratch computation
+- Per-document invalidation after chunks are rewritten
+- Picking up chunks added or deleted outside this process
+- HybridSearcher fetches lexical-only hits in a single query
+- search_many runs every query variant with one vector search
+"""
+
+import asyncio
+import math
+from collections import Counter
+
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sqlalchemy import event
+from unittest.mock import patch
+
+from backend.chunk_lexical_index import get_lexical_index, invalidate_lexical_chunks
+from backend.db_models import DBKnowledgeBase, DBDocumentChunk
+from backend.enhanced_rag import HybridSearcher
+
+KB_ID = "kb-1"
+
+TEXTS = {
+    1: ["kubernetes deployment with helm charts", "docker images and container registries"],
+    2: ["python asyncio event loops", "kubernetes pods restart when the deployment changes"],
+}
+
+
+@pytest.fixture
+def test_db(kb_session, add_document):
+    kb_session.add(DBKnowledgeBase(id="kb-2", name="Other", owner_username="testuser"))
+    kb_session.commit()
+
+    for doc_id, texts in TEXTS.items():
+        add_document(doc_id, chunks=texts)
+    add_document(3, chunks=["kubernetes in another knowledge base"], kb_id="kb-2")
+    return kb_session
+
+
+def brute_force_bm25(session, query, k1=1.5, b=0.75):
+    analyze = CountVectorizer(ngram_range=(1, 2), stop_words='english').build_analyzer()
+    chunks = session.query(DBDocumentChunk).filter_by(knowledge_base_id=KB_ID).all()
+    terms = {c.id: Counter(analyze(c.content)) for c in chunks}
+    avg_length = sum(sum(t.values()) for t in terms.values()) / len(terms)
+    scores = {}
+    for term in set(analyze(query)):
+        df = sum(1 for t in terms.values() if term in t)
+        if not df:
+            continue
+        idf = math.log(1 + (len(terms) - df + 0.5) / (df + 0.5))
+        for chunk_id, t in terms.items():
+            if term in t:
+                length = sum(t.values())
+                tf = t[term]
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (k1 + 1) / (
+                    tf + k1 * (1 - b + b * length / avg_length)
+                )
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def search(session, query, top_k=10):
+    return [(chunk_id, score) for chunk_id, _, score in get_lexical_index(session, KB_ID).search(session, query, top_k)]
+
+
+def test_search_matches_brute_force(test_db):
+    for query in ["kubernetes deployment", "docker", "event loops in python", "nothing relevant"]:
+        expected = brute_force_bm25(test_db, query)
+        actual = search(test_db, query)
+        assert [c for c, _ in actual] == [c for c, _ in expected]
+        assert [s for _, s in actual] == pytest.approx([s for _, s in expected])
+
+    # Other knowledge bases are never returned
+    kb2_chunk = test_db.query(DBDocumentChunk).filter_by(knowledge_base_id="kb-2").one()
+    assert kb2_chunk.id not in dict(search(test_db, "kubernetes"))
+
+
+def test_rewritten_document_is_reindexed(test_db, add_chunks):
+    search(test_db, "docker")  # load the index
+
+    test_db.query(DBDocumentChunk).filter_by(document_id=1).delete()
+    add_chunks(1, ["terraform modules for cloud networking"])
+    invalidate_lexical_chunks(test_db, KB_ID, 1)
+
+    assert search(test_db, "docker") == []
+    new_chunk = test_db.query(DBDocumentChunk).filter_by(document_id=1).one()
+    assert [c for c, _ in search(test_db, "terraform")] == [new_chunk.id]
+    assert search(test_db, "kubernetes") == brute_force_bm25(test_db, "kubernetes")
+
+
+def test_external_changes_are_picked_up(test_db, add_chunks):
+    index = get_lexical_index(test_db, KB_ID)
+    index.sync_interval = 0
+    search(test_db, "docker")
+
+    add_chunks(2, ["docker compose for local development"])
+    assert len(search(test_db, "docker")) == 2
+
+    test_db.query(DBDocumentChunk).filter(DBDocumentChunk.content.like("docker images%")).delete(
+        synchronize_session=False
+    )
+    test_db.commit()
+    assert search(test_db, "docker") == brute_force_bm25(test_db, "docker")
+    assert len(index) == 4
+
+
+def test_hybrid_search_fetches_lexical_hits_in_one_query(test_db):
+    searcher = HybridSearcher(test_db)
+    get_lexical_index(test_db, KB_ID).sync(test_db)
+
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        with patch.object(searcher, "_vector_search_many", return_value=[[]]):
+            results = asyncio.run(searcher.search("kubernetes deployment", [0.0], KB_ID, top_k=5))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert {r.document_id for r in results} == {1, 2}
+    assert results[0].tfidf_score == 1.0
+    assert all(r.content for r in results)
+
+
+def test_search_many_runs_all_variants_together(test_db):
+    searcher = HybridSearcher(test_db)
+    vector_hits = [[], [(1, 1, "kubernetes deployment with helm charts", 0.9)]]
+
+    with patch.object(searcher, "_vector_search_many", return_value=vector_hits) as vector_search:
+        results = asyncio.run(searcher.search_many(
+            ["docker", "python asyncio"], [[0.1], [0.2]], KB_ID, top_k=5
+        ))
+
+    vector_search.assert_called_once_with([[0.1], [0.2]], KB_ID, 10, 0.3)
+    assert len(results) == 2
+    assert [r.content for r in results[0]] == ["docker images and container registries"]
+    assert [r.chunk_id for r in results[1]][0] == 1
+    assert results[1][0].embedding_score == 1.0
+    assert {r.document_id for r in results[1]} == {1, 2}
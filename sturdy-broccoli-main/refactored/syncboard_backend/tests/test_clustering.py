@@ -9,11 +9,17 @@ Tests cover:
 - Threshold boundary conditions
 - Edge cases (empty concepts, no clusters, etc.)
 - Cluster name matching boost
+- Cached concept signatures agree with plain set arithmetic
 """
 
+import asyncio
+import random
+from unittest.mock import patch
+
 import pytest
 from backend.clustering import ImprovedClusteringEngine
 from backend.models import Cluster
+from backend.semantic_dictionary import SEED_SYNONYMS, SemanticDictionaryManager
 
 
 # =============================================================================
@@ -806,5 +812,99 @@ def test_clustering_very_long_concept_names():
     assert result == 0
 
 
+
+# =============================================================================
+# CONCEPT SIGNATURE TESTS
+# =============================================================================
+
+def reference_similarity(engine, concepts_a, concepts_b):
+    """Jaccard similarity of the expanded concept sets, computed directly."""
+    a = engine.semantic_dict.expand_concepts(concepts_a)
+    b = engine.semantic_dict.expand_concepts(concepts_b)
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def random_clusters(rng, count):
+    vocabulary = sorted(SEED_SYNONYMS) + [f"topic{i}" for i in range(40)]
+    return {
+        cluster_id: Cluster(
+            id=cluster_id, name=rng.choice(vocabulary).title(), doc_ids=[cluster_id],
+            primary_concepts=rng.sample(vocabulary, rng.randint(0, 6)), skill_level="beginner", doc_count=1
+        )
+        for cluster_id in rng.sample(range(1000), count)
+    }, vocabulary
+
+
+def test_signatures_match_set_arithmetic():
+    """Vectorized matching and knowledge areas agree with the per-cluster set computation."""
+    engine = ImprovedClusteringEngine()
+    engine.similarity_threshold = 0.2
+    rng = random.Random(7)
+    clusters, vocabulary = random_clusters(rng, 300)
+
+    for _ in range(50):
+        doc_concepts = [{"name": name.upper()} for name in rng.sample(vocabulary, rng.randint(1, 5))]
+        suggested = rng.choice(vocabulary)
+        best_id, best_score = None, 0.0
+        for cluster_id, cluster in clusters.items():
+            score = reference_similarity(engine, [c["name"] for c in doc_concepts], cluster.primary_concepts)
+            if engine.semantic_dict.expand_concepts([suggested]) & engine.semantic_dict.expand_concepts([cluster.name]):
+                score += engine.synonym_boost
+            if score > best_score:
+                best_id, best_score = cluster_id, score
+        expected = best_id if best_score >= engine.similarity_threshold else None
+
+        assert engine.find_best_cluster(doc_concepts, suggested, clusters) == expected
+
+    expected_areas, processed = [], set()
+    for cluster_id, cluster in clusters.items():
+        if cluster_id in processed:
+            continue
+        related = [cluster_id] + [
+            other_id for other_id, other in clusters.items()
+            if other_id != cluster_id and other_id not in processed
+            and reference_similarity(engine, cluster.primary_concepts, other.primary_concepts) >= 0.3
+        ]
+        processed.update(related)
+        expected_areas.append(related)
+
+    assert [area["related_clusters"] for area in engine.detect_knowledge_areas(clusters)] == expected_areas
+
+
+def test_only_changed_clusters_are_reexpanded():
+    """Cluster signatures are cached and refreshed when a cluster's concepts change."""
+    engine = ImprovedClusteringEngine()
+    clusters = {
+        1: Cluster(id=1, name="Python", doc_ids=[1], primary_concepts=["python", "django"], skill_level="beginner", doc_count=1),
+        2: Cluster(id=2, name="Databases", doc_ids=[2], primary_concepts=["postgres"], skill_level="beginner", doc_count=1),
+    }
+    doc_concepts = [{"name": "Postgres"}, {"name": "SQL"}]
+    assert engine.find_best_cluster(doc_concepts, "Storage", clusters) == 2
+
+    with patch.object(engine.semantic_dict, "expand_concepts", wraps=engine.semantic_dict.expand_concepts) as expand:
+        assert engine.find_best_cluster(doc_concepts, "Storage", clusters) == 2
+        assert expand.call_count == 0
+
+        clusters[1].primary_concepts.extend(["postgres", "sql"])
+        clusters[2].primary_concepts = ["redis"]
+        assert engine.find_best_cluster(doc_concepts, "Storage", clusters) == 1
+        # Both clusters are re-encoded, but only "redis" has not been expanded before
+        assert [call.args[0] for call in expand.call_args_list] == [["redis"]]
+
+
+def test_learned_synonyms_invalidate_signatures(tmp_path):
+    """A synonym learned after clusters were encoded is used for the next match."""
+    engine = ImprovedClusteringEngine(SemanticDictionaryManager(persistence_path=str(tmp_path / "synonyms.json")))
+    clusters = {
+        1: Cluster(id=1, name="Notes", doc_ids=[1], primary_concepts=["zettelkasten"], skill_level="beginner", doc_count=1),
+    }
+    doc_concepts = [{"name": "slipbox"}]
+    assert engine.find_best_cluster(doc_concepts, "Misc", clusters) is None
+
+    asyncio.run(engine.semantic_dict._add_learned_synonym("slipbox", "zettelkasten"))
+
+    assert engine.find_best_cluster(doc_concepts, "Misc", clusters) == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -15,7 +15,7 @@ Tests cover:
 import pytest
 import asyncio
 from datetime import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import IntegrityError
 
@@ -134,6 +134,70 @@ def test_repository_loads_existing_documents(db_session):
     assert 1 in repo.vector_store.docs
 
 
+def test_repository_init_does_not_scan_vector_table(db_session):
+    """Test building a repository defers loading to the shared index."""
+    db_session.add(DBVectorDocument(doc_id=0, content="Python programming"))
+    db_session.commit()
+
+    statements = []
+    engine = db_session.get_bind()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    DatabaseKnowledgeBankRepository(db_session=db_session)
+    event.remove(engine, "before_cursor_execute", record)
+
+    assert not any("vector_documents" in s for s in statements)
+
+
+def test_repositories_share_one_index(db_session):
+    """Test repositories on the same engine reuse one loaded index."""
+    db_session.add(DBVectorDocument(doc_id=0, content="Python programming"))
+    db_session.commit()
+
+    repo1 = DatabaseKnowledgeBankRepository(db_session=db_session)
+    repo2 = DatabaseKnowledgeBankRepository(db_session=db_session)
+
+    assert repo1.vector_store is repo2.vector_store
+    assert 0 in repo2.vector_store.docs
+
+
+@pytest.mark.asyncio
+async def test_shared_index_tracks_repository_writes(db_session, sample_metadata):
+    """Test adds and deletes through one repository are visible to others."""
+    repo1 = DatabaseKnowledgeBankRepository(db_session=db_session)
+    repo2 = DatabaseKnowledgeBankRepository(db_session=db_session)
+
+    doc_id = await repo1.add_document("Rust ownership and borrowing", sample_metadata)
+    assert doc_id in repo2.vector_store.docs
+    assert (await repo2.search_documents("rust borrowing", top_k=1))[0][0] == doc_id
+
+    await repo2.delete_document(doc_id)
+    assert doc_id not in repo1.vector_store.docs
+
+
+def test_shared_index_picks_up_external_changes(db_session):
+    """Test rows written outside the repository are synced incrementally."""
+    db_session.add(DBVectorDocument(doc_id=0, content="Python programming"))
+    db_session.add(DBVectorDocument(doc_id=1, content="JavaScript development"))
+    db_session.commit()
+
+    repo = DatabaseKnowledgeBankRepository(db_session=db_session)
+    version = repo._index.version
+    assert set(repo.vector_store.docs) == {0, 1}
+
+    db_session.query(DBVectorDocument).filter_by(doc_id=0).delete()
+    db_session.add(DBVectorDocument(doc_id=5, content="Go concurrency"))
+    db_session.commit()
+
+    repo._index.sync(db_session, force=True)
+
+    assert set(repo.vector_store.docs) == {1, 5}
+    assert repo._index.version > version
+
+
 # =============================================================================
 # DOCUMENT OPERATIONS
 # =============================================================================
@@ -183,6 +247,43 @@ async def test_add_multiple_documents(repository, sample_metadata):
     assert repository.db.query(DBVectorDocument).count() == 2
 
 
+@pytest.mark.asyncio
+async def test_add_documents_batch_shares_new_cluster(repository, sample_metadata):
+    """Documents saved together follow a memory-only cluster to its database ID."""
+    from backend.dependencies import get_kb_clusters
+
+    kb_clusters = get_kb_clusters(None)
+    kb_clusters[999] = Cluster(
+        id=999, name="Fresh", primary_concepts=["fresh"], doc_ids=[], skill_level="beginner"
+    )
+    try:
+        first = sample_metadata.model_copy(update={"cluster_id": 999})
+        second = sample_metadata.model_copy(update={"cluster_id": 999})
+
+        doc_ids = await repository.add_documents([("Python one", first), ("Python two", second)])
+
+        assert doc_ids == [0, 1]
+        db_cluster = repository.db.query(DBCluster).filter_by(name="Fresh").one()
+        assert first.cluster_id == second.cluster_id == db_cluster.id
+        assert {d.cluster_id for d in repository.db.query(DBDocument).all()} == {db_cluster.id}
+        assert set(doc_ids) <= set(repository.vector_store.docs)
+    finally:
+        kb_clusters.clear()
+
+
+@pytest.mark.asyncio
+async def test_add_documents_batch_is_all_or_nothing(repository, sample_metadata):
+    """A failing document rolls back the whole batch and its index reservations."""
+    orphan = sample_metadata.model_copy(update={"owner": "nobody"})
+
+    with pytest.raises(IntegrityError):
+        await repository.add_documents([("Python one", sample_metadata), ("Python two", orphan)])
+
+    assert repository.db.query(DBDocument).count() == 0
+    assert repository.db.query(DBVectorDocument).count() == 0
+    assert len(repository.vector_store.docs) == 0
+
+
 @pytest.mark.asyncio
 async def test_get_document(repository, sample_metadata):
     """Test retrieving document content."""
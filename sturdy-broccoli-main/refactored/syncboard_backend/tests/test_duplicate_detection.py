@@ -11,11 +11,22 @@ Tests duplicate detection functionality including:
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
 
 from backend.duplicate_detection import DuplicateDetector
-from backend.db_models import DBDocument, DBVectorDocument
+from backend.duplicate_index import get_duplicate_index
+from backend.db_models import Base, DBUser, DBDocument, DBVectorDocument
 from backend.vector_store import VectorStore
 
+TUTORIAL = (
+    "Python programming tutorial for beginners. Variables hold values, functions group "
+    "statements, and loops repeat work. Lists and dictionaries store collections, and "
+    "modules organise code into files you can import. Exceptions report errors, classes "
+    "bundle data with behaviour, and the standard library covers files, dates and networking. "
+    "Practice by writing small scripts, reading error messages carefully and testing often."
+)
+
 
 @pytest.fixture
 def mock_db_session():
@@ -98,34 +109,63 @@ def sample_vector_documents():
     }
 
 
+@pytest.fixture
+def sqlite_db():
+    """Real database with near-duplicate, unrelated and other-user documents."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        DBUser(username="testuser", hashed_password="hash"),
+        DBUser(username="otheruser", hashed_password="hash"),
+    ])
+    documents = [
+        (101, "testuser", "text", TUTORIAL),
+        (102, "testuser", "text", TUTORIAL + " Examples included."),
+        (103, "testuser", "url", "WEB ARTICLE: JavaScript patterns\nAdvanced JavaScript frameworks and design patterns"),
+        (104, "otheruser", "text", TUTORIAL),
+    ]
+    for doc_id, owner, source_type, content in documents:
+        session.add(DBDocument(
+            doc_id=doc_id, owner_username=owner, source_type=source_type,
+            content_length=len(content), skill_level="beginner"
+        ))
+        session.add(DBVectorDocument(doc_id=doc_id, content=content))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
 class TestFindDuplicates:
     """Test suite for finding duplicate documents."""
 
-    def test_find_duplicates_basic(self, duplicate_detector, mock_db_session, mock_vector_store, sample_documents, sample_vector_documents):
+    def test_find_duplicates_basic(self, sqlite_db, mock_vector_store):
         """Test basic duplicate detection functionality."""
-        # Setup - create separate mocks for different query chains
-        mock_filter_result = Mock()
-        mock_filter_result.all.return_value = sample_documents
-        mock_db_session.query.return_value.filter.return_value = mock_filter_result
-
-        # Mock vector store to return high similarity for doc 101 and 102
-        def mock_search(doc_id, top_k):
-            if doc_id == 101:
-                return [(102, 0.92), (103, 0.15)]  # High similarity with 102
-            elif doc_id == 102:
-                return [(101, 0.92), (103, 0.15)]
-            else:
-                return [(101, 0.15), (102, 0.15)]
-
-        mock_vector_store.search_by_doc_id.side_effect = mock_search
-
-        # Execute
-        result = duplicate_detector.find_duplicates(username="testuser", similarity_threshold=0.85)
-
-        # Verify
-        assert "duplicate_groups" in result
-        assert "total_duplicates_found" in result
-        assert result["total_duplicates_found"] >= 0
+        detector = DuplicateDetector(sqlite_db, mock_vector_store)
+
+        statements = []
+        engine = sqlite_db.get_bind()
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        get_duplicate_index(sqlite_db).sync(sqlite_db)  # Loaded once per process
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            result = detector.find_duplicates(username="testuser", similarity_threshold=0.85)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        # Only the user's near-duplicate pair is grouped; 104 belongs to another user
+        assert result["total_duplicates_found"] == 1
+        group, = result["duplicate_groups"]
+        assert group["primary_doc"]["doc_id"] == 101
+        assert group["primary_doc"]["source_type"] == "text"
+        assert [d["doc_id"] for d in group["duplicates"]] == [102]
+        assert 0.85 <= group["duplicates"][0]["similarity"] < 1.0
+        assert group["group_size"] == 2
+
+        # Documents, then one batched content fetch; never a per-document scan
+        assert len(statements) == 2
+        mock_vector_store.search_by_doc_id.assert_not_called()
 
     def test_find_duplicates_no_results(self, duplicate_detector, mock_db_session, mock_vector_store):
         """Test finding duplicates when none exist."""
@@ -139,46 +179,46 @@ class TestFindDuplicates:
         assert result["duplicate_groups"] == []
         assert result["total_duplicates_found"] == 0
 
-    def test_find_duplicates_high_threshold(self, duplicate_detector, mock_db_session, mock_vector_store, sample_documents):
+    def test_find_duplicates_high_threshold(self, sqlite_db, mock_vector_store):
         """Test with very high similarity threshold (99%)."""
-        # Setup
-        mock_db_session.query.return_value.filter.return_value.all.return_value = sample_documents
-        mock_vector_store.search_by_doc_id.return_value = [(102, 0.95), (103, 0.20)]
+        detector = DuplicateDetector(sqlite_db, mock_vector_store)
 
-        # Execute
-        result = duplicate_detector.find_duplicates(username="testuser", similarity_threshold=0.99)
+        result = detector.find_duplicates(username="testuser", similarity_threshold=0.99)
 
-        # Verify - should find fewer duplicates with higher threshold
-        assert "duplicate_groups" in result
+        # The pair is similar but not 99% similar
+        assert result["duplicate_groups"] == []
+        assert result["total_duplicates_found"] == 0
 
-    def test_find_duplicates_low_threshold(self, duplicate_detector, mock_db_session, mock_vector_store, sample_documents, sample_vector_documents):
+    def test_find_duplicates_low_threshold(self, sqlite_db, mock_vector_store):
         """Test with low similarity threshold (50%)."""
-        # Setup - Mock different query results for DBDocument vs DBVectorDocument
-        def mock_query(model):
-            mock_result = Mock()
-            if model == DBDocument:
-                mock_result.filter.return_value.all.return_value = sample_documents
-            else:  # DBVectorDocument
-                def mock_filter(condition):
-                    mock_filter_result = Mock()
-                    # Return vector documents based on doc_id
-                    def mock_first():
-                        # Extract doc_id from the condition (this is a simplified approach)
-                        # In reality, we just return a vector document with content
-                        return DBVectorDocument(doc_id=101, content="Sample content for testing")
-                    mock_filter_result.first = mock_first
-                    return mock_filter_result
-                mock_result.filter = mock_filter
-            return mock_result
+        detector = DuplicateDetector(sqlite_db, mock_vector_store)
 
-        mock_db_session.query.side_effect = mock_query
-        mock_vector_store.search_by_doc_id.return_value = [(102, 0.55), (103, 0.52)]
+        result = detector.find_duplicates(username="testuser", similarity_threshold=0.50)
 
-        # Execute
-        result = duplicate_detector.find_duplicates(username="testuser", similarity_threshold=0.50)
+        # Unrelated documents still never match
+        assert result["total_duplicates_found"] == 1
+        assert {d["doc_id"] for d in result["duplicate_groups"][0]["duplicates"]} == {102}
 
-        # Verify - should find more duplicates with lower threshold
-        assert "duplicate_groups" in result
+    def test_find_duplicates_sees_new_documents(self, sqlite_db, mock_vector_store):
+        """Documents added after the index was loaded are found too."""
+        detector = DuplicateDetector(sqlite_db, mock_vector_store)
+        detector.find_duplicates(username="testuser")
+
+        content = "WEB ARTICLE: JavaScript patterns\nAdvanced JavaScript frameworks and design patterns!"
+        sqlite_db.add(DBDocument(
+            doc_id=105, owner_username="testuser", source_type="url",
+            content_length=len(content), skill_level="advanced"
+        ))
+        sqlite_db.add(DBVectorDocument(doc_id=105, content=content))
+        sqlite_db.commit()
+        get_duplicate_index(sqlite_db).sync(sqlite_db, force=True)
+
+        result = detector.find_duplicates(username="testuser")
+
+        assert result["total_duplicates_found"] == 2
+        article_group = next(g for g in result["duplicate_groups"] if g["primary_doc"]["doc_id"] == 103)
+        assert article_group["primary_doc"]["title"] == "JavaScript patterns"
+        assert article_group["duplicates"][0]["similarity"] == 1.0
 
 
 class TestCompareTwoDocuments:
@@ -467,42 +507,26 @@ class TestEdgeCases:
 class TestIntegration:
     """Integration tests for complete workflows."""
 
-    def test_find_and_merge_workflow(self, duplicate_detector, mock_db_session, mock_vector_store, sample_documents, sample_vector_documents):
+    def test_find_and_merge_workflow(self, sqlite_db, mock_vector_store):
         """Test complete workflow: find duplicates then merge them."""
-        # Step 1: Find duplicates
-        mock_filter_result = Mock()
-        mock_filter_result.all.return_value = sample_documents
-        mock_db_session.query.return_value.filter.return_value = mock_filter_result
-        mock_vector_store.search_by_doc_id.return_value = [(102, 0.92)]
+        detector = DuplicateDetector(sqlite_db, mock_vector_store)
 
-        find_result = duplicate_detector.find_duplicates("testuser", 0.85)
+        # Step 1: Find duplicates
+        find_result = detector.find_duplicates("testuser", 0.85)
 
         # Verify duplicates found
-        assert "duplicate_groups" in find_result
+        group, = find_result["duplicate_groups"]
+        keep_id = group["primary_doc"]["doc_id"]
+        delete_ids = [d["doc_id"] for d in group["duplicates"]]
 
         # Step 2: Merge duplicates
-        keep_doc = Mock()
-        keep_doc.id = 1
-        keep_doc.doc_id = 101
-        keep_doc.owner_username = "testuser"
-
-        delete_doc = Mock()
-        delete_doc.id = 2
-        delete_doc.doc_id = 102
-        delete_doc.owner_username = "testuser"
-
-        # Setup new mock for merge operation
-        # Need: verify keep, verify delete, get vector_doc
-        mock_filter_for_merge = Mock()
-        mock_filter_for_merge.first.side_effect = [keep_doc, delete_doc, Mock()]
-        mock_filter_for_merge.all.return_value = []
-        mock_db_session.query.return_value.filter.return_value = mock_filter_for_merge
-
-        merge_result = duplicate_detector.merge_duplicates(101, [102], "testuser")
+        merge_result = detector.merge_duplicates(keep_id, delete_ids, "testuser")
 
         # Verify merge successful
         assert merge_result["status"] == "merged"
         assert merge_result["kept_doc_id"] == 101
+        assert 102 not in get_duplicate_index(sqlite_db)
+        assert detector.find_duplicates("testuser", 0.85)["duplicate_groups"] == []
 
     def test_compare_before_merge_workflow(self, duplicate_detector, mock_db_session, mock_vector_store, sample_vector_documents):
         """Test workflow: compare documents before merging."""
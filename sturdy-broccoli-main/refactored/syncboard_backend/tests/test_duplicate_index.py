@@ -0,0 +1,172 @@
+"""
+Tests for the MinHash/LSH near-duplicate index.
+
+Covers:
+- Signature estimates track exact shingle Jaccard similarity
+- Near-duplicates share LSH buckets; unrelated documents do not
+- Pairs at the lowest accepted threshold are still found
+- Lookups of a new text are scoped by owner / knowledge base
+- Exact duplicates are found by content hash, near-duplicates by sketch
+- Repository writes and external changes keep the index current
+"""
+
+import random
+
+import pytest
+
+from backend.constants import DUPLICATE_MIN_THRESHOLD
+from backend.db_models import DBUser, DBVectorDocument
+from backend.db_repository import DatabaseKnowledgeBankRepository
+from backend.duplicate_index import (
+    DuplicateIndex,
+    DuplicateMatch,
+    get_duplicate_index,
+    jaccard,
+    minhash_signature,
+    shingles,
+)
+from backend.models import DocumentMetadata
+
+WORDS = [f"word{i}" for i in range(2000)]
+
+
+def random_text(rng, length=300):
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def edited(rng, text, changes):
+    words = text.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+@pytest.fixture
+def test_db(kb_session):
+    kb_session.add(DBUser(username="alice", hashed_password="hash"))
+    kb_session.add(DBUser(username="bob", hashed_password="hash"))
+    kb_session.commit()
+    return kb_session
+
+
+def test_signature_estimates_jaccard():
+    rng = random.Random(1)
+    base = random_text(rng)
+    for changes in [0, 5, 20, 60]:
+        a, b = shingles(base), shingles(edited(rng, base, changes))
+        estimate = (minhash_signature(a) == minhash_signature(b)).mean()
+        assert estimate == pytest.approx(jaccard(a, b), abs=0.15)
+
+
+def test_near_duplicates_share_buckets(test_db, add_document):
+    rng = random.Random(2)
+    originals = [random_text(rng) for _ in range(200)]
+    for doc_id, text in enumerate(originals, start=1):
+        add_document(doc_id, text, owner_username="alice")
+    add_document(1001, edited(rng, originals[0], 3), owner_username="alice")
+    add_document(1002, edited(rng, originals[1], 3), owner_username="alice")
+
+    index = get_duplicate_index(test_db)
+    index.sync(test_db)
+
+    pairs = index.candidate_pairs(range(1, 1003))
+    assert {(1, 1001), (2, 1002)} <= pairs
+    assert len(pairs) < 10  # unrelated documents are (almost) never paired
+    assert index.candidate_pairs(range(2, 1001)) & {(1, 1001), (2, 1002)} == set()
+
+
+def test_pairs_at_the_minimum_threshold_become_candidates(test_db, add_document):
+    rng = random.Random(7)
+    similarities = []
+    for pair in range(100):
+        text = random_text(rng)
+        near = edited(rng, text, 40)
+        similarities.append(jaccard(shingles(text), shingles(near)))
+        add_document(2 * pair + 1, text, owner_username="alice")
+        add_document(2 * pair + 2, near, owner_username="alice")
+
+    index = get_duplicate_index(test_db)
+    index.sync(test_db)
+    pairs = index.candidate_pairs(range(1, 201))
+
+    assert sum(similarities) / len(similarities) == pytest.approx(DUPLICATE_MIN_THRESHOLD, abs=0.05)
+    assert sum((2 * pair + 1, 2 * pair + 2) in pairs for pair in range(100)) >= 80
+
+
+def test_find_similar_is_scoped(test_db, add_document):
+    rng = random.Random(3)
+    text = random_text(rng)
+    add_document(1, text, owner_username="alice")
+    add_document(2, text, owner_username="bob")
+    add_document(3, random_text(rng), owner_username="alice")
+    index = get_duplicate_index(test_db)
+
+    upload = edited(rng, text, 2)
+    assert [doc_id for doc_id, _ in index.find_similar(test_db, upload, 0.8)] in ([1, 2], [2, 1])
+    matches = index.find_similar(test_db, upload, 0.8, owner="alice")
+    assert [doc_id for doc_id, _ in matches] == [1]
+    assert matches[0][1] > 0.8
+    assert index.find_similar(test_db, upload, 0.8, owner="alice", knowledge_base_id="kb-b") == []
+    assert index.find_similar(test_db, "", 0.0) == []
+
+
+def test_find_duplicate_prefers_exact_matches(test_db, add_document):
+    rng = random.Random(6)
+    text = random_text(rng)
+    add_document(1, edited(rng, text, 1), owner_username="alice")
+    add_document(2, text, owner_username="alice")
+    add_document(3, text, owner_username="bob", kb_id=None)
+    index = get_duplicate_index(test_db)
+
+    assert index.find_duplicate(test_db, text, "kb-1") == DuplicateMatch(2, 1.0, True)
+    assert index.find_duplicate(test_db, text, None) == DuplicateMatch(3, 1.0, True)
+    assert index.find_duplicate(test_db, text, "kb-b", min_similarity=0.5) is None
+
+    near = index.find_duplicate(test_db, edited(rng, text, 2), "kb-1", min_similarity=0.8)
+    assert near.doc_id in (1, 2) and not near.exact and near.similarity < 1.0
+    assert index.find_duplicate(test_db, edited(rng, text, 2), "kb-1") is None  # exact only
+    assert index.find_duplicate(test_db, "", "kb-1", min_similarity=0.0) is None
+
+    index.remove(2)
+    assert index.find_duplicate(test_db, text, "kb-1") is None
+
+
+@pytest.mark.asyncio
+async def test_repository_writes_update_loaded_index(test_db):
+    rng = random.Random(4)
+    text = random_text(rng)
+    index = get_duplicate_index(test_db)
+    index.sync(test_db)
+    repo = DatabaseKnowledgeBankRepository(test_db)
+
+    doc_id = await repo.add_document(text, DocumentMetadata(
+        doc_id=0, owner="alice", cluster_id=None, knowledge_base_id="kb-1", source_type="text",
+        content_length=len(text), ingested_at="2024-01-01T00:00:00", skill_level="beginner"
+    ))
+    assert doc_id in index
+    assert index.find_similar(test_db, text, 0.99)[0][0] == doc_id
+    version = index.version
+    index.sync(test_db, force=True)
+    assert index.version == version  # the watermark already covers it
+
+    await repo.delete_document(doc_id)
+    assert doc_id not in index
+    assert index.find_similar(test_db, text, 0.5) == []
+
+
+def test_external_changes_are_picked_up(test_db, add_document):
+    rng = random.Random(5)
+    index = DuplicateIndex(sync_interval=0)
+    add_document(1, random_text(rng), owner_username="alice")
+    add_document(2, "", owner_username="alice")
+    index.sync(test_db)
+    assert len(index) == 2
+
+    text = random_text(rng)
+    add_document(3, text, owner_username="alice")
+    assert index.find_similar(test_db, text, 0.99)[0][0] == 3
+
+    test_db.query(DBVectorDocument).filter_by(doc_id=1).delete()
+    test_db.commit()
+    index.sync(test_db)
+    assert 1 not in index and len(index) == 2
@@ -0,0 +1,123 @@
+"""
+Tests for the ingest-time duplicate check.
+
+Covers:
+- Identical uploads reuse the existing document; near-identical ones only
+  with a threshold below 1.0 (the default keeps their edits)
+- The "reject" and "allow" policies
+- ZIP documents already in the KB skip concept extraction
+"""
+
+import asyncio
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from backend import tasks
+from backend.db_models import DBKnowledgeBase, DBDocument
+from backend.db_repository import DatabaseKnowledgeBankRepository
+from backend.dependencies import get_kb_documents, get_kb_metadata, get_kb_clusters
+from backend.exceptions import DuplicateDocumentError
+from backend.models import Concept, DocumentMetadata
+
+KB_ID = "kb-1"
+
+GUIDE = " ".join(
+    f"step {i} of the deployment guide configures service {i % 7} with replica count {i % 3}"
+    for i in range(40)
+)
+
+
+@pytest.fixture
+def session_factory(kb_session_factory):
+    with kb_session_factory() as session:
+        session.add(DBKnowledgeBase(id="kb-other", name="Other", owner_username="testuser"))
+        session.commit()
+        asyncio.run(DatabaseKnowledgeBankRepository(session).add_document(GUIDE, DocumentMetadata(
+            doc_id=0, owner="testuser", cluster_id=None, knowledge_base_id=KB_ID, source_type="file",
+            filename="guide.md", concepts=[Concept(name="Kubernetes", category="tool", confidence=0.9)],
+            content_length=len(GUIDE), ingested_at="2024-01-01T00:00:00", skill_level="beginner"
+        )))
+    yield kb_session_factory
+    for store in (get_kb_documents(KB_ID), get_kb_metadata(KB_ID), get_kb_clusters(KB_ID)):
+        store.clear()
+
+
+@pytest.fixture
+def db_context(session_factory):
+    @contextmanager
+    def context():
+        db = session_factory()
+        try:
+            yield db
+            db.commit()
+        finally:
+            db.close()
+
+    with patch.object(tasks, "get_db_context", context):
+        yield
+
+
+def existing_doc_id(session_factory):
+    with session_factory() as db:
+        return db.query(DBDocument.doc_id).scalar()
+
+
+def test_identical_upload_reuses_existing_document(session_factory, db_context):
+    result = tasks.check_duplicate_upload(GUIDE, KB_ID, "copy.md")
+
+    assert result["doc_id"] == result["duplicate_of"] == existing_doc_id(session_factory)
+    assert result["similarity"] == 1.0
+    assert [c["name"] for c in result["concepts"]] == ["Kubernetes"]
+    assert tasks.check_duplicate_upload(GUIDE, "kb-other", "copy.md") is None
+
+
+def test_near_duplicate_follows_threshold(session_factory, db_context):
+    edited = GUIDE.replace("step 3 ", "step three ")
+    assert tasks.check_duplicate_upload(edited, KB_ID, "edited.md") is None  # Exact only by default
+
+    with patch.object(tasks.settings, "duplicate_upload_threshold", 0.9):
+        result = tasks.check_duplicate_upload(edited, KB_ID, "edited.md")
+    assert result["duplicate_of"] == existing_doc_id(session_factory)
+    assert 0.9 <= result["similarity"] < 1.0
+
+    with patch.object(tasks.settings, "duplicate_upload_threshold", 1.0):
+        assert tasks.check_duplicate_upload(edited, KB_ID, "edited.md") is None
+
+
+def test_reject_and_allow_policies(session_factory, db_context):
+    with patch.object(tasks.settings, "duplicate_upload_policy", "reject"):
+        with pytest.raises(DuplicateDocumentError) as error:
+            tasks.check_duplicate_upload(GUIDE, KB_ID, "copy.md")
+    assert error.value.doc_id == existing_doc_id(session_factory)
+
+    with patch.object(tasks.settings, "duplicate_upload_policy", "allow"):
+        assert tasks.check_duplicate_upload(GUIDE, KB_ID, "copy.md") is None
+
+
+def test_zip_duplicates_skip_extraction(session_factory, db_context):
+    guide_id = existing_doc_id(session_factory)
+    documents = [
+        {"filename": "guide.md", "content": GUIDE, "folder": "docs"},
+        {"filename": "new.md", "content": "brand new notes about helm charts"},
+    ]
+    extraction = {"concepts": [], "skill_level": "beginner", "suggested_cluster": "Helm"}
+
+    with patch.object(tasks.concept_extractor, "extract_batch_with_learning",
+                      new=AsyncMock(return_value=[extraction])) as extract_batch, \
+            patch.object(tasks.feedback_service, "record_ai_decision", new_callable=AsyncMock), \
+            patch.object(tasks, "broadcast_cluster_created", new_callable=AsyncMock), \
+            patch.object(tasks, "chunk_and_summarize_document",
+                         new=AsyncMock(return_value=({"chunks": 1}, {"status": "success"}))):
+        processed, failed = asyncio.run(
+            tasks.run_zip_pipeline(lambda meta: None, "testuser", "docs.zip", documents, KB_ID)
+        )
+
+    assert failed == []
+    reused, new = processed
+    assert reused["duplicate_of"] == reused["doc_id"] == guide_id
+    assert reused["filename"] == "guide.md" and reused["folder"] == "docs" and reused["concepts"] == 1
+    assert "duplicate_of" not in new and new["chunks"] == 1
+    (items,), _ = extract_batch.call_args
+    assert [content for content, _ in items] == [documents[1]["content"]]
@@ -0,0 +1,182 @@
+"""
+Tests for embedding-centroid clustering.
+
+Covers:
+- Documents go to the nearest cluster centroid; centroids update incrementally
+- Concept matching without embeddings, and clusters re-keyed or replaced
+- Centroids rebuilt from stored chunk embeddings
+- Offline re-clustering with k-means and HDBSCAN
+- Upload embeddings are the mean of one batched chunk embedding call
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from backend import embedding_clustering
+from backend.db_models import DBCluster, DBConcept, DBDocument, DBDocumentChunk
+from backend.embedding_clustering import (
+    EmbeddingClusteringEngine,
+    embed_documents,
+    recluster_knowledge_base,
+)
+from backend.models import Cluster
+
+KB_ID = "kb-1"
+DIM = 8
+
+
+def near(axis, rng, noise=0.05):
+    vector = np.eye(DIM, dtype=np.float32)[axis] + rng.normal(scale=noise, size=DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def add_embedded_document(kb_session, add_document):
+    """add(doc_id, embedding, cluster_id=None, concepts=()): a document of two chunks along ``embedding``."""
+    def add(doc_id, embedding, cluster_id=None, concepts=()):
+        add_document(doc_id, embeddings=[embedding, 0.5 * embedding], cluster_id=cluster_id)
+        for name in concepts:
+            kb_session.add(DBConcept(document_id=doc_id, name=name, category="tool", confidence=0.9))
+        kb_session.commit()
+
+    return add
+
+
+def add_cluster(session, cluster_id, name):
+    session.add(DBCluster(id=cluster_id, name=name, primary_concepts=[], knowledge_base_id=KB_ID))
+    session.commit()
+
+
+def test_documents_join_nearest_centroid():
+    rng = np.random.default_rng(0)
+    engine = EmbeddingClusteringEngine(min_similarity=0.6)
+    clusters = {}
+    a = engine.create_cluster(1, "A", [], "beginner", clusters, embedding=near(0, rng))
+    b = engine.create_cluster(2, "B", [], "beginner", clusters, embedding=near(1, rng))
+
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(0, rng)) == a
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(1, rng)) == b
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(2, rng)) is None
+
+    # Two documents along axis 2 pull B's centroid halfway there
+    engine.add_to_cluster(b, 3, clusters, embedding=near(2, rng, noise=0.0))
+    engine.add_to_cluster(b, 4, clusters, embedding=near(2, rng, noise=0.0))
+    engine.add_to_cluster(b, 4, clusters, embedding=near(2, rng, noise=0.0))  # Already a member
+    halfway = (np.eye(DIM)[1] + 2 * np.eye(DIM)[2]).astype(np.float32)
+    assert engine.find_best_cluster([], "X", clusters, embedding=halfway / np.linalg.norm(halfway)) == b
+    assert clusters[b].doc_ids == [2, 3, 4]
+
+
+def test_concept_fallback_and_rekeyed_clusters():
+    rng = np.random.default_rng(1)
+    engine = EmbeddingClusteringEngine()
+    concepts = [{"name": "Docker", "category": "tool", "confidence": 0.9}]
+    clusters = {}
+
+    # No centroids yet: concepts decide, also for documents with an embedding
+    first = engine.create_cluster(1, "Containers", concepts, "beginner", clusters)
+    assert engine.find_best_cluster(concepts, "Containers", clusters, embedding=near(0, rng)) == first
+    assert engine.find_best_cluster(concepts, "Containers", clusters) == first
+
+    second = engine.create_cluster(2, "Axis", [], "beginner", clusters, embedding=near(0, rng))
+    # The repository re-keys new clusters to their database IDs
+    cluster = clusters.pop(second)
+    cluster.id = 42
+    clusters[42] = cluster
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(0, rng)) == 42
+
+    # A cache refresh replaces the Cluster object: its old centroid no longer counts
+    clusters[42] = Cluster(id=42, name="Axis", doc_ids=[2], primary_concepts=[], skill_level="beginner", doc_count=1)
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(0, rng)) is None
+
+
+def test_centroids_rebuilt_from_stored_chunks(kb_session, add_embedded_document):
+    rng = np.random.default_rng(2)
+    for doc_id in (10, 11):
+        add_embedded_document(doc_id, near(0, rng))
+    add_embedded_document(12, near(1, rng))
+    clusters = {
+        1: Cluster(id=1, name="A", doc_ids=[10, 11], primary_concepts=[], skill_level="beginner", doc_count=2),
+        2: Cluster(id=2, name="B", doc_ids=[12], primary_concepts=[], skill_level="beginner", doc_count=1),
+        3: Cluster(id=3, name="Empty", doc_ids=[], primary_concepts=[], skill_level="beginner", doc_count=0),
+    }
+    engine = EmbeddingClusteringEngine()
+
+    engine.sync_centroids(kb_session, KB_ID, clusters)
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(0, rng)) == 1
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(1, rng)) == 2
+
+    # Growth elsewhere is picked up; clusters kept current here are not reloaded
+    add_embedded_document(13, near(2, rng, noise=0.0))
+    add_embedded_document(14, near(2, rng, noise=0.0))
+    clusters[3].doc_ids = [13, 14]
+    clusters[3].doc_count = 2
+    assert engine._centroid_index(clusters).stale(clusters) == [clusters[3]]
+    engine.sync_centroids(kb_session, KB_ID, clusters)
+    assert engine.find_best_cluster([], "X", clusters, embedding=near(2, rng)) == 3
+    assert engine._centroid_index(clusters).stale(clusters) == []
+
+
+def test_recluster_with_kmeans_creates_named_clusters(kb_session, add_embedded_document):
+    rng = np.random.default_rng(3)
+    for doc_id in range(1, 5):
+        add_embedded_document(doc_id, near(0, rng), concepts=["docker", "kubernetes"])
+    for doc_id in range(5, 9):
+        add_embedded_document(doc_id, near(1, rng), concepts=["postgres"])
+
+    result = recluster_knowledge_base(kb_session, KB_ID, "kmeans", n_clusters=2)
+
+    assert sorted(result["moved"]) == list(range(1, 9))
+    assert len(result["clusters_created"]) == 2 and result["clusters_removed"] == []
+    placement = dict(kb_session.query(DBDocument.doc_id, DBDocument.cluster_id))
+    assert len({placement[d] for d in range(1, 5)}) == len({placement[d] for d in range(5, 9)}) == 1
+    names = {c.name: c.primary_concepts for c in kb_session.query(DBCluster)}
+    assert names == {"Docker & Kubernetes": ["docker", "kubernetes"], "Postgres": ["postgres"]}
+
+
+def test_recluster_with_hdbscan_keeps_cluster_identities(kb_session, add_embedded_document):
+    rng = np.random.default_rng(4)
+    for cluster_id, name in [(1, "Mixed A"), (2, "Mixed B"), (3, "Stray")]:
+        add_cluster(kb_session, cluster_id, name)
+    layout = {1: (0, 1), 2: (0, 1), 3: (1, 1), 4: (0, 2), 5: (1, 2), 6: (1, 2), 7: (1, 2), 8: (0, 3)}
+    for doc_id, (axis, cluster_id) in layout.items():
+        add_embedded_document(doc_id, near(axis, rng, noise=0.01), cluster_id=cluster_id)
+    add_embedded_document(9, near(5, rng), cluster_id=3)
+    kb_session.query(DBDocumentChunk).filter_by(document_id=9).delete()  # Not embedded: stays put
+    kb_session.commit()
+
+    result = recluster_knowledge_base(kb_session, KB_ID, "hdbscan")
+
+    assert sorted(result["moved"]) == [3, 4, 8]
+    assert result["clusters_created"] == [] and result["clusters_removed"] == []
+    placement = dict(kb_session.query(DBDocument.doc_id, DBDocument.cluster_id))
+    assert {placement[d] for d in (1, 2, 4, 8)} == {1} and {placement[d] for d in (3, 5, 6, 7)} == {2}
+    assert {c.name for c in kb_session.query(DBCluster)} == {"Mixed A", "Mixed B", "Stray"}
+
+    # Without the unembedded document the stray cluster empties out and is deleted
+    kb_session.query(DBDocument).filter_by(doc_id=9).delete()
+    kb_session.query(DBDocument).filter_by(doc_id=8).update({"cluster_id": 3})
+    kb_session.commit()
+    result = recluster_knowledge_base(kb_session, KB_ID, "hdbscan")
+    assert result["moved"] == [8] and result["clusters_removed"] == [3]
+    assert kb_session.query(DBCluster).filter_by(id=3).first() is None
+
+
+def test_embed_documents_batches_chunks():
+    calls = []
+
+    class FakeService:
+        async def embed_batch(self, texts):
+            calls.append(texts)
+            return [[1.0, 0.0] if "alpha" in text else [0.0, 1.0] for text in texts]
+
+    contents = ["alpha " * 30 + "beta " * 10, "beta only", ""]
+    with patch.object(embedding_clustering, "get_embedding_service", return_value=FakeService()):
+        first, second, empty = asyncio.run(embed_documents(contents))
+
+    assert len(calls) == 1
+    assert second == pytest.approx([0.0, 1.0]) and empty is None
+    assert np.linalg.norm(first) == pytest.approx(1.0) and first[0] > 0
@@ -0,0 +1,142 @@
+"""
+Tests for binary chunk embedding storage.
+
+Covers:
+- float32 / float16 / int8 round trips and blob sizes
+- Column values for new chunks and decoding of legacy JSON rows
+- Batched conversion of stored embeddings between formats
+"""
+
+import json
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.chunk_embedding_index import ChunkEmbeddingIndex
+from backend.chunking_pipeline import convert_chunk_embeddings
+from backend.db_models import Base, DBUser, DBKnowledgeBase, DBDocument, DBDocumentChunk
+from backend.embedding_codec import (
+    chunk_embedding_columns,
+    decode_chunk_embedding,
+    decode_embedding,
+    encode_embedding,
+)
+
+VECTOR = np.random.default_rng(0).normal(size=1536).astype(np.float32)
+
+
+# =============================================================================
+# ENCODING
+# =============================================================================
+
+def test_float32_round_trip_is_lossless_and_zero_copy():
+    blob = encode_embedding(VECTOR, "float32")
+    decoded = decode_embedding(blob)
+
+    assert np.array_equal(decoded, VECTOR)
+    assert not decoded.flags.owndata
+    # At least 4x smaller than the JSON array it replaces
+    assert len(json.dumps(VECTOR.tolist())) / len(blob) >= 4
+
+
+@pytest.mark.parametrize("storage_format,max_bytes,tolerance", [
+    ("float16", 2 * 1536 + 4, 1e-3),
+    ("int8", 1536 + 8, 2e-2),
+])
+def test_compact_formats_round_trip(storage_format, max_bytes, tolerance):
+    blob = encode_embedding(VECTOR, storage_format)
+    decoded = decode_embedding(blob)
+
+    assert len(blob) == max_bytes
+    assert decoded.dtype == np.float32
+    cosine = decoded @ VECTOR / (np.linalg.norm(decoded) * np.linalg.norm(VECTOR))
+    assert cosine == pytest.approx(1.0, abs=tolerance)
+
+
+def test_int8_handles_zero_vector():
+    assert not decode_embedding(encode_embedding(np.zeros(4), "int8")).any()
+
+
+def test_unknown_format_raises():
+    with pytest.raises(ValueError):
+        encode_embedding(VECTOR, "float64")
+    with pytest.raises(ValueError):
+        decode_embedding(b"\x09\x00\x00\x00")
+
+
+def test_chunk_columns_and_legacy_decoding():
+    assert chunk_embedding_columns(None, "float32") == {"embedding": None, "embedding_blob": None}
+    assert chunk_embedding_columns([1, 2], "json") == {"embedding": [1.0, 2.0], "embedding_blob": None}
+
+    columns = chunk_embedding_columns([1.0, 2.0], "float32")
+    assert columns["embedding"] is None
+    assert decode_chunk_embedding(**columns).tolist() == [1.0, 2.0]
+    assert decode_chunk_embedding([1.0, 2.0], None).tolist() == [1.0, 2.0]
+    assert decode_chunk_embedding(None, None) is None
+
+
+# =============================================================================
+# STORAGE CONVERSION
+# =============================================================================
+
+@pytest.fixture
+def test_db():
+    """In-memory database with five legacy JSON chunks and one binary chunk."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add(DBUser(username="testuser", hashed_password="hash"))
+    session.add(DBKnowledgeBase(id="kb-1", name="KB", owner_username="testuser"))
+    session.add(DBDocument(
+        id=1, doc_id=1, owner_username="testuser", knowledge_base_id="kb-1",
+        source_type="text", content_length=10, skill_level="beginner"
+    ))
+    for i in range(6):
+        session.add(DBDocumentChunk(
+            document_id=1, knowledge_base_id="kb-1", chunk_index=i,
+            start_token=0, end_token=5, content=f"chunk {i}",
+            **chunk_embedding_columns([float(i), 1.0, 0.5], "float32" if i == 5 else "json")
+        ))
+    session.add(DBDocumentChunk(
+        document_id=1, knowledge_base_id="kb-1", chunk_index=6,
+        start_token=0, end_token=5, content="no embedding"
+    ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_convert_json_rows_to_binary_in_batches(test_db):
+    result = convert_chunk_embeddings(test_db, "float32", batch_size=2)
+
+    assert result == {"converted": 5, "batches": 3, "storage_format": "float32"}
+    chunks = test_db.query(DBDocumentChunk).order_by(DBDocumentChunk.chunk_index).all()
+    assert all(chunk.embedding is None for chunk in chunks)
+    assert [decode_embedding(c.embedding_blob).tolist() for c in chunks[:6]] == [
+        [float(i), 1.0, 0.5] for i in range(6)
+    ]
+    assert test_db.query(DBDocumentChunk).filter(DBDocumentChunk.has_embedding).count() == 6
+    # Nothing left to do on a second run
+    assert convert_chunk_embeddings(test_db, "float32")["converted"] == 0
+
+
+def test_convert_binary_rows_back_to_json(test_db):
+    convert_chunk_embeddings(test_db, "float16")
+    result = convert_chunk_embeddings(test_db, "json")
+
+    assert result["converted"] == 6
+    chunk = test_db.query(DBDocumentChunk).filter_by(chunk_index=3).one()
+    assert chunk.embedding == [3.0, 1.0, 0.5]
+    assert chunk.embedding_blob is None
+
+
+def test_chunk_index_reads_mixed_storage(test_db):
+    index = ChunkEmbeddingIndex("kb-1")
+
+    hits = index.search(test_db, [5.0, 1.0, 0.5], top_k=2)
+
+    assert len(index) == 6
+    assert hits[0][2] == pytest.approx(1.0)
+    assert test_db.get(DBDocumentChunk, hits[0][0]).chunk_index == 5
@@ -0,0 +1,260 @@
+"""
+Tests for EmbeddingService.embed_batch batching, retries and caching.
+
+Covers:
+- Packing texts into requests by token budget and input count
+- Bounded concurrency across requests
+- Retry-After-aware retries of only the failed request
+- Splitting a rejected request to isolate bad input; auth errors fail at once
+- Content-addressed embedding cache (LRU and Redis tiers), Redis off the event loop
+- Reprocessing an unchanged document without embedding calls
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.chunking_pipeline import ChunkingPipeline
+from backend.db_models import Base, DBUser, DBKnowledgeBase, DBDocument, DBDocumentChunk
+from backend.document_chunker import DocumentChunker
+from backend.embedding_service import EmbeddingCache, EmbeddingService
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+class FakeEmbeddings:
+    """Embeds each text as [len(text)], with scripted failures."""
+
+    def __init__(self, failures=None, reject=None, delay=0.0):
+        self.calls = []
+        self.failures = list(failures or [])
+        self.reject = reject
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, input):
+        self.calls.append(list(input))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                raise self.failures.pop(0)
+            if self.reject in input:
+                raise FakeAPIError(400)
+            data = [type("Item", (), {"embedding": [float(len(text))]})() for text in input]
+            return type("Response", (), {"data": data})()
+        finally:
+            self.in_flight -= 1
+
+
+def make_service(embeddings, cache=None, **kwargs):
+    service = EmbeddingService(api_key="test-key", **kwargs)
+    service.client = type("Client", (), {"embeddings": embeddings})()
+    service.cache = cache or EmbeddingCache(service.model_name, use_redis=False)
+    return service
+
+
+def test_packs_batches_by_token_budget():
+    fake = FakeEmbeddings()
+    service = make_service(fake)
+    service.MAX_BATCH_TOKENS = 10
+    texts = ["one two three four", "five six seven eight", "nine ten eleven twelve", "", "  "]
+
+    results = asyncio.run(service.embed_batch(texts))
+
+    # Two 4-token texts fit in a 10-token request, the third needs its own
+    assert sorted(len(call) for call in fake.calls) == [1, 2]
+    assert results[:3] == [[18.0], [20.0], [22.0]]
+    assert results[3:] == [None, None]
+
+
+def test_caps_inputs_per_request_and_concurrency():
+    fake = FakeEmbeddings(delay=0.01)
+    service = make_service(fake, max_concurrency=2)
+    service.MAX_BATCH_SIZE = 3
+
+    results = asyncio.run(service.embed_batch([f"text {i}" for i in range(12)]))
+
+    assert len(fake.calls) == 4
+    assert fake.max_in_flight == 2
+    assert all(result == [6.0] for result in results[:10])
+
+
+def test_rate_limited_request_is_retried_alone():
+    fake = FakeEmbeddings(failures=[FakeAPIError(429, {"retry-after-ms": "5"})])
+    service = make_service(fake, max_concurrency=1)
+    service.MAX_BATCH_SIZE = 2
+
+    results = asyncio.run(service.embed_batch(["a", "bb", "ccc", "dddd"]))
+
+    assert results == [[1.0], [2.0], [3.0], [4.0]]
+    # Only the failed request was resent
+    assert sorted(fake.calls) == [["a", "bb"], ["a", "bb"], ["ccc", "dddd"]]
+
+
+def test_gives_up_after_max_retries():
+    fake = FakeEmbeddings(failures=[FakeAPIError(503, {"retry-after": "0"})] * 3)
+    service = make_service(fake, max_retries=2)
+
+    results = asyncio.run(service.embed_batch(["a", "bb"]))
+
+    assert results == [None, None]
+    assert len(fake.calls) == 3
+
+
+def test_shared_client_leaves_retries_to_the_service():
+    service = EmbeddingService(api_key="test-key")
+
+    assert service.client.max_retries == 0
+
+
+def test_rejected_request_is_split_to_isolate_bad_input():
+    fake = FakeEmbeddings(reject="bad")
+    service = make_service(fake)
+
+    results = asyncio.run(service.embed_batch(["a", "bb", "bad", "dddd"]))
+
+    assert results == [[1.0], [2.0], None, [4.0]]
+
+
+def test_auth_error_fails_the_call_without_splitting():
+    fake = FakeEmbeddings(failures=[FakeAPIError(401)])
+    service = make_service(fake, max_concurrency=1)
+    service.MAX_BATCH_SIZE = 2
+
+    results = asyncio.run(service.embed_batch(["a", "bb", "ccc", "dddd"]))
+
+    assert results == [None] * 4
+    assert fake.calls == [["a", "bb"]]
+
+
+def test_oversized_text_is_truncated():
+    service = make_service(FakeEmbeddings())
+
+    text, tokens = service._prepare_text("word " * 10000)
+
+    assert tokens == service.MAX_TOKENS
+    assert service.MAX_TOKENS // 2 < len(text) < len("word " * 10000)
+
+
+# =============================================================================
+# EMBEDDING CACHE
+# =============================================================================
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def execute(self):
+        pass
+
+
+def test_cached_and_duplicate_texts_are_not_resent():
+    fake = FakeEmbeddings()
+    service = make_service(fake)
+
+    first = asyncio.run(service.embed_batch(["alpha", "beta", "alpha"]))
+    second = asyncio.run(service.embed_batch(["beta", "gamma", "alpha"]))
+    single = asyncio.run(service.embed_text("  gamma "))
+
+    assert first == [[5.0], [4.0], [5.0]]
+    assert second == [[4.0], [5.0], [5.0]]
+    assert single == [5.0]
+    assert [sorted(call) for call in fake.calls] == [["alpha", "beta"], ["gamma"]]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache("model", max_entries=2, use_redis=False)
+    asyncio.run(cache.put_many({"a": [1.0], "b": [2.0]}))
+    asyncio.run(cache.get_many(["a"]))
+    asyncio.run(cache.put_many({"c": [3.0]}))
+
+    assert asyncio.run(cache.get_many(["a", "b", "c"])) == {"a": [1.0], "c": [3.0]}
+
+
+def test_redis_tier_is_shared_between_services():
+    redis = FakeRedis()
+    with patch("backend.cache.get_redis_client", return_value=redis):
+        writer = make_service(FakeEmbeddings(), cache=EmbeddingCache("text-embedding-3-small", use_redis=True))
+        asyncio.run(writer.embed_batch(["shared chunk"]))
+
+        fake = FakeEmbeddings()
+        reader = make_service(fake, cache=EmbeddingCache("text-embedding-3-small", use_redis=True))
+        results = asyncio.run(reader.embed_batch(["shared chunk"]))
+
+    assert results == [[12.0]]
+    assert fake.calls == []
+    assert len(redis.store) == 1
+    assert next(iter(redis.store)).startswith("embedding:text-embedding-3-small:")
+
+
+def test_redis_tier_runs_off_the_event_loop():
+    threads = []
+
+    def record(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return {}
+
+    with patch("backend.embedding_service.get_cached_embeddings", side_effect=record), \
+            patch("backend.embedding_service.cache_embeddings", side_effect=record):
+        service = make_service(FakeEmbeddings(), cache=EmbeddingCache("text-embedding-3-small", use_redis=True))
+        asyncio.run(service.embed_batch(["some chunk"]))
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_reprocessing_unchanged_document_makes_no_embedding_calls():
+    # The pipeline's database work runs in worker threads
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(DBUser(username="testuser", hashed_password="hash"))
+    db.add(DBKnowledgeBase(id="kb-1", name="KB", owner_username="testuser"))
+    document = DBDocument(
+        id=1, doc_id=1, owner_username="testuser", knowledge_base_id="kb-1",
+        source_type="text", content_length=10, skill_level="beginner"
+    )
+    db.add(document)
+    db.commit()
+    content = "\n\n".join(f"Paragraph {i} about vectors. " * 20 for i in range(10))
+    chunker = DocumentChunker(target_chunk_tokens=100, max_chunk_tokens=150, min_chunk_tokens=10, overlap_tokens=0)
+
+    first = FakeEmbeddings()
+    service = make_service(first)
+    service.dimensions = 1
+    asyncio.run(ChunkingPipeline(chunker, service).process_document(db, document, content))
+
+    # A fresh process: empty LRU, no Redis. Stored chunks are reused.
+    second = FakeEmbeddings()
+    service = make_service(second)
+    service.dimensions = 1
+    result = asyncio.run(ChunkingPipeline(chunker, service).process_document(db, document, content))
+
+    assert len(first.calls) > 0
+    assert second.calls == []
+    assert result["embeddings"] == result["chunks"] > 1
+    assert db.query(DBDocumentChunk).filter(DBDocumentChunk.has_embedding).count() == result["chunks"]
+    db.close()
@@ -3,6 +3,7 @@ Tests for Enhanced RAG System.
 
 Tests the following components:
 - HybridSearcher: TF-IDF + embedding combination
+- reciprocal_rank_fusion: Merging query variant results
 - CrossEncoderReranker: Reranking quality
 - QueryExpander: Query expansion logic
 - ParentChildChunker: Chunking strategy
@@ -26,6 +27,7 @@ from backend.enhanced_rag import (
     ParentChildChunker,
     EnhancedRAGService,
     get_pgvector_migration_sql,
+    reciprocal_rank_fusion,
 )
 
 
@@ -392,12 +394,12 @@ class TestEnhancedRAGService:
         service = EnhancedRAGService(mock_db_session, rag_config)
 
         # Mock embedding service to return empty results
-        with patch.object(service, '_get_embedding', new_callable=AsyncMock) as mock_embed:
-            mock_embed.return_value = [0.1] * 1536
+        with patch.object(service, '_get_embeddings', new_callable=AsyncMock) as mock_embed:
+            mock_embed.return_value = [[0.1] * 1536]
 
             # Mock hybrid searcher to return empty
-            with patch.object(service.hybrid_searcher, 'search', new_callable=AsyncMock) as mock_search:
-                mock_search.return_value = []
+            with patch.object(service.hybrid_searcher, 'search_many', new_callable=AsyncMock) as mock_search:
+                mock_search.return_value = [[]]
 
                 # Mock generate answer
                 with patch.object(service, '_generate_answer', new_callable=AsyncMock) as mock_gen:
@@ -487,3 +489,36 @@ class TestHybridScoring:
 
         # Max possible hybrid score is 1.0
         assert chunk.hybrid_score <= 1.0
+
+
+class TestReciprocalRankFusion:
+    """Tests for merging query variant results."""
+
+    @staticmethod
+    def ranked(*chunk_ids, score=0.5):
+        return [
+            RetrievedChunk(chunk_id=c, document_id=c, content=f"chunk {c}", hybrid_score=score)
+            for c in chunk_ids
+        ]
+
+    def test_chunks_found_by_several_variants_rank_first(self):
+        """A chunk ranked well by every variant beats one variant's top hit."""
+        fused = reciprocal_rank_fusion([
+            self.ranked(1, 2, 3),
+            self.ranked(2, 4),
+            self.ranked(5, 2),
+        ], k=60)
+
+        assert [c.chunk_id for c in fused] == [2, 1, 5, 4, 3]
+        assert fused[0].final_score == 1.0
+        assert fused[0].fusion_score == pytest.approx(2 / 62 + 1 / 61)
+        assert all(0 < c.final_score <= 1.0 for c in fused)
+
+    def test_single_variant_keeps_order_and_best_copy(self):
+        """One variant keeps its ranking; duplicates keep the best-scored copy."""
+        assert [c.chunk_id for c in reciprocal_rank_fusion([self.ranked(3, 1, 2)])] == [3, 1, 2]
+
+        low, high = self.ranked(7, score=0.2)[0], self.ranked(7, score=0.9)[0]
+        fused = reciprocal_rank_fusion([[low], [high]])
+        assert len(fused) == 1 and fused[0] is high
+        assert reciprocal_rank_fusion([]) == []
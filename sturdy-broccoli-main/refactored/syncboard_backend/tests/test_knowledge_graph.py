@@ -0,0 +1,202 @@
+"""
+Tests for the knowledge graph build.
+
+Covers:
+- Relationships from concept / technology / cluster posting lists match
+  an all-pairs comparison
+- Summaries and concepts are loaded with a fixed number of queries
+- Adjacency-based related-document lookups and learning paths
+- Incremental upload / delete / cluster-move maintenance and versioning
+"""
+
+import asyncio
+import random
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.db_models import Base, DBUser, DBKnowledgeBase, DBCluster, DBDocument, DBDocumentSummary, DBConcept
+from backend import knowledge_graph_service
+from backend.knowledge_graph_service import KnowledgeGraphService, apply_graph_change, get_knowledge_graph
+
+KB_ID = "kb-1"
+CONCEPTS = ["python", "fastapi", "docker", "redis", "celery", "react", "sql", "numpy"]
+
+
+@pytest.fixture
+def test_db():
+    """KB with 30 documents: half described by summaries, half by the concepts table."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add(DBUser(username="testuser", hashed_password="hash"))
+    session.add(DBKnowledgeBase(id=KB_ID, name="KB", owner_username="testuser"))
+    for cluster_id in (1, 2, 3):
+        session.add(DBCluster(id=cluster_id, name=f"c{cluster_id}", primary_concepts=[], skill_level="beginner"))
+    session.commit()
+
+    rng = random.Random(0)
+    for i in range(30):
+        doc = DBDocument(
+            doc_id=100 + i, owner_username="testuser", knowledge_base_id=KB_ID,
+            cluster_id=rng.choice([1, 2, 3, None]), source_type="text",
+            content_length=10, skill_level="beginner", filename=f"doc{i}.md"
+        )
+        session.add(doc)
+        session.flush()
+        names = rng.sample(CONCEPTS, 3)
+        if i % 2:
+            session.add(DBDocumentSummary(
+                document_id=doc.id, knowledge_base_id=KB_ID, summary_type="document",
+                summary_level=3, short_summary="s", key_concepts=[n.title() for n in names],
+                tech_stack=names[:1]
+            ))
+        else:
+            for name, category in zip(names, ["language", "concept", "tool"]):
+                session.add(DBConcept(document_id=doc.id, name=name, category=category, confidence=0.9))
+    session.commit()
+    yield session
+    session.close()
+
+
+def all_pairs(graph):
+    """Relationships computed the old way, by comparing every pair of nodes."""
+    expected = set()
+    nodes = list(graph._nodes.values())
+    for i, a in enumerate(nodes):
+        for b in nodes[i + 1:]:
+            concepts = set(a.concepts) & set(b.concepts)
+            if concepts:
+                strength = len(concepts) / max(len(a.concepts), len(b.concepts), 1)
+                expected.add((a.doc_id, b.doc_id, "shared_concept", round(strength, 6), frozenset(concepts)))
+            tech = set(a.tech_stack) & set(b.tech_stack)
+            if tech:
+                strength = len(tech) / max(len(a.tech_stack), len(b.tech_stack), 1)
+                expected.add((a.doc_id, b.doc_id, "shared_tech", round(strength, 6), frozenset(tech)))
+            if a.cluster_id is not None and a.cluster_id == b.cluster_id:
+                expected.add((a.doc_id, b.doc_id, "same_cluster", 0.8, frozenset([f"cluster_{a.cluster_id}"])))
+    return expected
+
+
+def edges(graph):
+    return {
+        (r.source_doc_id, r.target_doc_id, r.relationship_type, round(r.strength, 6), frozenset(r.shared_items))
+        for r in graph.relationships()
+    }
+
+
+def undirected(edge_set):
+    return {(frozenset(e[:2]),) + e[2:] for e in edge_set}
+
+
+def test_posting_list_build_matches_all_pairs(test_db):
+    graph = KnowledgeGraphService()
+    stats = graph.build_graph(test_db, KB_ID)
+
+    actual = edges(graph)
+    assert actual == all_pairs(graph)
+    assert stats.total_documents == 30
+    assert stats.total_relationships == len(actual) == graph.relationship_count
+    assert sum(len(rels) for nbrs in graph._adjacency.values() for rels in nbrs.values()) == 2 * len(actual)
+
+
+def test_build_uses_constant_number_of_queries(test_db):
+    statements = []
+    engine = test_db.get_bind()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    KnowledgeGraphService().build_graph(test_db, KB_ID)
+    event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 3
+
+
+def test_related_documents_and_learning_path(test_db):
+    graph = KnowledgeGraphService()
+    graph.build_graph(test_db, KB_ID)
+    doc_id = next(iter(graph._nodes))
+
+    related = graph.get_related_documents(doc_id, min_strength=0.0, limit=1000)
+    expected = {
+        r.target_doc_id if r.source_doc_id == doc_id else r.source_doc_id
+        for r in graph.relationships() if doc_id in (r.source_doc_id, r.target_doc_id)
+    }
+    assert {r["doc_id"] for r in related} == expected
+    assert [r["strength"] for r in related] == sorted((r["strength"] for r in related), reverse=True)
+
+    path = graph.find_learning_path("python", "numpy")
+    assert path
+    assert "python" in graph._nodes[path[0]["doc_id"]].concepts
+    assert "numpy" in graph._nodes[path[-1]["doc_id"]].concepts
+
+
+# =============================================================================
+# INCREMENTAL MAINTENANCE
+# =============================================================================
+
+def change_kb(session):
+    """Upload one document, delete one, and move one to another cluster."""
+    doc = DBDocument(
+        doc_id=500, owner_username="testuser", knowledge_base_id=KB_ID, cluster_id=2,
+        source_type="text", content_length=10, skill_level="beginner", filename="new.md"
+    )
+    session.add(doc)
+    session.flush()
+    for name in ("python", "redis"):
+        session.add(DBConcept(document_id=doc.id, name=name, category="language", confidence=0.9))
+    session.delete(session.query(DBDocument).filter_by(doc_id=101).one())
+    moved = session.query(DBDocument).filter_by(doc_id=102).one()
+    moved.cluster_id = 3 if moved.cluster_id != 3 else 1
+    session.commit()
+    return [500, 101, 102]
+
+
+def test_sync_applies_changes_incrementally(test_db):
+    graph = KnowledgeGraphService(sync_interval=0)
+    graph.build_graph(test_db, KB_ID)
+    version = graph.version
+    change_kb(test_db)
+
+    graph.sync(test_db)
+
+    fresh = KnowledgeGraphService()
+    fresh.build_graph(test_db, KB_ID)
+    assert set(graph._nodes) == set(fresh._nodes)
+    assert undirected(edges(graph)) == undirected(edges(fresh)) == undirected(all_pairs(graph))
+    assert graph.relationship_count == fresh.relationship_count
+    assert graph.get_stats() == fresh.get_stats()
+    assert 101 not in graph._adjacency
+    assert graph.version > version
+
+
+def test_published_changes_refresh_only_named_documents(test_db):
+    knowledge_graph_service._graph_cache.clear()
+    graph = asyncio.run(get_knowledge_graph(test_db, KB_ID))
+    graph.sync_interval = 3600
+    doc_ids = change_kb(test_db)
+
+    statements = []
+    engine = test_db.get_bind()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    apply_graph_change({"entity": "document", "action": "added", "ids": doc_ids, "knowledge_base_id": KB_ID})
+    same = asyncio.run(get_knowledge_graph(test_db, KB_ID))
+    event.remove(engine, "before_cursor_execute", record)
+
+    fresh = KnowledgeGraphService()
+    fresh.build_graph(test_db, KB_ID)
+    assert same is graph
+    assert undirected(edges(graph)) == undirected(edges(fresh))
+    # Three node queries plus the watermark, no KB-wide diff
+    assert len(statements) == 5
+    assert all("IN (" in sql for sql in statements[:3])
+
+    apply_graph_change({"entity": "knowledge_base", "action": "deleted", "ids": [], "knowledge_base_id": KB_ID})
+    assert KB_ID not in knowledge_graph_service._graph_cache
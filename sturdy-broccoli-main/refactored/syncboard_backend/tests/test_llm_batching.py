@@ -0,0 +1,142 @@
+"""
+Tests for multi-document batched concept extraction.
+
+Covers:
+- Packing items by token budget and item count
+- Parsing numbered batch responses, ignoring malformed entries
+- ConceptExtractor.extract_batch_with_learning demultiplexing, ordering
+  and single-document fallback, also for malformed entries
+- Each batched document is labelled with its own source type
+"""
+
+import asyncio
+import json
+import re
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend import concept_extractor as concept_extractor_module
+from backend.concept_extractor import ConceptExtractor
+from backend.llm_batching import pack_batches, parse_batch_results
+from backend.llm_providers import MockLLMProvider
+
+LEARNING_CONTEXT = {
+    "recent_corrections": [],
+    "user_preferences": {"has_feedback": False},
+    "confidence_calibration": {},
+    "prompt_additions": ""
+}
+
+
+def test_pack_batches_respects_both_limits():
+    assert pack_batches([3, 3, 3, 3], max_tokens=7, max_items=10) == [[0, 1], [2, 3]]
+    assert pack_batches([1] * 5, max_tokens=100, max_items=2) == [[0, 1], [2, 3], [4]]
+    # Oversized items get their own batch
+    assert pack_batches([2, 50, 2], max_tokens=10, max_items=10) == [[0], [1], [2]]
+    assert pack_batches([], max_tokens=10, max_items=10) == []
+
+
+def test_parse_batch_results_keeps_valid_entries_only():
+    response = json.dumps({"results": [
+        {"id": 2, "x": "b"},
+        {"id": "1", "x": "a"},
+        {"id": 9, "x": "out of range"},
+        {"x": "no id"},
+        "not a dict",
+        {"id": 2, "x": "duplicate"},
+    ]})
+
+    assert parse_batch_results(response, 3) == {1: {"x": "a"}, 2: {"x": "b"}}
+    assert parse_batch_results("not json", 3) == {}
+    assert parse_batch_results(json.dumps({"results": "nope"}), 3) == {}
+
+
+def fake_extraction_response(prompt, drop=(), malformed=()):
+    """Answer a batched prompt with one concept named after each document's first word."""
+    items = re.findall(r"=== DOCUMENT (\d+) ===\nSource type: \w+\n(\w+)", prompt)
+    return json.dumps({"results": [
+        {
+            "id": int(number),
+            "concepts": "not a list" if word in malformed else [
+                {"name": word, "category": "concept", "confidence": 0.95},
+                {"name": "shared", "category": "concept", "confidence": 0.9}
+            ],
+            "skill_level": "beginner",
+            "primary_topic": word,
+            "suggested_cluster": word.title()
+        }
+        for number, word in items if word not in drop
+    ]})
+
+
+@pytest.fixture
+def extractor():
+    with patch("backend.feedback_service.FeedbackService.get_learning_context_for_extraction",
+               new_callable=AsyncMock, return_value=LEARNING_CONTEXT):
+        yield ConceptExtractor(llm_provider=MockLLMProvider())
+
+
+def run_batch(extractor, items, drop=(), malformed=(), enabled=True):
+    prompts = []
+
+    async def call(prompt, max_completion_tokens=4000):
+        prompts.append(prompt)
+        return fake_extraction_response(prompt, drop, malformed)
+
+    single = {
+        "concepts": [{"name": "single", "category": "concept", "confidence": 0.95}],
+        "skill_level": "advanced", "primary_topic": "single", "suggested_cluster": "Single",
+        "confidence_score": 0.9
+    }
+    with patch.object(extractor, "_call_provider_extract", side_effect=call), \
+            patch.object(extractor, "_extract_with_learning_prompt", new_callable=AsyncMock, return_value=single) as one, \
+            patch.object(concept_extractor_module.settings, "enable_llm_batching", enabled), \
+            patch.object(concept_extractor_module.settings, "enable_dual_pass", False):
+        results = asyncio.run(extractor.extract_batch_with_learning(items, username="testuser"))
+    return results, prompts, one.await_count
+
+
+def test_small_documents_share_one_request(extractor):
+    words = ["alpha", "bravo", "charlie", "delta", "echo"]
+    results, prompts, single_calls = run_batch(extractor, [(f"{w} notes about things", "file") for w in words])
+
+    assert len(prompts) == 1
+    assert single_calls == 0
+    assert [r["primary_topic"] for r in results] == words
+    assert all(r["learning_applied"]["corrections_used"] == 0 for r in results)
+    assert all(0 < r["confidence_score"] <= 1 for r in results)
+
+
+def test_missing_and_large_documents_fall_back_to_single_calls(extractor):
+    items = [
+        ("alpha notes", "file"),
+        ("bravo notes", "file"),
+        ("YOUTUBE VIDEO TRANSCRIPT talk", "file"),
+        ("charlie notes", "file"),
+    ]
+    results, prompts, single_calls = run_batch(extractor, items, drop={"bravo"})
+
+    assert len(prompts) == 1
+    # The transcript is never batched; "bravo" was left out of the response
+    assert single_calls == 2
+    assert [r["primary_topic"] for r in results] == ["alpha", "single", "single", "charlie"]
+
+
+def test_malformed_entries_fall_back_to_single_calls(extractor):
+    items = [("alpha notes", "file"), ("bravo notes", "url"), ("charlie notes", "text")]
+    results, prompts, single_calls = run_batch(extractor, items, malformed={"bravo"})
+
+    assert len(prompts) == 1
+    assert re.findall(r"=== DOCUMENT \d+ ===\nSource type: (\w+)", prompts[0]) == ["file", "url", "text"]
+    assert single_calls == 1
+    assert [r["primary_topic"] for r in results] == ["alpha", "single", "charlie"]
+
+
+def test_batching_can_be_disabled(extractor):
+    results, prompts, single_calls = run_batch(
+        extractor, [("alpha notes", "file"), ("bravo notes", "file")], enabled=False
+    )
+
+    assert prompts == []
+    assert single_calls == 2
+    assert len(results) == 2
@@ -0,0 +1,80 @@
+"""
+Tests for post-retrieval chunk enrichment in enhanced RAG.
+
+Covers:
+- Parent content and document metadata arrive in a single query
+- Cached parent contents are not fetched again
+- Reprocessing a document invalidates its cached parents
+"""
+
+import pytest
+from sqlalchemy import event
+
+from backend.db_models import DBDocumentChunk
+from backend.enhanced_rag import (
+    RetrievedChunk,
+    enrich_chunk_context,
+    get_parent_context_cache,
+    invalidate_parent_context,
+)
+
+
+@pytest.fixture
+def test_db(kb_session, add_document, add_chunks):
+    for document_id, filename in [(1, "auth.md"), (2, "deploy.md")]:
+        add_document(100 + document_id, id=document_id, source_type="file", filename=filename)
+
+    (parent,) = add_chunks(1, ["full section about authentication"], chunk_type="parent")
+    add_chunks(1, ["login with tokens"], chunk_type="child", parent_chunk_id=parent.id)
+    add_chunks(2, ["deploy with helm"], chunk_type="child")
+    return kb_session
+
+
+def retrieved(session):
+    children = session.query(DBDocumentChunk).filter_by(chunk_type="child").order_by(DBDocumentChunk.id)
+    return [RetrievedChunk(chunk_id=c.id, document_id=c.document_id, content=c.content) for c in children]
+
+
+def enrich_counting_queries(session, chunks):
+    statements = []
+    engine = session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        enrich_chunk_context(chunks, session)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return statements
+
+
+def test_parents_and_metadata_in_one_query(test_db):
+    auth, deploy = chunks = retrieved(test_db)
+
+    statements = enrich_counting_queries(test_db, chunks)
+
+    assert len(statements) == 1
+    assert auth.parent_content == "full section about authentication"
+    assert auth.filename == "auth.md" and auth.source_type == "file"
+    assert deploy.parent_content is None and deploy.parent_chunk_id is None
+    assert deploy.filename == "deploy.md"
+
+
+def test_cached_parents_are_not_refetched(test_db):
+    enrich_chunk_context(retrieved(test_db), test_db)
+    assert len(get_parent_context_cache(test_db)) == 2
+
+    # Change the parent behind the cache's back: the cached copy is used
+    test_db.query(DBDocumentChunk).filter_by(chunk_type="parent").update({"content": "changed"})
+    test_db.commit()
+    auth, _ = chunks = retrieved(test_db)
+    statements = enrich_counting_queries(test_db, chunks)
+
+    assert len(statements) == 1
+    assert auth.parent_content == "full section about authentication"
+    assert auth.filename == "auth.md"
+
+    invalidate_parent_context(test_db, 1)
+    assert len(get_parent_context_cache(test_db)) == 1
+    auth, _ = chunks = retrieved(test_db)
+    enrich_chunk_context(chunks, test_db)
+    assert auth.parent_content == "changed"
@@ -0,0 +1,106 @@
+"""
+Tests for the process-wide cross-encoder rerank service.
+
+Covers:
+- Pairs from concurrent requests are scored together off the event loop
+- Scores are cached per (query, chunk id)
+- Full batches are scored without waiting for the window
+- CrossEncoderReranker.arerank falls back to the retrieval ranking
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+from backend.enhanced_rag import CrossEncoderReranker, RetrievedChunk
+from backend.rerank_service import RerankService
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how many query words the chunk contains."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs):
+        self.calls.append((threading.current_thread().name, list(pairs)))
+        return [float(sum(word in content for word in query.split())) for query, content in pairs]
+
+
+def make_service(**kwargs):
+    service = RerankService("fake-model", **kwargs)
+    service._model = FakeCrossEncoder()
+    service._load_attempted = True
+    return service
+
+
+def test_concurrent_requests_share_one_prediction():
+    service = make_service(batch_window=0.02)
+
+    async def score_concurrently():
+        return await asyncio.gather(
+            service.score("python asyncio", [(1, "python asyncio loops"), (2, "java")]),
+            service.score("python asyncio", [(2, "java"), (3, "python")]),
+            service.score("docker", [(1, "python asyncio loops"), (4, "docker compose")]),
+        )
+
+    results = asyncio.run(score_concurrently())
+
+    assert results == [[2.0, 0.0], [0.0, 1.0], [0.0, 1.0]]
+    (thread_name, pairs), = service._model.calls
+    assert thread_name.startswith("reranker")
+    assert len(pairs) == 5  # (python asyncio, chunk 2) is scored once
+
+
+def test_scores_are_cached_per_query_and_chunk():
+    service = make_service(batch_window=0)
+
+    first = asyncio.run(service.score("python", [(1, "python"), (2, "go")]))
+    second = asyncio.run(service.score("python", [(2, "go"), (1, "python"), (3, "python too")]))
+
+    assert first == [1.0, 0.0]
+    assert second == [0.0, 1.0, 1.0]
+    assert [len(pairs) for _, pairs in service._model.calls] == [2, 1]
+
+    service.cache_size = 1
+    asyncio.run(service.score("python", [(4, "python")]))
+    assert len(service._cache) == 1
+
+
+def test_full_batch_is_scored_without_waiting():
+    service = make_service(batch_window=60, max_batch_pairs=2)
+
+    scores = asyncio.run(asyncio.wait_for(
+        service.score("python", [(1, "python"), (2, "go")]), timeout=5
+    ))
+
+    assert scores == [1.0, 0.0]
+
+
+def test_arerank_falls_back_without_model():
+    chunks = [
+        RetrievedChunk(chunk_id=i, document_id=i, content=f"chunk {i}", final_score=score)
+        for i, score in [(1, 0.2), (2, 0.9), (3, 0.5)]
+    ]
+    service = RerankService("missing-model")
+    service._load_attempted = True
+
+    with patch("backend.enhanced_rag.get_rerank_service", return_value=service):
+        result = asyncio.run(CrossEncoderReranker("missing-model").arerank("query", chunks, top_k=2))
+
+    assert [c.chunk_id for c in result] == [2, 3]
+
+
+def test_arerank_combines_rerank_and_hybrid_scores():
+    chunks = [
+        RetrievedChunk(chunk_id=1, document_id=1, content="go channels", hybrid_score=1.0),
+        RetrievedChunk(chunk_id=2, document_id=2, content="python asyncio", hybrid_score=0.0),
+    ]
+    service = make_service(batch_window=0)
+
+    with patch("backend.enhanced_rag.get_rerank_service", return_value=service):
+        result = asyncio.run(CrossEncoderReranker("fake-model").arerank("python asyncio", chunks))
+
+    assert [c.chunk_id for c in result] == [2, 1]
+    assert result[0].rerank_score == 2.0
+    assert result[0].final_score == 2.0 * 0.8
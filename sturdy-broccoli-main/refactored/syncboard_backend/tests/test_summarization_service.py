@@ -0,0 +1,178 @@
+"""
+Tests for concurrent hierarchical summarization.
+
+Covers:
+- Chunk and section summaries run concurrently under the configured limit
+- Summary records keep chunk order and link to the right parents
+- Transient API errors are retried per request; programming errors are not
+- Small chunks share batched requests, with single-chunk fallback
+"""
+
+import asyncio
+import json
+import re
+import httpx
+import openai
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import summarization_service
+from backend.api_retry import is_retryable
+from backend.db_models import Base, DBUser, DBKnowledgeBase, DBDocument, DBDocumentSummary
+from backend.summarization_service import SummarizationService, generate_hierarchical_summaries
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": {"retry-after-ms": "1"}})()
+
+
+class FakeCompletions:
+    """Echoes the last line of the prompt as the summary, with scripted failures."""
+
+    def __init__(self, failures=None, delay=0.02):
+        self.failures = list(failures or [])
+        self.delay = delay
+        self.calls = 0
+        self.batch_sizes = []
+        self.drop = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                raise self.failures.pop(0)
+            prompt = params["messages"][-1]["content"]
+            items = re.findall(r"=== CHUNK (\d+) ===\n(.*)", prompt)
+            if items:
+                # Batched request: answer per chunk number, leaving out dropped texts
+                self.batch_sizes.append(len(items))
+                content = json.dumps({"results": [
+                    {"id": int(number), "short_summary": text, "key_concepts": [], "tech_stack": []}
+                    for number, text in items if text not in self.drop
+                ]})
+            else:
+                text = prompt.splitlines()[-1]
+                content = json.dumps({"short_summary": text, "key_concepts": [], "tech_stack": []})
+            message = type("Message", (), {"content": content})()
+            return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_openai():
+    completions = FakeCompletions()
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+    with patch.object(summarization_service, "OPENAI_API_KEY", "test-key"), \
+            patch.object(SummarizationService, "client", client):
+        yield completions
+
+
+@pytest.fixture
+def test_db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(DBUser(username="testuser", hashed_password="hash"))
+    session.add(DBKnowledgeBase(id="kb-1", name="KB", owner_username="testuser"))
+    session.add(DBDocument(
+        id=1, doc_id=1, owner_username="testuser", knowledge_base_id="kb-1",
+        source_type="text", content_length=10, skill_level="beginner"
+    ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_chunks_are_summarized_concurrently_in_order(test_db, fake_openai):
+    # Deliberately shuffled: records must follow chunk_index
+    chunks = [{"id": 100 + i, "content": f"chunk {i}", "chunk_index": i} for i in range(10)]
+    chunks.reverse()
+
+    with patch.object(summarization_service.settings, "summary_max_concurrency", 4), \
+            patch.object(summarization_service.settings, "enable_llm_batching", False):
+        result = asyncio.run(generate_hierarchical_summaries(test_db, 1, "kb-1", chunks))
+
+    assert result["chunk_summaries"] == 10
+    assert fake_openai.max_in_flight == 4
+    # 10 chunks + 3 sections + 1 document
+    assert fake_openai.calls == 14
+
+    records = test_db.query(DBDocumentSummary).filter_by(summary_level=1).order_by(DBDocumentSummary.id).all()
+    assert [r.chunk_id for r in records] == [100 + i for i in range(10)]
+    assert [r.short_summary for r in records] == [f"chunk {i}" for i in range(10)]
+
+    sections = test_db.query(DBDocumentSummary).filter_by(summary_level=2).order_by(DBDocumentSummary.id).all()
+    assert [sum(r.parent_id == s.id for r in records) for s in sections] == [4, 4, 2]
+    assert sections[0].short_summary == "- chunk 3"
+
+
+def test_transient_errors_are_retried(fake_openai):
+    fake_openai.failures = [FakeAPIError(429), FakeAPIError(503)]
+    service = SummarizationService(max_concurrency=2)
+
+    result = asyncio.run(service.summarize_chunk("hello"))
+
+    assert result.short_summary == "hello"
+    assert fake_openai.calls == 3
+
+
+def test_rejected_request_falls_back_without_retry(fake_openai):
+    fake_openai.failures = [FakeAPIError(400)]
+    service = SummarizationService()
+
+    result = asyncio.run(service.summarize_chunk("short text"))
+
+    assert result.short_summary == "short text"
+    assert fake_openai.calls == 1
+
+
+def test_programming_errors_are_not_retried(fake_openai):
+    fake_openai.failures = [KeyError("choices")]
+    service = SummarizationService()
+
+    asyncio.run(service.summarize_chunk("short text"))
+
+    assert fake_openai.calls == 1
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com")))
+    assert not is_retryable(ValueError("bad input"))
+
+
+def test_shared_client_leaves_retries_to_the_service():
+    with patch.object(summarization_service, "OPENAI_API_KEY", "test-key"):
+        assert SummarizationService().client.max_retries == 0
+
+
+def test_small_chunks_share_batched_requests(fake_openai):
+    fake_openai.drop = {"chunk 9"}
+    service = SummarizationService()
+
+    with patch.object(summarization_service.settings, "enable_llm_batching", True):
+        results = asyncio.run(service.summarize_chunks([f"chunk {i}" for i in range(10)]))
+
+    assert [r.short_summary for r in results] == [f"chunk {i}" for i in range(10)]
+    # Two packed requests (8 + 2), plus one single call for the chunk the batch left out
+    assert sorted(fake_openai.batch_sizes) == [2, 8]
+    assert fake_openai.calls == 3
+
+
+def test_failed_batch_falls_back_to_single_chunks(fake_openai):
+    fake_openai.failures = [FakeAPIError(400)]
+    service = SummarizationService()
+
+    with patch.object(summarization_service.settings, "enable_llm_batching", True):
+        results = asyncio.run(service.summarize_chunks(["a b", "c d", "e f"]))
+
+    assert [r.short_summary for r in results] == ["a b", "c d", "e f"]
+    assert fake_openai.calls == 4
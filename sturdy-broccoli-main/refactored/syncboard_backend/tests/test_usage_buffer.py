@@ -0,0 +1,169 @@
+"""
+Tests for buffered usage tracking.
+
+Covers:
+- Counts reach usage_records only on flush, as batched increments
+- Counters include unflushed counts and read the database once per user
+- Several processes' buffers add up; failed flushes keep their counts
+- Quota checks see requests that are not flushed yet
+- Quota checks reuse cached limits until they expire or the plan changes
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from backend.db_models import DBRateLimitOverride, DBUser, DBUsageRecord, DBUserSubscription
+from backend.middleware.usage_tracking import usage_counts
+from backend.routers import usage as usage_router
+from backend.usage_buffer import UsageBuffer, usage_period
+
+
+@pytest.fixture
+def test_db(kb_session):
+    for username in ("alice", "bob"):
+        kb_session.add(DBUser(username=username, hashed_password="hash"))
+    kb_session.commit()
+    return kb_session
+
+
+def stored(session, username):
+    session.expire_all()
+    return session.query(DBUsageRecord).filter_by(username=username).one()
+
+
+def count_statements(session, action):
+    statements = []
+    engine = session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_counts_are_written_on_flush(test_db):
+    buffer = UsageBuffer()
+    for _ in range(3):
+        buffer.record("alice", usage_counts("GET", "/search_full"))
+    buffer.record("bob", usage_counts("POST", "/upload_text"))
+    assert test_db.query(DBUsageRecord).count() == 0
+
+    assert buffer.flush(test_db) == 2
+    alice = stored(test_db, "alice")
+    assert (alice.api_calls, alice.search_queries, alice.documents_uploaded) == (3, 3, 0)
+    assert (alice.period_start, alice.period_end) == usage_period()
+    assert stored(test_db, "bob").documents_uploaded == 1
+    assert test_db.query(DBUserSubscription).count() == 2
+
+    buffer.record("alice", {"api_calls": 2})
+    buffer.record("bob", {"api_calls": 1})
+    _, statements = count_statements(test_db, lambda: buffer.flush(test_db))
+    assert sum(s.lstrip().upper().startswith("UPDATE") for s in statements) == 1  # One executemany
+    assert stored(test_db, "alice").api_calls == 5 and stored(test_db, "bob").api_calls == 2
+    assert buffer.flush(test_db) == 0
+
+
+def test_counters_include_pending_counts(test_db):
+    buffer = UsageBuffer()
+    buffer.record("alice", {"api_calls": 4, "ai_requests": 1})
+
+    counters, statements = count_statements(test_db, lambda: buffer.counters(test_db, "alice"))
+    assert counters["api_calls"] == 4 and counters["ai_requests"] == 1 and counters["storage_bytes"] == 0
+    assert len(statements) == 1
+
+    buffer.record("alice", {"api_calls": 1})
+    counters, statements = count_statements(test_db, lambda: buffer.counters(test_db, "alice"))
+    assert counters["api_calls"] == 5 and statements == []
+
+    buffer.flush(test_db)
+    counters, statements = count_statements(test_db, lambda: buffer.counters(test_db, "alice"))
+    assert counters["api_calls"] == 5 and statements == []
+
+
+def test_buffers_of_several_processes_add_up(test_db):
+    first, second = UsageBuffer(), UsageBuffer()
+    first.record("alice", {"api_calls": 2})
+    first.flush(test_db)
+    assert second.counters(test_db, "alice")["api_calls"] == 2
+
+    first.record("alice", {"api_calls": 3})
+    second.record("alice", {"api_calls": 10})
+    first.flush(test_db)
+    second.flush(test_db)
+
+    assert stored(test_db, "alice").api_calls == 15
+    assert first.counters(test_db, "alice")["api_calls"] == 5  # Sees the other buffer's counts after its next flush
+    first.flush(test_db)
+    assert first.counters(test_db, "alice")["api_calls"] == 15
+    assert second.counters(test_db, "alice")["api_calls"] == 15
+
+
+def test_failed_flush_keeps_counts(test_db):
+    buffer = UsageBuffer()
+    buffer.record("alice", {"api_calls": 2})
+
+    with patch.object(UsageBuffer, "_write", side_effect=RuntimeError("database down")):
+        assert buffer.flush(test_db) == 0
+    buffer.record("alice", {"api_calls": 1})
+    assert buffer.counters(test_db, "alice")["api_calls"] == 3
+
+    assert buffer.flush(test_db) == 1
+    assert stored(test_db, "alice").api_calls == 3
+    assert buffer.counters(test_db, "alice")["api_calls"] == 3
+
+
+def test_counts_go_to_the_period_they_happened_in(test_db):
+    buffer = UsageBuffer()
+    buffer.record("alice", {"api_calls": 7}, now=datetime(2024, 1, 31, 23, 59))
+    buffer.record("alice", {"api_calls": 1})
+    buffer.flush(test_db)
+
+    records = test_db.query(DBUsageRecord).filter_by(username="alice").order_by(DBUsageRecord.period_start).all()
+    assert [(r.period_start, r.api_calls) for r in records] == [
+        (datetime(2024, 1, 1), 7), (usage_period()[0], 1)
+    ]
+    assert records[0].period_end == datetime(2024, 1, 31, 23, 59, 59)
+    assert buffer.counters(test_db, "alice")["api_calls"] == 1
+
+
+def test_quota_checks_read_buffered_counts(test_db):
+    buffer = UsageBuffer()
+    with patch.object(usage_router, "usage_buffer", buffer):
+        buffer.record("alice", {"api_calls": 99})
+        assert asyncio.run(usage_router.check_quota(test_db, "alice", "api_calls"))
+
+        asyncio.run(usage_router.increment_usage(test_db, "alice", "api_calls"))
+        assert not asyncio.run(usage_router.check_quota(test_db, "alice", "api_calls"))
+    assert test_db.query(DBUsageRecord).count() == 0  # Nothing flushed yet
+
+
+def test_quota_checks_cache_limits(test_db):
+    buffer = UsageBuffer()
+    check = lambda: asyncio.run(usage_router.check_quota(test_db, "alice", "api_calls"))
+    with patch.object(usage_router, "usage_buffer", buffer):
+        buffer.record("alice", {"api_calls": 150})
+        assert not check()  # Free plan: 100 per day
+        allowed, statements = count_statements(test_db, check)
+        assert not allowed and statements == []
+
+        test_db.add(DBRateLimitOverride(username="alice", max_api_calls_per_day=200))
+        test_db.commit()
+        assert not check()  # Cached until the entry expires
+        buffer.limits_ttl = 0
+        assert check()
+
+        buffer.limits_ttl = 3600
+        subscription = test_db.query(DBUserSubscription).filter_by(username="alice").one()
+        subscription.plan = "pro"
+        test_db.commit()
+        test_db.query(DBRateLimitOverride).delete()
+        test_db.commit()
+        buffer.forget_limits("alice")
+        buffer.record("alice", {"api_calls": 1000})
+        assert check()  # Pro plan: 10000 per day
@@ -9,11 +9,13 @@ Tests cover:
 - Edge cases (empty corpus, unicode, special characters)
 - Performance characteristics
 - Search filtering with allowed_doc_ids
+- Partitioned (per knowledge base) stores
+- Persisted, memory-mapped index snapshots
 """
 
 import pytest
 import numpy as np
-from backend.vector_store import VectorStore
+from backend.vector_store import VectorStore, PartitionedVectorStore
 
 
 # =============================================================================
@@ -578,6 +580,320 @@ def test_search_returns_sorted_results():
         assert scores[i] >= scores[i + 1], f"Scores not sorted: {scores}"
 
 
+# =============================================================================
+# INCREMENTAL INDEX TESTS
+# =============================================================================
+
+def test_incremental_add_does_not_rebuild():
+    """Test that incremental mode never refits the whole corpus on insert."""
+    vs = VectorStore(incremental=True)
+
+    rebuild_count = [0]
+    original_rebuild = vs._rebuild_vectors
+
+    def counting_rebuild():
+        rebuild_count[0] += 1
+        original_rebuild()
+
+    vs._rebuild_vectors = counting_rebuild
+
+    for i in range(5):
+        vs.add_document(f"Doc {i}")
+    vs.remove_document(2)
+
+    assert rebuild_count[0] == 0
+    assert vs.doc_ids == [0, 1, 3, 4]
+
+
+def test_incremental_search_matches_full_refit():
+    """Test that incremental scores match a full refit once IDF is refreshed."""
+    texts = [
+        "Python programming tutorial for beginners",
+        "JavaScript web development guide",
+        "Python data science and machine learning",
+        "Rust systems programming",
+    ]
+    full = VectorStore()
+    full.add_documents_batch(texts)
+
+    inc = VectorStore(incremental=True)
+    for text in texts:
+        inc.add_document(text)
+    inc.refresh_idf()
+
+    expected = full.search("Python programming", top_k=4)
+    actual = inc.search("Python programming", top_k=4)
+
+    assert [r[0] for r in actual] == [r[0] for r in expected]
+    for (_, a, _), (_, e, _) in zip(actual, expected):
+        assert a == pytest.approx(e)
+
+
+def test_incremental_vocabulary_is_stable():
+    """Test that existing terms keep their column as new terms arrive."""
+    vs = VectorStore(incremental=True)
+
+    vs.add_document("python programming")
+    python_col = vs._vocab["python"]
+    vs.add_document("kubernetes operators in go")
+
+    assert vs._vocab["python"] == python_col
+    assert "kubernetes" in vs._vocab
+    assert vs.search("kubernetes", top_k=1)[0][0] == 1
+
+
+def test_incremental_remove_tombstones_then_compacts():
+    """Test that removals are tombstoned and compacted past the threshold."""
+    vs = VectorStore(incremental=True, compaction_ratio=0.5)
+
+    for i in range(4):
+        vs.add_document(f"Python document {i}")
+
+    vs.remove_document(0)
+    assert vs._n_dead == 1
+    assert 0 not in [r[0] for r in vs.search("Python", top_k=10)]
+
+    vs.remove_document(1)
+    vs.remove_document(2)
+    assert vs._n_dead == 0
+    assert vs._row_doc_ids == [3]
+    assert [r[0] for r in vs.search("Python", top_k=10)] == [3]
+
+
+def test_incremental_readd_replaces_row():
+    """Test that re-adding a doc_id replaces its previous content."""
+    vs = VectorStore(incremental=True)
+
+    vs.add_document("Python programming", doc_id=7)
+    vs.add_document("Rust programming", doc_id=7)
+
+    results = vs.search("Rust", top_k=10)
+    assert len(results) == 1
+    assert results[0][0] == 7
+    assert results[0][2] == "Rust programming"
+
+
+def test_incremental_search_by_doc_id():
+    """Test similar-document lookup in incremental mode."""
+    vs = VectorStore(incremental=True)
+
+    id1 = vs.add_document("Python web development with FastAPI")
+    id2 = vs.add_document("Python web development with Django")
+    id3 = vs.add_document("Baking sourdough bread")
+
+    results = vs.search_by_doc_id(id1, top_k=2)
+
+    assert results[0][0] == id2
+    assert id1 not in [r[0] for r in results]
+    assert len(results) == 2
+    assert id3 in [r[0] for r in results]
+
+
+def test_clear_resets_incremental_index():
+    """Test that clear() drops documents and index state but keeps _next_id."""
+    vs = VectorStore(incremental=True)
+
+    vs.add_document("Python programming")
+    vs.add_document("JavaScript development")
+    vs.clear()
+
+    assert vs.docs == {}
+    assert vs.doc_ids == []
+    assert vs.search("Python", top_k=10) == []
+    assert vs.add_document("Go programming") == 2
+
+
+def test_load_documents_rebuilds_once():
+    """Test that bulk loading refits the full-refit store exactly once."""
+    vs = VectorStore()
+
+    rebuild_count = [0]
+    original_rebuild = vs._rebuild_vectors
+
+    def counting_rebuild():
+        rebuild_count[0] += 1
+        original_rebuild()
+
+    vs._rebuild_vectors = counting_rebuild
+
+    loaded = vs.load_documents([(5, "Python programming"), (2, "Rust programming")])
+
+    assert loaded == 2
+    assert rebuild_count[0] == 1
+    assert vs.doc_ids == [2, 5]
+    assert vs._next_id == 6
+    assert vs.search("Rust", top_k=1)[0][0] == 2
+
+
+def test_load_documents_incremental_matches_full_refit():
+    """Test that a bulk-built incremental index scores like a full refit."""
+    pairs = [
+        (0, "Python programming tutorial"),
+        (3, "JavaScript web development"),
+        (7, "Python data science"),
+    ]
+    full = VectorStore()
+    full.load_documents(pairs)
+
+    inc = VectorStore(incremental=True)
+    inc.load_documents(pairs)
+
+    expected = full.search("Python", top_k=3)
+    actual = inc.search("Python", top_k=3)
+    assert [r[0] for r in actual] == [r[0] for r in expected]
+    for (_, a, _), (_, e, _) in zip(actual, expected):
+        assert a == pytest.approx(e)
+
+    # Further inserts append against the bulk-built vocabulary
+    new_id = inc.add_document("Python web scraping")
+    assert new_id == 8
+    assert new_id in [r[0] for r in inc.search("scraping", top_k=3)]
+
+
+# =============================================================================
+# TOP-K SELECTION AND PARTITIONED STORE TESTS
+# =============================================================================
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_top_k_matches_full_sort(incremental):
+    """Test argpartition top-k returns the same ranking as sorting every score."""
+    vs = VectorStore(incremental=incremental)
+    texts = [f"python topic{i % 7} " + "filler " * (i % 5) for i in range(60)]
+    vs.add_documents_batch(texts)
+
+    full = vs.search("python topic3 filler", top_k=60)
+    top = vs.search("python topic3 filler", top_k=5)
+
+    assert top == full[:5]
+
+
+def test_search_accepts_set_filter():
+    """Test allowed_doc_ids may be any collection (sets are the fast path)."""
+    vs = VectorStore()
+    ids = vs.add_documents_batch(["Python basics", "Python advanced", "Java basics"])
+
+    as_list = vs.search("Python", top_k=5, allowed_doc_ids=[ids[1], ids[2]])
+    as_set = vs.search("Python", top_k=5, allowed_doc_ids={ids[1], ids[2]})
+
+    assert as_list == as_set
+    assert {r[0] for r in as_set} <= {ids[1], ids[2]}
+    assert vs.search("Python", top_k=5, allowed_doc_ids=set()) == []
+
+
+def test_partitioned_store_scopes_search_to_knowledge_base():
+    """Test a KB-scoped search only sees that KB's partition."""
+    vs = PartitionedVectorStore(incremental=True)
+    a = vs.add_document("Python web framework", knowledge_base_id="kb-a")
+    b = vs.add_document("Python data analysis", knowledge_base_id="kb-b")
+
+    assert a != b
+    assert set(vs.docs) == {a, b}
+    assert [r[0] for r in vs.search("Python", knowledge_base_id="kb-a")] == [a]
+    assert [r[0] for r in vs.search("Python", knowledge_base_id="kb-b")] == [b]
+    assert vs.search("Python", knowledge_base_id="kb-missing") == []
+    assert {r[0] for r in vs.search("Python")} == {a, b}
+    # Without a KB, only partitions holding allowed documents are searched
+    assert [r[0] for r in vs.search("Python", allowed_doc_ids={b})] == [b]
+
+
+def test_partitioned_store_has_independent_vocabularies():
+    """Test each partition builds its own vocabulary."""
+    vs = PartitionedVectorStore(incremental=True)
+    vs.load_documents([
+        (0, "rust ownership", "kb-a"),
+        (1, "rust lifetimes", "kb-a"),
+        (2, "go channels", "kb-b"),
+    ])
+
+    assert "channels" not in vs.partition("kb-a")._vocab
+    assert "ownership" not in vs.partition("kb-b")._vocab
+    assert vs.add_document("go generics", knowledge_base_id="kb-b") == 3
+    assert vs.search_by_doc_id(3)[0][0] == 2
+
+
+def test_partitioned_store_moves_and_removes_documents():
+    """Test re-adding under another KB moves the document; removal drops it."""
+    vs = PartitionedVectorStore()
+    doc_id = vs.add_document("Python testing", knowledge_base_id="kb-a")
+    vs.add_document("Python testing", doc_id=doc_id, knowledge_base_id="kb-b")
+
+    assert vs.knowledge_base_of(doc_id) == "kb-b"
+    assert vs.search("Python", knowledge_base_id="kb-a") == []
+
+    vs.remove_document(doc_id)
+    assert vs.docs == {}
+    assert vs.search("Python", knowledge_base_id="kb-b") == []
+
+
+# =============================================================================
+# SNAPSHOT TESTS
+# =============================================================================
+
+SNAPSHOT_DOCS = [(i, f"document {i} about python topic{i % 4}") for i in range(20)]
+
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path):
+    """Test a reopened snapshot searches identically from read-only mapped arrays."""
+    original = VectorStore(incremental=True)
+    original.load_documents(SNAPSHOT_DOCS, snapshot_dir=str(tmp_path), snapshot_version=20)
+    assert (tmp_path / "CURRENT").read_text() == "v000000000020"
+
+    reopened = VectorStore(incremental=True)
+    reopened._append_row = lambda *a: pytest.fail("unchanged documents must not be re-indexed")
+    reopened.load_documents(SNAPSHOT_DOCS, snapshot_dir=str(tmp_path), snapshot_version=20)
+
+    assert not reopened.doc_matrix.data.flags.writeable
+    assert reopened.search("python topic2", top_k=5) == original.search("python topic2", top_k=5)
+    assert reopened.search_by_doc_id(3) == original.search_by_doc_id(3)
+
+
+def test_snapshot_catches_up_changed_documents(tmp_path):
+    """Test new, edited and deleted documents are applied on top of a stale snapshot."""
+    VectorStore(incremental=True).load_documents(SNAPSHOT_DOCS, snapshot_dir=str(tmp_path), snapshot_version=20)
+
+    current = [d for d in SNAPSHOT_DOCS if d[0] != 5]
+    current[2] = (2, "rust ownership rules")
+    current.append((30, "rust borrow checker"))
+
+    vs = VectorStore(incremental=True)
+    vs.load_documents(current, snapshot_dir=str(tmp_path), snapshot_version=31)
+    fresh = VectorStore(incremental=True)
+    fresh.load_documents(current)
+
+    assert 5 not in {r[0] for r in vs.search("document", top_k=50)}
+    assert [r[0] for r in vs.search("rust", top_k=2)] == [r[0] for r in fresh.search("rust", top_k=2)]
+    assert vs.add_document("new doc") == 31
+    # The stale snapshot was replaced by one tagged with the new version
+    assert (tmp_path / "CURRENT").read_text() == "v000000000031"
+
+
+def test_snapshot_pruning_keeps_recent_versions(tmp_path):
+    """Test only the newest snapshot versions are kept on disk."""
+    vs = VectorStore(incremental=True)
+    vs.load_documents(SNAPSHOT_DOCS)
+    for version in (1, 2, 3):
+        vs.save_snapshot(str(tmp_path), version)
+
+    assert sorted(p.name for p in tmp_path.glob("v*")) == ["v000000000002", "v000000000003"]
+
+
+def test_unusable_snapshot_falls_back_to_full_build(tmp_path):
+    """Test an unreadable snapshot is ignored and the index is built from text."""
+    (tmp_path / "CURRENT").write_text("v000000000007")
+
+    vs = VectorStore(incremental=True)
+    assert vs.load_documents(SNAPSHOT_DOCS, snapshot_dir=str(tmp_path), snapshot_version=20) == 20
+    assert len(vs.search("python", top_k=50)) == 20
+
+
+def test_snapshot_requires_incremental_mode(tmp_path):
+    """Test full-refit stores refuse to snapshot."""
+    vs = VectorStore()
+    vs.add_document("Python")
+    with pytest.raises(ValueError):
+        vs.save_snapshot(str(tmp_path), 1)
+
+
 # =============================================================================
 # PERFORMANCE TESTS
 # =============================================================================
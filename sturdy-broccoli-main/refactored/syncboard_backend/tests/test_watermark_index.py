@@ -0,0 +1,83 @@
+"""
+Tests for the shared watermark index plumbing.
+
+Covers:
+- EngineRegistry keeps one object per (engine, key) and peek() never creates
+- WatermarkIndex reads only new rows, and diffs ids only when counts disagree
+"""
+
+from typing import Dict
+
+from sqlalchemy import func
+
+from backend.db_models import DBVectorDocument
+from backend.watermark_index import EngineRegistry, WatermarkIndex
+
+
+class ContentIndex(WatermarkIndex):
+    """doc_id -> content of every vector row, recording how rows were read."""
+
+    def __init__(self):
+        super().__init__(sync_interval=3600)
+        self.docs: Dict[int, str] = {}
+        self.calls = []
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _watermark(self, db):
+        row_count, max_row_id = db.query(func.count(DBVectorDocument.id), func.max(DBVectorDocument.id)).one()
+        return row_count, max_row_id or 0
+
+    def _load_rows(self, db):
+        self.calls.append("load")
+        self.docs = dict(db.query(DBVectorDocument.doc_id, DBVectorDocument.content))
+
+    def _add_rows_after(self, db, row_id):
+        self.calls.append("after")
+        self.docs.update(db.query(DBVectorDocument.doc_id, DBVectorDocument.content).filter(
+            DBVectorDocument.id > row_id
+        ))
+
+    def _reconcile(self, db):
+        self.calls.append("reconcile")
+        self.docs = dict(db.query(DBVectorDocument.doc_id, DBVectorDocument.content))
+
+
+def add_row(session, doc_id):
+    session.add(DBVectorDocument(doc_id=doc_id, content=f"doc {doc_id}"))
+    session.commit()
+
+
+def test_registry_is_per_engine_and_key(db_session):
+    registry = EngineRegistry()
+    assert registry.peek(db_session, "kb") is None
+
+    first = registry.get(db_session, ContentIndex, "kb")
+    assert registry.get(db_session, ContentIndex, "kb") is first
+    assert registry.peek(db_session, "kb") is first
+    assert registry.get(db_session, ContentIndex, "other") is not first
+    assert registry.peek(db_session) is None
+
+
+def test_sync_reads_new_rows_and_reconciles_deletes(db_session):
+    add_row(db_session, 1)
+    index = ContentIndex()
+    index.sync(db_session)
+    assert index.docs == {1: "doc 1"} and index.calls == ["load"]
+
+    add_row(db_session, 2)
+    index.sync(db_session)
+    assert 2 not in index.docs  # Within the sync interval
+    index.sync(db_session, force=True)
+    assert index.docs == {1: "doc 1", 2: "doc 2"} and index.calls == ["load", "after"]
+
+    index.sync(db_session, force=True)
+    assert index.calls == ["load", "after"]  # Watermark unchanged
+
+    db_session.query(DBVectorDocument).filter_by(doc_id=1).delete()
+    db_session.commit()
+    version = index.version
+    index.sync(db_session, force=True)
+    assert index.docs == {2: "doc 2"} and index.calls[-2:] == ["after", "reconcile"]
+    assert index.version == version + 1
@@ -0,0 +1,72 @@
+"""
+Tests for the Celery worker's persistent event loop and shared OpenAI clients.
+
+Covers:
+- run_async() reuses one loop (and its clients) while the worker loop runs
+- Shared clients are per event loop and closed on shutdown
+- Without a worker loop, run_async() falls back to a fresh loop per call
+- The worker loop starts even if the initial cache resync fails
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from backend.openai_clients import get_async_openai
+from backend import tasks
+from backend.tasks import initialize_worker_state, run_async
+from backend.worker_loop import WorkerEventLoop, worker_loop
+
+
+async def current_loop_and_client():
+    return asyncio.get_running_loop(), get_async_openai("sk-test")
+
+
+@pytest.fixture
+def running_worker_loop():
+    worker_loop.start()
+    yield worker_loop
+    worker_loop.stop(timeout=5)
+
+
+def test_run_async_reuses_worker_loop_and_client(running_worker_loop):
+    first_loop, first_client = run_async(current_loop_and_client())
+    second_loop, second_client = run_async(current_loop_and_client())
+
+    assert first_loop is second_loop
+    assert first_client is second_client
+    assert get_async_openai("sk-test", max_retries=0) is not get_async_openai("sk-test")
+
+
+def test_stop_closes_shared_clients():
+    loop = WorkerEventLoop()
+    loop.start()
+    _, client = loop.run(current_loop_and_client())
+
+    loop.stop(timeout=5)
+
+    assert not loop.is_running
+    assert client.is_closed()
+    with pytest.raises(RuntimeError):
+        loop.run(current_loop_and_client())
+
+
+def test_run_async_without_worker_loop_uses_fresh_loops():
+    assert not worker_loop.is_running
+
+    first_loop, first_client = run_async(current_loop_and_client())
+    second_loop, second_client = run_async(current_loop_and_client())
+
+    assert first_loop is not second_loop
+    assert first_client is not second_client
+
+
+def test_worker_loop_starts_when_resync_fails():
+    with patch.object(tasks.worker_cache_sync, "full_resync", side_effect=RuntimeError("database down")):
+        try:
+            with pytest.raises(RuntimeError):
+                initialize_worker_state()
+            assert worker_loop.is_running
+        finally:
+            worker_loop.stop(timeout=5)
@@ -0,0 +1,172 @@
+"""
+Tests for the staged multi-document ZIP ingestion pipeline.
+
+Covers:
+- Documents are extracted in batches, saved and chunked with bounded concurrency
+- Results keep file order; empty files are skipped and failures reported
+- Documents that cannot be saved leave no trace in the in-memory caches
+- Documents the database saves under another doc_id are re-keyed in the caches
+- Progress keeps flowing through the progress callback
+"""
+
+import asyncio
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import tasks
+from backend.db_models import Base, DBUser, DBKnowledgeBase, DBDocument
+from backend.dependencies import get_kb_documents, get_kb_metadata, get_kb_clusters
+
+KB_ID = "kb-zip"
+
+
+def extraction(topic):
+    return {
+        "concepts": [{"name": topic, "category": "concept", "confidence": 0.9}],
+        "skill_level": "beginner",
+        "primary_topic": topic,
+        "suggested_cluster": topic.title(),
+        "confidence_score": 0.8
+    }
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(DBUser(username="testuser", hashed_password="hash"))
+        session.add(DBKnowledgeBase(id=KB_ID, name="ZIP", owner_username="testuser"))
+        session.commit()
+    yield factory
+    for store in (get_kb_documents(KB_ID), get_kb_metadata(KB_ID), get_kb_clusters(KB_ID)):
+        store.clear()
+    engine.dispose()
+
+
+def run_pipeline(session_factory, documents, failing_topic=None, unsaveable_topic=None):
+    @contextmanager
+    def db_context():
+        db = session_factory()
+        try:
+            yield db
+            db.commit()
+        finally:
+            db.close()
+
+    async def extract_batch(items, username, knowledge_base_id=None):
+        # Leave the second document of each wave to the single-document path
+        return [None if i == 1 else extraction(content.split()[0]) for i, (content, _) in enumerate(items)]
+
+    async def extract_one(content, source_type, username, knowledge_base_id=None):
+        return extraction(content.split()[0])
+
+    enriching = {"now": 0, "max": 0}
+
+    async def chunk_and_summarize(doc_id, content, kb_id, doc_filename):
+        if content.startswith(str(failing_topic)):
+            raise RuntimeError("chunking exploded")
+        enriching["now"] += 1
+        enriching["max"] = max(enriching["max"], enriching["now"])
+        await asyncio.sleep(0.01)
+        enriching["now"] -= 1
+        return {"chunks": 2}, {"status": "success"}
+
+    save = tasks.save_documents_blocking
+
+    def save_documents(items):
+        if any(content.startswith(str(unsaveable_topic)) for content, _ in items):
+            raise RuntimeError("insert rejected")
+        return save(items)
+
+    states = []
+    with patch.object(tasks, "get_db_context", db_context), \
+            patch.object(tasks, "save_documents_blocking", side_effect=save_documents), \
+            patch.object(tasks.concept_extractor, "extract_batch_with_learning", side_effect=extract_batch), \
+            patch.object(tasks.concept_extractor, "extract_with_learning", side_effect=extract_one), \
+            patch.object(tasks.feedback_service, "record_ai_decision", new_callable=AsyncMock), \
+            patch.object(tasks, "broadcast_cluster_created", new_callable=AsyncMock), \
+            patch.object(tasks, "chunk_and_summarize_document", side_effect=chunk_and_summarize), \
+            patch.object(tasks, "ZIP_PIPELINE_EXTRACTION_WAVE", 3), \
+            patch.object(tasks, "ZIP_PIPELINE_INSERT_BATCH", 2), \
+            patch.object(tasks, "ZIP_PIPELINE_MAX_CONCURRENT_DOCUMENTS", 2):
+        processed, failed = asyncio.run(
+            tasks.run_zip_pipeline(lambda meta: states.append(meta), "testuser", "notes.zip", documents, KB_ID)
+        )
+    return processed, failed, states, enriching["max"]
+
+
+def test_documents_flow_through_all_stages_in_order(session_factory):
+    topics = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf"]
+    documents = [{"filename": f"{t}.md", "content": f"{t} notes about things"} for t in topics]
+    documents.insert(3, {"filename": "empty.md", "content": "   "})
+
+    processed, failed, states, max_enriching = run_pipeline(session_factory, documents)
+
+    assert failed == []
+    assert [d["filename"] for d in processed] == [f"{t}.md" for t in topics]
+    assert all(d["chunks"] == 2 and d["original_zip"] == "notes.zip" for d in processed)
+    assert max_enriching == 2
+
+    with session_factory() as db:
+        saved = {d.doc_id: d for d in db.query(DBDocument).all()}
+    assert sorted(saved) == sorted(d["doc_id"] for d in processed)
+    assert all(saved[d["doc_id"]].cluster_id == d["cluster_id"] for d in processed)
+
+    assert {s["stage"] for s in states} == {"extracting_concepts", "processing_zip_files"}
+    assert states[-1]["current_file"] == states[-1]["total_files"] == len(documents)
+    assert states[-1]["percent"] == 95
+
+
+def test_failed_documents_are_reported_without_stopping_the_rest(session_factory):
+    documents = [{"filename": f"{t}.md", "content": f"{t} notes"} for t in ["alpha", "bravo", "charlie"]]
+
+    processed, failed, states, _ = run_pipeline(session_factory, documents, failing_topic="bravo")
+
+    assert [d["filename"] for d in processed] == ["alpha.md", "charlie.md"]
+    assert failed == [{"filename": "bravo.md", "error": "chunking exploded", "index": 1}]
+    assert states[-1]["current_file"] == 3
+
+
+def test_unsaved_documents_are_dropped_from_the_caches(session_factory):
+    documents = [{"filename": f"{t}.md", "content": f"{t} notes"} for t in ["alpha", "kilo", "charlie"]]
+
+    processed, failed, _, _ = run_pipeline(session_factory, documents, unsaveable_topic="kilo")
+
+    assert [d["filename"] for d in processed] == ["alpha.md", "charlie.md"]
+    assert failed == [{"filename": "kilo.md", "error": "insert rejected", "index": 1}]
+    metadata = get_kb_metadata(KB_ID)
+    assert sorted(meta.filename for meta in metadata.values()) == ["alpha.md", "charlie.md"]
+    assert "kilo notes" not in get_kb_documents(KB_ID).values()
+    assert "kilo notes" not in tasks.vector_store.docs.values()
+    clusters = get_kb_clusters(KB_ID)
+    assert {doc_id for c in clusters.values() for doc_id in c.doc_ids} == set(metadata)
+    assert "Kilo" not in {c.name for c in clusters.values()}
+
+
+def test_documents_saved_under_another_doc_id_are_rekeyed(session_factory):
+    documents = [{"filename": f"{t}.md", "content": f"{t} notes"} for t in ["alpha", "bravo", "charlie"]]
+
+    # The worker's id counter runs ahead of the ids the database hands out
+    with patch.object(tasks.vector_store, "_next_id", tasks.vector_store._next_id + 1000):
+        processed, failed, _, _ = run_pipeline(session_factory, documents)
+
+    assert failed == []
+    with session_factory() as db:
+        saved = {d.doc_id for d in db.query(DBDocument).all()}
+    metadata = get_kb_metadata(KB_ID)
+    assert set(metadata) == saved == {d["doc_id"] for d in processed}
+    assert all(meta.doc_id == doc_id for doc_id, meta in metadata.items())
+    documents_by_id = get_kb_documents(KB_ID)
+    assert {documents_by_id[d["doc_id"]] for d in processed} == {doc["content"] for doc in documents}
+    assert all(tasks.vector_store.docs[doc_id] == documents_by_id[doc_id] for doc_id in saved)
+    clusters = get_kb_clusters(KB_ID)
+    assert {doc_id for c in clusters.values() for doc_id in c.doc_ids} == saved